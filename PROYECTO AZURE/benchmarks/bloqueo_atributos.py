@@ -0,0 +1,210 @@
+# bloqueo_atributos.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark del bloqueo por atributos (marca / medida / pack, ver atributos.py).
+
+  - clustering: `familias_jerarquicas` sin bloqueo, con `BLOQUEO_POR_NIVEL`
+    y con marca + medida + pack, sobre varias variantes ensuciadas de cada
+    producto: comparaciones por nivel, tiempo, y uniones de N1 correctas
+    (misma base real que su maestra) e incorrectas
+  - matching:   `buscar_lote` con y sin `por_atributos` sobre variantes
+    ensuciadas de la tabla con su base conocida: aciertos, matches a una
+    base de otra medida/pack y comparaciones
+  - extracción: `extraer_atributos` sobre casos conocidos (medida pegada al
+    pack, unidades con y sin espacio); si alguno falla el script sale con 1
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bloqueo_atributos.py
+    python benchmarks/bloqueo_atributos.py --descripciones 20000 --variantes 50000 --consultas 5000 --json bloqueo.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from normalizacion.atributos import BLOQUEO_POR_NIVEL, extraer_atributos
+from normalizacion.indice_normalizacion import METODO_FUZZY, NormalizationIndex
+from normalizacion.motor_clustering import familias_jerarquicas
+from normalizacion_lote import generar_consultas_etiquetadas, generar_tabla
+
+UMBRALES = [85, 75, 65, 55]
+
+
+# Descripción -> (medida, pack) esperados
+CASOS_EXTRACCION = {
+    "SPRITE 2.25LX6": ("2250ml", 6),
+    "SPRITE 2.25L X6": ("2250ml", 6),
+    "FANTA 600CCX6": ("600ml", 6),
+    "GALLETITAS 500GX12": ("500g", 12),
+    "AGUA 1,5 LTX 6": ("1500ml", 6),
+    "COCA COLA 2250CC X8": ("2250ml", 8),
+    "LECHE 1L": ("1000ml", None),
+    "HARINA 1KG 10U": ("1000g", 10),
+    "CERVEZA 4X6 473CC": ("473ml", 24),
+    "AZUCAR 1 KG": ("1000g", None),
+}
+
+
+def verificar_extraccion() -> List[str]:
+    """Casos de `CASOS_EXTRACCION` que no dan la medida y el pack esperados."""
+    fallidos = []
+    for descripcion, esperado in CASOS_EXTRACCION.items():
+        obtenido = _producto(descripcion)
+        if obtenido != esperado:
+            fallidos.append(f"{descripcion}: {obtenido} (esperado {esperado})")
+    return fallidos
+
+
+def _producto(base: str):
+    atributos = extraer_atributos(base)
+    return atributos.medida, atributos.pack
+
+
+# Configuraciones de clustering comparadas
+BLOQUEOS = {
+    "sin_bloqueo": None,
+    "con_bloqueo": BLOQUEO_POR_NIVEL,
+    "con_marca": [('marca', 'medida', 'pack'), ('marca', 'medida'), ('marca',), ()],
+}
+
+
+def medir_clustering(n: int) -> Dict:
+    # ~4-5 variantes ensuciadas distintas por producto, con su base real
+    variantes, bases = generar_tabla(max(1, n // 4), semilla=3)
+    etiquetadas: Dict[str, str] = {}
+    semilla = 5
+    while len(etiquetadas) < n:
+        consultas, correctas = generar_consultas_etiquetadas(variantes, bases, n, semilla=semilla)
+        for consulta, correcta in zip(consultas, correctas):
+            if len(etiquetadas) < n:
+                etiquetadas.setdefault(consulta, correcta)
+        semilla += 1
+    descripciones = list(etiquetadas)
+    reales = [etiquetadas[d] for d in descripciones]
+
+    filas = {}
+    for nombre, bloqueo in BLOQUEOS.items():
+        estadisticas: List[Dict[str, int]] = []
+        inicio = time.perf_counter()
+        niveles = familias_jerarquicas(descripciones, UMBRALES, atributos_por_nivel=bloqueo, estadisticas=estadisticas)
+        segundos = time.perf_counter() - inicio
+        unidas = [(i, m) for i, m in enumerate(niveles[0]) if i != m]
+        filas[nombre] = {
+            "segundos": segundos,
+            "comparaciones": [e["comparaciones"] for e in estadisticas],
+            "familias": [int(len(np.unique(m))) for m in niveles],
+            "uniones_correctas_n1": sum(reales[i] == reales[m] for i, m in unidas),
+            "uniones_incorrectas_n1": sum(reales[i] != reales[m] for i, m in unidas),
+        }
+    return {"descripciones": n, "productos": len(set(reales)), **filas}
+
+
+def medir_matching(n_variantes: int, n_consultas: int, umbral: float) -> Dict:
+    variantes, bases = generar_tabla(n_variantes)
+    indice = NormalizationIndex(variantes, bases)
+    consultas, correctas = generar_consultas_etiquetadas(variantes, bases, n_consultas)
+    correctas = np.array(correctas, dtype=object)
+    producto_correcto = [_producto(b) for b in correctas]
+
+    inicio = time.perf_counter()
+    indice.atributos()
+    atributos_s = time.perf_counter() - inicio
+
+    codigos = indice.atributos()
+    comparaciones_bloqueo = sum(int(codigos.compatibles(codigos.clave(c)).sum()) for c in consultas)
+
+    filas = {}
+    for nombre, por_atributos in (("sin_bloqueo", False), ("con_bloqueo", True)):
+        inicio = time.perf_counter()
+        norm, _, met, _ = indice.buscar_lote(consultas, umbral, por_atributos=por_atributos)
+        segundos = time.perf_counter() - inicio
+        fuzzy = met == METODO_FUZZY
+        otra_medida = [
+            bool(f) and _producto(n) != p for n, f, p in zip(norm, fuzzy, producto_correcto)
+        ]
+        filas[nombre] = {
+            "segundos": segundos,
+            "comparaciones": comparaciones_bloqueo if por_atributos else len(consultas) * len(indice),
+            "fuzzy": int(fuzzy.sum()),
+            "aciertos": int((norm == correctas).sum()),
+            "precision_fuzzy": float((norm[fuzzy] == correctas[fuzzy]).mean()) if fuzzy.any() else 1.0,
+            "otra_medida_o_pack": int(sum(otra_medida)),
+        }
+    return {
+        "variantes": n_variantes,
+        "consultas": n_consultas,
+        "umbral": umbral,
+        "atributos_s": atributos_s,
+        **filas,
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    c, m = reporte["clustering"], reporte["matching"]
+    print("=" * 78)
+    print(f"BLOQUEO POR ATRIBUTOS ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"Clustering: {c['descripciones']:,} descripciones de {c['productos']:,} productos, umbrales {UMBRALES}")
+    print(f"{'':>12} {'tiempo':>7} {'comparaciones N1..N4':>26} {'familias N1..N4':>22} {'N1 ok':>7} {'N1 mal':>7}")
+    for nombre in BLOQUEOS:
+        f = c[nombre]
+        comparaciones = "/".join(f"{x / 1e6:.1f}M" for x in f["comparaciones"])
+        familias = "/".join(str(x) for x in f["familias"])
+        print(f"{nombre:>12} {f['segundos']:>6.1f}s {comparaciones:>26} {familias:>22} "
+              f"{f['uniones_correctas_n1']:>7,} {f['uniones_incorrectas_n1']:>7,}")
+    print("-" * 78)
+    print(f"Matching: {m['consultas']:,} consultas contra {m['variantes']:,} variantes, umbral {m['umbral']} "
+          f"(atributos de la tabla en {m['atributos_s']:.2f}s)")
+    print(f"{'':>12} {'tiempo':>8} {'comparaciones':>14} {'fuzzy':>7} {'aciertos':>9} {'precisión':>10} {'otra medida':>12}")
+    for nombre in ("sin_bloqueo", "con_bloqueo"):
+        f = m[nombre]
+        print(f"{nombre:>12} {f['segundos']:>7.2f}s {f['comparaciones'] / 1e6:>13.1f}M {f['fuzzy']:>7,} "
+              f"{f['aciertos']:>9,} {f['precision_fuzzy'] * 100:>9.2f}% {f['otra_medida_o_pack']:>12,}")
+    print("-" * 78)
+    print("N1 ok / mal = descripciones unidas a una maestra de la misma / otra base real; "
+          "otra medida = match a una base de otra medida o pack")
+    print("-" * 78)
+    fallidos = reporte["extraccion_fallida"]
+    print(f"Extracción de atributos: {len(CASOS_EXTRACCION) - len(fallidos)}/{len(CASOS_EXTRACCION)} casos ok")
+    for fallido in fallidos:
+        print(f"  ✗ {fallido}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del bloqueo por atributos")
+    parser.add_argument("--descripciones", type=int, default=20000)
+    parser.add_argument("--variantes", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=5000)
+    parser.add_argument("--umbral", type=float, default=75)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "clustering": medir_clustering(args.descripciones),
+        "matching": medir_matching(args.variantes, args.consultas, args.umbral),
+        "extraccion_fallida": verificar_extraccion(),
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if reporte["extraccion_fallida"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
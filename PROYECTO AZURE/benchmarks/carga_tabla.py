@@ -0,0 +1,122 @@
+# carga_tabla.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark del arranque de la normalización: tiempo hasta tener tabla + índice.
+
+Compara, para una tabla sintética de variantes (default 50.000):
+  - excel:      pd.read_excel + construir NormalizationIndex (comportamiento anterior)
+  - almacen:    leer el almacén SQLite + construir el índice
+  - artefacto:  cargar el pickle compilado (tabla + índice ya construido)
+
+También verifica que el índice cargado del artefacto sea el mismo que el construido.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/carga_tabla.py
+    python benchmarks/carga_tabla.py --variantes 10000 50000 --json carga.json
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pandas as pd
+
+from normalizacion.almacen_variantes import AlmacenVariantes
+from normalizacion.indice_normalizacion import NormalizationIndex
+from normalizacion.tabla_compilada import cargar_tabla_compilada, guardar_tabla_compilada
+from normalizacion_lote import generar_tabla
+
+
+def _cronometrar(funcion, repeticiones: int):
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def medir(tamanios: List[int], repeticiones: int) -> Dict:
+    filas = []
+    for n in tamanios:
+        variantes, bases = generar_tabla(n)
+        with tempfile.TemporaryDirectory() as directorio:
+            directorio = Path(directorio)
+            ruta_excel = directorio / "tabla_normalizacion.xlsx"
+            pd.DataFrame({'Nombre Gestion': variantes, 'Base': bases}).to_excel(ruta_excel, index=False)
+
+            excel_s, _ = _cronometrar(
+                lambda: NormalizationIndex.desde_dataframe(pd.read_excel(ruta_excel)), 1
+            )
+
+            with AlmacenVariantes(directorio / "variantes.sqlite") as almacen:
+                almacen.sincronizar_excel(ruta_excel)
+                firma = almacen.firma()
+
+                def desde_almacen():
+                    tabla = almacen.cargar_tabla()
+                    return tabla, NormalizationIndex.desde_dataframe(tabla)
+
+                almacen_s, (tabla, indice) = _cronometrar(desde_almacen, repeticiones)
+
+            ruta_artefacto = directorio / "tabla_normalizacion.pkl"
+            guardado_s = guardar_tabla_compilada(ruta_artefacto, firma, tabla, indice)
+            artefacto_s, cargado = _cronometrar(
+                lambda: cargar_tabla_compilada(ruta_artefacto, firma), repeticiones
+            )
+            _, indice_cargado, _ = cargado
+
+            iguales = (
+                indice_cargado.version == indice.version
+                and indice_cargado.opciones == indice.opciones
+                and indice_cargado.mapa_exacto == indice.mapa_exacto
+            )
+            filas.append({
+                "variantes": n,
+                "excel_s": excel_s,
+                "almacen_s": almacen_s,
+                "artefacto_s": artefacto_s,
+                "guardar_artefacto_s": guardado_s,
+                "artefacto_mb": ruta_artefacto.stat().st_size / 1e6,
+                "indice_igual": iguales,
+            })
+
+    return {"repeticiones": repeticiones, "resultados": filas}
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print("CARGA DE LA TABLA DE NORMALIZACIÓN (tabla + índice listos para buscar)")
+    print("=" * 78)
+    print(f"{'variantes':>10} {'excel':>9} {'almacen':>9} {'artefacto':>10} {'guardar':>9} {'MB':>7} {'igual':>6}")
+    for f in reporte["resultados"]:
+        print(f"{f['variantes']:>10,} {f['excel_s']:>8.2f}s {f['almacen_s']:>8.2f}s {f['artefacto_s']:>9.3f}s "
+              f"{f['guardar_artefacto_s']:>8.2f}s {f['artefacto_mb']:>7.1f} {str(f['indice_igual']):>6}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la tabla de normalización")
+    parser.add_argument("--variantes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = medir(args.variantes, args.repeticiones)
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+
+if __name__ == "__main__":
+    main()
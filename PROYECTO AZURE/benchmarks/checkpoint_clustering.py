@@ -0,0 +1,147 @@
+# checkpoint_clustering.py
+# -*- coding: utf-8 -*-
+"""
+Verificación de los checkpoints por nivel del clustering (checkpoint_clustering.py).
+
+  - corte: `familias_jerarquicas` con checkpoint corre en un proceso aparte
+    que se termina (os._exit) apenas empieza el nivel --cortar-en
+  - retoma: la corrida siguiente con las mismas entradas lee los niveles
+    guardados, calcula solo los que faltan y tiene que dar las mismas
+    familias que una corrida completa sin checkpoint
+  - invalidación: con otros umbrales el checkpoint no se usa
+  - eventos: cada nivel calculado emite nivel_inicio, progreso (con ETA) y
+    nivel_fin; los retomados, nivel_reanudado
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/checkpoint_clustering.py
+    python benchmarks/checkpoint_clustering.py --descripciones 30000 --cortar-en 4 --json checkpoint.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from normalizacion.atributos import BLOQUEO_POR_NIVEL
+from normalizacion.motor_clustering import familias_jerarquicas
+from normalizacion_lote import generar_tabla
+
+UMBRALES = [85, 75, 65, 55]
+
+
+def descripciones(n: int) -> List[str]:
+    variantes, _ = generar_tabla(n, semilla=11)
+    return list(dict.fromkeys(str(v) for v in variantes))
+
+
+def correr_y_cortar(n: int, carpeta: str, cortar_en: int) -> None:
+    """Corre con checkpoint y termina el proceso al empezar el nivel `cortar_en`."""
+    def al_progreso(evento: Dict) -> None:
+        if evento["evento"] == "nivel_inicio" and evento["nivel"] == cortar_en:
+            os._exit(3)
+
+    familias_jerarquicas(descripciones(n), UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL,
+                         carpeta_checkpoint=carpeta, al_progreso=al_progreso)
+    os._exit(0)
+
+
+def medir(n: int, cortar_en: int) -> Dict:
+    textos = descripciones(n)
+
+    inicio = time.perf_counter()
+    referencia = familias_jerarquicas(textos, UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL)
+    completa_s = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        corte = subprocess.run([sys.executable, __file__, "--cortar", str(n), carpeta, str(cortar_en)])
+        guardados = sorted(p.name for p in Path(carpeta).glob("nivel_*.npy"))
+
+        eventos: List[Dict] = []
+        estadisticas: List[Dict] = []
+        inicio = time.perf_counter()
+        retomada = familias_jerarquicas(textos, UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL,
+                                        carpeta_checkpoint=carpeta, al_progreso=eventos.append,
+                                        estadisticas=estadisticas)
+        retomada_s = time.perf_counter() - inicio
+
+        otros_umbrales: List[Dict] = []
+        familias_jerarquicas(textos, [90, 75, 65, 55], atributos_por_nivel=BLOQUEO_POR_NIVEL,
+                             carpeta_checkpoint=carpeta, al_progreso=otros_umbrales.append)
+
+    reanudados = [e["nivel"] for e in eventos if e["evento"] == "nivel_reanudado"]
+    calculados = [e["nivel"] for e in eventos if e["evento"] == "nivel_fin"]
+    progreso = [e for e in eventos if e["evento"] == "progreso"]
+    return {
+        "descripciones": len(textos),
+        "cortar_en": cortar_en,
+        "codigo_salida_corte": corte.returncode,
+        "niveles_guardados_al_cortar": guardados,
+        "niveles_reanudados": reanudados,
+        "niveles_calculados": calculados,
+        "eventos": dict(Counter(e["evento"] for e in eventos)),
+        "ultimo_progreso": progreso[-1] if progreso else None,
+        "completa_s": completa_s,
+        "retomada_s": retomada_s,
+        "iguales": all(np.array_equal(a, b) for a, b in zip(referencia, retomada)) and len(retomada) == len(UMBRALES),
+        "otros_umbrales_reanudados": sum(e["evento"] == "nivel_reanudado" for e in otros_umbrales),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificación de los checkpoints del clustering")
+    parser.add_argument("--descripciones", type=int, default=20_000)
+    parser.add_argument("--cortar-en", type=int, default=3, help="Nivel en el que se corta la primera corrida")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    parser.add_argument("--cortar", nargs=3, metavar=("N", "CARPETA", "NIVEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cortar:
+        n, carpeta, nivel = args.cortar
+        correr_y_cortar(int(n), carpeta, int(nivel))
+
+    reporte = {"cpus": os.cpu_count(), "resultado": medir(args.descripciones, args.cortar_en)}
+    r = reporte["resultado"]
+    esperados = list(range(1, args.cortar_en))
+    correcto = (
+        r["iguales"]
+        and r["niveles_reanudados"] == esperados
+        and r["niveles_calculados"] == list(range(args.cortar_en, len(UMBRALES) + 1))
+        and r["otros_umbrales_reanudados"] == 0
+    )
+
+    print("=" * 78)
+    print(f"CHECKPOINTS DEL CLUSTERING ({reporte['cpus']} CPUs, {r['descripciones']:,} descripciones)")
+    print("=" * 78)
+    print(f"Corrida cortada al empezar el nivel {r['cortar_en']} (salida {r['codigo_salida_corte']}): "
+          f"guardados {r['niveles_guardados_al_cortar']}")
+    print(f"Corrida retomada: niveles reanudados {r['niveles_reanudados']}, calculados {r['niveles_calculados']}")
+    print(f"Eventos: {r['eventos']}")
+    if r["ultimo_progreso"]:
+        print(f"Último progreso: {json.dumps(r['ultimo_progreso'], ensure_ascii=False)}")
+    print(f"Tiempo: completa {r['completa_s']:.1f}s, retomada {r['retomada_s']:.1f}s")
+    print(f"Mismas familias que la corrida completa: {r['iguales']}")
+    print(f"Con otros umbrales se reanudaron {r['otros_umbrales_reanudados']} niveles (se esperaba 0)")
+    print("=" * 78)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not correcto:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
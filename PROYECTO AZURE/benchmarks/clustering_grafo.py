@@ -0,0 +1,176 @@
+# clustering_grafo.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del clustering por grafo + union-find (clustering_grafo.py).
+
+  - equivalencia: `familias_grafo` contra componentes conexas calculadas par
+    por par (similitud_func + union-find en Python) en una entrada chica, con
+    y sin bloqueo; las familias de los 4 niveles tienen que ser idénticas
+  - comparación: `clustering_jerarquico` en modo 'lideres', 'grafo' y
+    'grafo' con medoide sobre ítems sintéticos con la respuesta correcta
+    (datos_sinteticos.py): tiempo, pares puntuados, familias y precisión /
+    recall / F1 por pares en cada nivel
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/clustering_grafo.py
+    python benchmarks/clustering_grafo.py --filas 50000 --productos 3000 --json grafo.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from datos_sinteticos import generar_catalogo, generar_items
+from normalizacion.atributos import BLOQUEO_POR_NIVEL, extraer_atributos
+from normalizacion.clustering_grafo import familias_grafo
+from normalizacion.indice_normalizacion import METODOS_SIMILITUD
+from normalizacion.main import analisis_pareto, clustering_jerarquico
+from normalizacion_lote import generar_tabla
+from suite_normalizacion import calidad_clustering
+
+UMBRALES = [85, 75, 65, 55]
+
+MODOS = {
+    "lideres": {"modo": "lideres"},
+    "grafo": {"modo": "grafo"},
+    "grafo_medoide": {"modo": "grafo", "medoide": True},
+}
+
+
+def componentes_par_por_par(descripciones: List[str], umbrales: List[int], bloqueo) -> List[np.ndarray]:
+    """Referencia: cada nivel une los pares que superan el umbral (y el del nivel anterior)."""
+    preprocesar, scorer = METODOS_SIMILITUD["token_sort_ratio"]
+    textos = [preprocesar(d) for d in descripciones]
+    atributos = [extraer_atributos(d) for d in descripciones]
+    n = len(textos)
+
+    niveles, anterior = [], None
+    for k, umbral in enumerate(umbrales):
+        padre = list(range(n))
+
+        def raiz(x: int) -> int:
+            while padre[x] != x:
+                x = padre[x]
+            return x
+
+        def unir(a: int, b: int) -> None:
+            ra, rb = raiz(a), raiz(b)
+            if ra != rb:
+                padre[max(ra, rb)] = min(ra, rb)
+
+        if anterior is not None:
+            for i in range(n):
+                unir(i, int(anterior[i]))
+        nombres = bloqueo[k] if bloqueo else ()
+        for i in range(n):
+            for j in range(i + 1, n):
+                mismo_bloque = all(getattr(atributos[i], a) == getattr(atributos[j], a) for a in nombres)
+                if mismo_bloque and scorer(textos[i], textos[j]) > umbral:
+                    unir(i, j)
+        anterior = np.array([raiz(i) for i in range(n)])
+        niveles.append(anterior)
+    return niveles
+
+
+def verificar(n: int) -> List[Dict]:
+    variantes, _ = generar_tabla(n, semilla=3)
+    descripciones = list(dict.fromkeys(str(v) for v in variantes))
+    resultados = []
+    for nombre, bloqueo in (("sin bloqueo", None), ("con bloqueo", BLOQUEO_POR_NIVEL)):
+        referencia = componentes_par_por_par(descripciones, UMBRALES, bloqueo)
+        # Bloques de memoria chicos: muchas pasadas de cdist por bloque
+        grafo = familias_grafo(descripciones, UMBRALES, atributos_por_nivel=bloqueo, memoria_max_mb=0.05)
+        resultados.append({
+            "bloqueo": nombre,
+            "descripciones": len(descripciones),
+            "iguales": all(np.array_equal(a, b) for a, b in zip(referencia, grafo)),
+        })
+    return resultados
+
+
+def comparar(n_filas: int, n_productos: int) -> Dict:
+    catalogo = generar_catalogo(n_productos)
+    items = generar_items(catalogo, n_filas)
+    datos = items[["Descripcion", "Cantidad", "Proveedor"]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_pareto = analisis_pareto(datos)
+
+    modos = {}
+    for nombre, opciones in MODOS.items():
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            inicio = time.perf_counter()
+            df = clustering_jerarquico(df_pareto, umbrales=UMBRALES, **opciones)
+            segundos = time.perf_counter() - inicio
+        modos[nombre] = {"segundos": segundos, "calidad": calidad_clustering(df, items, len(UMBRALES))}
+
+    # Pares puntuados: greedy por nivel contra la pasada única
+    descripciones = df_pareto.sort_values("Frecuencia", ascending=False, kind="stable")["Descripcion"] \
+        .astype(object).drop_duplicates().tolist()
+    from normalizacion.motor_clustering import familias_jerarquicas
+    por_nivel: List[Dict] = []
+    familias_jerarquicas(descripciones, UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL, estadisticas=por_nivel)
+    pasada: List[Dict] = []
+    familias_grafo(descripciones, UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL, estadisticas=pasada)
+    modos["lideres"]["comparaciones"] = sum(e["comparaciones"] for e in por_nivel)
+    modos["grafo"]["comparaciones"] = modos["grafo_medoide"]["comparaciones"] = pasada[0]["comparaciones"]
+    modos["grafo"]["aristas"] = [e["aristas"] for e in pasada]
+    return {"filas": n_filas, "productos": len(catalogo), "descripciones": len(descripciones), "modos": modos}
+
+
+def imprimir(reporte: Dict) -> None:
+    c = reporte["comparacion"]
+    print("=" * 78)
+    print(f"CLUSTERING POR GRAFO + UNION-FIND ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    for v in reporte["verificacion"]:
+        print(f"Equivalencia con componentes par por par, {v['bloqueo']} ({v['descripciones']} descripciones): {v['iguales']}")
+    print("-" * 78)
+    print(f"{c['filas']:,} filas, {c['descripciones']:,} descripciones, {c['productos']:,} productos")
+    print(f"Aristas por nivel (pasada única): {c['modos']['grafo']['aristas']}")
+    print(f"{'modo':>14} {'tiempo':>8} {'comparaciones':>14}  familias / F1 por nivel")
+    for nombre, m in c["modos"].items():
+        q = m["calidad"]
+        niveles = "  ".join(f"N{n} {q[f'familias_n{n}']:,}/{q[f'f1_n{n}']:.3f}" for n in range(1, len(UMBRALES) + 1))
+        print(f"{nombre:>14} {m['segundos']:>7.2f}s {m['comparaciones']:>14,}  {niveles}")
+    print("-" * 78)
+    print("F1 por pares de descripciones únicas: misma familia = mismo producto")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del clustering por grafo + union-find")
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--productos", type=int, default=3_000)
+    parser.add_argument("--verificar", type=int, default=500, help="Descripciones de la comparación par por par")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "verificacion": verificar(args.verificar),
+        "comparacion": comparar(args.filas, args.productos),
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not all(v["iguales"] for v in reporte["verificacion"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
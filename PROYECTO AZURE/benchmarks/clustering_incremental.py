@@ -0,0 +1,142 @@
+# clustering_incremental.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del clustering incremental (modelo_familias.py).
+
+  - equivalencia: construir el modelo con el histórico y asignar el mes
+    nuevo tiene que dar las mismas familias (4 niveles) que
+    `familias_jerarquicas` sobre histórico + nuevas, con y sin bloqueo por
+    atributos, y también después de guardar y cargar el modelo
+  - tiempo: asignar el mes (con descripciones repetidas y nuevas) contra
+    reconstruir todo el clustering
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/clustering_incremental.py
+    python benchmarks/clustering_incremental.py --historico 100000 --mes 5000 --json incremental.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from normalizacion.atributos import BLOQUEO_POR_NIVEL
+from normalizacion.modelo_familias import ModeloFamilias
+from normalizacion.motor_clustering import familias_jerarquicas
+from normalizacion_lote import generar_tabla
+
+UMBRALES = [85, 75, 65, 55]
+
+
+def historico_y_mes(n_historico: int, n_mes: int, repetidas: float = 0.5):
+    """Descripciones del histórico y del mes (parte repetidas, parte nuevas)."""
+    variantes, _ = generar_tabla(n_historico + n_mes, semilla=21)
+    historico, nuevas = variantes[:n_historico], variantes[n_historico:]
+    rng = np.random.default_rng(4)
+    n_repetidas = int(n_mes * repetidas)
+    mes = list(rng.choice(historico, n_repetidas, replace=False)) + nuevas[:n_mes - n_repetidas]
+    rng.shuffle(mes)
+    return historico, [str(d) for d in mes]
+
+
+def medir(n_historico: int, n_mes: int, bloqueo) -> Dict:
+    historico, mes = historico_y_mes(n_historico, n_mes)
+
+    inicio = time.perf_counter()
+    modelo = ModeloFamilias.construir(historico, UMBRALES, atributos_por_nivel=bloqueo)
+    construir_s = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / "modelo.pkl"
+        modelo.guardar(ruta)
+        tamanio_mb = ruta.stat().st_size / 1024 / 1024
+        inicio = time.perf_counter()
+        modelo = ModeloFamilias.cargar(ruta)
+        cargar_s = time.perf_counter() - inicio
+
+    estadisticas: List[Dict[str, int]] = []
+    inicio = time.perf_counter()
+    agregadas = modelo.asignar(mes, estadisticas=estadisticas)
+    asignar_s = time.perf_counter() - inicio
+
+    # Referencia: clustering completo con las nuevas al final del orden
+    todas = historico + [d for d in dict.fromkeys(mes) if d not in set(historico)]
+    inicio = time.perf_counter()
+    referencia = familias_jerarquicas(todas, UMBRALES, atributos_por_nivel=bloqueo)
+    reconstruir_s = time.perf_counter() - inicio
+
+    familias = modelo.familias(todas)
+    distintas = [
+        int(sum(f != todas[m] for f, m in zip(nivel, ref)))
+        for nivel, ref in zip(familias, referencia)
+    ]
+    return {
+        "historico": n_historico,
+        "mes": n_mes,
+        "nuevas": agregadas,
+        "construir_s": construir_s,
+        "modelo_mb": tamanio_mb,
+        "cargar_s": cargar_s,
+        "asignar_s": asignar_s,
+        "reconstruir_s": reconstruir_s,
+        "comparaciones": [e["comparaciones"] for e in estadisticas],
+        "familias_nuevas": [e["lideres_nuevos"] for e in estadisticas],
+        "distintas_por_nivel": distintas,
+        "iguales": not any(distintas),
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"CLUSTERING INCREMENTAL: umbrales {UMBRALES}, {reporte['cpus']} CPUs")
+    print("=" * 78)
+    print(f"{'':>12} {'hist.':>8} {'mes':>6} {'nuevas':>7} {'construir':>10} {'cargar':>7} "
+          f"{'asignar':>8} {'reconstruir':>12} {'iguales':>8}")
+    for nombre, f in reporte["corridas"].items():
+        print(f"{nombre:>12} {f['historico']:>8,} {f['mes']:>6,} {f['nuevas']:>7,} {f['construir_s']:>9.1f}s "
+              f"{f['cargar_s']:>6.2f}s {f['asignar_s']:>7.2f}s {f['reconstruir_s']:>11.1f}s {str(f['iguales']):>8}")
+    print("-" * 78)
+    for nombre, f in reporte["corridas"].items():
+        comparaciones = "/".join(f"{x / 1e6:.1f}M" for x in f["comparaciones"])
+        nuevas = "/".join(str(x) for x in f["familias_nuevas"])
+        print(f"{nombre:>12} comparaciones N1..N4: {comparaciones}; familias nuevas: {nuevas}; "
+              f"modelo {f['modelo_mb']:.1f} MB")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del clustering incremental")
+    parser.add_argument("--historico", type=int, default=50000)
+    parser.add_argument("--mes", type=int, default=5000)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "corridas": {
+            "sin_bloqueo": medir(args.historico, args.mes, None),
+            "con_bloqueo": medir(args.historico, args.mes, BLOQUEO_POR_NIVEL),
+        },
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not all(f["iguales"] for f in reporte["corridas"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
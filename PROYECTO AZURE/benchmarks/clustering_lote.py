@@ -0,0 +1,167 @@
+# clustering_lote.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del clustering jerárquico por bloques (motor_clustering.py).
+
+  - equivalencia: compara `familias_jerarquicas` contra el doble bucle
+    original (similitud_func par por par) en entradas chicas; las familias de
+    los 4 niveles tienen que ser idénticas
+  - escala: tiempo del motor por bloques con 10.000 / 50.000 / 100.000
+    descripciones; el original se extrapola (O(n²)) desde el tamaño más
+    chico de la verificación
+
+El original agrupaba los niveles 2-4 en el orden de un `set`; la referencia
+usa el orden de primera aparición, igual que el motor.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/clustering_lote.py
+    python benchmarks/clustering_lote.py --verificar 300 1000 2000 --descripciones 10000 50000 100000 --json clustering.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from normalizacion.motor_clustering import familias_jerarquicas
+from normalizacion_lote import generar_tabla
+
+UMBRALES = [85, 75, 65, 55]
+
+
+def clustering_original(descripciones: List[str], umbrales: List[int], usar_token_sort: bool = True) -> List[Dict]:
+    """Doble bucle de la versión anterior de `clustering_jerarquico` (orden determinístico)."""
+    similitud_func = fuzz.token_sort_ratio if usar_token_sort else fuzz.ratio
+
+    def nivel(textos: List[str], umbral: int) -> Dict[str, str]:
+        maestras, asignadas = {}, set()
+        for i, desc in enumerate(textos):
+            if desc in asignadas:
+                continue
+            maestras[desc] = desc
+            asignadas.add(desc)
+            for j in range(i + 1, len(textos)):
+                candidata = textos[j]
+                if candidata in asignadas:
+                    continue
+                if similitud_func(desc, candidata) > umbral:
+                    maestras[candidata] = desc
+                    asignadas.add(candidata)
+        return maestras
+
+    niveles = [nivel(descripciones, umbrales[0])]
+    for umbral in umbrales[1:]:
+        anterior = niveles[-1]
+        previas = list(dict.fromkeys(anterior[d] for d in descripciones))
+        maestras_nivel = nivel(previas, umbral)
+        niveles.append({d: maestras_nivel.get(m, m) for d, m in anterior.items()})
+    return niveles
+
+
+def descripciones_sinteticas(n: int, semilla: int = 42) -> List[str]:
+    """Descripciones únicas (variantes sucias de productos) en orden de 'frecuencia'."""
+    variantes, _ = generar_tabla(n, semilla=semilla)
+    return variantes
+
+
+def verificar(tamanios: List[int]) -> List[Dict]:
+    filas = []
+    for n in tamanios:
+        descripciones = descripciones_sinteticas(n)
+        inicio = time.perf_counter()
+        referencia = clustering_original(descripciones, UMBRALES)
+        original_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        niveles = familias_jerarquicas(descripciones, UMBRALES)
+        motor_s = time.perf_counter() - inicio
+
+        distintas = [
+            int(sum(descripciones[m] != ref[d] for d, m in zip(descripciones, maestras)))
+            for maestras, ref in zip(niveles, referencia)
+        ]
+        filas.append({
+            "descripciones": n,
+            "original_s": original_s,
+            "motor_s": motor_s,
+            "familias": [len(set(ref.values())) for ref in referencia],
+            "distintas_por_nivel": distintas,
+            "iguales": not any(distintas),
+        })
+    return filas
+
+
+def escalar(tamanios: List[int], base: Dict) -> List[Dict]:
+    filas = []
+    for n in tamanios:
+        descripciones = descripciones_sinteticas(n)
+        inicio = time.perf_counter()
+        niveles = familias_jerarquicas(descripciones, UMBRALES)
+        motor_s = time.perf_counter() - inicio
+        original_estimado_s = base["original_s"] * (n / base["descripciones"]) ** 2
+        filas.append({
+            "descripciones": n,
+            "motor_s": motor_s,
+            "original_estimado_s": original_estimado_s,
+            "speedup_estimado": original_estimado_s / motor_s if motor_s else None,
+            "familias": [int(len(np.unique(m))) for m in niveles],
+        })
+    return filas
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"CLUSTERING JERÁRQUICO POR BLOQUES: umbrales {reporte['umbrales']}, {reporte['cpus']} CPUs")
+    print("=" * 78)
+    print("Equivalencia con el doble bucle original")
+    print(f"{'descr.':>8} {'original':>10} {'motor':>9} {'familias N1..N4':>26} {'iguales':>8}")
+    for f in reporte["verificacion"]:
+        familias = "/".join(str(x) for x in f["familias"])
+        print(f"{f['descripciones']:>8,} {f['original_s']:>9.2f}s {f['motor_s']:>8.2f}s {familias:>26} "
+              f"{str(f['iguales']):>8}")
+    print("-" * 78)
+    print("Escala (original extrapolado O(n²))")
+    print(f"{'descr.':>8} {'motor':>9} {'original est.':>14} {'speedup':>8} {'familias N1..N4':>26}")
+    for f in reporte["escala"]:
+        familias = "/".join(str(x) for x in f["familias"])
+        print(f"{f['descripciones']:>8,} {f['motor_s']:>8.1f}s {f['original_estimado_s']:>13.0f}s "
+              f"{f['speedup_estimado']:>7.1f}x {familias:>26}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del clustering jerárquico por bloques")
+    parser.add_argument("--verificar", type=int, nargs="+", default=[300, 1000, 2000])
+    parser.add_argument("--descripciones", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    verificacion = verificar(args.verificar)
+    reporte = {
+        "umbrales": UMBRALES,
+        "cpus": os.cpu_count(),
+        "verificacion": verificacion,
+        "escala": escalar(args.descripciones, verificacion[-1]),
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not all(f["iguales"] for f in verificacion):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
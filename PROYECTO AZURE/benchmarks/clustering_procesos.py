@@ -0,0 +1,144 @@
+# clustering_procesos.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del clustering en un pool de procesos (clustering_procesos.py).
+
+  - equivalencia: `familias_jerarquicas` con 2 y 3 procesos contra el motor de
+    un proceso, con y sin bloqueo por atributos; las familias de los 4
+    niveles tienen que ser idénticas
+  - escala: tiempo con 1 / 4 / 16 / 32 procesos sobre --descripciones
+    descripciones. La referencia de 1 es el motor de un proceso con un hilo
+    (workers=1); speedup = t1 / tp y eficiencia = speedup / procesos
+
+La eficiencia solo tiene sentido con al menos tantos núcleos como procesos:
+las filas con más procesos que núcleos se marcan como sobresuscritas (miden
+el costo de repartir, no la escala).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/clustering_procesos.py
+    python benchmarks/clustering_procesos.py --descripciones 100000 --procesos 1 4 16 32 --json procesos.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from normalizacion.atributos import BLOQUEO_POR_NIVEL
+from normalizacion.motor_clustering import familias_jerarquicas
+from normalizacion_lote import generar_tabla
+
+UMBRALES = [85, 75, 65, 55]
+
+
+def descripciones(n: int, semilla: int = 11) -> List[str]:
+    variantes, _ = generar_tabla(n, semilla=semilla)
+    return list(dict.fromkeys(str(v) for v in variantes))
+
+
+def correr(textos: List[str], procesos: int, bloqueo) -> Dict:
+    estadisticas: List[Dict[str, int]] = []
+    inicio = time.perf_counter()
+    niveles = familias_jerarquicas(
+        textos, UMBRALES, atributos_por_nivel=bloqueo, estadisticas=estadisticas,
+        procesos=procesos, workers=1 if procesos == 1 else -1
+    )
+    return {
+        "segundos": time.perf_counter() - inicio,
+        "comparaciones": sum(e["comparaciones"] for e in estadisticas),
+        "familias": [int(len(np.unique(m))) for m in niveles],
+        "niveles": niveles,
+    }
+
+
+def verificar(n: int) -> List[Dict]:
+    textos = descripciones(n, semilla=5)
+    resultados = []
+    for nombre, bloqueo in (("sin bloqueo", None), ("con bloqueo", BLOQUEO_POR_NIVEL)):
+        referencia = correr(textos, 1, bloqueo)["niveles"]
+        for procesos in (2, 3):
+            niveles = correr(textos, procesos, bloqueo)["niveles"]
+            resultados.append({
+                "bloqueo": nombre,
+                "procesos": procesos,
+                "iguales": all(np.array_equal(a, b) for a, b in zip(referencia, niveles)),
+            })
+    return resultados
+
+
+def medir(n: int, lista_procesos: List[int], bloqueo) -> Dict:
+    textos = descripciones(n)
+    filas = []
+    for procesos in lista_procesos:
+        r = correr(textos, procesos, bloqueo)
+        del r["niveles"]
+        filas.append({"procesos": procesos, **r})
+
+    base = next((f for f in filas if f["procesos"] == 1), None)
+    cpus = os.cpu_count() or 1
+    for f in filas:
+        f["sobresuscrito"] = f["procesos"] > cpus
+        if base is not None:
+            f["speedup"] = base["segundos"] / f["segundos"]
+            f["eficiencia"] = f["speedup"] / f["procesos"]
+            f["mismas_familias"] = f["familias"] == base["familias"]
+    return {"descripciones": len(textos), "bloqueo": bloqueo is not None, "filas": filas}
+
+
+def imprimir(reporte: Dict) -> None:
+    e = reporte["escala"]
+    print("=" * 78)
+    print(f"CLUSTERING EN UN POOL DE PROCESOS ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    for v in reporte["verificacion"]:
+        print(f"Equivalencia {v['bloqueo']}, {v['procesos']} procesos: {v['iguales']}")
+    print("-" * 78)
+    print(f"{e['descripciones']:,} descripciones, {'con' if e['bloqueo'] else 'sin'} bloqueo por atributos")
+    print(f"{'procesos':>9} {'tiempo':>9} {'comparaciones':>15} {'speedup':>8} {'eficiencia':>11}")
+    for f in e["filas"]:
+        nota = "  (sobresuscrito)" if f["sobresuscrito"] else ""
+        print(f"{f['procesos']:>9} {f['segundos']:>8.1f}s {f['comparaciones']:>15,} "
+              f"{f.get('speedup', float('nan')):>7.2f}x {f.get('eficiencia', float('nan')):>10.0%}{nota}")
+    print("-" * 78)
+    print("1 proceso = motor de un proceso con un hilo; eficiencia = speedup / procesos")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del clustering en un pool de procesos")
+    parser.add_argument("--descripciones", type=int, default=30_000)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--verificar", type=int, default=5_000, help="Descripciones de la comparación de familias")
+    parser.add_argument("--sin-bloqueo", action="store_true", help="Medir la escala sin bloqueo por atributos")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "verificacion": verificar(args.verificar),
+        "escala": medir(args.descripciones, args.procesos, None if args.sin_bloqueo else BLOQUEO_POR_NIVEL),
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    correcto = all(v["iguales"] for v in reporte["verificacion"]) and all(
+        f.get("mismas_familias", True) for f in reporte["escala"]["filas"]
+    )
+    if not correcto:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
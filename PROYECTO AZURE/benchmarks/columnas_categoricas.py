@@ -0,0 +1,196 @@
+# columnas_categoricas.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación de las columnas categóricas del pipeline de clustering (main.py).
+
+  - equivalencia: `analisis_pareto` y `clustering_jerarquico` contra las
+    versiones anteriores (groupby por texto + merge) en una muestra con
+    descripciones nulas; tienen que dar los mismos valores fila por fila
+  - escala: Pareto y consolidación de las 4 familias sobre --filas filas
+    (el clustering en sí no cambia, las familias se arman sintéticas);
+    tiempo y memoria asignada (tracemalloc: pico durante la operación y lo
+    que ocupa el resultado) de merge contra códigos enteros
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/columnas_categoricas.py
+    python benchmarks/columnas_categoricas.py --filas 2000000 --descripciones 50000 --json categoricas.json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from normalizacion_lote import generar_tabla
+from normalizacion.atributos import BLOQUEO_POR_NIVEL
+from normalizacion.main import _unir_por_descripcion, analisis_pareto, clustering_jerarquico, tabla_pareto
+from normalizacion.modelo_familias import ModeloFamilias
+
+UMBRALES = [85, 75, 65, 55]
+
+
+def generar_filas(n_filas: int, n_descripciones: int, semilla: int = 42) -> pd.DataFrame:
+    """Filas procesadas con descripciones Zipf, ~1% sin descripción y ~2% sin cantidad."""
+    variantes, _ = generar_tabla(n_descripciones, semilla=semilla)
+    variantes = list(dict.fromkeys(variantes))
+    rng = np.random.default_rng(semilla)
+    pesos = 1 / np.arange(1, len(variantes) + 1)
+    descripciones = rng.choice(np.array(variantes, dtype=object), n_filas, p=pesos / pesos.sum())
+    descripciones[rng.random(n_filas) < 0.01] = None
+    cantidades = rng.integers(1, 50, n_filas).astype(float)
+    cantidades[rng.random(n_filas) < 0.02] = np.nan
+    return pd.DataFrame({
+        "Proveedor": rng.choice(["PROVEEDOR SA", "QUILMES", "ARCOR SAIC"], n_filas),
+        "Descripcion": descripciones,
+        "Cantidad": cantidades,
+    }, index=np.arange(n_filas) * 2)
+
+
+def pareto_merge(df: pd.DataFrame) -> pd.DataFrame:
+    """`analisis_pareto` anterior: groupby por texto + merge."""
+    df_freq = df.groupby("Descripcion").agg({"Cantidad": ["count", "sum"]}).reset_index()
+    df_freq.columns = ["Descripcion", "Frecuencia", "Volumen_Total"]
+    df_freq = tabla_pareto(df_freq)
+    return df.merge(df_freq[["Descripcion", "Frecuencia", "Categoria_Pareto"]],
+                    left_on="Descripcion", right_on="Descripcion", how="left")
+
+
+def clustering_merge(df: pd.DataFrame) -> pd.DataFrame:
+    """`clustering_jerarquico` anterior (sin modelo): groupby por texto + merge."""
+    df_unique = df.groupby("Descripcion").agg({"Frecuencia": "first"}).reset_index().sort_values(
+        "Frecuencia", ascending=False, kind="stable"
+    )
+    descripciones = df_unique["Descripcion"].tolist()
+    modelo = ModeloFamilias.construir(descripciones, UMBRALES, atributos_por_nivel=BLOQUEO_POR_NIVEL)
+    df_familias = pd.DataFrame({"Descripcion": descripciones})
+    for nivel, maestras in enumerate(modelo.familias(descripciones), start=1):
+        df_familias[f"Familia_N{nivel}"] = maestras
+    return df.merge(df_familias, on="Descripcion", how="left")
+
+
+def como_objeto(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def iguales(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    try:
+        pd.testing.assert_frame_equal(como_objeto(a), como_objeto(b), check_dtype=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def verificar(n_filas: int, n_descripciones: int) -> Dict:
+    df = generar_filas(n_filas, n_descripciones, semilla=7)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        pareto = analisis_pareto(df)
+        clustering = clustering_jerarquico(pareto)
+    referencia_pareto = pareto_merge(df)
+    return {
+        "filas": n_filas,
+        "pareto_iguales": iguales(pareto, referencia_pareto),
+        "clustering_iguales": iguales(clustering, clustering_merge(referencia_pareto)),
+        "dtypes": {c: str(t) for c, t in clustering.dtypes.items()},
+    }
+
+
+def medir_operacion(operacion: Callable[[], pd.DataFrame]) -> Dict:
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = operacion()
+    segundos = time.perf_counter() - inicio
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"segundos": segundos, "pico_mb": pico / 1024 / 1024, "resultado_mb": actual / 1024 / 1024}, resultado
+
+
+def familias_sinteticas(descripciones: pd.Series) -> pd.DataFrame:
+    """4 niveles de familias por prefijo (cada nivel agrupa más que el anterior)."""
+    unicas = pd.Series(descripciones.dropna().unique(), dtype=object)
+    tabla = pd.DataFrame({"Descripcion": unicas})
+    for nivel, largo in enumerate([18, 12, 8, 5], start=1):
+        tabla[f"Familia_N{nivel}"] = unicas.str[:largo].str.strip().to_numpy()
+    return tabla
+
+
+def medir(n_filas: int, n_descripciones: int) -> Dict:
+    df = generar_filas(n_filas, n_descripciones)
+    df_familias = familias_sinteticas(df["Descripcion"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pareto_codigos, df_pareto = medir_operacion(lambda: analisis_pareto(df))
+    pareto_textos, df_pareto_merge = medir_operacion(lambda: pareto_merge(df))
+    del df_pareto_merge
+    familias_codigos, _ = medir_operacion(lambda: _unir_por_descripcion(df_pareto, "Descripcion", df_familias))
+    familias_textos, _ = medir_operacion(
+        lambda: df_pareto.astype({"Descripcion": object, "Categoria_Pareto": object}).merge(
+            df_familias, on="Descripcion", how="left"
+        )
+    )
+    return {
+        "filas": n_filas,
+        "descripciones": int(df["Descripcion"].nunique()),
+        "pareto": {"merge": pareto_textos, "codigos": pareto_codigos},
+        "familias": {"merge": familias_textos, "codigos": familias_codigos},
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    v, e = reporte["verificacion"], reporte["escala"]
+    print("=" * 78)
+    print(f"COLUMNAS CATEGÓRICAS EN EL PIPELINE DE CLUSTERING ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"Equivalencia con groupby + merge ({v['filas']:,} filas): "
+          f"Pareto = {v['pareto_iguales']}, clustering = {v['clustering_iguales']}")
+    print("-" * 78)
+    print(f"{e['filas']:,} filas, {e['descripciones']:,} descripciones distintas")
+    print(f"{'paso':>10} {'versión':>9} {'tiempo':>9} {'pico MB':>9} {'resultado MB':>13}")
+    for paso in ("pareto", "familias"):
+        for version in ("merge", "codigos"):
+            m = e[paso][version]
+            print(f"{paso:>10} {version:>9} {m['segundos']:>8.2f}s {m['pico_mb']:>9,.0f} {m['resultado_mb']:>13,.0f}")
+    print("-" * 78)
+    print("MB = memoria asignada durante la operación (tracemalloc); 'familias' parte del Pareto")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las columnas categóricas")
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--descripciones", type=int, default=50_000)
+    parser.add_argument("--verificar", type=int, default=20_000, help="Filas de la corrida que compara resultados")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "verificacion": verificar(args.verificar, max(200, args.verificar // 10)),
+        "escala": medir(args.filas, args.descripciones),
+    }
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not (reporte["verificacion"]["pareto_iguales"] and reporte["verificacion"]["clustering_iguales"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
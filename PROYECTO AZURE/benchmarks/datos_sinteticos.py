@@ -0,0 +1,184 @@
+# datos_sinteticos.py
+# -*- coding: utf-8 -*-
+"""
+Generador sintético (con semilla) de ítems de factura con la respuesta correcta.
+
+Arma un catálogo de productos (marca, variedad, envase, medida, pack) y, a
+partir de él:
+
+  - la tabla auxiliar: el nombre base de cada producto más algunas variantes
+    escritas como las escriben los proveedores
+  - los ítems: filas con Descripcion, Cantidad y Proveedor, y las columnas de
+    control Base_Real / Producto_Id (el producto del que sale cada fila)
+
+Las variantes imitan los datos reales: la medida en otra unidad o formato
+(1.5L, 1500CC, 1,5 LT), el pack escrito de otra forma (X6, PACK 6, 6 UNID,
+4X6), tokens desordenados, typos, tokens omitidos y minúsculas. Cada
+proveedor escribe el mismo producto casi siempre igual, así que las
+descripciones se repiten entre facturas como en los libros reales, y la
+popularidad de los productos sigue una Zipf.
+
+Uso (desde otros benchmarks):
+    from datos_sinteticos import generar_catalogo, generar_tabla_auxiliar, generar_items
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from normalizacion_lote import ENVASES, MARCAS, VARIEDADES
+
+MEDIDAS_ML = [237, 354, 473, 500, 600, 1000, 1500, 1750, 2000, 2250, 2500, 3000]
+PACKS = [1, 4, 6, 8, 12, 24]
+PROVEEDORES = ["QUILMES", "COCA COLA FEMSA", "ARCOR SAIC", "PEPSICO", "DISTRIBUIDORA NORTE",
+               "MAYORISTA SUR", "BEBIDAS DEL OESTE", "ALMACEN CENTRAL"]
+
+
+def _medida_base(ml: int) -> str:
+    return f"{ml / 1000:g}L" if ml >= 1000 else f"{ml}CC"
+
+
+def _medida_variante(ml: int, rng: random.Random) -> str:
+    litros = f"{ml / 1000:g}"
+    opciones = [f"{ml}CC", f"{ml} CC", f"{ml}ML", f"{ml} ML"]
+    if ml >= 1000:
+        opciones += [f"{litros}L", f"{litros} LT", f"{litros.replace('.', ',')} LT", f"{litros}LTS"]
+    return rng.choice(opciones)
+
+
+def _pack_base(pack: int) -> str:
+    return f"X{pack}" if pack > 1 else ""
+
+
+def _pack_variante(pack: int, rng: random.Random) -> str:
+    if pack == 1:
+        return ""
+    opciones = [f"X{pack}", f"X {pack}", f"PACK {pack}", f"PACK X{pack}", f"{pack} UNID"]
+    if pack == 24:
+        opciones.append("4X6")
+    return rng.choice(opciones)
+
+
+def _typo(token: str, rng: random.Random) -> str:
+    """Borra, duplica o cambia de lugar una letra."""
+    if len(token) <= 3:
+        return token
+    j = rng.randrange(len(token) - 1)
+    cambio = rng.random()
+    if cambio < 0.4:
+        return token[:j] + token[j + 1:]
+    if cambio < 0.7:
+        return token[:j] + token[j] + token[j:]
+    return token[:j] + token[j + 1] + token[j] + token[j + 2:]
+
+
+def variante(producto: Dict, rng: random.Random) -> str:
+    """Una forma de escribir el producto, como en una factura de proveedor."""
+    marca = producto["Marca"]
+    if " " in marca and rng.random() < 0.15:
+        marca = marca.replace(" ", rng.choice(["", "-"]))
+    partes = [marca, producto["Variedad"], producto["Envase"],
+              _medida_variante(producto["Medida_ml"], rng), _pack_variante(producto["Pack"], rng)]
+    tokens = " ".join(p for p in partes if p).split()
+
+    if rng.random() < 0.3:
+        rng.shuffle(tokens)
+    if rng.random() < 0.4:
+        i = rng.randrange(len(tokens))
+        tokens[i] = _typo(tokens[i], rng)
+    if rng.random() < 0.15 and len(tokens) > 3:
+        tokens.pop(rng.randrange(len(tokens)))
+    texto = " ".join(tokens)
+    return texto.lower() if rng.random() < 0.2 else texto
+
+
+def generar_catalogo(n_productos: int, semilla: int = 42) -> pd.DataFrame:
+    """
+    Productos distintos con su nombre base.
+
+    Returns:
+        DataFrame con Producto_Id, Base, Marca, Variedad, Envase, Medida_ml y Pack
+    """
+    rng = random.Random(semilla)
+    vistos, filas = set(), []
+    while len(filas) < n_productos:
+        clave = (rng.choice(MARCAS), rng.choice(VARIEDADES), rng.choice(ENVASES),
+                 rng.choice(MEDIDAS_ML), rng.choice(PACKS))
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        marca, variedad, envase, medida, pack = clave
+        base = " ".join(p for p in (marca, variedad, envase, _medida_base(medida), _pack_base(pack)) if p)
+        filas.append({"Producto_Id": len(filas), "Base": base, "Marca": marca, "Variedad": variedad,
+                      "Envase": envase, "Medida_ml": medida, "Pack": pack})
+    catalogo = pd.DataFrame(filas)
+    # Dos claves distintas pueden dar el mismo texto base: se deja el primero
+    return catalogo.drop_duplicates("Base").reset_index(drop=True).assign(
+        Producto_Id=lambda d: np.arange(len(d))
+    )
+
+
+def generar_tabla_auxiliar(catalogo: pd.DataFrame, variantes_por_producto: int = 3, semilla: int = 43) -> pd.DataFrame:
+    """
+    Tabla de normalización: el nombre base de cada producto y variantes de proveedor.
+
+    Returns:
+        DataFrame con 'Nombre Gestion' y 'Base' (sin variantes repetidas)
+    """
+    rng = random.Random(semilla)
+    filas: List[Tuple[str, str]] = []
+    for producto in catalogo.to_dict("records"):
+        filas.append((producto["Base"], producto["Base"]))
+        filas.extend((variante(producto, rng), producto["Base"]) for _ in range(variantes_por_producto))
+    tabla = pd.DataFrame(filas, columns=["Nombre Gestion", "Base"])
+    return tabla.drop_duplicates("Nombre Gestion").reset_index(drop=True)
+
+
+def generar_items(
+    catalogo: pd.DataFrame,
+    n_filas: int,
+    semilla: int = 44,
+    formas_por_proveedor: int = 2,
+    nuevas: float = 0.1
+) -> pd.DataFrame:
+    """
+    Ítems de factura de los productos del catálogo, con la respuesta correcta.
+
+    Args:
+        catalogo: Resultado de `generar_catalogo`
+        n_filas: Cantidad de filas
+        semilla: Semilla del generador
+        formas_por_proveedor: Formas distintas en que cada proveedor escribe
+            un mismo producto
+        nuevas: Proporción de filas escritas de una forma nueva (no repetida)
+
+    Returns:
+        DataFrame con Descripcion, Cantidad, Proveedor, Base_Real y Producto_Id
+    """
+    rng = random.Random(semilla)
+    np_rng = np.random.default_rng(semilla)
+    productos = catalogo.to_dict("records")
+    pesos = 1 / np.arange(1, len(productos) + 1) ** 0.9
+    elegidos = np_rng.choice(len(productos), n_filas, p=pesos / pesos.sum())
+    proveedores = np_rng.integers(0, len(PROVEEDORES), n_filas)
+
+    formas: Dict[Tuple[int, int], List[str]] = {}
+    descripciones = []
+    for p, prov in zip(elegidos.tolist(), proveedores.tolist()):
+        if rng.random() < nuevas:
+            descripciones.append(variante(productos[p], rng))
+            continue
+        conocidas = formas.setdefault((prov, p), [])
+        if len(conocidas) < formas_por_proveedor:
+            conocidas.append(variante(productos[p], rng))
+        descripciones.append(rng.choice(conocidas))
+
+    return pd.DataFrame({
+        "Descripcion": descripciones,
+        "Cantidad": np_rng.integers(1, 60, n_filas).astype(float),
+        "Proveedor": [PROVEEDORES[i] for i in proveedores],
+        "Base_Real": catalogo["Base"].to_numpy()[elegidos],
+        "Producto_Id": elegidos.astype(np.int64),
+    })
@@ -0,0 +1,172 @@
+# importtime.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark de tiempo de importación / arranque de la app de Streamlit.
+
+Ejecuta `python -X importtime` sobre un módulo (por defecto `src.app`) en un
+proceso limpio, parsea la salida y genera un reporte con:
+  - tiempo total de importación (mediana de N corridas)
+  - módulos más costosos (tiempo acumulado)
+  - estado de los paquetes pesados que NO deberían cargarse al arrancar
+
+Con --render también se ejecuta `main()` en modo bare, como aproximación al
+tiempo hasta el primer render de la página.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --render --repeticiones 10 --json importtime.json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Paquetes que la app debe cargar solo cuando una pestaña procesa archivos
+PAQUETES_PESADOS = [
+    "pandas",
+    "numpy",
+    "PIL",
+    "azure.ai.formrecognizer",
+    "google.generativeai",
+    "rapidfuzz",
+    "fitz",
+    "openpyxl",
+]
+
+_LINEA_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parsear_importtime(salida: str) -> List[Dict]:
+    """
+    Parsea la salida de `-X importtime`.
+
+    Returns:
+        Lista de dicts con modulo, propio_us, acumulado_us y nivel de anidamiento
+    """
+    registros = []
+    for linea in salida.splitlines():
+        m = _LINEA_IMPORTTIME.match(linea)
+        if not m:
+            continue
+        registros.append({
+            "modulo": m.group(4),
+            "propio_us": int(m.group(1)),
+            "acumulado_us": int(m.group(2)),
+            "nivel": (len(m.group(3)) - 1) // 2,
+        })
+    return registros
+
+
+def medir_import(modulo: str, render: bool = False) -> Dict:
+    """
+    Importa `modulo` en un subproceso con -X importtime.
+
+    Returns:
+        Dict con los registros parseados y el tiempo de pared del proceso
+    """
+    codigo = f"import {modulo}"
+    if render:
+        codigo += f"; {modulo}.main()"
+
+    inicio = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=str(ROOT_DIR),
+        capture_output=True,
+        text=True,
+    )
+    pared_s = time.perf_counter() - inicio
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falló la importación de {modulo}:\n{proc.stderr[-2000:]}")
+
+    return {"registros": parsear_importtime(proc.stderr), "pared_s": pared_s}
+
+
+def generar_reporte(modulo: str, repeticiones: int = 5, top: int = 15, render: bool = False) -> Dict:
+    """
+    Corre la medición varias veces y resume (medianas).
+
+    Returns:
+        Dict serializable a JSON con el resumen
+    """
+    corridas = [medir_import(modulo, render) for _ in range(repeticiones)]
+
+    acumulados: Dict[str, List[int]] = {}
+    for corrida in corridas:
+        for reg in corrida["registros"]:
+            acumulados.setdefault(reg["modulo"], []).append(reg["acumulado_us"])
+
+    medianas = {mod: statistics.median(valores) for mod, valores in acumulados.items()}
+    total_us = medianas.get(modulo, 0)
+
+    mas_costosos = sorted(
+        ({"modulo": mod, "acumulado_ms": us / 1000} for mod, us in medianas.items() if mod != modulo),
+        key=lambda r: r["acumulado_ms"],
+        reverse=True,
+    )[:top]
+
+    pesados = {
+        paquete: (medianas[paquete] / 1000 if paquete in medianas else None)
+        for paquete in PAQUETES_PESADOS
+    }
+
+    return {
+        "modulo": modulo,
+        "render": render,
+        "repeticiones": repeticiones,
+        "python": sys.version.split()[0],
+        "import_total_ms": total_us / 1000,
+        "proceso_total_ms": statistics.median(c["pared_s"] for c in corridas) * 1000,
+        "mas_costosos": mas_costosos,
+        "paquetes_pesados_ms": pesados,
+    }
+
+
+def imprimir_reporte(reporte: Dict) -> None:
+    """Imprime el reporte en consola."""
+    print("=" * 60)
+    print(f"IMPORT TIME: {reporte['modulo']} ({reporte['repeticiones']} corridas, mediana)")
+    print("=" * 60)
+    print(f"Import del módulo:      {reporte['import_total_ms']:9.1f} ms")
+    etiqueta = "Proceso (import+main):" if reporte["render"] else "Proceso completo:     "
+    print(f"{etiqueta}  {reporte['proceso_total_ms']:9.1f} ms")
+
+    print("\nMódulos más costosos (acumulado):")
+    for reg in reporte["mas_costosos"]:
+        print(f"  {reg['acumulado_ms']:9.1f} ms  {reg['modulo']}")
+
+    print("\nPaquetes pesados al arrancar:")
+    for paquete, ms in reporte["paquetes_pesados_ms"].items():
+        estado = "no cargado ✓" if ms is None else f"{ms:9.1f} ms"
+        print(f"  {paquete:28s} {estado}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de importación")
+    parser.add_argument("--modulo", default="src.app", help="Módulo a importar (default: src.app)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--render", action="store_true", help="Ejecutar también main() (modo bare)")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = generar_reporte(args.modulo, args.repeticiones, args.top, args.render)
+    imprimir_reporte(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# ingesta_por_bloques.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación de los pipelines por bloques (lectura_por_bloques.py).
+
+Genera un Excel sintético de ítems de factura y corre `normalizar_productos`
+y `normalizar_productos_con_auxiliar` completos (read_excel) y por bloques,
+cada corrida en un proceso aparte para medir su pico de memoria (RSS):
+
+  - equivalencia: con --verificar filas, las hojas de salida de ambas
+    versiones tienen que ser iguales
+  - escala: tiempo y pico de memoria con --filas filas
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/ingesta_por_bloques.py
+    python benchmarks/ingesta_por_bloques.py --verificar 20000 --filas 300000 --bloque 50000 --json ingesta.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from normalizacion_lote import generar_tabla
+
+PROVEEDORES = ["PROVEEDOR SA", "DISTRIBUIDORA NORTE SRL", "COCA COLA FEMSA", "QUILMES", "ARCOR SAIC"]
+
+
+def generar_excel(ruta: Path, n_filas: int, semilla: int = 42) -> None:
+    """Excel de ítems (hoja 'Datos') con columna Info concatenada y ~5% de filas insalvables."""
+    from openpyxl import Workbook
+
+    variantes, _ = generar_tabla(max(1000, n_filas // 20), semilla=semilla)
+    rng = np.random.default_rng(semilla)
+    # Frecuencias tipo Zipf: pocas descripciones concentran la mayoría de las filas
+    pesos = 1 / np.arange(1, len(variantes) + 1)
+    descripciones = rng.choice(variantes, n_filas, p=pesos / pesos.sum())
+    cantidades = rng.integers(1, 50, n_filas).astype(float)
+    precios = np.round(rng.uniform(10, 5000, n_filas), 2)
+    subtotales = np.round(cantidades * precios, 2)
+    caso = rng.random(n_filas)
+    subtotales[caso < 0.10] = np.nan
+    precios[(caso >= 0.95)] = np.nan
+    cantidades[(caso >= 0.95)] = 0
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Datos")
+    hoja.append(["Info", "Descripcion", "Cantidad", "Precio_Unitario", "Subtotal"])
+    for i in range(n_filas):
+        factura = i // 8
+        info = (f"FC - {factura % 20 + 1:04d}-{factura:08d} - {factura % 28 + 1:02d}/{factura % 12 + 1:02d}/2024"
+                f" - {PROVEEDORES[factura % len(PROVEEDORES)]} - OC{factura % 9999}")
+        hoja.append([
+            info,
+            descripciones[i],
+            None if np.isnan(cantidades[i]) else cantidades[i],
+            None if np.isnan(precios[i]) else precios[i],
+            None if np.isnan(subtotales[i]) else subtotales[i],
+        ])
+    libro.save(ruta)
+
+    # Tabla auxiliar (hoja 'Sheet1') con parte de las variantes
+    tabla_variantes, tabla_bases = generar_tabla(max(500, n_filas // 40), semilla=semilla)
+    pd.DataFrame({"Nombre Gestion": tabla_variantes, "Base": tabla_bases}).to_excel(
+        ruta.with_name("auxiliar.xlsx"), sheet_name="Sheet1", index=False
+    )
+
+
+def correr(pipeline: str, entrada: str, salida: str, bloque: int) -> Dict:
+    """Corre un pipeline en este proceso y devuelve tiempo y pico de memoria."""
+    import contextlib
+    import io
+
+    from normalizacion.lectura_por_bloques import pico_memoria_mb
+    from normalizacion.main import normalizar_productos
+    from normalizacion.normalizacion_con_auxiliar import normalizar_productos_con_auxiliar
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if pipeline == "clustering":
+            normalizar_productos(entrada, salida, hoja_entrada="Datos", filas_por_bloque=bloque or None)
+        else:
+            normalizar_productos_con_auxiliar(
+                entrada, str(Path(entrada).with_name("auxiliar.xlsx")), salida,
+                hoja_datos="Datos", filas_por_bloque=bloque or None
+            )
+    return {"segundos": time.perf_counter() - inicio, "pico_mb": pico_memoria_mb()}
+
+
+def correr_en_proceso(pipeline: str, entrada: Path, salida: Path, bloque: int) -> Dict:
+    resultado = subprocess.run(
+        [sys.executable, __file__, "--correr", pipeline, str(entrada), str(salida), str(bloque)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def hojas_iguales(a: Path, b: Path) -> Dict[str, bool]:
+    hojas_a = pd.read_excel(a, sheet_name=None)
+    hojas_b = pd.read_excel(b, sheet_name=None)
+    iguales = {}
+    for nombre in sorted(set(hojas_a) | set(hojas_b)):
+        try:
+            pd.testing.assert_frame_equal(hojas_a[nombre], hojas_b[nombre], check_dtype=False)
+            iguales[nombre] = True
+        except (AssertionError, KeyError):
+            iguales[nombre] = False
+    return iguales
+
+
+def medir(n_filas: int, bloque: int, verificar: bool) -> Dict:
+    filas = {"filas": n_filas, "bloque": bloque}
+    with tempfile.TemporaryDirectory() as carpeta:
+        entrada = Path(carpeta) / "items.xlsx"
+        inicio = time.perf_counter()
+        generar_excel(entrada, n_filas)
+        filas["generar_s"] = time.perf_counter() - inicio
+        filas["entrada_mb"] = entrada.stat().st_size / 1024 / 1024
+
+        for pipeline in ("clustering", "auxiliar"):
+            completo = Path(carpeta) / f"{pipeline}_completo.xlsx"
+            por_bloques = Path(carpeta) / f"{pipeline}_bloques.xlsx"
+            filas[pipeline] = {
+                "completo": correr_en_proceso(pipeline, entrada, completo, 0),
+                "por_bloques": correr_en_proceso(pipeline, entrada, por_bloques, bloque),
+            }
+            if verificar:
+                filas[pipeline]["hojas_iguales"] = hojas_iguales(completo, por_bloques)
+    return filas
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"INGESTA POR BLOQUES ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"{'filas':>9} {'MB xlsx':>8} {'pipeline':>11} {'completo':>18} {'por bloques':>18} {'hojas iguales':>14}")
+    for f in reporte["corridas"]:
+        for pipeline in ("clustering", "auxiliar"):
+            c, b = f[pipeline]["completo"], f[pipeline]["por_bloques"]
+            iguales = f[pipeline].get("hojas_iguales")
+            texto_iguales = "-" if iguales is None else str(all(iguales.values()))
+            print(f"{f['filas']:>9,} {f['entrada_mb']:>8.1f} {pipeline:>11} "
+                  f"{c['segundos']:>7.1f}s {c['pico_mb']:>6,.0f} MB "
+                  f"{b['segundos']:>7.1f}s {b['pico_mb']:>6,.0f} MB {texto_iguales:>14}")
+    print("-" * 78)
+    print("Cada corrida en un proceso aparte; MB = pico de memoria residente (RSS)")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los pipelines por bloques")
+    parser.add_argument("--verificar", type=int, default=20000, help="Filas de la corrida que compara las salidas")
+    parser.add_argument("--filas", type=int, nargs="*", default=[300000])
+    parser.add_argument("--bloque", type=int, default=50000)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    parser.add_argument("--correr", nargs=4, metavar=("PIPELINE", "ENTRADA", "SALIDA", "BLOQUE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.correr:
+        pipeline, entrada, salida, bloque = args.correr
+        print(json.dumps(correr(pipeline, entrada, salida, int(bloque))))
+        return
+
+    # La verificación usa bloques chicos para pasar por varios bloques
+    corridas = [medir(args.verificar, min(args.bloque, max(1000, args.verificar // 7)), verificar=True)]
+    corridas += [medir(n, args.bloque, verificar=False) for n in args.filas]
+    reporte = {"cpus": os.cpu_count(), "corridas": corridas}
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    verificacion = corridas[0]
+    if not all(all(verificacion[p]["hojas_iguales"].values()) for p in ("clustering", "auxiliar")):
+        print(json.dumps({p: verificacion[p]["hojas_iguales"] for p in ("clustering", "auxiliar")}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# lectura_cacheada.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación de la lectura con copia en caché (lectura_cacheada.py).
+
+Genera un Excel de ítems de factura y su tabla auxiliar y compara, para cada
+hoja:
+
+  - read_excel: lectura directa (lo que hacían todas las herramientas)
+  - primera lectura: read_excel + conversión de la copia
+  - lecturas siguientes: desde la copia, completa y con 2 columnas
+
+  - equivalencia: las lecturas desde la copia tienen que dar el mismo
+    DataFrame que read_excel (mismos dtypes, mismas celdas nulas y el mismo
+    texto con astype(str), así None y NaN no pasan por iguales), y al
+    modificar el archivo la copia se tiene que regenerar
+
+El formato de la copia depende del entorno (Parquet con pyarrow, si no pickle).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/lectura_cacheada.py
+    python benchmarks/lectura_cacheada.py --filas 200000 --repeticiones 5 --json lectura.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pandas as pd
+
+from ingesta_por_bloques import generar_excel
+from normalizacion.lectura_cacheada import CARPETA_CACHE, leer_tabla
+
+
+def iguales(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """assert_frame_equal da por iguales None y NaN: se comparan también nulos y texto."""
+    try:
+        pd.testing.assert_frame_equal(a, b)
+    except AssertionError:
+        return False
+    return a.isna().equals(b.isna()) and a.astype(str).equals(b.astype(str))
+
+
+def formato_copia(archivo: Path) -> str:
+    metas = list((archivo.parent / CARPETA_CACHE).glob(f"{archivo.stem}-*.json"))
+    return json.loads(metas[0].read_text(encoding="utf-8"))["formato"] if metas else "-"
+
+
+def medir(archivo: Path, hoja: str, columnas, repeticiones: int) -> Dict:
+    inicio = time.perf_counter()
+    referencia = pd.read_excel(archivo, sheet_name=hoja)
+    read_excel_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    leer_tabla(archivo, hoja)
+    primera_s = time.perf_counter() - inicio
+
+    tiempos, tiempos_columnas = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        completa = leer_tabla(archivo, hoja)
+        tiempos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        proyectada = leer_tabla(archivo, hoja, columnas=columnas)
+        tiempos_columnas.append(time.perf_counter() - inicio)
+
+    return {
+        "hoja": hoja,
+        "filas": len(referencia),
+        "formato": formato_copia(archivo),
+        "read_excel_s": read_excel_s,
+        "primera_s": primera_s,
+        "copia_s": min(tiempos),
+        "copia_columnas_s": min(tiempos_columnas),
+        "iguales": iguales(completa, referencia) and iguales(proyectada, referencia[columnas]),
+    }
+
+
+def verificar_invalidacion(carpeta: Path) -> bool:
+    """Al reescribir el archivo (otro contenido), la lectura siguiente lo refleja."""
+    archivo = carpeta / "tabla.xlsx"
+    pd.DataFrame({"Nombre Gestion": ["A", "B"], "Base": ["X", "Y"]}).to_excel(archivo, index=False)
+    primera = leer_tabla(archivo)
+    pd.DataFrame({"Nombre Gestion": ["A", "B", "C"], "Base": ["X", "Y", "Z"]}).to_excel(archivo, index=False)
+    segunda = leer_tabla(archivo)
+    return len(primera) == 2 and iguales(segunda, pd.read_excel(archivo))
+
+
+def verificar_nulos(carpeta: Path) -> bool:
+    """Las celdas vacías de columnas de texto dan lo mismo en frío y desde la copia."""
+    archivo = carpeta / "nulos.xlsx"
+    pd.DataFrame({
+        "Nombre Gestion": ["A", None, "C"],
+        "Base": [None, "Y", "Z"],
+        "Precio": [1.5, None, 3.0],
+    }).to_excel(archivo, index=False)
+    referencia = pd.read_excel(archivo)
+    fria = leer_tabla(archivo)
+    desde_copia = leer_tabla(archivo)
+    proyectada = leer_tabla(archivo, columnas=["Base"])
+    return (
+        iguales(fria, referencia)
+        and iguales(desde_copia, referencia)
+        and iguales(proyectada, referencia[["Base"]])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lectura con copia en caché")
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        carpeta = Path(carpeta)
+        entrada = carpeta / "items.xlsx"
+        generar_excel(entrada, args.filas)
+        reporte = {
+            "cpus": os.cpu_count(),
+            "lecturas": [
+                medir(entrada, "Datos", ["Descripcion", "Cantidad"], args.repeticiones),
+                medir(carpeta / "auxiliar.xlsx", "Sheet1", ["Nombre Gestion", "Base"], args.repeticiones),
+            ],
+            "invalidacion": verificar_invalidacion(carpeta),
+            "nulos": verificar_nulos(carpeta),
+        }
+
+    print("=" * 78)
+    print(f"LECTURA CON COPIA EN CACHÉ ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"{'hoja':>8} {'filas':>9} {'formato':>8} {'read_excel':>11} {'1ª lectura':>11} "
+          f"{'copia':>8} {'2 cols':>8} {'iguales':>8}")
+    for r in reporte["lecturas"]:
+        print(f"{r['hoja']:>8} {r['filas']:>9,} {r['formato']:>8} {r['read_excel_s']:>10.2f}s "
+              f"{r['primera_s']:>10.2f}s {r['copia_s'] * 1000:>6.0f}ms {r['copia_columnas_s'] * 1000:>6.0f}ms "
+              f"{str(r['iguales']):>8}")
+    print("-" * 78)
+    print(f"Copia regenerada al modificar el archivo: {reporte['invalidacion']}")
+    print(f"Celdas vacías iguales en frío y desde la copia: {reporte['nulos']}")
+    print("=" * 78)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not (reporte["invalidacion"] and reporte["nulos"] and all(r["iguales"] for r in reporte["lecturas"])):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
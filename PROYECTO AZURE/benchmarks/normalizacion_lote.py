@@ -0,0 +1,206 @@
+# normalizacion_lote.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la normalización por fuzzy matching: individual vs lote.
+
+Compara, contra una tabla sintética de variantes (default 50.000):
+  - original:   process.extractOne(desc, variantes, scorer=token_sort_ratio) por descripción
+  - indice:     NormalizationIndex.buscar (exactas por hash + opciones preprocesadas)
+  - lote:       NormalizationIndex.buscar_lote (cdist por bloques, workers=-1)
+
+Los modos individuales se miden sobre una muestra y se extrapolan al total.
+También se verifica que el modo lote devuelva lo mismo que el original en la muestra.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/normalizacion_lote.py
+    python benchmarks/normalizacion_lote.py --variantes 50000 --consultas 1000 10000 100000 --json lote.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from rapidfuzz import fuzz, process
+
+from normalizacion.indice_normalizacion import NormalizationIndex
+
+MARCAS = ["COCA COLA", "FANTA", "SPRITE", "QUILMES", "BRAHMA", "STELLA ARTOIS", "PEPSI", "7UP",
+          "VILLAVICENCIO", "CEPITA", "SCHWEPPES", "ANDES", "PATAGONIA", "CORONA", "AQUARIUS",
+          "POWERADE", "MONSTER", "SPEED", "GATORADE", "LEVITE", "MANAOS", "SECCO", "PASO DE LOS TOROS"]
+VARIEDADES = ["", "ZERO", "LIGHT", "CLASICA", "NARANJA", "LIMA LIMON", "POMELO", "IPA", "ROJA",
+              "NEGRA", "SIN AZUCAR", "ORIGINAL", "DURAZNO", "MANZANA", "TONICA", "GOLDEN"]
+ENVASES = ["LATA", "PET", "VIDRIO", "RET", "DESC", ""]
+MEDIDAS = ["237CC", "354CC", "473CC", "500CC", "600CC", "1L", "1.5L", "1.75L", "2L", "2.25L", "2.5L", "3L"]
+PACKS = ["X4", "X6", "X8", "X12", "X24", "4X6", ""]
+
+
+def _producto(rng: random.Random) -> str:
+    partes = [rng.choice(MARCAS), rng.choice(VARIEDADES), rng.choice(ENVASES),
+              rng.choice(MEDIDAS), rng.choice(PACKS), f"C{rng.randint(1, 999)}"]
+    return " ".join(p for p in partes if p)
+
+
+def _ensuciar(texto: str, rng: random.Random) -> str:
+    """Simula variantes de proveedor: tokens permutados, typos, abreviaturas, minúsculas."""
+    tokens = texto.split()
+    if rng.random() < 0.3:
+        rng.shuffle(tokens)
+    if rng.random() < 0.5 and tokens:
+        i = rng.randrange(len(tokens))
+        t = tokens[i]
+        if len(t) > 3:
+            j = rng.randrange(len(t))
+            tokens[i] = t[:j] + t[j + 1:]
+    if rng.random() < 0.2 and len(tokens) > 2:
+        tokens.pop(rng.randrange(len(tokens)))
+    salida = " ".join(tokens)
+    return salida.lower() if rng.random() < 0.2 else salida
+
+
+def generar_tabla(n_variantes: int, semilla: int = 42):
+    rng = random.Random(semilla)
+    variantes, bases = [], []
+    vistos = set()
+    while len(variantes) < n_variantes:
+        base = _producto(rng)
+        variante = _ensuciar(base, rng) if rng.random() < 0.7 else base
+        if variante in vistos:
+            continue
+        vistos.add(variante)
+        variantes.append(variante)
+        bases.append(base)
+    return variantes, bases
+
+
+def generar_consultas(variantes: List[str], n: int, semilla: int = 7) -> List[str]:
+    """Descripciones únicas: ~20% exactas (cambiando mayúsculas), resto ensuciadas o nuevas."""
+    rng = random.Random(semilla)
+    consultas, vistos = [], set()
+    while len(consultas) < n:
+        r = rng.random()
+        if r < 0.2:
+            c = rng.choice(variantes).swapcase()
+        elif r < 0.85:
+            c = _ensuciar(rng.choice(variantes), rng)
+        else:
+            c = _producto(rng)
+        if c not in vistos:
+            vistos.add(c)
+            consultas.append(c)
+    return consultas
+
+
+def generar_consultas_etiquetadas(variantes: List[str], bases: List[str], n: int, semilla: int = 11):
+    """Variantes ensuciadas de la tabla junto con el nombre base correcto de cada una."""
+    rng = random.Random(semilla)
+    consultas, correctas = [], []
+    for _ in range(n):
+        i = rng.randrange(len(variantes))
+        consultas.append(_ensuciar(variantes[i], rng))
+        correctas.append(bases[i])
+    return consultas, correctas
+
+
+def _original(desc: str, variantes: List[str], mapa: Dict[str, str], umbral: float):
+    """Implementación fila por fila previa (referencia)."""
+    desc_limpia = desc.strip()
+    for variante in variantes:
+        if desc_limpia.upper() == variante.upper():
+            return mapa[variante], 100.0, 'Exacta'
+    resultado = process.extractOne(desc_limpia, variantes, scorer=fuzz.token_sort_ratio)
+    if resultado and resultado[1] >= umbral:
+        return mapa[resultado[0]], float(resultado[1]), 'Fuzzy'
+    return desc_limpia, float(resultado[1]) if resultado else 0.0, 'Sin match'
+
+
+def medir(n_variantes: int, tamanios: List[int], muestra: int, umbral: float) -> Dict:
+    variantes, bases = generar_tabla(n_variantes)
+    mapa = dict(zip(variantes, bases))
+    lista_variantes = list(mapa.keys())
+
+    inicio = time.perf_counter()
+    indice = NormalizationIndex(variantes, bases)
+    construccion_s = time.perf_counter() - inicio
+
+    filas = []
+    for n in tamanios:
+        consultas = generar_consultas(variantes, n)
+        sub = consultas[:min(muestra, n)]
+
+        inicio = time.perf_counter()
+        referencia = [_original(c, lista_variantes, mapa, umbral) for c in sub]
+        original_s = (time.perf_counter() - inicio) * n / len(sub)
+
+        inicio = time.perf_counter()
+        individuales = [indice.buscar(c, umbral) for c in sub]
+        indice_s = (time.perf_counter() - inicio) * n / len(sub)
+
+        inicio = time.perf_counter()
+        normalizadas, similitudes, metodos, _ = indice.buscar_lote(consultas, umbral)
+        lote_s = time.perf_counter() - inicio
+
+        diferencias = sum(
+            1 for i, ref in enumerate(referencia)
+            if ref != (normalizadas[i], float(similitudes[i]), metodos[i]) or ref != individuales[i]
+        )
+
+        filas.append({
+            "consultas": n,
+            "muestra": len(sub),
+            "original_s": original_s,
+            "indice_s": indice_s,
+            "lote_s": lote_s,
+            "speedup_vs_original": original_s / lote_s if lote_s else None,
+            "diferencias_en_muestra": diferencias,
+        })
+
+    return {
+        "variantes": n_variantes,
+        "umbral": umbral,
+        "cpus": os.cpu_count(),
+        "construccion_indice_s": construccion_s,
+        "resultados": filas,
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"NORMALIZACIÓN: {reporte['variantes']:,} variantes, umbral {reporte['umbral']}, "
+          f"{reporte['cpus']} CPUs (índice en {reporte['construccion_indice_s']:.2f}s)")
+    print("=" * 78)
+    print(f"{'consultas':>10} {'original*':>12} {'indice*':>11} {'lote':>10} {'speedup':>9} {'difs':>6}")
+    for f in reporte["resultados"]:
+        print(f"{f['consultas']:>10,} {f['original_s']:>11.1f}s {f['indice_s']:>10.1f}s "
+              f"{f['lote_s']:>9.1f}s {f['speedup_vs_original']:>8.1f}x {f['diferencias_en_muestra']:>6}")
+    print("-" * 78)
+    print("* extrapolado desde la muestra; 'difs' = resultados distintos al original en la muestra")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de normalización individual vs lote")
+    parser.add_argument("--variantes", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--muestra", type=int, default=300, help="Consultas medidas en los modos individuales")
+    parser.add_argument("--umbral", type=float, default=75)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = medir(args.variantes, args.consultas, args.muestra, args.umbral)
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# normalizacion_por_archivo.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la normalización por archivo de la pestaña general (src/app.py).
+
+Reparte ítems sintéticos (datos_sinteticos.py) en facturas de --items filas
+(un proveedor por factura; las variantes de la tabla, salvo los nombres base,
+quedan en la partición de un proveedor) y compara, con almacén, cache y
+artefacto en una carpeta temporal nueva para cada modo:
+
+  - al final: concatenar todos los ítems, `normalizar_dataframe` y
+    `agregar_variantes_a_tabla` después del último archivo (flujo anterior)
+  - por archivo: `NormalizacionPorArchivo.normalizar` apenas termina cada
+    archivo (misma cache para todos) y, al final, solo concatenar y
+    `agregar_variantes_a_tabla` (una escritura al almacén)
+
+Mide lo que se agrega por archivo y la espera después del último archivo,
+y verifica que las columnas de normalización, las estadísticas por
+partición y las variantes aprendidas sean las mismas en los dos modos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/normalizacion_por_archivo.py
+    python benchmarks/normalizacion_por_archivo.py --filas 20000 --items 60 --json por_archivo.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from datos_sinteticos import PROVEEDORES, generar_catalogo, generar_items, generar_tabla_auxiliar
+from suite_normalizacion import _silencioso, normalizador_temporal
+
+COLUMNAS = ["Producto_Normalizado", "Similitud_Match", "Metodo_Match", "Particion_Match"]
+
+
+def facturas(items: pd.DataFrame, por_factura: int) -> List[pd.DataFrame]:
+    """Facturas de un proveedor cada una, de `por_factura` ítems como máximo."""
+    archivos = []
+    for proveedor, filas in items.groupby("Proveedor", sort=False):
+        for inicio in range(0, len(filas), por_factura):
+            factura = filas.iloc[inicio:inicio + por_factura][["Descripcion", "Cantidad", "Proveedor"]].copy()
+            factura["Archivo"] = f"{proveedor}_{inicio // por_factura:04d}.pdf"
+            archivos.append(factura)
+    return archivos
+
+
+def al_final(normalizador, archivos: List[pd.DataFrame]) -> Dict:
+    por_archivo = [0.0] * len(archivos)
+    inicio = time.perf_counter()
+    df_final = pd.concat(archivos, ignore_index=True)
+    df_final = normalizador.normalizar_dataframe(df_final, columna_descripcion='Descripcion',
+                                                 umbral_similitud=75, agregar_columnas_debug=True)
+    variantes = normalizador.agregar_variantes_a_tabla(df_final, umbral_min=80, auto_guardar=True)
+    return {"df": df_final, "por_archivo": por_archivo,
+            "espera_final": time.perf_counter() - inicio, "variantes": variantes}
+
+
+def por_archivo(normalizador, archivos: List[pd.DataFrame]) -> Dict:
+    tiempos, normalizados = [], []
+    sesion = normalizador.NormalizacionPorArchivo(columna_descripcion='Descripcion', umbral_similitud=75)
+    for archivo in archivos:
+        inicio = time.perf_counter()
+        normalizados.append(sesion.normalizar(archivo.copy(), agregar_columnas_debug=True))
+        tiempos.append(time.perf_counter() - inicio)
+    sesion.cerrar()
+
+    inicio = time.perf_counter()
+    df_final = pd.concat(normalizados, ignore_index=True)
+    df_final.attrs = sesion.attrs()
+    variantes = normalizador.agregar_variantes_a_tabla(df_final, umbral_min=80, auto_guardar=True)
+    return {"df": df_final, "por_archivo": tiempos,
+            "espera_final": time.perf_counter() - inicio, "variantes": variantes}
+
+
+MODOS = {"al_final": al_final, "por_archivo": por_archivo}
+
+
+def _sin_tiempos(por_particion: Dict) -> Dict:
+    """Estadísticas sin tiempos ni aciertos de cache (por archivo hay más aciertos)."""
+    return {
+        p: {k: v for k, v in datos.items() if k not in ("segundos", "desde_cache")}
+        for p, datos in (por_particion or {}).items()
+    }
+
+
+def correr(n_filas: int, n_productos: int, por_factura: int) -> Dict:
+    catalogo = generar_catalogo(n_productos)
+    tabla = generar_tabla_auxiliar(catalogo)
+    proveedores = np.random.default_rng(7).choice(PROVEEDORES, len(tabla))
+    tabla["Proveedor"] = np.where(tabla["Nombre Gestion"] == tabla["Base"], "", proveedores)
+    archivos = facturas(generar_items(catalogo, n_filas), por_factura)
+
+    resultados = {}
+    for nombre, modo in MODOS.items():
+        with normalizador_temporal(tabla) as normalizador:
+            # Índice cargado antes de medir, como en la app ya abierta
+            _silencioso(normalizador.obtener_indice_normalizacion)
+            resultados[nombre] = _silencioso(lambda: modo(normalizador, archivos))
+
+    antes, ahora = resultados["al_final"], resultados["por_archivo"]
+    verificacion = {
+        "columnas": all(antes["df"][c].equals(ahora["df"][c]) for c in COLUMNAS),
+        "particiones": _sin_tiempos(antes["df"].attrs.get("particiones_normalizacion"))
+        == _sin_tiempos(ahora["df"].attrs.get("particiones_normalizacion")),
+        "variantes": antes["variantes"] == ahora["variantes"],
+    }
+    modos = {
+        nombre: {
+            "espera_final": r["espera_final"],
+            "por_archivo_medio": float(np.mean(r["por_archivo"])),
+            "por_archivo_max": float(np.max(r["por_archivo"])),
+            "total": float(np.sum(r["por_archivo"])) + r["espera_final"],
+            "variantes": r["variantes"],
+            "cache": r["df"].attrs.get("cache_normalizacion"),
+        }
+        for nombre, r in resultados.items()
+    }
+    return {"filas": n_filas, "archivos": len(archivos), "productos": len(catalogo),
+            "variantes_tabla": len(tabla), "modos": modos, "verificacion": verificacion}
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"NORMALIZACIÓN POR ARCHIVO EN LA PESTAÑA GENERAL ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"{reporte['filas']:,} filas en {reporte['archivos']:,} facturas, "
+          f"tabla de {reporte['variantes_tabla']:,} variantes")
+    print(f"{'modo':>12} {'por archivo (medio/máx)':>24} {'espera final':>13} {'total':>8} {'variantes':>10}")
+    for nombre, m in reporte["modos"].items():
+        print(f"{nombre:>12} {m['por_archivo_medio'] * 1000:>10.1f} / {m['por_archivo_max'] * 1000:>7.1f} ms "
+              f"{m['espera_final']:>12.3f}s {m['total']:>7.2f}s {m['variantes']:>10,}")
+    print("-" * 78)
+    v = reporte["verificacion"]
+    print(f"Mismas columnas: {v['columnas']}  mismas estadísticas por partición: {v['particiones']}  "
+          f"mismas variantes: {v['variantes']}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la normalización por archivo")
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--productos", type=int, default=2_000)
+    parser.add_argument("--items", type=int, default=40, help="Ítems por factura")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {"cpus": os.cpu_count(), **correr(args.filas, args.productos, args.items)}
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not all(reporte["verificacion"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
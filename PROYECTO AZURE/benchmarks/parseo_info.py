@@ -0,0 +1,161 @@
+# parseo_info.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del parseo vectorizado de la columna concatenada (main.py).
+
+  - equivalencia: `parse_columna_concatenada_serie` contra el split por '-'
+    anterior en filas donde ese split era correcto (número sin guion), y
+    número completo en las filas XXXX-XXXXXXXX que el split cortaba
+  - escala: tiempo del parseo vectorizado sobre 1.000.000 de filas, con
+    todas las facturas distintas y con varios ítems por factura (la columna
+    se repite en cada ítem); el apply fila por fila se extrapola (lineal)
+    desde la muestra
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/parseo_info.py
+    python benchmarks/parseo_info.py --filas 1000000 --muestra 50000 --json parseo.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+import pandas as pd
+
+from normalizacion.main import parse_columna_concatenada_serie
+
+PROVEEDORES = ["PROVEEDOR SA", "DISTRIBUIDORA NORTE SRL", "COCA COLA FEMSA", "QUILMES", "ARCOR SAIC"]
+
+
+def parse_split_original(valor: str) -> Dict[str, str]:
+    """Parser anterior: split por '-' y regex de fecha sobre la tercera parte."""
+    resultado = {'tipo': None, 'numero': None, 'fecha': None, 'proveedor': None, 'orden_compra': None}
+    partes = [p.strip() for p in str(valor).split('-')]
+    if len(partes) >= 1:
+        resultado['tipo'] = partes[0]
+    if len(partes) >= 2:
+        resultado['numero'] = partes[1]
+    if len(partes) >= 3:
+        fecha_match = re.search(r'(\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{4})', partes[2])
+        if fecha_match:
+            resultado['fecha'] = fecha_match.group(1)
+    if len(partes) >= 4:
+        resultado['proveedor'] = partes[3]
+    if len(partes) >= 5:
+        resultado['orden_compra'] = '-'.join(partes[4:])
+    return resultado
+
+
+def generar_info(n: int, con_guion: bool, semilla: int = 42) -> List[str]:
+    """Filas "Tipo - Num - Fecha - Prov - OC" (fecha DD/MM/YYYY: el split no la cortaba)."""
+    rng = np.random.default_rng(semilla)
+    tipos = rng.choice(["FC", "NC", "ND", "FCE"], n)
+    puntos = rng.integers(1, 20, n)
+    numeros = rng.integers(1, 99_999_999, n)
+    dias = rng.integers(1, 29, n)
+    meses = rng.integers(1, 13, n)
+    proveedores = rng.choice(PROVEEDORES, n)
+    ocs = rng.integers(1, 9999, n)
+    filas = []
+    for i in range(n):
+        numero = f"{puntos[i]:04d}-{numeros[i]:08d}" if con_guion else f"{numeros[i]:08d}"
+        filas.append(
+            f"{tipos[i]} - {numero} - {dias[i]:02d}/{meses[i]:02d}/2024 - {proveedores[i]} - OC{ocs[i]}"
+        )
+    return filas
+
+
+def verificar(n: int) -> Dict:
+    # Sin guion en el número: mismos campos que el split
+    filas = generar_info(n, con_guion=False)
+    vectorizado = parse_columna_concatenada_serie(pd.Series(filas))
+    referencia = pd.DataFrame([parse_split_original(f) for f in filas])
+    fechas = pd.to_datetime(referencia['fecha'], format='%d/%m/%Y')
+    distintas = {
+        campo: int((vectorizado[campo].astype(str) != referencia[campo].astype(str)).sum())
+        for campo in ('tipo', 'numero', 'proveedor', 'orden_compra')
+    }
+    distintas['fecha'] = int((vectorizado['fecha'] != fechas).sum())
+
+    # Con guion: número completo
+    filas = generar_info(n, con_guion=True, semilla=7)
+    vectorizado = parse_columna_concatenada_serie(pd.Series(filas))
+    esperados = pd.Series([f.split(' - ')[1] for f in filas])
+    numero_completo = int((vectorizado['numero'] == esperados).sum())
+
+    return {
+        "filas": n,
+        "distintas_sin_guion": distintas,
+        "numero_completo_con_guion": numero_completo,
+        "iguales": not any(distintas.values()) and numero_completo == n,
+    }
+
+
+def medir(n_filas: int, n_muestra: int, items_por_factura: int) -> Dict:
+    muestra = pd.Series(generar_info(n_muestra, con_guion=True))
+    inicio = time.perf_counter()
+    pd.DataFrame(muestra.apply(parse_split_original).tolist())
+    apply_muestra_s = time.perf_counter() - inicio
+
+    facturas = generar_info(max(1, n_filas // items_por_factura), con_guion=True)
+    filas = pd.Series(np.repeat(facturas, items_por_factura)[:n_filas])
+    inicio = time.perf_counter()
+    resultado = parse_columna_concatenada_serie(filas)
+    vectorizado_s = time.perf_counter() - inicio
+
+    return {
+        "filas": len(filas),
+        "items_por_factura": items_por_factura,
+        "apply_muestra_s": apply_muestra_s,
+        "apply_estimado_s": apply_muestra_s * len(filas) / n_muestra,
+        "vectorizado_s": vectorizado_s,
+        "memoria_mb": resultado.memory_usage(deep=True).sum() / 1024 / 1024,
+        "memoria_texto_mb": filas.memory_usage(deep=True) / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parseo de la columna concatenada")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--muestra", type=int, default=50_000)
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 8], help="Ítems por factura")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {
+        "cpus": os.cpu_count(),
+        "verificacion": verificar(args.muestra),
+        "escala": [medir(args.filas, args.muestra, items) for items in args.items],
+    }
+    v = reporte["verificacion"]
+    print("=" * 78)
+    print(f"PARSEO DE LA COLUMNA CONCATENADA ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"Sin guion en el número ({v['filas']:,} filas), campos distintos al split: {v['distintas_sin_guion']}")
+    print(f"Con número XXXX-XXXXXXXX: {v['numero_completo_con_guion']:,} / {v['filas']:,} completos")
+    print("-" * 78)
+    print(f"{'filas':>10} {'ítems/fact.':>12} {'apply (est.)':>13} {'str.extract':>12} {'MB texto':>9} {'MB tipado':>10}")
+    for e in reporte["escala"]:
+        print(f"{e['filas']:>10,} {e['items_por_factura']:>12} {e['apply_estimado_s']:>12.1f}s "
+              f"{e['vectorizado_s']:>11.1f}s {e['memoria_texto_mb']:>9.0f} {e['memoria_mb']:>10.0f}")
+    print("=" * 78)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not v["iguales"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# pdf_raster.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark del rasterizado local de PDFs (src.pdf_local) para elegir PDF_RASTER_DPI.
+
+Para cada DPI mide el tiempo de render (sin cache y con cache) y el tamaño de
+los PNG que se envían a Gemini. Sin argumentos genera un PDF sintético de
+factura; con --pdf se usa un archivo real.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/pdf_raster.py
+    python benchmarks/pdf_raster.py --pdf factura.pdf --dpi 100 150 200 300
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import fitz  # PyMuPDF
+
+from src import pdf_local
+
+
+def generar_pdf_sintetico(paginas: int = 2, lineas: int = 40) -> bytes:
+    """PDF con texto de factura (sirve para medir render; la capa de texto es usable)."""
+    doc = fitz.open()
+    for p in range(paginas):
+        page = doc.new_page()
+        page.insert_text((40, 50), f"FACTURA A  N° 0001-{p + 1:08d}  CUIT 30-12345678-9", fontsize=12)
+        for i in range(lineas):
+            page.insert_text(
+                (40, 80 + i * 17),
+                f"{1000 + i}  PRODUCTO DE PRUEBA {i:03d} X 12 UN   {i + 1:>4}   $ {1234.5 * (i + 1):>12,.2f}",
+                fontsize=9,
+            )
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rasterizado de PDFs")
+    parser.add_argument("--pdf", help="PDF a rasterizar (default: sintético)")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[100, 150, 200, 300])
+    args = parser.parse_args()
+
+    pdf_bytes = Path(args.pdf).read_bytes() if args.pdf else generar_pdf_sintetico()
+    paginas = len(pdf_local.extract_text_pages(pdf_bytes))
+    usable = pdf_local.text_layer_is_usable(pdf_local.extract_text_pages(pdf_bytes), min_chars=80)
+
+    print("=" * 60)
+    print(f"RASTERIZADO LOCAL: {paginas} páginas (capa de texto usable: {usable})")
+    print("=" * 60)
+    print(f"{'DPI':>5} {'render (ms)':>12} {'cache (ms)':>11} {'KB/página':>10}")
+    for dpi in args.dpi:
+        pdf_local.clear_cache()
+        inicio = time.perf_counter()
+        pngs = pdf_local.render_pages_png(pdf_bytes, dpi=dpi)
+        frio_ms = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        pdf_local.render_pages_png(pdf_bytes, dpi=dpi)
+        cache_ms = (time.perf_counter() - inicio) * 1000
+
+        kb = sum(len(p) for p in pngs) / len(pngs) / 1024
+        print(f"{dpi:>5} {frio_ms:>12.1f} {cache_ms:>11.2f} {kb:>10.0f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# preseleccion_ngramas.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y recall de la preselección por trigramas (candidatos_k).
+
+Para cada K compara `buscar_lote(..., candidatos_k=K)` contra la búsqueda
+completa (cdist contra todas las variantes) sobre la misma tabla sintética:
+  - recall_match:     de las descripciones con match >= umbral en la búsqueda
+                      completa, proporción que encuentra la misma variante
+  - iguales:          proporción con el mismo resultado (normalizada + método)
+  - falsos_sin_match: descripciones que pasan de Fuzzy a 'Sin match'
+
+Sirve para elegir K (NORMALIZACION_CANDIDATOS_K) según el tamaño de la tabla.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/preseleccion_ngramas.py
+    python benchmarks/preseleccion_ngramas.py --variantes 50000 --consultas 5000 --k 50 100 200 500 --json k.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from normalizacion.indice_normalizacion import METODO_FUZZY, NormalizationIndex
+from normalizacion_lote import generar_consultas, generar_tabla
+
+
+def medir(n_variantes: int, n_consultas: int, valores_k: List[int], umbral: float) -> Dict:
+    variantes, bases = generar_tabla(n_variantes)
+    indice = NormalizationIndex(variantes, bases)
+    consultas = generar_consultas(variantes, n_consultas)
+
+    inicio = time.perf_counter()
+    indice.indice_ngramas()
+    construccion_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ref_norm, _, ref_met, ref_var = indice.buscar_lote(consultas, umbral)
+    completa_s = time.perf_counter() - inicio
+    con_match = ref_met == METODO_FUZZY
+
+    filas = []
+    for k in valores_k:
+        inicio = time.perf_counter()
+        norm, _, met, var = indice.buscar_lote(consultas, umbral, candidatos_k=k)
+        preseleccion_s = time.perf_counter() - inicio
+
+        filas.append({
+            "k": k,
+            "preseleccion_s": preseleccion_s,
+            "speedup": completa_s / preseleccion_s if preseleccion_s else None,
+            "recall_match": float(np.mean(var[con_match] == ref_var[con_match])) if con_match.any() else 1.0,
+            "iguales": float(np.mean((norm == ref_norm) & (met == ref_met))),
+            "falsos_sin_match": int(np.sum(con_match & (met != METODO_FUZZY))),
+        })
+
+    return {
+        "variantes": n_variantes,
+        "consultas": n_consultas,
+        "umbral": umbral,
+        "cpus": os.cpu_count(),
+        "construccion_ngramas_s": construccion_s,
+        "completa_s": completa_s,
+        "con_match": int(con_match.sum()),
+        "resultados": filas,
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    print("=" * 78)
+    print(f"PRESELECCIÓN POR TRIGRAMAS: {reporte['variantes']:,} variantes, {reporte['consultas']:,} consultas, "
+          f"umbral {reporte['umbral']}, {reporte['cpus']} CPUs")
+    print(f"Índice de trigramas en {reporte['construccion_ngramas_s']:.2f}s | búsqueda completa "
+          f"{reporte['completa_s']:.2f}s ({reporte['con_match']:,} con match)")
+    print("=" * 78)
+    print(f"{'K':>6} {'tiempo':>9} {'speedup':>8} {'recall':>8} {'iguales':>8} {'perdidos':>9}")
+    for f in reporte["resultados"]:
+        print(f"{f['k']:>6} {f['preseleccion_s']:>8.2f}s {f['speedup']:>7.1f}x {f['recall_match'] * 100:>7.2f}% "
+              f"{f['iguales'] * 100:>7.2f}% {f['falsos_sin_match']:>9}")
+    print("-" * 78)
+    print("recall = misma variante que la búsqueda completa entre las que tenían match; "
+          "perdidos = Fuzzy -> Sin match")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall y tiempo de la preselección por trigramas")
+    parser.add_argument("--variantes", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=5000)
+    parser.add_argument("--k", type=int, nargs="+", default=[50, 100, 200, 500, 1000])
+    parser.add_argument("--umbral", type=float, default=75)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = medir(args.variantes, args.consultas, args.k, args.umbral)
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+
+if __name__ == "__main__":
+    main()
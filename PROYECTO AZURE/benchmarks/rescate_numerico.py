@@ -0,0 +1,155 @@
+# rescate_numerico.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark y verificación del rescate numérico vectorizado (main.py).
+
+  - equivalencia: `rescatar_valores_numericos_lote` contra
+    `df.apply(rescatar_valores_numericos, axis=1)` en una muestra con todos
+    los casos (ninguno / uno / varios faltantes, ceros, NaN, textos en
+    columnas object, columna ausente); tienen que dar el mismo DataFrame
+  - escala: tiempo del rescate vectorizado sobre 1.000.000 de filas; el
+    apply por fila se extrapola (lineal) desde la muestra
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/rescate_numerico.py
+    python benchmarks/rescate_numerico.py --filas 1000000 --muestra 50000 --json rescate.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+import pandas as pd
+
+from normalizacion.main import rescatar_valores_numericos, rescatar_valores_numericos_lote
+
+
+def generar_filas(n: int, semilla: int = 42) -> pd.DataFrame:
+    """Filas de factura con ~70% completas, ~20% con un faltante y ~10% con varios."""
+    rng = np.random.default_rng(semilla)
+    cantidad = rng.integers(1, 50, n).astype(np.float64)
+    precio = np.round(rng.uniform(10, 5000, n), 2)
+    subtotal = cantidad * precio
+
+    caso = rng.random(n)
+    columnas = [cantidad, precio, subtotal]
+    for k, columna in enumerate(columnas):
+        # Un faltante (NaN o 0) en la columna k
+        uno = (caso >= 0.70 + 0.0667 * k) & (caso < 0.70 + 0.0667 * (k + 1))
+        columna[uno & (rng.random(n) < 0.5)] = np.nan
+        columna[uno & (columna == columna)] = 0
+    varios = caso >= 0.90
+    cantidad[varios] = np.nan
+    precio[varios & (rng.random(n) < 0.5)] = 0
+
+    return pd.DataFrame({
+        "Descripcion": rng.choice(["COCA COLA 600CC X6", "FERNET BRANCA 750ML", "AGUA 6X500CC"], n),
+        "Cantidad": cantidad,
+        "Precio_Unitario": precio,
+        "Subtotal": subtotal,
+    })
+
+
+def casos_especiales() -> List[pd.DataFrame]:
+    """
+    Columnas object con textos y números, y un frame sin columna Cantidad.
+
+    Sin entero x texto: la versión por fila repetía el texto ('s/d' * 4) y la
+    vectorizada deja la fila insalvable.
+    """
+    mixto = pd.DataFrame({
+        "Cantidad": [2, "3", np.nan, 4.0, "x", 0, 5],
+        "Precio_Unitario": [10.0, 5.0, 2.0, "s/d", 1.0, np.nan, 3.0],
+        "Subtotal": [np.nan, 15.0, 8.0, np.nan, 7.0, 9.0, 0],
+    }, dtype=object)
+    sin_cantidad = pd.DataFrame({"Precio_Unitario": [2.0, 3.0, 0.0], "Subtotal": [4.0, np.nan, 1.0]})
+    return [mixto, sin_cantidad]
+
+
+def iguales(df: pd.DataFrame) -> bool:
+    referencia = df.copy()
+    referencia["Salvable"] = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        referencia = referencia.apply(rescatar_valores_numericos, axis=1)
+    lote = rescatar_valores_numericos_lote(df)
+    columnas = sorted(referencia.columns)
+    try:
+        pd.testing.assert_frame_equal(
+            referencia[columnas].astype(object), lote[columnas].astype(object), check_dtype=False
+        )
+    except AssertionError:
+        return False
+    return True
+
+
+def medir(n_filas: int, n_muestra: int) -> Dict:
+    muestra = generar_filas(n_muestra)
+    inicio = time.perf_counter()
+    referencia = muestra.copy()
+    referencia["Salvable"] = True
+    referencia.apply(rescatar_valores_numericos, axis=1)
+    apply_muestra_s = time.perf_counter() - inicio
+
+    df = generar_filas(n_filas)
+    inicio = time.perf_counter()
+    resultado = rescatar_valores_numericos_lote(df)
+    lote_s = time.perf_counter() - inicio
+    apply_estimado_s = apply_muestra_s * n_filas / n_muestra
+
+    return {
+        "filas": n_filas,
+        "muestra": n_muestra,
+        "iguales_muestra": iguales(muestra),
+        "iguales_especiales": all(iguales(caso) for caso in casos_especiales()),
+        "apply_muestra_s": apply_muestra_s,
+        "apply_estimado_s": apply_estimado_s,
+        "lote_s": lote_s,
+        "speedup_estimado": apply_estimado_s / lote_s if lote_s else None,
+        "insalvables": int((~resultado["Salvable"]).sum()),
+    }
+
+
+def imprimir(reporte: Dict) -> None:
+    r = reporte["resultado"]
+    print("=" * 78)
+    print(f"RESCATE NUMÉRICO VECTORIZADO ({reporte['cpus']} CPUs)")
+    print("=" * 78)
+    print(f"Equivalencia con apply por fila: muestra de {r['muestra']:,} filas = {r['iguales_muestra']}, "
+          f"casos especiales = {r['iguales_especiales']}")
+    print(f"apply por fila:  {r['apply_muestra_s']:.2f}s con {r['muestra']:,} filas "
+          f"→ ~{r['apply_estimado_s']:.0f}s estimados con {r['filas']:,}")
+    print(f"vectorizado:     {r['lote_s']:.2f}s con {r['filas']:,} filas ({r['insalvables']:,} insalvables)")
+    print(f"speedup estimado: {r['speedup_estimado']:.0f}x")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del rescate numérico vectorizado")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--muestra", type=int, default=50_000)
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    args = parser.parse_args()
+
+    reporte = {"cpus": os.cpu_count(), "resultado": medir(args.filas, args.muestra)}
+    imprimir(reporte)
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+    if not (reporte["resultado"]["iguales_muestra"] and reporte["resultado"]["iguales_especiales"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
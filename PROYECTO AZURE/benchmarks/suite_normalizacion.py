@@ -0,0 +1,287 @@
+# suite_normalizacion.py
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks de normalización y clustering sobre datos sintéticos.
+
+Con el generador de datos_sinteticos.py (catálogo + tabla auxiliar + ítems con
+la respuesta correcta) corre, para cada cantidad de filas de --filas:
+
+  - normalizar_dataframe (src/normalizador.py, la pestaña de la app), con el
+    almacén, la cache y el artefacto en una carpeta temporal y sin cache de
+    resultados (cada corrida calcula todo)
+  - normalizar_con_fuzzy_matching (normalizacion_con_auxiliar.py), modo lote
+  - clustering_jerarquico (main.py) sobre el Pareto de las filas
+
+y guarda, por operación y escala:
+
+  - segundos: tiempo de pared
+  - pico_mb: memoria asignada máxima durante la operación (tracemalloc, en
+    una segunda corrida para no cargar el tiempo medido)
+  - calidad contra la respuesta correcta:
+      normalización: aciertos (filas con la base correcta), cobertura
+      (filas con match Exacta/Fuzzy) y precisión (aciertos entre las cubiertas)
+      clustering: precisión / recall / F1 por pares de descripciones únicas
+      en cada nivel (mismo producto = misma familia)
+
+El JSON incluye commit, CPUs y parámetros; con --comparar se imprime la
+diferencia contra un JSON anterior (misma operación y escala).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/suite_normalizacion.py
+    python benchmarks/suite_normalizacion.py --filas 1000 10000 100000 --json suite.json
+    python benchmarks/suite_normalizacion.py --json suite_nueva.json --comparar suite.json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pandas as pd
+
+from datos_sinteticos import generar_catalogo, generar_items, generar_tabla_auxiliar
+from normalizacion.main import analisis_pareto, clustering_jerarquico
+from normalizacion.normalizacion_con_auxiliar import normalizar_con_fuzzy_matching
+
+VERSION_REPORTE = 1
+METODOS_CON_MATCH = ("Exacta", "Fuzzy")
+
+# Métrica principal de cada operación para --comparar
+METRICA_PRINCIPAL = {
+    "normalizar_dataframe": "aciertos",
+    "normalizar_con_fuzzy_matching": "aciertos",
+    "clustering_jerarquico": "f1_n1",
+}
+
+
+def _silencioso(operacion: Callable):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return operacion()
+
+
+def medir(operacion: Callable, medir_memoria: bool = True) -> Tuple[Dict, object]:
+    """Tiempo de pared de `operacion` y, aparte, su pico de memoria con tracemalloc."""
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = _silencioso(operacion)
+    medicion = {"segundos": time.perf_counter() - inicio, "pico_mb": None}
+
+    if medir_memoria:
+        gc.collect()
+        tracemalloc.start()
+        _silencioso(operacion)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        medicion["pico_mb"] = pico / 1024 / 1024
+    return medicion, resultado
+
+
+def calidad_normalizacion(normalizadas: pd.Series, metodos: pd.Series, correctas: pd.Series) -> Dict:
+    aciertos = normalizadas.to_numpy() == correctas.to_numpy()
+    cubiertas = metodos.isin(METODOS_CON_MATCH).to_numpy()
+    return {
+        "aciertos": float(aciertos.mean()),
+        "cobertura": float(cubiertas.mean()),
+        "precision": float(aciertos[cubiertas].mean()) if cubiertas.any() else 0.0,
+    }
+
+
+def _pares(tamanios: pd.Series) -> int:
+    return int((tamanios * (tamanios - 1) // 2).sum())
+
+
+def calidad_clustering(df_final: pd.DataFrame, df_items: pd.DataFrame, niveles: int) -> Dict:
+    """Precisión / recall / F1 por pares sobre descripciones únicas, por nivel."""
+    # Producto de cada descripción: el más frecuente entre sus filas
+    producto = (
+        df_items.groupby(["Descripcion", "Producto_Id"]).size()
+        .sort_values(ascending=False, kind="stable").reset_index()
+        .drop_duplicates("Descripcion").set_index("Descripcion")["Producto_Id"]
+    )
+    columnas = [f"Familia_N{n}" for n in range(1, niveles + 1)]
+    familias = df_final[["Descripcion"] + columnas].astype(object).drop_duplicates("Descripcion")
+    familias = familias[familias["Descripcion"].notna()]
+    familias["Producto_Id"] = familias["Descripcion"].map(producto).to_numpy()
+
+    pares_producto = _pares(familias.groupby("Producto_Id").size())
+    resultado = {"descripciones": len(familias)}
+    for n, columna in enumerate(columnas, start=1):
+        pares_familia = _pares(familias.groupby(columna).size())
+        correctos = _pares(familias.groupby([columna, "Producto_Id"]).size())
+        precision = correctos / pares_familia if pares_familia else 1.0
+        recall = correctos / pares_producto if pares_producto else 1.0
+        resultado[f"familias_n{n}"] = int(familias[columna].nunique())
+        resultado[f"precision_n{n}"] = precision
+        resultado[f"recall_n{n}"] = recall
+        resultado[f"f1_n{n}"] = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return resultado
+
+
+@contextlib.contextmanager
+def normalizador_temporal(tabla: pd.DataFrame):
+    """`src/normalizador.py` con almacén, cache y artefacto en una carpeta temporal."""
+    import normalizador
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        carpeta = Path(carpeta)
+        excel = carpeta / "tabla_normalizacion.xlsx"
+        tabla.to_excel(excel, index=False)
+        anteriores = {
+            nombre: getattr(normalizador, nombre)
+            for nombre in ("TABLA_AUXILIAR_PATHS", "VARIANTES_DB_PATH",
+                           "CACHE_NORMALIZACION_PATH", "TABLA_COMPILADA_PATH")
+        }
+        normalizador.TABLA_AUXILIAR_PATHS = [str(excel)]
+        normalizador.VARIANTES_DB_PATH = carpeta / "variantes.sqlite"
+        normalizador.CACHE_NORMALIZACION_PATH = carpeta / "normalizacion.sqlite"
+        normalizador.TABLA_COMPILADA_PATH = carpeta / "tabla_normalizacion.pkl"
+        try:
+            yield normalizador
+        finally:
+            for nombre, valor in anteriores.items():
+                setattr(normalizador, nombre, valor)
+
+
+def correr(filas: List[int], productos: int, variantes_por_producto: int, semilla: int,
+           umbrales: List[int], medir_memoria: bool) -> Dict:
+    catalogo = generar_catalogo(productos, semilla=semilla)
+    tabla = generar_tabla_auxiliar(catalogo, variantes_por_producto, semilla=semilla + 1)
+    resultados = []
+
+    with normalizador_temporal(tabla) as normalizador:
+        inicio = time.perf_counter()
+        _silencioso(normalizador.obtener_indice_normalizacion)
+        carga_indice_s = time.perf_counter() - inicio
+
+        for n in filas:
+            items = generar_items(catalogo, n, semilla=semilla + 2)
+            datos = items[["Descripcion", "Cantidad", "Proveedor"]]
+
+            medicion, df = medir(
+                lambda: normalizador.normalizar_dataframe(datos.copy(), agregar_columnas_debug=True, usar_cache=False),
+                medir_memoria
+            )
+            resultados.append({
+                "operacion": "normalizar_dataframe", "filas": n, **medicion,
+                "calidad": calidad_normalizacion(df["Producto_Normalizado"], df["Metodo_Match"], items["Base_Real"]),
+            })
+
+            medicion, df = medir(lambda: normalizar_con_fuzzy_matching(datos, tabla), medir_memoria)
+            resultados.append({
+                "operacion": "normalizar_con_fuzzy_matching", "filas": n, **medicion,
+                "calidad": calidad_normalizacion(df["Descripcion_Normalizada"], df["Metodo_Match"], items["Base_Real"]),
+            })
+
+            df_pareto = _silencioso(lambda: analisis_pareto(datos))
+            medicion, df = medir(lambda: clustering_jerarquico(df_pareto, umbrales=umbrales), medir_memoria)
+            resultados.append({
+                "operacion": "clustering_jerarquico", "filas": n, **medicion,
+                "calidad": calidad_clustering(df, items, len(umbrales)),
+            })
+
+    return {
+        "catalogo": {"productos": len(catalogo), "variantes_tabla": len(tabla), "carga_indice_s": carga_indice_s},
+        "resultados": resultados,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def imprimir(reporte: Dict) -> None:
+    c = reporte["catalogo"]
+    print("=" * 78)
+    print(f"SUITE DE NORMALIZACIÓN Y CLUSTERING ({reporte['cpus']} CPUs, commit {reporte['commit'] or '-'})")
+    print("=" * 78)
+    print(f"Catálogo: {c['productos']:,} productos, tabla auxiliar de {c['variantes_tabla']:,} variantes "
+          f"(índice de la app en {c['carga_indice_s']:.2f}s)")
+    print(f"{'operación':>30} {'filas':>9} {'tiempo':>9} {'pico MB':>8}  calidad")
+    for r in reporte["resultados"]:
+        q = r["calidad"]
+        if r["operacion"] == "clustering_jerarquico":
+            calidad = " ".join(f"F1 N{n} {q[f'f1_n{n}']:.3f}" for n in range(1, 5) if f"f1_n{n}" in q)
+        else:
+            calidad = f"aciertos {q['aciertos']:.1%}, cobertura {q['cobertura']:.1%}, precisión {q['precision']:.1%}"
+        pico = f"{r['pico_mb']:>8,.0f}" if r["pico_mb"] is not None else f"{'-':>8}"
+        print(f"{r['operacion']:>30} {r['filas']:>9,} {r['segundos']:>8.2f}s {pico}  {calidad}")
+    print("=" * 78)
+
+
+def comparar(reporte: Dict, anterior: Dict) -> None:
+    previos = {(r["operacion"], r["filas"]): r for r in anterior["resultados"]}
+    print(f"\nCOMPARACIÓN CONTRA commit {anterior.get('commit') or '-'}")
+    print("-" * 78)
+    print(f"{'operación':>30} {'filas':>9} {'tiempo':>16} {'Δ':>7} {'métrica':>9} {'Δ':>8}")
+    for r in reporte["resultados"]:
+        previo = previos.get((r["operacion"], r["filas"]))
+        if previo is None:
+            continue
+        metrica = METRICA_PRINCIPAL[r["operacion"]]
+        delta_tiempo = r["segundos"] / previo["segundos"] - 1 if previo["segundos"] else 0.0
+        delta_calidad = r["calidad"][metrica] - previo["calidad"][metrica]
+        print(f"{r['operacion']:>30} {r['filas']:>9,} {previo['segundos']:>6.2f}s → {r['segundos']:>6.2f}s "
+              f"{delta_tiempo:>+7.0%} {metrica:>9} {delta_calidad:>+8.4f}")
+    print("-" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de normalización y clustering")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--productos", type=int, default=3_000, help="Productos del catálogo sintético")
+    parser.add_argument("--variantes-por-producto", type=int, default=3, help="Variantes de cada producto en la tabla auxiliar")
+    parser.add_argument("--umbrales", type=int, nargs="+", default=[85, 75, 65, 55])
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria (una sola corrida)")
+    parser.add_argument("--json", dest="archivo_json", help="Guardar el reporte en este archivo JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    reporte = {
+        "version": VERSION_REPORTE,
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _commit(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "parametros": {
+            "filas": args.filas,
+            "productos": args.productos,
+            "variantes_por_producto": args.variantes_por_producto,
+            "umbrales": args.umbrales,
+            "semilla": args.semilla,
+        },
+        **correr(args.filas, args.productos, args.variantes_por_producto, args.semilla,
+                 args.umbrales, not args.sin_memoria),
+    }
+    imprimir(reporte)
+
+    if args.comparar:
+        comparar(reporte, json.loads(Path(args.comparar).read_text(encoding="utf-8")))
+
+    if args.archivo_json:
+        Path(args.archivo_json).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n✓ Reporte guardado en: {args.archivo_json}")
+
+
+if __name__ == "__main__":
+    main()
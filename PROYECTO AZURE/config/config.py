@@ -8,24 +8,35 @@ Soporta Streamlit Cloud secrets.
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Optional
 
-# Cargar variables de entorno desde .env (para ejecución local)
-load_dotenv()
+# Referencia al propio módulo: las funciones leen la configuración a través de él
+# para que los valores perezosos (ver __getattr__ al final) se resuelvan al usarse.
+_cfg = sys.modules[__name__]
 
-# Detectar si estamos en Streamlit Cloud
-try:
-    import streamlit as st
-    # Try to access secrets, if it fails, we're not on cloud
+
+@lru_cache(maxsize=None)
+def _cargar_entorno() -> None:
+    """Carga variables de entorno desde .env (para ejecución local), una sola vez."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def _running_on_streamlit_cloud() -> bool:
+    """Detecta si estamos en Streamlit Cloud (lee secrets.toml una sola vez)."""
     try:
-        RUNNING_ON_STREAMLIT_CLOUD = hasattr(st, 'secrets') and len(st.secrets) > 0
-    except Exception:
-        # Si no hay secrets.toml, no estamos en cloud
-        RUNNING_ON_STREAMLIT_CLOUD = False
-except ImportError:
-    RUNNING_ON_STREAMLIT_CLOUD = False
+        import streamlit as st
+        # Try to access secrets, if it fails, we're not on cloud
+        try:
+            return hasattr(st, 'secrets') and len(st.secrets) > 0
+        except Exception:
+            # Si no hay secrets.toml, no estamos en cloud
+            return False
+    except ImportError:
+        return False
 
 # =========================
 # VALIDACIÓN DE ENTORNO
@@ -41,8 +52,10 @@ def _get_required_env(var_name: str) -> str:
     Soporta tanto .env como Streamlit secrets.
     Lanza ConfigurationError si no existe.
     """
+    _cargar_entorno()
+
     # Primero intentar Streamlit secrets (si está disponible)
-    if RUNNING_ON_STREAMLIT_CLOUD:
+    if _running_on_streamlit_cloud():
         try:
             import streamlit as st
             if var_name in st.secrets:
@@ -65,8 +78,10 @@ def _get_optional_env(var_name: str, default: str = "") -> str:
     Obtiene una variable de entorno opcional con valor por defecto.
     Soporta tanto .env como Streamlit secrets.
     """
+    _cargar_entorno()
+
     # Primero intentar Streamlit secrets (si está disponible)
-    if RUNNING_ON_STREAMLIT_CLOUD:
+    if _running_on_streamlit_cloud():
         try:
             import streamlit as st
             if var_name in st.secrets:
@@ -79,48 +94,10 @@ def _get_optional_env(var_name: str, default: str = "") -> str:
 
 
 # =========================
-# AZURE DOCUMENT INTELLIGENCE
-# =========================
-AZURE_ENDPOINT = _get_required_env("AZURE_ENDPOINT")
-AZURE_KEY = _get_required_env("AZURE_KEY")
-SKIP_AZURE = _get_optional_env("SKIP_AZURE", "0").lower() in ("1", "true", "t", "yes", "y")
-
-# =========================
-# GEMINI (Google AI)
-# =========================
-GEMINI_API_KEY = _get_required_env("GEMINI_API_KEY")
-GEMINI_MODEL = _get_optional_env("GEMINI_MODEL", "gemini-2.5-pro")
-GEMINI_TEMPERATURE = float(_get_optional_env("GEMINI_TEMPERATURE", "0.1"))
-GEMINI_MAX_TOKENS = int(_get_optional_env("GEMINI_MAX_TOKENS", "4096"))
-
-# =========================
-# GOOGLE DRIVE
+# CONSTANTES
 # =========================
-DRIVE_FOLDER_ID = _get_optional_env("FOLDER_ID", "1Zax30lsPpeMiHby58RmV_iCT80M0lHPQ")
-DRIVE_CREDENTIALS_FILE = Path(_get_optional_env(
-    "DRIVE_CREDENTIALS_FILE",
-    "credentials/credentials.json"
-))
 DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-
-# =========================
-# PROCESAMIENTO
-# =========================
 ALLOWED_MIME_TYPES = {'image/jpeg', 'image/png', 'application/pdf'}
-MAX_ITEMS_DISPLAY = int(_get_optional_env("MAX_ITEMS_DISPLAY", "50"))
-SLEEP_BETWEEN_FILES = float(_get_optional_env("SLEEP_BETWEEN_FILES", "0.4"))
-
-# Tolerancia para validación de cálculos (Cantidad * Precio ≈ Subtotal)
-CALCULATION_TOLERANCE = float(_get_optional_env("CALCULATION_TOLERANCE", "0.01"))
-
-# =========================
-# OUTPUTS
-# =========================
-OUTPUT_FILE = Path(_get_optional_env("OUTPUT_FILE", "items.xlsx"))
-LOG_FILE = Path(_get_optional_env("LOG_FILE", "logs/processing.log"))
-
-# Crear directorio de logs si no existe
-LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 # =========================
 # PATHS DEL PROYECTO
@@ -143,9 +120,9 @@ def validate_setup() -> None:
     errors = []
 
     # Validar credenciales de Drive
-    if not DRIVE_CREDENTIALS_FILE.exists():
+    if not _cfg.DRIVE_CREDENTIALS_FILE.exists():
         errors.append(
-            f"Archivo de credenciales de Google Drive no encontrado: {DRIVE_CREDENTIALS_FILE}\n"
+            f"Archivo de credenciales de Google Drive no encontrado: {_cfg.DRIVE_CREDENTIALS_FILE}\n"
             f"Descarga las credenciales desde Google Cloud Console."
         )
 
@@ -162,42 +139,110 @@ def validate_setup() -> None:
 # =========================
 # LOGGING CONFIGURATION
 # =========================
-LOGGING_CONFIG = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'detailed': {
-            'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
+def _build_logging_config() -> Dict[str, Any]:
+    """Arma la configuración de logging (depende de LOG_FILE)."""
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'detailed': {
+                'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                'datefmt': '%Y-%m-%d %H:%M:%S'
+            },
+            'simple': {
+                'format': '%(levelname)s - %(message)s'
+            }
         },
-        'simple': {
-            'format': '%(levelname)s - %(message)s'
-        }
-    },
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'level': 'INFO',
-            'formatter': 'simple',
-            'stream': 'ext://sys.stdout'
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'level': 'INFO',
+                'formatter': 'simple',
+                'stream': 'ext://sys.stdout'
+            },
+            'file': {
+                'class': 'logging.handlers.RotatingFileHandler',
+                'level': 'DEBUG',
+                'formatter': 'detailed',
+                'filename': str(_cfg.LOG_FILE),
+                'maxBytes': 10485760,  # 10MB
+                'backupCount': 5,
+                'encoding': 'utf-8',
+                'delay': True  # El archivo se abre con el primer mensaje
+            }
         },
-        'file': {
-            'class': 'logging.handlers.RotatingFileHandler',
+        'root': {
             'level': 'DEBUG',
-            'formatter': 'detailed',
-            'filename': str(LOG_FILE),
-            'maxBytes': 10485760,  # 10MB
-            'backupCount': 5,
-            'encoding': 'utf-8'
+            'handlers': ['console', 'file']
         }
-    },
-    'root': {
-        'level': 'DEBUG',
-        'handlers': ['console', 'file']
     }
+
+
+# =========================
+# VALORES PEREZOSOS
+# =========================
+# Las variables que dependen de .env / secrets se resuelven recién cuando alguien
+# las lee (cfg.AZURE_KEY, etc.), no al importar el módulo: así la app puede
+# renderizar la primera página sin tocar disco ni fallar por una clave faltante.
+_LAZY_SETTINGS: Dict[str, Callable[[], Any]] = {
+    "RUNNING_ON_STREAMLIT_CLOUD": _running_on_streamlit_cloud,
+
+    # AZURE DOCUMENT INTELLIGENCE
+    "AZURE_ENDPOINT": lambda: _get_required_env("AZURE_ENDPOINT"),
+    "AZURE_KEY": lambda: _get_required_env("AZURE_KEY"),
+    "SKIP_AZURE": lambda: _get_optional_env("SKIP_AZURE", "0").lower() in ("1", "true", "t", "yes", "y"),
+
+    # GEMINI (Google AI)
+    "GEMINI_API_KEY": lambda: _get_required_env("GEMINI_API_KEY"),
+    "GEMINI_MODEL": lambda: _get_optional_env("GEMINI_MODEL", "gemini-2.5-pro"),
+    "GEMINI_TEMPERATURE": lambda: float(_get_optional_env("GEMINI_TEMPERATURE", "0.1")),
+    "GEMINI_MAX_TOKENS": lambda: int(_get_optional_env("GEMINI_MAX_TOKENS", "4096")),
+
+    # GOOGLE DRIVE
+    "DRIVE_FOLDER_ID": lambda: _get_optional_env("FOLDER_ID", "1Zax30lsPpeMiHby58RmV_iCT80M0lHPQ"),
+    "DRIVE_CREDENTIALS_FILE": lambda: Path(_get_optional_env(
+        "DRIVE_CREDENTIALS_FILE",
+        "credentials/credentials.json"
+    )),
+
+    # PROCESAMIENTO
+    "MAX_ITEMS_DISPLAY": lambda: int(_get_optional_env("MAX_ITEMS_DISPLAY", "50")),
+    "SLEEP_BETWEEN_FILES": lambda: float(_get_optional_env("SLEEP_BETWEEN_FILES", "0.4")),
+    # Tolerancia para validación de cálculos (Cantidad * Precio ≈ Subtotal)
+    "CALCULATION_TOLERANCE": lambda: float(_get_optional_env("CALCULATION_TOLERANCE", "0.01")),
+    # PDFs locales para Gemini: DPI de rasterizado y mínimo de caracteres por página
+    # para considerar usable la capa de texto
+    "PDF_RASTER_DPI": lambda: int(_get_optional_env("PDF_RASTER_DPI", "150")),
+    "PDF_MIN_TEXT_CHARS": lambda: int(_get_optional_env("PDF_MIN_TEXT_CHARS", "80")),
+    # Hilos para procesar en paralelo las facturas / páginas de un mismo PDF
+    "PDF_MAX_WORKERS": lambda: int(_get_optional_env("PDF_MAX_WORKERS", "4")),
+    # Normalización: variantes preseleccionadas por trigramas antes del fuzzy
+    # matching (0 = comparar contra toda la tabla, resultado exacto)
+    "NORMALIZACION_CANDIDATOS_K": lambda: int(_get_optional_env("NORMALIZACION_CANDIDATOS_K", "0")),
+    # Normalización: solo matchear variantes con medida y pack compatibles
+    "NORMALIZACION_BLOQUEO_ATRIBUTOS": lambda: _get_optional_env(
+        "NORMALIZACION_BLOQUEO_ATRIBUTOS", "0"
+    ).lower() in ("1", "true", "t", "yes", "y"),
+
+    # OUTPUTS
+    "OUTPUT_FILE": lambda: Path(_get_optional_env("OUTPUT_FILE", "items.xlsx")),
+    "LOG_FILE": lambda: Path(_get_optional_env("LOG_FILE", "logs/processing.log")),
+
+    # LOGGING
+    "LOGGING_CONFIG": _build_logging_config,
 }
 
 
+def __getattr__(name: str) -> Any:
+    """Resuelve (y memoriza) los valores de configuración perezosos."""
+    factory = _LAZY_SETTINGS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = factory()
+    globals()[name] = value
+    return value
+
+
 # =========================
 # INFORMACIÓN DEL SISTEMA
 # =========================
@@ -206,15 +251,15 @@ def print_config_summary() -> None:
     print("=" * 60)
     print("CONFIGURACIÓN DEL SISTEMA")
     print("=" * 60)
-    print(f"Azure Endpoint: {AZURE_ENDPOINT}")
+    print(f"Azure Endpoint: {_cfg.AZURE_ENDPOINT}")
     print(f"Azure Key: {'*' * 40} (oculta)")
-    print(f"Skip Azure: {SKIP_AZURE}")
-    print(f"Gemini Model: {GEMINI_MODEL}")
+    print(f"Skip Azure: {_cfg.SKIP_AZURE}")
+    print(f"Gemini Model: {_cfg.GEMINI_MODEL}")
     print(f"Gemini API Key: {'*' * 30} (oculta)")
-    print(f"Drive Folder ID: {DRIVE_FOLDER_ID}")
-    print(f"Drive Credentials: {DRIVE_CREDENTIALS_FILE}")
-    print(f"Output File: {OUTPUT_FILE}")
-    print(f"Log File: {LOG_FILE}")
+    print(f"Drive Folder ID: {_cfg.DRIVE_FOLDER_ID}")
+    print(f"Drive Credentials: {_cfg.DRIVE_CREDENTIALS_FILE}")
+    print(f"Output File: {_cfg.OUTPUT_FILE}")
+    print(f"Log File: {_cfg.LOG_FILE}")
     print(f"Proveedores Dir: {PROVEEDORES_DIR}")
     print("=" * 60)
 
@@ -9,12 +9,22 @@ import logging.config
 from typing import Dict, List, Optional
 import config.config as cfg
 
-LOGGING_CONFIG = cfg.LOGGING_CONFIG
+_logging_configurado = False
 
 
 def setup_logging() -> None:
-    """Configura el sistema de logging del proyecto."""
-    logging.config.dictConfig(LOGGING_CONFIG)
+    """
+    Configura el sistema de logging del proyecto (una sola vez).
+
+    No se ejecuta al importar: lo invocan los puntos de entrada (app, scripts)
+    para no leer .env / secrets ni crear el directorio de logs en el import.
+    """
+    global _logging_configurado
+    if _logging_configurado:
+        return
+    cfg.LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    logging.config.dictConfig(cfg.LOGGING_CONFIG)
+    _logging_configurado = True
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -92,6 +102,3 @@ def log_plugin_loaded(logger: logging.Logger, plugin_name: str, file_name: str)
     """Registra la carga de un plugin de proveedor."""
     logger.info(f"➕ Plugin detectado: {plugin_name} para {file_name}")
 
-
-# Inicializar logging al importar el módulo
-setup_logging()
@@ -0,0 +1,349 @@
+"""
+Almacén de variantes de normalización (SQLite en modo WAL).
+
+Reemplaza la reescritura completa de tabla_normalizacion.xlsx cada vez que se
+aprende una variante:
+  - Las variantes aprendidas se AGREGAN (append-only) con INSERT OR IGNORE sobre
+    un índice único por variante en mayúsculas; la deduplicación se hace en
+    una sola pasada vectorizada por lote.
+  - Las escrituras van en transacciones BEGIN IMMEDIATE: SQLite toma el lock
+    de escritura del archivo, así que varios usuarios aprendiendo a la vez se
+    serializan en lugar de pisarse.
+  - El Excel pasa a ser solo formato de importación/exportación: se reimporta
+    cuando cambia su firma (mtime + tamaño) y se puede exportar la tabla
+    completa de forma atómica.
+  - Cada variante puede llevar un proveedor (columna opcional 'Proveedor' del
+    Excel, o el proveedor de la factura de la que se aprendió); sin proveedor
+    es una variante global. La unicidad es por (proveedor, variante).
+  - `generacion` cambia con cada reimportación del Excel y `ultimo_id` crece con
+    cada variante aprendida: con eso el índice de búsqueda sabe si tiene que
+    reconstruirse o solo agregar las variantes nuevas. `firma()` los combina
+    para validar artefactos compilados a partir del almacén.
+"""
+
+import os
+import sqlite3
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from normalizacion.lectura_cacheada import leer_tabla
+
+ORIGEN_EXCEL = 'excel'
+ORIGEN_APRENDIDA = 'aprendida'
+
+# Proveedor de las variantes globales
+SIN_PROVEEDOR = ''
+
+# Máximo de parámetros por consulta IN (límite conservador de SQLite)
+_LOTE_SQL = 500
+
+
+def limpiar_tabla(
+    df: pd.DataFrame,
+    columna_variante: str = 'Nombre Gestion',
+    columna_base: str = 'Base',
+    columna_proveedor: str = 'Proveedor'
+) -> pd.DataFrame:
+    """
+    Normaliza una tabla variante/base: strings sin espacios extremos y sin filas vacías.
+
+    La columna de proveedor es opcional: si falta (o está vacía) la variante es global.
+
+    Returns:
+        DataFrame con columnas 'Nombre Gestion', 'Base' y 'Proveedor'
+    """
+    if columna_proveedor in df.columns:
+        proveedores = df[columna_proveedor].fillna(SIN_PROVEEDOR).astype(str).str.strip()
+    else:
+        proveedores = pd.Series(SIN_PROVEEDOR, index=df.index)
+    tabla = pd.DataFrame({
+        'Nombre Gestion': df[columna_variante].astype(str).str.strip(),
+        'Base': df[columna_base].astype(str).str.strip(),
+        'Proveedor': proveedores.to_numpy(),
+    })
+    return tabla[(tabla['Nombre Gestion'] != '') & (tabla['Base'] != '')].reset_index(drop=True)
+
+
+def _sin_repetidas(tabla: pd.DataFrame) -> pd.DataFrame:
+    """
+    Última aparición de cada (proveedor, variante en mayúsculas), con la columna 'clave'.
+
+    Gana la última fila, como en el `dict(zip(...))` con el que se leía la tabla.
+    """
+    tabla = tabla.assign(clave=tabla['Nombre Gestion'].str.upper())
+    return tabla[~tabla.duplicated(['Proveedor', 'clave'], keep='last')]
+
+
+class AlmacenVariantes:
+    """Tabla de normalización persistida en SQLite (variantes del Excel + aprendidas)."""
+
+    def __init__(self, ruta: Union[str, Path]):
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.ruta = ruta
+
+        # isolation_level=None: las transacciones se abren explícitamente con BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(ruta), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS variantes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                variante TEXT NOT NULL,
+                clave TEXT NOT NULL,
+                base TEXT NOT NULL,
+                proveedor TEXT NOT NULL DEFAULT '',
+                origen TEXT NOT NULL,
+                creado TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(variantes)")}
+        if 'proveedor' not in columnas:
+            # Almacén creado antes de las particiones por proveedor
+            self._conn.execute("ALTER TABLE variantes ADD COLUMN proveedor TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("DROP INDEX IF EXISTS ix_variantes_clave")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_variantes_proveedor_clave ON variantes (proveedor, clave)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadatos (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)"
+        )
+        # Identifica este archivo: un almacén recreado no se confunde con el anterior
+        self._conn.execute(
+            "INSERT OR IGNORE INTO metadatos (clave, valor) VALUES ('identificador', ?)",
+            (uuid.uuid4().hex,)
+        )
+
+    @contextmanager
+    def _transaccion(self):
+        """Transacción de escritura (toma el lock del archivo al empezar)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+
+    def _leer_metadato(self, clave: str) -> Optional[str]:
+        fila = self._conn.execute("SELECT valor FROM metadatos WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _escribir_metadato(self, clave: str, valor) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES (?, ?)", (clave, str(valor))
+        )
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+    def generacion(self) -> int:
+        """Contador de reimportaciones del Excel (cambia => reconstruir índices)."""
+        return int(self._leer_metadato('generacion') or 0)
+
+    def ultimo_id(self) -> int:
+        """Id de la última variante guardada."""
+        fila = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM variantes").fetchone()
+        return int(fila[0])
+
+    def firma(self, ultimo_id: Optional[int] = None) -> str:
+        """
+        Firma del contenido: cambia al reimportar el Excel o al agregar variantes.
+
+        Args:
+            ultimo_id: Último id a considerar (None = el actual)
+        """
+        if ultimo_id is None:
+            ultimo_id = self.ultimo_id()
+        return f"{self._leer_metadato('identificador')}:{self.generacion()}:{ultimo_id}"
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM variantes").fetchone()[0])
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def cargar_tabla(self, hasta_id: Optional[int] = None) -> pd.DataFrame:
+        """
+        Tabla completa: primero las filas del Excel (en su orden) y después las
+        aprendidas en orden de alta.
+
+        Args:
+            hasta_id: Si se indica, ignora las filas agregadas después de ese id
+                (para que la tabla coincida con un `ultimo_id` leído antes)
+
+        Returns:
+            DataFrame con columnas 'Nombre Gestion', 'Base' y 'Proveedor'
+        """
+        return pd.read_sql_query(
+            "SELECT variante AS \"Nombre Gestion\", base AS \"Base\", proveedor AS \"Proveedor\" "
+            "FROM variantes WHERE id <= ? ORDER BY origen != ?, id",
+            self._conn,
+            params=(self._tope(hasta_id), ORIGEN_EXCEL)
+        )
+
+    def variantes_desde(self, ultimo_id: int, hasta_id: Optional[int] = None) -> pd.DataFrame:
+        """
+        Variantes aprendidas con id mayor a `ultimo_id` (para actualizar índices).
+
+        Args:
+            ultimo_id: Último id ya incorporado al índice
+            hasta_id: Último id a incluir (None = todas)
+
+        Returns:
+            DataFrame con columnas 'Nombre Gestion', 'Base' y 'Proveedor' en orden de alta
+        """
+        return pd.read_sql_query(
+            "SELECT variante AS \"Nombre Gestion\", base AS \"Base\", proveedor AS \"Proveedor\" "
+            "FROM variantes WHERE id > ? AND id <= ? AND origen = ? ORDER BY id",
+            self._conn,
+            params=(int(ultimo_id), self._tope(hasta_id), ORIGEN_APRENDIDA)
+        )
+
+    @staticmethod
+    def _tope(hasta_id: Optional[int]) -> int:
+        # Máximo entero de SQLite: sin tope
+        return int(hasta_id) if hasta_id is not None else 2 ** 63 - 1
+
+    def _claves_existentes(self, tabla: pd.DataFrame) -> set:
+        """(proveedor, clave) de `tabla` que ya están en el almacén."""
+        existentes = set()
+        for proveedor, claves in tabla.groupby('Proveedor', sort=False)['clave']:
+            claves = list(claves.unique())
+            for inicio in range(0, len(claves), _LOTE_SQL):
+                lote = claves[inicio:inicio + _LOTE_SQL]
+                marcas = ",".join("?" * len(lote))
+                existentes.update(
+                    (proveedor, fila[0]) for fila in self._conn.execute(
+                        f"SELECT clave FROM variantes WHERE proveedor = ? AND clave IN ({marcas})",
+                        [proveedor, *lote]
+                    )
+                )
+        return existentes
+
+    def filtrar_nuevas(self, candidatas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Variantes candidatas que todavía no están en el almacén (sin guardarlas).
+
+        Args:
+            candidatas: DataFrame con 'Nombre Gestion', 'Base' y opcionalmente 'Proveedor'
+
+        Returns:
+            DataFrame ('Nombre Gestion', 'Base', 'Proveedor') sin duplicados (por
+            proveedor + variante en mayúsculas) ni variantes existentes
+        """
+        tabla = _sin_repetidas(limpiar_tabla(candidatas))
+        existentes = self._claves_existentes(tabla)
+        nuevas = [(p, c) not in existentes for p, c in zip(tabla['Proveedor'], tabla['clave'])]
+        return tabla[nuevas].drop(columns='clave').reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def agregar(self, candidatas: pd.DataFrame, origen: str = ORIGEN_APRENDIDA) -> pd.DataFrame:
+        """
+        Agrega variantes nuevas (append-only); las ya existentes se ignoran.
+
+        Args:
+            candidatas: DataFrame con 'Nombre Gestion', 'Base' y opcionalmente 'Proveedor'
+            origen: Origen registrado para las filas nuevas
+
+        Returns:
+            DataFrame con las variantes efectivamente agregadas
+        """
+        with self._transaccion() as conn:
+            nuevas = self.filtrar_nuevas(candidatas)
+            conn.executemany(
+                "INSERT OR IGNORE INTO variantes (variante, clave, base, proveedor, origen) VALUES (?, ?, ?, ?, ?)",
+                zip(nuevas['Nombre Gestion'], nuevas['Nombre Gestion'].str.upper(), nuevas['Base'],
+                    nuevas['Proveedor'], [origen] * len(nuevas))
+            )
+        return nuevas
+
+    def sincronizar_excel(
+        self,
+        ruta_excel: Union[str, Path],
+        columna_variante: str = 'Nombre Gestion',
+        columna_base: str = 'Base',
+        forzar: bool = False,
+        columna_proveedor: str = 'Proveedor'
+    ) -> bool:
+        """
+        Importa el Excel si cambió desde la última importación (mtime + tamaño).
+
+        Las filas del Excel reemplazan a las importadas antes; si una variante
+        aprendida también está en el Excel (mismo proveedor), manda el Excel.
+
+        Returns:
+            True si se reimportó
+        """
+        estado = Path(ruta_excel).stat()
+        firma = f"{estado.st_mtime_ns}:{estado.st_size}"
+        if not forzar and self._leer_metadato('excel_firma') == firma:
+            return False
+
+        df = leer_tabla(ruta_excel, columnas=[columna_variante, columna_base, columna_proveedor])
+        if columna_variante not in df.columns or columna_base not in df.columns:
+            raise ValueError(f"La tabla debe tener columnas '{columna_variante}' y '{columna_base}'")
+
+        tabla = _sin_repetidas(limpiar_tabla(df, columna_variante, columna_base, columna_proveedor))
+
+        with self._transaccion() as conn:
+            conn.execute("DELETE FROM variantes WHERE origen = ?", (ORIGEN_EXCEL,))
+            conn.execute("DROP TABLE IF EXISTS temp.claves_excel")
+            conn.execute("CREATE TEMP TABLE claves_excel (proveedor TEXT, clave TEXT, PRIMARY KEY (proveedor, clave))")
+            conn.executemany(
+                "INSERT OR IGNORE INTO claves_excel (proveedor, clave) VALUES (?, ?)",
+                zip(tabla['Proveedor'], tabla['clave'])
+            )
+            conn.execute(
+                "DELETE FROM variantes WHERE (proveedor, clave) IN (SELECT proveedor, clave FROM claves_excel)"
+            )
+            conn.executemany(
+                "INSERT INTO variantes (variante, clave, base, proveedor, origen) VALUES (?, ?, ?, ?, ?)",
+                zip(tabla['Nombre Gestion'], tabla['clave'], tabla['Base'], tabla['Proveedor'],
+                    [ORIGEN_EXCEL] * len(tabla))
+            )
+            self._escribir_metadato('excel_firma', firma)
+            self._escribir_metadato('generacion', self.generacion() + 1)
+        return True
+
+    def exportar_excel(self, ruta_excel: Union[str, Path]) -> int:
+        """
+        Exporta la tabla completa a Excel (archivo temporal + reemplazo atómico).
+
+        La columna 'Proveedor' solo se exporta si alguna variante tiene proveedor.
+
+        Returns:
+            Cantidad de filas exportadas
+        """
+        ruta_excel = Path(ruta_excel)
+        tabla = self.cargar_tabla()
+        if (tabla['Proveedor'] == SIN_PROVEEDOR).all():
+            tabla = tabla.drop(columns='Proveedor')
+        fd, temporal = tempfile.mkstemp(suffix=".xlsx", dir=str(ruta_excel.parent))
+        os.close(fd)
+        try:
+            tabla.to_excel(temporal, index=False)
+            os.replace(temporal, ruta_excel)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        return len(tabla)
+
+    def cerrar(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "AlmacenVariantes":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
@@ -0,0 +1,165 @@
+"""
+Atributos estructurados de una descripción de producto, para bloqueo.
+
+Los scores fuzzy unen sin problema "COCA COLA 600CC X6" con "COCA COLA 2250CC
+X8": los textos se parecen aunque nunca sean el mismo producto. De cada
+descripción se extraen:
+  - marca:  primer token alfabético (en mayúsculas)
+  - medida: contenido llevado a la unidad base (ml o g), ej. 1.5L -> 1500
+  - unidad: 'ml' o 'g'
+  - pack:   unidades por bulto (X6, PACK 6, 6 UNID, 4X6 -> 24)
+
+y solo se comparan descripciones de bloques compatibles:
+  - en el clustering (`bloques`), mismo valor en los atributos del nivel (un
+    atributo faltante es un valor más, así el greedy por bloque da lo mismo
+    que el greedy global restringido a pares del mismo bloque)
+  - contra la tabla auxiliar (`CodigosAtributos`), mismo valor o faltante en
+    alguno de los dos lados (una descripción sin medida puede matchear
+    cualquier medida)
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Unidad de la descripción -> (unidad base, factor)
+UNIDADES = {
+    'CC': ('ml', 1), 'ML': ('ml', 1), 'CM3': ('ml', 1),
+    'L': ('ml', 1000), 'LT': ('ml', 1000), 'LTS': ('ml', 1000), 'LTR': ('ml', 1000),
+    'LITRO': ('ml', 1000), 'LITROS': ('ml', 1000),
+    'G': ('g', 1), 'GR': ('g', 1), 'GRS': ('g', 1), 'GRAMOS': ('g', 1),
+    'KG': ('g', 1000), 'KGS': ('g', 1000), 'KILO': ('g', 1000), 'KILOS': ('g', 1000),
+}
+
+# La medida puede venir pegada al pack ("2.25LX6"): después de la unidad se
+# acepta un límite de palabra o una X seguida del número del pack
+_MEDIDA = re.compile(
+    r'(?<![^\sX])(\d+(?:[.,]\d+)?)\s*(' + '|'.join(sorted(UNIDADES, key=len, reverse=True)) + r')(?=X\s*\d|\b)'
+)
+_PACK_DOBLE = re.compile(r'(?<!\w)(\d+)\s*X\s*(\d+)\b')
+_PACK = re.compile(
+    r'(?:(?<!\w)X\s*(\d+)\b|\bPACK\s*(?:X\s*)?(\d+)\b|(?<!\w)(\d+)\s*(?:U|UN|UND|UNID|UNIDADES)\b|(?<!\w)(\d+)\s*X(?!\w))'
+)
+_MARCA = re.compile(r'[A-ZÁÉÍÓÚÑ]{2,}')
+
+# Atributos de bloqueo por nivel de clustering: N1 misma medida y pack, N2
+# misma medida, N3 y N4 libres. La marca (primer token) no se usa por defecto:
+# con tokens desordenados o typos en la marca separa variantes del mismo
+# producto (medido con benchmarks/bloqueo_atributos.py)
+BLOQUEO_POR_NIVEL: List[Tuple[str, ...]] = [
+    ('medida', 'pack'),
+    ('medida',),
+    (),
+    (),
+]
+
+# Atributos que tienen que ser compatibles para matchear contra la tabla
+# auxiliar (la marca no: un typo en la marca dejaría la descripción sin match)
+ATRIBUTOS_COINCIDENCIA: Tuple[str, ...] = ('medida', 'pack')
+
+
+class Atributos(NamedTuple):
+    marca: Optional[str]
+    medida: Optional[str]
+    unidad: Optional[str]
+    pack: Optional[int]
+
+
+def _numero(texto: str) -> float:
+    return float(texto.replace(',', '.'))
+
+
+def extraer_atributos(descripcion) -> Atributos:
+    """
+    Marca, medida, unidad y pack de una descripción (None los que no aparecen).
+
+    La medida se devuelve como texto con su unidad base ('1500ml', '500g')
+    para que 1.5L, 1,5 LT y 1500CC den el mismo valor.
+    """
+    if descripcion is None or pd.isna(descripcion):
+        return Atributos(None, None, None, None)
+    texto = str(descripcion).upper()
+
+    medida = unidad = None
+    encontrada = _MEDIDA.search(texto)
+    if encontrada:
+        unidad, factor = UNIDADES[encontrada.group(2)]
+        medida = f"{_numero(encontrada.group(1)) * factor:g}{unidad}"
+        texto = texto[:encontrada.start()] + ' ' + texto[encontrada.end():]
+
+    pack = None
+    doble = _PACK_DOBLE.search(texto)
+    if doble:
+        pack = int(doble.group(1)) * int(doble.group(2))
+        texto = texto[:doble.start()] + ' ' + texto[doble.end():]
+    else:
+        simple = _PACK.search(texto)
+        if simple:
+            pack = int(next(g for g in simple.groups() if g))
+            texto = texto[:simple.start()] + ' ' + texto[simple.end():]
+
+    marca = _MARCA.search(texto)
+    return Atributos(marca.group(0) if marca else None, medida, unidad, pack)
+
+
+def bloques(atributos: Sequence[Atributos], nombres: Sequence[str]) -> np.ndarray:
+    """
+    Número de bloque de cada descripción: mismo número = mismos valores en `nombres`.
+
+    Un atributo faltante cuenta como un valor más (no es comodín).
+    """
+    if not nombres:
+        return np.zeros(len(atributos), dtype=np.int64)
+    claves = [tuple(getattr(a, n) for n in nombres) for a in atributos]
+    codigos, _ = pd.factorize(pd.Series(claves, dtype=object))
+    return codigos.astype(np.int64)
+
+
+class CodigosAtributos:
+    """
+    Atributos de las variantes de una tabla, codificados para filtrar por compatibilidad.
+
+    Attributes:
+        nombres: Atributos que se comparan
+        valores: Por atributo, valor -> código
+        codigos: Matriz (variantes x atributos) de códigos; -1 = faltante
+    """
+
+    def __init__(self, textos: Sequence[str], nombres: Sequence[str] = ATRIBUTOS_COINCIDENCIA):
+        self.nombres = tuple(nombres)
+        self.valores: List[Dict] = [{} for _ in self.nombres]
+        self.codigos = np.full((0, len(self.nombres)), -1, dtype=np.int64)
+        self.extender(textos)
+
+    def extender(self, textos: Sequence[str]) -> None:
+        """Agrega las variantes nuevas al final."""
+        nuevos = np.full((len(textos), len(self.nombres)), -1, dtype=np.int64)
+        for i, texto in enumerate(textos):
+            atributos = extraer_atributos(texto)
+            for j, nombre in enumerate(self.nombres):
+                valor = getattr(atributos, nombre)
+                if valor is not None:
+                    nuevos[i, j] = self.valores[j].setdefault(valor, len(self.valores[j]))
+        self.codigos = np.vstack([self.codigos, nuevos])
+
+    def clave(self, texto) -> Tuple[int, ...]:
+        """
+        Códigos de una consulta: -1 = faltante; -2 = valor que ninguna variante tiene.
+        """
+        atributos = extraer_atributos(texto)
+        clave = []
+        for j, nombre in enumerate(self.nombres):
+            valor = getattr(atributos, nombre)
+            clave.append(-1 if valor is None else self.valores[j].get(valor, -2))
+        return tuple(clave)
+
+    def compatibles(self, clave: Tuple[int, ...]) -> np.ndarray:
+        """Máscara de las variantes compatibles con la clave de una consulta."""
+        mascara = np.ones(len(self.codigos), dtype=bool)
+        for j, codigo in enumerate(clave):
+            if codigo != -1:
+                columna = self.codigos[:, j]
+                mascara &= (columna == codigo) | (columna == -1)
+        return mascara
@@ -0,0 +1,225 @@
+"""
+Cache persistente (SQLite) de descripciones ya normalizadas.
+
+Las mismas descripciones de proveedor se repiten todos los meses: el resultado
+(normalizada, similitud, método) se guarda por descripción y se reutiliza en
+las corridas siguientes.
+
+Cada fila lleva la versión con la que se calculó: hash de la tabla de
+normalización + método + umbral. Al abrir la cache con una tabla distinta se
+borran los resultados de las versiones anteriores, así que cualquier cambio en
+la tabla invalida la cache sin intervención manual.
+
+Cuando a la tabla solo se le AGREGAN variantes (aprendizaje), `migrar_version`
+conserva los resultados que no pueden cambiar y borra solo los afectados.
+
+Con índices por proveedor cada resultado guarda además la partición que lo
+resolvió (la del proveedor o la global de respaldo).
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Máximo de parámetros por consulta IN (límite conservador de SQLite)
+_LOTE_SQL = 500
+
+ResultadoNormalizacion = Tuple[str, float, str]
+ResultadoConParticion = Tuple[str, float, str, Optional[str]]
+
+
+class CacheNormalizacion:
+    """
+    Cache descripción -> (normalizada, similitud, método) para una versión de tabla.
+
+    Attributes:
+        version: Clave de versión (tabla|método|umbral) de los resultados
+        consultas: Descripciones buscadas desde que se abrió la cache
+        aciertos: Descripciones encontradas en la cache
+    """
+
+    def __init__(
+        self,
+        ruta: Union[str, Path],
+        version_tabla: str,
+        umbral_similitud: float,
+        metodo: str = 'token_sort_ratio'
+    ):
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+
+        self.ruta = ruta
+        self.version_tabla = version_tabla
+        self.version = f"{version_tabla}|{metodo}|{float(umbral_similitud):g}"
+        self.consultas = 0
+        self.aciertos = 0
+
+        self._conn = sqlite3.connect(str(ruta), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS normalizaciones (
+                version TEXT NOT NULL,
+                descripcion TEXT NOT NULL,
+                normalizada TEXT NOT NULL,
+                similitud REAL NOT NULL,
+                metodo TEXT NOT NULL,
+                particion TEXT,
+                PRIMARY KEY (version, descripcion)
+            ) WITHOUT ROWID
+            """
+        )
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(normalizaciones)")}
+        if "particion" not in columnas:
+            # Cache creada antes de guardar la partición: las filas viejas quedan en NULL
+            with self._conn:
+                self._conn.execute("ALTER TABLE normalizaciones ADD COLUMN particion TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadatos (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)"
+        )
+        self._invalidar_si_cambio_la_tabla()
+
+    def _invalidar_si_cambio_la_tabla(self) -> None:
+        """Borra los resultados calculados con otra versión de la tabla."""
+        fila = self._conn.execute(
+            "SELECT valor FROM metadatos WHERE clave = 'version_tabla'"
+        ).fetchone()
+        if fila is not None and fila[0] == self.version_tabla:
+            return
+
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM normalizaciones WHERE substr(version, 1, ?) != ?",
+                (len(self.version_tabla) + 1, f"{self.version_tabla}|")
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES ('version_tabla', ?)",
+                (self.version_tabla,)
+            )
+
+    def obtener(
+        self,
+        descripciones: Iterable[str],
+        con_particion: bool = False
+    ) -> Dict[str, Union[ResultadoNormalizacion, ResultadoConParticion]]:
+        """
+        Busca resultados ya calculados.
+
+        Args:
+            descripciones: Descripciones limpias (strip) y sin repetir
+            con_particion: Agregar la partición que resolvió cada resultado
+                (None si se guardó sin partición)
+
+        Returns:
+            Dict descripción -> (normalizada, similitud, método[, partición]) con los aciertos
+        """
+        descripciones = list(descripciones)
+        encontrados: Dict[str, Union[ResultadoNormalizacion, ResultadoConParticion]] = {}
+
+        for inicio in range(0, len(descripciones), _LOTE_SQL):
+            lote = descripciones[inicio:inicio + _LOTE_SQL]
+            marcas = ",".join("?" * len(lote))
+            filas = self._conn.execute(
+                f"SELECT descripcion, normalizada, similitud, metodo, particion FROM normalizaciones "
+                f"WHERE version = ? AND descripcion IN ({marcas})",
+                [self.version, *lote]
+            )
+            for descripcion, normalizada, similitud, metodo, particion in filas:
+                encontrados[descripcion] = (
+                    (normalizada, similitud, metodo, particion) if con_particion
+                    else (normalizada, similitud, metodo)
+                )
+
+        self.consultas += len(descripciones)
+        self.aciertos += len(encontrados)
+        return encontrados
+
+    def guardar(self, resultados: Dict[str, Union[ResultadoNormalizacion, ResultadoConParticion]]) -> None:
+        """Guarda (o reemplaza) resultados nuevos de esta versión, con o sin partición."""
+        if not resultados:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO normalizaciones "
+                "(version, descripcion, normalizada, similitud, metodo, particion) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.version, descripcion, str(resultado[0]), float(resultado[1]), resultado[2],
+                     resultado[3] if len(resultado) > 3 else None)
+                    for descripcion, resultado in resultados.items()
+                ]
+            )
+
+    def migrar_version(
+        self,
+        version_tabla_nueva: str,
+        metodo: str,
+        es_afectada: Callable[[List[str], List[float]], np.ndarray]
+    ) -> int:
+        """
+        Pasa los resultados de la versión actual de la tabla a una versión extendida.
+
+        Los resultados de otros métodos se descartan; de los del método indicado
+        se borran los que `es_afectada` marca y el resto se re-etiqueta con la
+        versión nueva.
+
+        Args:
+            version_tabla_nueva: Hash de la tabla con las variantes agregadas
+            metodo: Método de similitud del índice que evalúa las afectadas
+            es_afectada: (descripciones, similitudes) -> máscara de resultados a recalcular
+
+        Returns:
+            Cantidad de resultados conservados
+        """
+        prefijo_actual = f"{self.version_tabla}|"
+        prefijo_metodo = f"{prefijo_actual}{metodo}|"
+        filas = self._conn.execute(
+            "SELECT version, descripcion, similitud FROM normalizaciones WHERE substr(version, 1, ?) = ?",
+            (len(prefijo_actual), prefijo_actual)
+        ).fetchall()
+
+        del_metodo = [f for f in filas if f[0].startswith(prefijo_metodo)]
+        mascara = es_afectada([f[1] for f in del_metodo], [f[2] for f in del_metodo]) if del_metodo else []
+        borrar = [(f[0], f[1]) for f in filas if not f[0].startswith(prefijo_metodo)]
+        borrar += [(f[0], f[1]) for f, afectada in zip(del_metodo, mascara) if afectada]
+
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM normalizaciones WHERE version = ? AND descripcion = ?", borrar
+            )
+            self._conn.execute(
+                "UPDATE normalizaciones SET version = ? || substr(version, ?) WHERE substr(version, 1, ?) = ?",
+                (f"{version_tabla_nueva}|", len(prefijo_actual) + 1, len(prefijo_actual), prefijo_actual)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES ('version_tabla', ?)",
+                (version_tabla_nueva,)
+            )
+
+        self.version = f"{version_tabla_nueva}|{self.version[len(prefijo_actual):]}"
+        self.version_tabla = version_tabla_nueva
+        return len(filas) - len(borrar)
+
+    def tasa_aciertos(self) -> float:
+        """Proporción de descripciones resueltas desde la cache (0-1)."""
+        return self.aciertos / self.consultas if self.consultas else 0.0
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Resumen de uso para mostrar en reportes."""
+        return {
+            "consultas": self.consultas,
+            "aciertos": self.aciertos,
+            "tasa_aciertos": self.tasa_aciertos(),
+        }
+
+    def cerrar(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CacheNormalizacion":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
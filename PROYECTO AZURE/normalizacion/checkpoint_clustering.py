@@ -0,0 +1,160 @@
+"""
+Checkpoints por nivel del clustering jerárquico, para reanudar corridas largas.
+
+Con cientos de miles de descripciones un nivel puede tardar horas; si el
+proceso se corta en el nivel 3, los niveles 1 y 2 ya terminados se guardan en
+la carpeta del checkpoint y la corrida siguiente con las mismas entradas
+arranca desde el nivel 3.
+
+Contenido de la carpeta:
+
+  - descripciones.json: diccionario de textos (las descripciones en orden)
+  - nivel_N.npy: posición de la maestra de cada descripción (int32)
+  - manifiesto.json: huella de las entradas y niveles terminados (con sus
+    estadísticas); se escribe después del .npy, así un nivel a medio guardar
+    no cuenta como terminado
+
+La huella cubre descripciones (y su orden), umbrales, método y bloqueo: si
+algo cambia, el checkpoint anterior se descarta y se empieza de cero.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Cambiar si cambia la estructura de la carpeta o la extracción de atributos
+VERSION_FORMATO = 2
+
+
+def _escribir_atomico(destino: Path, escribir: Callable[[str], None]) -> None:
+    fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=str(destino.parent))
+    os.close(fd)
+    try:
+        escribir(temporal)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+class CheckpointNiveles:
+    """
+    Niveles terminados de una corrida de `familias_jerarquicas`.
+
+    Attributes:
+        carpeta: Carpeta del checkpoint
+        huella: Hash de descripciones + umbrales + método + bloqueo
+    """
+
+    def __init__(
+        self,
+        carpeta: Union[str, Path],
+        descripciones: Sequence[str],
+        umbrales: Sequence[float],
+        metodo: str,
+        atributos_por_nivel: Optional[Sequence[Sequence[str]]] = None
+    ):
+        self.carpeta = Path(carpeta)
+        self._descripciones = [str(d) for d in descripciones]
+        parametros = {
+            "formato": VERSION_FORMATO,
+            "umbrales": [float(u) for u in umbrales],
+            "metodo": metodo,
+            "atributos_por_nivel": [list(n) for n in atributos_por_nivel] if atributos_por_nivel else None,
+        }
+        hash_entradas = hashlib.sha256(json.dumps(parametros, sort_keys=True).encode("utf-8"))
+        hash_entradas.update(json.dumps(self._descripciones, ensure_ascii=False).encode("utf-8"))
+        self.huella = hash_entradas.hexdigest()
+
+    @property
+    def _manifiesto(self) -> Path:
+        return self.carpeta / "manifiesto.json"
+
+    def _leer_manifiesto(self) -> Optional[Dict[str, Any]]:
+        try:
+            manifiesto = json.loads(self._manifiesto.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if manifiesto.get("formato") != VERSION_FORMATO or manifiesto.get("huella") != self.huella:
+            return None
+        return manifiesto
+
+    def cargar(self) -> List[Tuple[np.ndarray, Dict[str, int]]]:
+        """
+        Niveles terminados con estas mismas entradas, en orden.
+
+        Returns:
+            Lista de (maestras del nivel, estadísticas del nivel); vacía si no
+            hay checkpoint, es de otras entradas o no se puede leer
+        """
+        manifiesto = self._leer_manifiesto()
+        if manifiesto is None:
+            return []
+
+        niveles = []
+        for datos in manifiesto["niveles"]:
+            try:
+                maestra = np.load(self.carpeta / datos["archivo"]).astype(np.int64)
+            except (OSError, ValueError):
+                break
+            if len(maestra) != len(self._descripciones):
+                break
+            niveles.append((maestra, datos["estadisticas"]))
+        return niveles
+
+    def guardar_nivel(self, nivel: int, maestra: np.ndarray, estadisticas: Dict[str, int]) -> Path:
+        """
+        Guarda un nivel terminado (los anteriores ya tienen que estar guardados).
+
+        Returns:
+            Path del archivo del nivel
+        """
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        manifiesto = self._leer_manifiesto()
+        if manifiesto is None:
+            # Primer nivel de estas entradas: se reemplaza lo que hubiera
+            manifiesto = {"formato": VERSION_FORMATO, "huella": self.huella,
+                          "descripciones": len(self._descripciones), "niveles": []}
+            _escribir_atomico(
+                self.carpeta / "descripciones.json",
+                lambda ruta: Path(ruta).write_text(json.dumps(self._descripciones, ensure_ascii=False), encoding="utf-8")
+            )
+        if len(manifiesto["niveles"]) < nivel - 1:
+            raise ValueError(f"El checkpoint no tiene los niveles anteriores al {nivel}")
+
+        def escribir_npy(ruta: str) -> None:
+            with open(ruta, "wb") as salida:
+                np.save(salida, maestra.astype(np.int32))
+
+        archivo = self.carpeta / f"nivel_{nivel}.npy"
+        _escribir_atomico(archivo, escribir_npy)
+
+        manifiesto["niveles"] = manifiesto["niveles"][:nivel - 1] + [
+            {"nivel": nivel, "archivo": archivo.name, "estadisticas": {k: int(v) for k, v in estadisticas.items()}}
+        ]
+        _escribir_atomico(
+            self._manifiesto,
+            lambda ruta: Path(ruta).write_text(json.dumps(manifiesto, indent=2), encoding="utf-8")
+        )
+        return archivo
+
+
+def registrar_eventos(archivo: Union[str, Path]) -> Callable[[Dict[str, Any]], None]:
+    """
+    Callback `al_progreso` que agrega cada evento como una línea JSON al archivo.
+
+    Sirve para seguir una corrida larga desde afuera (`tail -f eventos.jsonl`).
+    """
+    archivo = Path(archivo)
+    archivo.parent.mkdir(parents=True, exist_ok=True)
+
+    def registrar(evento: Dict[str, Any]) -> None:
+        with open(archivo, "a", encoding="utf-8") as salida:
+            salida.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+    return registrar
@@ -0,0 +1,228 @@
+"""
+Clustering por grafo: componentes conexas (union-find) de un grafo de similitud.
+
+Alternativa al greedy por líderes de motor_clustering.py, que depende del
+orden en que se recorren las descripciones y vuelve a puntuar las maestras en
+cada nivel:
+
+  - una sola pasada de scores: `process.cdist` por bloques de filas contra
+    las descripciones posteriores, con score_cutoff en el umbral más bajo;
+    solo se guardan los pares que lo superan (grafo disperso)
+  - cada nivel filtra esas aristas por su umbral (y por su bloqueo de
+    atributos) y une sus extremos con union-find; las familias son las
+    componentes conexas
+  - cada nivel parte de las componentes del anterior, así que las familias
+    quedan anidadas igual que en el modo por líderes
+
+El union-find está vectorizado con NumPy: las raíces se buscan para todas las
+aristas de un bloque a la vez (con compresión de caminos) y cada raíz se
+cuelga de la menor de sus vecinas, así que la raíz de cada componente es su
+descripción más prioritaria (la más frecuente).
+
+Representante de cada familia: la descripción más frecuente de la
+componente o, con `medoide=True`, la que tiene mayor similitud total con el
+resto ponderada por `pesos` (Frecuencia).
+
+Las componentes conexas son single-linkage: una cadena de pares parecidos une
+descripciones que entre sí no lo son. Comparar la calidad con el modo por
+líderes con benchmarks/clustering_grafo.py.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from rapidfuzz import process
+
+from normalizacion.atributos import bloques, extraer_atributos
+from normalizacion.indice_normalizacion import METODOS_SIMILITUD
+from normalizacion.motor_clustering import MEMORIA_BLOQUE_MB
+
+# Candidatas a medoide por componente (las más frecuentes): acota el costo
+# de las componentes grandes a candidatas x miembros
+MAX_CANDIDATAS_MEDOIDE = 200
+
+
+def _raices(padre: np.ndarray, nodos: np.ndarray) -> np.ndarray:
+    """Raíz de cada nodo (comprime el camino de los nodos consultados)."""
+    raices = padre[nodos]
+    while True:
+        siguientes = padre[raices]
+        if np.array_equal(siguientes, raices):
+            break
+        raices = siguientes
+    padre[nodos] = raices
+    return raices
+
+
+def _unir(padre: np.ndarray, a: np.ndarray, b: np.ndarray) -> None:
+    """Une los extremos de las aristas (a, b): cada raíz se cuelga de la menor."""
+    while len(a):
+        raiz_a, raiz_b = _raices(padre, a), _raices(padre, b)
+        distintas = raiz_a != raiz_b
+        if not distintas.any():
+            return
+        a, b = a[distintas], b[distintas]
+        raiz_a, raiz_b = raiz_a[distintas], raiz_b[distintas]
+        np.minimum.at(padre, np.maximum(raiz_a, raiz_b), np.minimum(raiz_a, raiz_b))
+
+
+def _medoides(
+    raices: np.ndarray,
+    textos: List[str],
+    scorer: Callable,
+    pesos: np.ndarray,
+    workers: int
+) -> np.ndarray:
+    """Medoide ponderado de cada componente (mayor similitud total con el resto)."""
+    representante = raices.copy()
+    orden = np.argsort(raices, kind="stable")
+    cortes = np.flatnonzero(np.diff(raices[orden])) + 1
+    for miembros in np.split(orden, cortes):
+        if len(miembros) < 3:
+            # Con dos, los dos suman lo mismo: queda el más frecuente
+            continue
+        candidatas = miembros[:MAX_CANDIDATAS_MEDOIDE]
+        matriz = process.cdist(
+            [textos[i] for i in candidatas],
+            [textos[j] for j in miembros],
+            scorer=scorer,
+            processor=None,
+            dtype=np.float64,
+            workers=workers
+        )
+        puntaje = matriz @ pesos[miembros]
+        representante[miembros] = candidatas[int(np.argmax(puntaje))]
+    return representante
+
+
+def familias_grafo(
+    descripciones: Sequence[str],
+    umbrales: Sequence[float],
+    metodo: str = 'token_sort_ratio',
+    workers: int = -1,
+    memoria_max_mb: float = MEMORIA_BLOQUE_MB,
+    mostrar_progreso: bool = False,
+    al_terminar_nivel: Optional[Callable[[int, int], None]] = None,
+    atributos_por_nivel: Optional[Sequence[Sequence[str]]] = None,
+    estadisticas: Optional[List[Dict[str, int]]] = None,
+    pesos: Optional[Sequence[float]] = None,
+    medoide: bool = False
+) -> List[np.ndarray]:
+    """
+    Clustering por componentes conexas: una pasada de scores para todos los niveles.
+
+    Args:
+        descripciones: Descripciones únicas en orden de prioridad (frecuencia)
+        umbrales: Umbral de cada nivel [N1, N2, ...]
+        metodo: Clave de `METODOS_SIMILITUD` ('token_sort_ratio' o 'ratio')
+        workers: Hilos para cdist (-1 = todos los núcleos)
+        memoria_max_mb: Tamaño máximo de cada bloque de la matriz de scores
+        mostrar_progreso: Si True, muestra una barra tqdm de la pasada de scores
+        al_terminar_nivel: Callback opcional (nivel, cantidad de familias)
+        atributos_por_nivel: Atributos de bloqueo de cada nivel (ej.
+            `BLOQUEO_POR_NIVEL`); la pasada solo puntúa pares con los mismos
+            atributos comunes a todos los niveles y cada nivel descarta las
+            aristas entre bloques distintos
+        estadisticas: Lista opcional donde se agrega, por nivel, un dict con
+            'aristas' (pares del nivel), 'comparaciones' y 'bloques' (los de
+            la pasada única, en el nivel 1; 0 en los demás)
+        pesos: Peso de cada descripción para el medoide (ej. Frecuencia); None = 1
+        medoide: Si True, el representante de cada familia es su medoide
+            ponderado; si no, la descripción más prioritaria
+
+    Returns:
+        Una lista por nivel con la posición (en `descripciones`) del
+        representante de cada descripción (mismo formato que `familias_jerarquicas`)
+    """
+    preprocesar, scorer = METODOS_SIMILITUD[metodo]
+    textos = [preprocesar(str(d)) if preprocesar else str(d) for d in descripciones]
+    n = len(textos)
+    umbral_minimo = min(umbrales) if len(umbrales) else 0
+
+    # Bloques de cada nivel y de la pasada (atributos comunes a todos los niveles)
+    nombres_por_nivel = [
+        tuple(atributos_por_nivel[k]) if atributos_por_nivel and k < len(atributos_por_nivel) else ()
+        for k in range(len(umbrales))
+    ]
+    comunes = tuple(a for a in nombres_por_nivel[0] if all(a in nombres for nombres in nombres_por_nivel)) \
+        if nombres_por_nivel else ()
+    atributos = [extraer_atributos(d) for d in descripciones] if any(nombres_por_nivel) else None
+    codigos_nivel = [bloques(atributos, nombres) if nombres else None for nombres in nombres_por_nivel]
+    codigos_pase = bloques(atributos, comunes) if comunes else np.zeros(n, dtype=np.int64)
+
+    padres = [np.arange(n, dtype=np.int64) for _ in umbrales]
+    aristas = [0] * len(umbrales)
+    comparaciones = 0
+
+    barra = None
+    if mostrar_progreso:
+        from tqdm import tqdm
+        barra = tqdm(total=n, desc="Grafo de similitud")
+
+    orden = np.argsort(codigos_pase, kind="stable")
+    cortes = np.flatnonzero(np.diff(codigos_pase[orden])) + 1
+    for posiciones in np.split(orden, cortes):
+        m = len(posiciones)
+        inicio = 0
+        while inicio < m:
+            candidatos = m - inicio - 1
+            filas_por_bloque = max(1, int(memoria_max_mb * 1024 * 1024 // (8 * max(candidatos, 1))))
+            fin = min(m, inicio + filas_por_bloque)
+            if candidatos:
+                comparaciones += (fin - inicio) * candidatos
+                matriz = process.cdist(
+                    [textos[i] for i in posiciones[inicio:fin]],
+                    [textos[j] for j in posiciones[inicio + 1:]],
+                    scorer=scorer,
+                    processor=None,
+                    score_cutoff=umbral_minimo,
+                    dtype=np.float64,
+                    workers=workers
+                )
+                fila_par, columna_par = np.nonzero(matriz > umbral_minimo)
+                scores = matriz[fila_par, columna_par]
+                del matriz
+                # Solo pares (i, j) con j posterior a i dentro del bloque
+                posteriores = columna_par + 1 > fila_par
+                fila_par, columna_par, scores = fila_par[posteriores], columna_par[posteriores], scores[posteriores]
+                a = posiciones[inicio + fila_par]
+                b = posiciones[inicio + 1 + columna_par]
+
+                # Cada nivel filtra la misma lista de aristas
+                for k, umbral in enumerate(umbrales):
+                    del_nivel = scores > umbral
+                    if codigos_nivel[k] is not None:
+                        del_nivel &= codigos_nivel[k][a] == codigos_nivel[k][b]
+                    aristas[k] += int(del_nivel.sum())
+                    _unir(padres[k], a[del_nivel], b[del_nivel])
+
+            if barra is not None:
+                barra.update(fin - inicio)
+            inicio = fin
+
+    if barra is not None:
+        barra.close()
+
+    pesos_array = np.ones(n) if pesos is None else np.asarray(pesos, dtype=np.float64)
+    todos = np.arange(n, dtype=np.int64)
+    niveles: List[np.ndarray] = []
+    raices = None
+    for k, padre in enumerate(padres):
+        if raices is not None:
+            # Anidado: las familias del nivel anterior quedan dentro de una del nivel
+            _unir(padre, todos, raices)
+        raices = _raices(padre, todos)
+        representante = _medoides(raices, textos, scorer, pesos_array, workers) if medoide else raices
+        niveles.append(representante)
+
+        n_familias = len(np.unique(raices))
+        if estadisticas is not None:
+            estadisticas.append({
+                'aristas': aristas[k],
+                'comparaciones': comparaciones if k == 0 else 0,
+                'bloques': int(codigos_pase.max()) + 1 if k == 0 and n else 0,
+            })
+        if al_terminar_nivel is not None:
+            al_terminar_nivel(k + 1, n_familias)
+
+    return niveles
@@ -0,0 +1,274 @@
+"""
+Scores del clustering por líderes repartidos en un pool de procesos.
+
+`process.cdist` ya usa varios hilos, pero en los niveles con bloqueo hay miles
+de bloques chicos (cada cdist dura milisegundos y el resto es Python con el
+GIL tomado) y un solo proceso no llega a ocupar un servidor de muchos núcleos.
+`PoolSimilitud` reparte el cálculo de scores entre procesos:
+
+  - los textos preprocesados se copian una sola vez a memoria compartida
+    (`multiprocessing.shared_memory`: offsets + UTF-8) y cada proceso los lee
+    al arrancar, en vez de recibirlos serializados en cada tarea
+  - las posiciones del nivel y la marca de asignado de cada texto también
+    viven en memoria compartida; el proceso principal las actualiza entre
+    rondas y los procesos las leen al empezar cada tarea
+  - cada tarea devuelve solo los pares que superan el umbral (lista de aristas
+    dispersa, int32), nunca la matriz de scores
+  - la asignación de líderes la hace el proceso principal, en orden, con el
+    mismo greedy que `agrupar_lideres`
+
+El trabajo avanza por rondas: en cada ronda se toma una ventana de filas de
+cada bloque grande (una tarea por proceso) y los bloques chicos enteros
+(agrupados en tareas). Los candidatos de una tarea son los textos libres al
+empezar la ronda, un superconjunto de los libres al momento de asignar, así
+que las familias son las mismas que con `agrupar_lideres`; como entre rondas
+se descartan los textos ya asignados, la cantidad de pares puntuados es
+parecida a la del motor de un proceso.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import process
+
+from normalizacion.indice_normalizacion import METODOS_SIMILITUD
+
+# Estado de cada proceso del pool (lo arma `_iniciar_proceso`)
+_ESTADO: Dict[str, Any] = {}
+
+
+def _adjuntar(nombre: str) -> shared_memory.SharedMemory:
+    """Abre un segmento creado por el proceso principal (que es quien lo borra)."""
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        # Python < 3.13: el registro en el resource tracker es un set por
+        # nombre, el unlink del proceso principal lo da de baja
+        return shared_memory.SharedMemory(name=nombre)
+
+
+def _empaquetar_textos(textos: Sequence[str]) -> shared_memory.SharedMemory:
+    """Copia los textos a un segmento: n+1 offsets int64 seguidos de los bytes UTF-8."""
+    codificados = [t.encode("utf-8") for t in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in codificados], out=offsets[1:])
+    cabecera = offsets.nbytes
+    segmento = shared_memory.SharedMemory(create=True, size=max(1, cabecera + int(offsets[-1])))
+    segmento.buf[:cabecera] = offsets.tobytes()
+    segmento.buf[cabecera:cabecera + int(offsets[-1])] = b"".join(codificados)
+    return segmento
+
+
+def _iniciar_proceso(nombre_textos: str, n_textos: int, nombre_nivel: str, metodo: str) -> None:
+    segmento = _adjuntar(nombre_textos)
+    offsets = np.ndarray((n_textos + 1,), dtype=np.int64, buffer=segmento.buf).tolist()
+    datos = bytes(segmento.buf[8 * (n_textos + 1):8 * (n_textos + 1) + offsets[-1]])
+    segmento.close()
+
+    nivel = _adjuntar(nombre_nivel)
+    _ESTADO.update(
+        textos=[datos[a:b].decode("utf-8") for a, b in zip(offsets[:-1], offsets[1:])],
+        nivel=nivel,
+        posiciones=np.ndarray((n_textos,), dtype=np.int64, buffer=nivel.buf),
+        asignado=np.ndarray((n_textos,), dtype=bool, buffer=nivel.buf, offset=8 * n_textos),
+        scorer=METODOS_SIMILITUD[metodo][1],
+    )
+
+
+def _aristas(tarea: Tuple[float, List[Tuple[int, int, int]]]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Pares (fila, candidato) que superan el umbral en los segmentos de la tarea.
+
+    Cada segmento es (fin del bloque, primera fila, fin de las filas), en
+    posiciones del nivel; los candidatos de una fila son los textos libres
+    posteriores a ella dentro del mismo bloque.
+    """
+    umbral, segmentos = tarea
+    textos, posiciones, asignado = _ESTADO["textos"], _ESTADO["posiciones"], _ESTADO["asignado"]
+    filas_pares, candidatos_pares = [], []
+    comparaciones = 0
+    for fin_bloque, inicio, fin in segmentos:
+        candidatos = np.flatnonzero(~asignado[inicio + 1:fin_bloque]) + inicio + 1
+        filas = np.flatnonzero(~asignado[inicio:fin]) + inicio
+        if not len(filas) or not len(candidatos):
+            continue
+        comparaciones += len(filas) * len(candidatos)
+        matriz = process.cdist(
+            [textos[p] for p in posiciones[filas].tolist()],
+            [textos[p] for p in posiciones[candidatos].tolist()],
+            scorer=_ESTADO["scorer"],
+            processor=None,
+            score_cutoff=umbral,
+            dtype=np.float64,
+            workers=1
+        )
+        fila_par, columna_par = np.nonzero(matriz > umbral)
+        del matriz
+        i, j = filas[fila_par], candidatos[columna_par]
+        posteriores = j > i
+        filas_pares.append(i[posteriores].astype(np.int32))
+        candidatos_pares.append(j[posteriores].astype(np.int32))
+
+    if not filas_pares:
+        vacio = np.empty(0, dtype=np.int32)
+        return vacio, vacio, comparaciones
+    return np.concatenate(filas_pares), np.concatenate(candidatos_pares), comparaciones
+
+
+class PoolSimilitud:
+    """
+    Pool de procesos con los textos de un clustering en memoria compartida.
+
+    Se usa como context manager (libera procesos y memoria compartida al salir).
+
+    Attributes:
+        procesos: Cantidad de procesos del pool
+        pares_por_tarea: Scores máximos de cada tarea (la matriz de cada proceso)
+    """
+
+    def __init__(
+        self,
+        textos: Sequence[str],
+        metodo: str = 'token_sort_ratio',
+        procesos: int = -1,
+        memoria_max_mb: float = 256
+    ):
+        """
+        Args:
+            textos: Todos los textos ya preprocesados (las posiciones de
+                `lideres` se refieren a esta lista)
+            metodo: Clave de `METODOS_SIMILITUD` (de ahí sale el scorer)
+            procesos: Procesos del pool (-1 = todos los núcleos)
+            memoria_max_mb: Memoria total de las matrices de scores, repartida
+                entre los procesos
+        """
+        if metodo not in METODOS_SIMILITUD:
+            raise ValueError(f"Método de similitud desconocido: {metodo}. Opciones: {list(METODOS_SIMILITUD)}")
+        self.procesos = (os.cpu_count() or 1) if procesos == -1 else max(1, int(procesos))
+        self.pares_por_tarea = max(1, int(memoria_max_mb * 1024 * 1024 // 8 // self.procesos))
+        n = len(textos)
+
+        self._textos = _empaquetar_textos(textos)
+        self._nivel = shared_memory.SharedMemory(create=True, size=max(1, 9 * n))
+        self._posiciones = np.ndarray((n,), dtype=np.int64, buffer=self._nivel.buf)
+        self._asignado = np.ndarray((n,), dtype=bool, buffer=self._nivel.buf, offset=8 * n)
+        self._ejecutor = ProcessPoolExecutor(
+            max_workers=self.procesos,
+            initializer=_iniciar_proceso,
+            initargs=(self._textos.name, n, self._nivel.name, metodo)
+        )
+
+    def __enter__(self) -> "PoolSimilitud":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Termina los procesos y borra la memoria compartida."""
+        if self._ejecutor is None:
+            return
+        self._ejecutor.shutdown(wait=True)
+        self._ejecutor = None
+        del self._posiciones, self._asignado
+        for segmento in (self._textos, self._nivel):
+            segmento.close()
+            segmento.unlink()
+
+    def _ronda(self, cursores: List[int], fines: List[int], activos: List[int]) -> Tuple[List[List[Tuple[int, int, int]]], int]:
+        """Tareas de una ronda; avanza los cursores y devuelve (tareas, filas recorridas)."""
+        tareas, agrupados, trabajo, recorridas = [], [], 0, 0
+        for b in activos:
+            inicio, fin_bloque = cursores[b], fines[b]
+            libres = max(1, int(np.count_nonzero(~self._asignado[inicio + 1:fin_bloque])))
+            filas_por_tarea = max(1, self.pares_por_tarea // libres)
+            if filas_por_tarea >= fin_bloque - inicio:
+                # Lo que queda del bloque entra en una tarea: se agrupa con otros
+                agrupados.append((fin_bloque, inicio, fin_bloque))
+                trabajo += (fin_bloque - inicio) * libres
+                if trabajo >= self.pares_por_tarea:
+                    tareas.append(agrupados)
+                    agrupados, trabajo = [], 0
+                fin = fin_bloque
+            else:
+                # Bloque grande: una ventana de filas por proceso
+                fin = min(fin_bloque, inicio + filas_por_tarea * self.procesos)
+                for desde in range(inicio, fin, filas_por_tarea):
+                    tareas.append([(fin_bloque, desde, min(desde + filas_por_tarea, fin))])
+            recorridas += fin - inicio
+            cursores[b] = fin
+        if agrupados:
+            tareas.append(agrupados)
+        return tareas, recorridas
+
+    def lideres(
+        self,
+        bloques: Sequence[np.ndarray],
+        umbral: float,
+        estadisticas: Optional[Dict[str, int]] = None,
+        al_avanzar: Optional[Callable[[int], None]] = None
+    ) -> List[np.ndarray]:
+        """
+        Un nivel del clustering: líder de cada texto, greedy independiente por bloque.
+
+        Args:
+            bloques: Posiciones (en los textos del pool) de cada bloque, en
+                orden de prioridad dentro del bloque
+            umbral: Similitud que hay que superar (estrictamente) para unirse a un líder
+            estadisticas: Dict opcional donde se acumulan los pares puntuados ('comparaciones')
+            al_avanzar: Callback opcional con la cantidad de textos recorridos
+                en cada ronda (suman el total de los bloques)
+
+        Returns:
+            Por bloque, la posición (dentro del bloque) del líder de cada texto;
+            lo mismo que `agrupar_lideres` sobre cada bloque
+        """
+        tamanios = [len(b) for b in bloques]
+        fines = np.cumsum(tamanios, dtype=np.int64).tolist()
+        n = fines[-1] if fines else 0
+        if n:
+            self._posiciones[:n] = np.concatenate(bloques)
+        self._asignado[:n] = False
+        lider = np.arange(n, dtype=np.int64)
+
+        cursores = [f - t for f, t in zip(fines, tamanios)]
+        activos = [b for b, t in enumerate(tamanios) if t]
+        while activos:
+            tareas, recorridas = self._ronda(cursores, fines, activos)
+            resultados = list(self._ejecutor.map(_aristas, [(umbral, t) for t in tareas]))
+
+            filas = np.concatenate([r[0] for r in resultados])
+            candidatos = np.concatenate([r[1] for r in resultados])
+            if estadisticas is not None:
+                estadisticas['comparaciones'] = (
+                    estadisticas.get('comparaciones', 0) + sum(r[2] for r in resultados)
+                )
+
+            # Greedy en orden de posición: las aristas nunca cruzan bloques y las
+            # filas de la ronda quedan en orden dentro de cada bloque
+            orden = np.lexsort((candidatos, filas))
+            filas, candidatos = filas[orden], candidatos[orden]
+            con_aristas, desde = np.unique(filas, return_index=True)
+            hasta = np.append(desde[1:], len(filas))
+            for i, a, z in zip(con_aristas.tolist(), desde.tolist(), hasta.tolist()):
+                if self._asignado[i]:
+                    continue
+                self._asignado[i] = True
+                similares = candidatos[a:z]
+                similares = similares[~self._asignado[similares]]
+                self._asignado[similares] = True
+                lider[similares] = i
+
+            # Las filas recorridas sin aristas libres quedan como su propio líder
+            for tarea in tareas:
+                for _, inicio, fin in tarea:
+                    self._asignado[inicio:fin] = True
+
+            if al_avanzar is not None:
+                al_avanzar(recorridas)
+            activos = [b for b in activos if cursores[b] < fines[b]]
+
+        return [lider[f - t:f] - (f - t) for f, t in zip(fines, tamanios)]
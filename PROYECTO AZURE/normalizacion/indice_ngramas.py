@@ -0,0 +1,140 @@
+"""
+Índice invertido de trigramas para preseleccionar variantes candidatas.
+
+En lugar de puntuar cada descripción contra todas las variantes de la tabla,
+se cuentan los trigramas de caracteres que comparte con cada variante (listas
+de posteo) y solo las K variantes con más trigramas en común pasan al scorer
+de rapidfuzz.
+
+Antes de elegir las K se descartan las variantes cuyo largo hace imposible
+llegar al umbral: para ratio (Indel normalizado) el score máximo entre textos
+de largo a y b es 200 * min(a, b) / (a + b). Ese filtro es exacto; la
+preselección por trigramas es aproximada y su recall contra la búsqueda
+completa se mide con benchmarks/preseleccion_ngramas.py.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Largo de los n-gramas de caracteres
+N_GRAMA = 3
+
+
+def ngramas(texto: str, n: int = N_GRAMA) -> set:
+    """N-gramas de caracteres del texto, con un espacio de relleno a cada lado."""
+    relleno = f" {texto} "
+    return {relleno[i:i + n] for i in range(len(relleno) - n + 1)}
+
+
+def rango_largo(largo_consulta: int, umbral_similitud: float) -> tuple:
+    """
+    Largos de variante que pueden alcanzar `umbral_similitud` con ratio.
+
+    Returns:
+        (largo mínimo, largo máximo) inclusive
+    """
+    if umbral_similitud <= 0:
+        return 0, np.iinfo(np.int64).max
+    if umbral_similitud > 100:
+        return 1, 0
+    minimo = math.ceil(umbral_similitud * largo_consulta / (200 - umbral_similitud) - 1e-9)
+    maximo = math.floor((200 - umbral_similitud) * largo_consulta / umbral_similitud + 1e-9)
+    return minimo, maximo
+
+
+class IndiceNgramas:
+    """
+    Listas de posteo trigrama -> variantes (formato CSR).
+
+    Las variantes se numeran por largo creciente: así las que cumplen el
+    filtro de largo de una consulta forman un rango contiguo y el conteo de
+    trigramas compartidos se recorta a ese rango sin máscaras.
+
+    Attributes:
+        vocabulario: Trigrama -> id
+        inicio_posteo: Comienzo de la lista de cada trigrama en `posteo`
+        posteo: Números (por largo) de las variantes que tienen cada trigrama
+        por_largo: Número por largo -> posición de la variante en la tabla
+        largos_ordenados: Largo de cada variante, en orden de `por_largo`
+    """
+
+    def __init__(self, textos: List[str]):
+        largos = np.fromiter((len(t) for t in textos), dtype=np.int64, count=len(textos))
+        self.por_largo = np.argsort(largos, kind="stable")
+        self.largos_ordenados = largos[self.por_largo]
+        numero = np.empty(len(textos), dtype=np.int64)
+        numero[self.por_largo] = np.arange(len(textos))
+
+        self.vocabulario: Dict[str, int] = {}
+        ids_ngrama: List[int] = []
+        ids_texto: List[int] = []
+        for posicion, texto in enumerate(textos):
+            ids = {self.vocabulario.setdefault(g, len(self.vocabulario)) for g in ngramas(texto)}
+            ids_ngrama.extend(ids)
+            ids_texto.extend([numero[posicion]] * len(ids))
+
+        ids_ngrama = np.asarray(ids_ngrama, dtype=np.int64)
+        ids_texto = np.asarray(ids_texto, dtype=np.int64)
+        orden = np.lexsort((ids_texto, ids_ngrama))
+        self.posteo = ids_texto[orden].astype(np.int32)
+        self.inicio_posteo = np.zeros(len(self.vocabulario) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids_ngrama, minlength=len(self.vocabulario)), out=self.inicio_posteo[1:])
+
+    def __len__(self) -> int:
+        return len(self.por_largo)
+
+    def _candidatas(self, consulta: str, k: int, umbral_similitud: Optional[float]) -> np.ndarray:
+        """Posiciones (orden ascendente) de las K variantes con más trigramas en común."""
+        n = len(self.por_largo)
+        desde, hasta = 0, n
+        if umbral_similitud is not None:
+            minimo, maximo = rango_largo(len(consulta), umbral_similitud)
+            desde = int(np.searchsorted(self.largos_ordenados, minimo, side="left"))
+            hasta = int(np.searchsorted(self.largos_ordenados, maximo, side="right"))
+
+        ids = [self.vocabulario[g] for g in ngramas(consulta) if g in self.vocabulario]
+        if hasta <= desde or not ids:
+            return np.empty(0, dtype=np.int64)
+
+        posteos = np.concatenate([self.posteo[self.inicio_posteo[i]:self.inicio_posteo[i + 1]] for i in ids])
+        conteos = np.bincount(posteos, minlength=n)[desde:hasta]
+
+        # Menor conteo que deja al menos K variantes (histograma de conteos)
+        acumulado = np.bincount(conteos)[::-1].cumsum()
+        corte = max(1, len(acumulado) - 1 - int(np.searchsorted(acumulado, k)))
+
+        elegidas = np.flatnonzero(conteos > corte)
+        if len(elegidas) < k:
+            en_corte = np.flatnonzero(conteos == corte)
+            faltan = k - len(elegidas)
+            if len(en_corte) > faltan:
+                # Empates en el corte: primero las variantes que están antes en la tabla
+                en_corte = en_corte[np.argsort(self.por_largo[en_corte + desde], kind="stable")[:faltan]]
+            elegidas = np.concatenate([elegidas, en_corte])
+
+        return np.sort(self.por_largo[elegidas + desde])
+
+    def preseleccionar(
+        self,
+        consultas: List[str],
+        k: int,
+        umbral_similitud: Optional[float] = None
+    ) -> List[np.ndarray]:
+        """
+        Las (hasta) K variantes con más trigramas en común con cada consulta.
+
+        Args:
+            consultas: Textos ya preprocesados igual que las variantes
+            k: Candidatas por consulta
+            umbral_similitud: Si se indica, descarta las variantes que por
+                largo no pueden alcanzarlo
+
+        Returns:
+            Lista alineada con `consultas` de posiciones candidatas en orden
+            ascendente (los empates en el corte se resuelven por posición)
+        """
+        if len(self.por_largo) == 0 or k <= 0:
+            return [np.empty(0, dtype=np.int64) for _ in consultas]
+        return [self._candidatas(consulta, k, umbral_similitud) for consulta in consultas]
@@ -0,0 +1,634 @@
+"""
+Índice precalculado de la tabla de normalización (variante -> nombre base).
+
+Se construye UNA vez por versión de la tabla y concentra lo que antes se
+recalculaba por cada fila:
+  - mapa variante -> base (mismo criterio que dict(zip(...)): gana la última)
+  - mapa en mayúsculas para coincidencias exactas (gana la primera variante)
+  - variantes preprocesadas para rapidfuzz: token_sort_ratio(a, b) es
+    ratio(tokens ordenados de a, tokens ordenados de b), así que las variantes
+    se ordenan una sola vez y cada consulta usa fuzz.ratio directo.
+
+La búsqueda en lote (`buscar_lote`) puntúa todas las consultas contra todas
+las variantes con `process.cdist` (multi-core, por bloques de memoria acotada)
+y devuelve el mismo resultado que `extractOne` consulta por consulta.
+
+Con `candidatos_k` solo se puntúan las K variantes preseleccionadas por el
+índice de trigramas (indice_ngramas.py): más rápido con tablas grandes, pero
+aproximado.
+
+Con `por_atributos` cada descripción solo se compara con las variantes de
+medida y pack compatibles (atributos.py): "COCA COLA 600CC X6" ya no puede
+normalizarse como "COCA COLA 2250CC X8".
+
+No depende de Streamlit: lo usan tanto src/normalizador.py como los scripts
+de normalizacion/.
+"""
+
+import copy
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from normalizacion.atributos import CodigosAtributos
+from normalizacion.indice_ngramas import IndiceNgramas
+
+
+METODO_EXACTA = 'Exacta'
+METODO_FUZZY = 'Fuzzy'
+METODO_SIN_MATCH = 'Sin match'
+METODO_SIN_DESCRIPCION = 'Sin descripción'
+
+
+# Memoria máxima (MB) de cada bloque de la matriz de scores en `buscar_lote`
+MEMORIA_LOTE_MB = 256
+
+
+def ordenar_tokens(texto: str) -> str:
+    """Preprocesado equivalente al interno de token_sort_ratio (sin cambiar mayúsculas)."""
+    return " ".join(sorted(texto.split()))
+
+
+# Método de similitud -> (preprocesado de los textos, scorer de rapidfuzz)
+METODOS_SIMILITUD: Dict[str, Tuple[Optional[Callable[[str], str]], Callable]] = {
+    'token_sort_ratio': (ordenar_tokens, fuzz.ratio),
+    'ratio': (None, fuzz.ratio),
+    'partial_ratio': (None, fuzz.partial_ratio),
+}
+
+
+def _actualizar_hash(h, variantes: Iterable[str], bases: Iterable[str]):
+    for variante, base in zip(variantes, bases):
+        h.update(str(variante).encode("utf-8"))
+        h.update(b"\x1f")
+        h.update(str(base).encode("utf-8"))
+        h.update(b"\x1e")
+    return h
+
+
+def calcular_version_tabla(variantes: Iterable[str], bases: Iterable[str]) -> str:
+    """
+    Hash del contenido de la tabla (orden incluido), para detectar cambios.
+
+    Returns:
+        Hex SHA-1 de las filas (variante, base)
+    """
+    return _actualizar_hash(hashlib.sha1(), variantes, bases).hexdigest()
+
+
+class NormalizationIndex:
+    """
+    Índice de búsqueda sobre la tabla de normalización.
+
+    Attributes:
+        variantes: Variantes únicas en orden de primera aparición
+        mapa_base: Variante -> nombre base
+        mapa_exacto: Variante en mayúsculas -> nombre base
+        opciones: Variantes preprocesadas según el método (choices para rapidfuzz)
+        metodo: Método de similitud ('token_sort_ratio', 'ratio', 'partial_ratio')
+        version: Hash del contenido de la tabla
+    """
+
+    def __init__(
+        self,
+        variantes: Iterable[str],
+        bases: Iterable[str],
+        metodo: str = 'token_sort_ratio'
+    ):
+        if metodo not in METODOS_SIMILITUD:
+            raise ValueError(f"Método de similitud desconocido: {metodo}. Opciones: {list(METODOS_SIMILITUD)}")
+
+        variantes = [str(v) for v in variantes]
+        bases = [str(b) for b in bases]
+
+        self.metodo = metodo
+        self._preprocesar, self._scorer = METODOS_SIMILITUD[metodo]
+
+        # Hash incremental: `con_variantes` lo extiende sin recorrer toda la tabla
+        self._hash = _actualizar_hash(hashlib.sha1(), variantes, bases)
+        self.version = self._hash.hexdigest()
+        self.mapa_base: Dict[str, str] = dict(zip(variantes, bases))
+        self.variantes: List[str] = list(self.mapa_base.keys())
+
+        self.mapa_exacto: Dict[str, str] = {}
+        for variante in self.variantes:
+            self.mapa_exacto.setdefault(variante.upper(), self.mapa_base[variante])
+
+        self.opciones: List[str] = [self._preparar(v) for v in self.variantes]
+        self._ngramas: Optional[IndiceNgramas] = None
+        self._atributos: Optional[CodigosAtributos] = None
+
+    @classmethod
+    def desde_dataframe(
+        cls,
+        tabla: pd.DataFrame,
+        columna_variante: str = 'Nombre Gestion',
+        columna_base: str = 'Base',
+        metodo: str = 'token_sort_ratio'
+    ) -> "NormalizationIndex":
+        """Construye el índice desde la tabla auxiliar ya limpia."""
+        return cls(tabla[columna_variante].tolist(), tabla[columna_base].tolist(), metodo=metodo)
+
+    def __getstate__(self) -> Dict:
+        # Las funciones de rapidfuzz y el hash incremental no se serializan
+        estado = self.__dict__.copy()
+        for clave in ('_hash', '_preprocesar', '_scorer'):
+            estado.pop(clave, None)
+        return estado
+
+    def __setstate__(self, estado: Dict) -> None:
+        self.__dict__.update(estado)
+        self._preprocesar, self._scorer = METODOS_SIMILITUD[self.metodo]
+        # Sin variantes repetidas (tabla limpia) las filas son variantes + mapa_base;
+        # si no coincide con la versión guardada, `version` sigue siendo la original
+        self._hash = _actualizar_hash(
+            hashlib.sha1(), self.variantes, (self.mapa_base[v] for v in self.variantes)
+        )
+
+    def hash_consistente(self) -> bool:
+        """Indica si el hash incremental corresponde a `version` (necesario para `con_variantes`)."""
+        return self._hash.hexdigest() == self.version
+
+    def _preparar(self, texto: str) -> str:
+        return self._preprocesar(texto) if self._preprocesar else texto
+
+    def indice_ngramas(self) -> IndiceNgramas:
+        """Índice de trigramas de las opciones (se construye la primera vez que se usa)."""
+        if getattr(self, '_ngramas', None) is None:
+            self._ngramas = IndiceNgramas(self.opciones)
+        return self._ngramas
+
+    def atributos(self) -> CodigosAtributos:
+        """Medida y pack de cada variante (se calculan la primera vez que se usan)."""
+        if getattr(self, '_atributos', None) is None:
+            self._atributos = CodigosAtributos(self.variantes)
+        return self._atributos
+
+    def __len__(self) -> int:
+        return len(self.variantes)
+
+    def clave_metodo(self, candidatos_k: Optional[int] = None, por_atributos: bool = False) -> str:
+        """Método + modo de búsqueda, para versionar resultados guardados (cache)."""
+        clave = f"{self.metodo}@top{candidatos_k}" if candidatos_k else self.metodo
+        return f"{clave}+atributos" if por_atributos else clave
+
+    def con_variantes(self, variantes: Iterable[str], bases: Iterable[str]) -> "NormalizationIndex":
+        """
+        Devuelve un índice nuevo con variantes agregadas al final de la tabla.
+
+        Solo se preprocesan las variantes nuevas; el índice actual no se
+        modifica, así que puede seguir usándose desde otros hilos.
+
+        Args:
+            variantes: Variantes nuevas (en orden de alta)
+            bases: Nombre base de cada variante nueva
+
+        Returns:
+            NormalizationIndex equivalente a construirlo con la tabla extendida
+        """
+        variantes = [str(v) for v in variantes]
+        bases = [str(b) for b in bases]
+
+        nuevo = object.__new__(NormalizationIndex)
+        nuevo.metodo = self.metodo
+        nuevo._preprocesar, nuevo._scorer = self._preprocesar, self._scorer
+        nuevo.mapa_base = dict(self.mapa_base)
+        nuevo.variantes = list(self.variantes)
+        nuevo.mapa_exacto = dict(self.mapa_exacto)
+        nuevo.opciones = list(self.opciones)
+        nuevo._ngramas = None
+        nuevo._atributos = None
+        n_anteriores = len(self.variantes)
+
+        for variante, base in zip(variantes, bases):
+            clave = variante.upper()
+            if variante not in nuevo.mapa_base:
+                nuevo.variantes.append(variante)
+                nuevo.opciones.append(nuevo._preparar(variante))
+                nuevo.mapa_base[variante] = base
+                nuevo.mapa_exacto.setdefault(clave, base)
+            else:
+                # Variante repetida: gana la última base (como dict(zip(...)))
+                nuevo.mapa_base[variante] = base
+                primera = next(v for v in nuevo.variantes if v.upper() == clave)
+                nuevo.mapa_exacto[clave] = nuevo.mapa_base[primera]
+
+        # Los atributos ya calculados se extienden solo con las variantes nuevas
+        if getattr(self, '_atributos', None) is not None:
+            nuevo._atributos = copy.deepcopy(self._atributos)
+            nuevo._atributos.extender(nuevo.variantes[n_anteriores:])
+
+        nuevo._hash = _actualizar_hash(self._hash.copy(), variantes, bases)
+        nuevo.version = nuevo._hash.hexdigest()
+        return nuevo
+
+    def afectadas_por(
+        self,
+        variantes_nuevas: Iterable[str],
+        descripciones: List[str],
+        similitudes: Iterable[float],
+        workers: int = -1
+    ) -> np.ndarray:
+        """
+        Indica qué resultados previos podrían cambiar al agregar `variantes_nuevas`.
+
+        Una variante agregada al final solo cambia el resultado de una
+        descripción si coincide exacto (mayúsculas) o si la puntúa al menos tan
+        alto como su mejor match anterior (los empates se marcan por las dudas).
+
+        Args:
+            variantes_nuevas: Variantes agregadas
+            descripciones: Descripciones limpias ya resueltas
+            similitudes: Similitud que obtuvo cada descripción
+
+        Returns:
+            Máscara booleana alineada con `descripciones`
+        """
+        variantes_nuevas = [str(v) for v in variantes_nuevas]
+        afectadas = np.zeros(len(descripciones), dtype=bool)
+        if not variantes_nuevas or not descripciones:
+            return afectadas
+
+        claves_nuevas = {v.upper() for v in variantes_nuevas}
+        afectadas |= np.array([d.upper() in claves_nuevas for d in descripciones], dtype=bool)
+
+        similitudes = np.asarray(list(similitudes), dtype="float64")
+        opciones_nuevas = [self._preparar(v) for v in variantes_nuevas]
+        filas_por_bloque = max(1, int(MEMORIA_LOTE_MB * 1024 * 1024 // (4 * len(opciones_nuevas))))
+        for inicio in range(0, len(descripciones), filas_por_bloque):
+            bloque = [self._preparar(d) for d in descripciones[inicio:inicio + filas_por_bloque]]
+            maximos = process.cdist(
+                bloque, opciones_nuevas, scorer=self._scorer, processor=None, workers=workers
+            ).max(axis=1)
+            fin = inicio + len(bloque)
+            afectadas[inicio:fin] |= maximos >= similitudes[inicio:fin] - 1e-3
+
+        return afectadas
+
+    def buscar(
+        self,
+        descripcion,
+        umbral_similitud: float = 75,
+        candidatos_k: Optional[int] = None,
+        por_atributos: bool = False
+    ) -> Tuple[str, float, str]:
+        """
+        Normaliza una descripción (mismo resultado que la búsqueda fila por fila original).
+
+        Args:
+            descripcion: Texto a normalizar
+            umbral_similitud: Umbral mínimo de similitud (0-100)
+            candidatos_k: Si se indica, solo puntúa las K variantes preseleccionadas por trigramas
+            por_atributos: Si True, solo puntúa las variantes de medida y pack compatibles
+
+        Returns:
+            Tupla (descripcion_normalizada, similitud, metodo)
+        """
+        if pd.isna(descripcion) or str(descripcion).strip() == '':
+            return '', 0.0, METODO_SIN_DESCRIPCION
+
+        desc_limpia = str(descripcion).strip()
+
+        # 1. Coincidencia exacta (case-insensitive) por hash
+        base = self.mapa_exacto.get(desc_limpia.upper())
+        if base is not None:
+            return base, 100.0, METODO_EXACTA
+
+        # 2. Fuzzy matching sobre las opciones preprocesadas
+        consulta = self._preparar(desc_limpia)
+        if por_atributos:
+            posiciones, scores = self._mejores_por_atributos(
+                [desc_limpia], [consulta], candidatos_k=candidatos_k, umbral_similitud=umbral_similitud
+            )
+            resultado = (None, scores[0], posiciones[0]) if posiciones[0] >= 0 else None
+        elif candidatos_k:
+            posiciones, scores = self._mejores_candidatas([consulta], candidatos_k, umbral_similitud)
+            resultado = (None, scores[0], posiciones[0]) if posiciones[0] >= 0 else None
+        else:
+            resultado = process.extractOne(
+                consulta,
+                self.opciones,
+                scorer=self._scorer,
+                processor=None
+            )
+
+        if resultado and resultado[1] >= umbral_similitud:
+            _, similitud, posicion = resultado
+            return self.mapa_base[self.variantes[posicion]], float(similitud), METODO_FUZZY
+
+        # 3. Sin match suficiente - mantener original
+        return desc_limpia, float(resultado[1]) if resultado else 0.0, METODO_SIN_MATCH
+
+    def _mejores_coincidencias(
+        self,
+        consultas: List[str],
+        workers: int = -1,
+        memoria_max_mb: float = MEMORIA_LOTE_MB,
+        mostrar_progreso: bool = False,
+        permitidas: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mejor variante y score para cada consulta (ya preprocesada), con cdist por bloques.
+
+        cdist devuelve float32: la fila se reduce al máximo en float32 y los
+        candidatos empatados se vuelven a puntuar en float64, tomando el primero,
+        igual que `extractOne`.
+
+        Args:
+            permitidas: Posiciones (ascendentes) de las únicas variantes a
+                puntuar; None = todas
+
+        Returns:
+            Tupla (posiciones de la mejor variante, scores en float64)
+        """
+        n_consultas = len(consultas)
+        posiciones = np.full(n_consultas, -1, dtype=np.int64)
+        scores = np.zeros(n_consultas, dtype="float64")
+        opciones = self.opciones if permitidas is None else [self.opciones[p] for p in permitidas]
+        if n_consultas == 0 or not opciones:
+            return posiciones, scores
+
+        filas_por_bloque = max(1, int(memoria_max_mb * 1024 * 1024 // (4 * len(opciones))))
+        bloques = range(0, n_consultas, filas_por_bloque)
+        if mostrar_progreso:
+            from tqdm import tqdm
+            bloques = tqdm(bloques, desc="Normalizando (lote)", unit="bloque")
+
+        for inicio in bloques:
+            bloque = consultas[inicio:inicio + filas_por_bloque]
+            matriz = process.cdist(
+                bloque,
+                opciones,
+                scorer=self._scorer,
+                processor=None,
+                workers=workers
+            )
+            maximos = matriz.max(axis=1)
+            empatadas = (matriz == maximos[:, None]).sum(axis=1) > 1
+            mejores = matriz.argmax(axis=1)
+
+            for i, consulta in enumerate(bloque):
+                if empatadas[i]:
+                    candidatos = np.flatnonzero(matriz[i] == maximos[i])
+                else:
+                    candidatos = mejores[i:i + 1]
+                mejor_pos, mejor_score = -1, -1.0
+                for pos in candidatos:
+                    score = self._scorer(consulta, opciones[pos])
+                    if score > mejor_score:
+                        mejor_pos, mejor_score = int(pos), score
+                posiciones[inicio + i] = mejor_pos if permitidas is None else permitidas[mejor_pos]
+                scores[inicio + i] = mejor_score
+
+        return posiciones, scores
+
+    def _mejores_candidatas(
+        self,
+        consultas: List[str],
+        candidatos_k: int,
+        umbral_similitud: Optional[float] = None,
+        compatibles: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Como `_mejores_coincidencias`, pero puntuando solo las K variantes
+        preseleccionadas por el índice de trigramas.
+
+        Las candidatas van en orden de posición, así que entre empates gana la
+        primera variante de la tabla, como en la búsqueda completa. Una consulta
+        sin candidatas queda con posición -1 y score 0. Con `compatibles`
+        (máscara por variante) se descartan las candidatas fuera de la máscara.
+
+        Returns:
+            Tupla (posiciones de la mejor variante, scores en float64)
+        """
+        posiciones = np.full(len(consultas), -1, dtype=np.int64)
+        scores = np.zeros(len(consultas), dtype="float64")
+        if not consultas or not self.opciones:
+            return posiciones, scores
+
+        # El filtro por largo solo vale para ratio (partial_ratio no se acota por largo)
+        if self._scorer is not fuzz.ratio:
+            umbral_similitud = None
+        candidatas = self.indice_ngramas().preseleccionar(consultas, candidatos_k, umbral_similitud)
+        for i, (consulta, posibles) in enumerate(zip(consultas, candidatas)):
+            if compatibles is not None:
+                posibles = posibles[compatibles[posibles]]
+            if len(posibles) == 0:
+                continue
+            resultado = process.extractOne(
+                consulta,
+                [self.opciones[pos] for pos in posibles],
+                scorer=self._scorer,
+                processor=None
+            )
+            posiciones[i] = posibles[resultado[2]]
+            scores[i] = resultado[1]
+
+        return posiciones, scores
+
+    def _mejores_por_atributos(
+        self,
+        limpias: List[str],
+        consultas: List[str],
+        workers: int = -1,
+        memoria_max_mb: float = MEMORIA_LOTE_MB,
+        candidatos_k: Optional[int] = None,
+        umbral_similitud: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Como `_mejores_coincidencias`, pero cada consulta solo contra las
+        variantes de medida y pack compatibles (ver `CodigosAtributos`).
+
+        Las consultas con los mismos atributos se puntúan juntas contra su
+        subconjunto de variantes (en orden de posición, así los empates se
+        resuelven igual que en la búsqueda completa).
+
+        Args:
+            limpias: Descripciones originales (de ahí se extraen los atributos)
+            consultas: Las mismas descripciones ya preprocesadas
+
+        Returns:
+            Tupla (posiciones de la mejor variante, scores en float64)
+        """
+        posiciones = np.full(len(consultas), -1, dtype=np.int64)
+        scores = np.zeros(len(consultas), dtype="float64")
+        if not consultas or not self.opciones:
+            return posiciones, scores
+
+        codigos = self.atributos()
+        grupos: Dict[Tuple[int, ...], List[int]] = {}
+        for i, desc in enumerate(limpias):
+            grupos.setdefault(codigos.clave(desc), []).append(i)
+
+        for clave, filas in grupos.items():
+            compatibles = codigos.compatibles(clave)
+            sub = [consultas[i] for i in filas]
+            if candidatos_k:
+                pos, sc = self._mejores_candidatas(sub, candidatos_k, umbral_similitud, compatibles)
+            else:
+                pos, sc = self._mejores_coincidencias(
+                    sub, workers, memoria_max_mb, permitidas=np.flatnonzero(compatibles)
+                )
+            posiciones[filas], scores[filas] = pos, sc
+
+        return posiciones, scores
+
+    def buscar_lote(
+        self,
+        descripciones: Iterable,
+        umbral_similitud: float = 75,
+        workers: int = -1,
+        memoria_max_mb: float = MEMORIA_LOTE_MB,
+        mostrar_progreso: bool = False,
+        candidatos_k: Optional[int] = None,
+        por_atributos: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Normaliza un lote de descripciones (mismo resultado que `buscar` una por una).
+
+        Args:
+            descripciones: Descripciones a normalizar (idealmente sin repetidos)
+            umbral_similitud: Umbral mínimo de similitud (0-100)
+            workers: Hilos para cdist (-1 = todos los núcleos)
+            memoria_max_mb: Tamaño máximo de cada bloque de la matriz de scores
+            mostrar_progreso: Si True, muestra una barra tqdm por bloque
+            candidatos_k: Si se indica, solo puntúa las K variantes
+                preseleccionadas por trigramas (aproximado); None = todas
+            por_atributos: Si True, solo puntúa las variantes de medida y pack
+                compatibles con cada descripción
+
+        Returns:
+            Tupla de arrays (normalizada, similitud, metodo, variante_match);
+            variante_match es None salvo en los matches Fuzzy
+        """
+        descripciones = list(descripciones)
+        n = len(descripciones)
+        normalizadas = np.empty(n, dtype=object)
+        similitudes = np.zeros(n, dtype="float64")
+        metodos = np.empty(n, dtype=object)
+        variantes_match = np.full(n, None, dtype=object)
+
+        pendientes: List[int] = []
+        limpias: List[str] = []
+        for i, descripcion in enumerate(descripciones):
+            if pd.isna(descripcion) or str(descripcion).strip() == '':
+                normalizadas[i], metodos[i] = '', METODO_SIN_DESCRIPCION
+                continue
+            desc_limpia = str(descripcion).strip()
+            base = self.mapa_exacto.get(desc_limpia.upper())
+            if base is not None:
+                normalizadas[i], similitudes[i], metodos[i] = base, 100.0, METODO_EXACTA
+                continue
+            pendientes.append(i)
+            limpias.append(desc_limpia)
+
+        consultas = [self._preparar(d) for d in limpias]
+        if por_atributos:
+            posiciones, scores = self._mejores_por_atributos(
+                limpias, consultas, workers, memoria_max_mb, candidatos_k, umbral_similitud
+            )
+        elif candidatos_k:
+            posiciones, scores = self._mejores_candidatas(consultas, candidatos_k, umbral_similitud)
+        else:
+            posiciones, scores = self._mejores_coincidencias(consultas, workers, memoria_max_mb, mostrar_progreso)
+
+        for i, desc_limpia, pos, score in zip(pendientes, limpias, posiciones, scores):
+            similitudes[i] = score
+            if pos >= 0 and score >= umbral_similitud:
+                variante = self.variantes[pos]
+                normalizadas[i], metodos[i], variantes_match[i] = self.mapa_base[variante], METODO_FUZZY, variante
+            else:
+                normalizadas[i], metodos[i] = desc_limpia, METODO_SIN_MATCH
+
+        return normalizadas, similitudes, metodos, variantes_match
+
+    def _resolver(
+        self,
+        descripciones: List,
+        umbral_similitud: float,
+        lote: bool,
+        candidatos_k: Optional[int] = None,
+        por_atributos: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Normaliza una lista de descripciones distintas (lote o una por una)."""
+        if lote:
+            normalizadas, similitudes, metodos, _ = self.buscar_lote(
+                descripciones, umbral_similitud, candidatos_k=candidatos_k, por_atributos=por_atributos
+            )
+            return normalizadas, similitudes, metodos
+
+        resultados = [self.buscar(desc, umbral_similitud, candidatos_k, por_atributos) for desc in descripciones]
+        return (
+            np.array([r[0] for r in resultados], dtype=object),
+            np.array([r[1] for r in resultados], dtype="float64"),
+            np.array([r[2] for r in resultados], dtype=object),
+        )
+
+    def normalizar_serie(
+        self,
+        descripciones: pd.Series,
+        umbral_similitud: float = 75,
+        lote: bool = True,
+        cache=None,
+        candidatos_k: Optional[int] = None,
+        por_atributos: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Normaliza una serie procesando cada descripción distinta una sola vez.
+
+        Args:
+            descripciones: Serie con las descripciones (puede tener repetidos y nulos)
+            umbral_similitud: Umbral mínimo de similitud (0-100)
+            lote: Si True usa `buscar_lote` (cdist multi-core); si no, `buscar` por descripción
+            cache: CacheNormalizacion opcional (misma versión de tabla y umbral);
+                solo se calculan las descripciones que no estén guardadas
+            candidatos_k: Preselección por trigramas (ver `buscar_lote`); la
+                cache debe abrirse con `clave_metodo(candidatos_k, por_atributos)`
+            por_atributos: Bloqueo por medida y pack (ver `buscar_lote`)
+
+        Returns:
+            Tupla de arrays alineados con la serie: (normalizada, similitud, metodo)
+        """
+        codigos, unicos = pd.factorize(descripciones, use_na_sentinel=True)
+        unicos = list(unicos)
+
+        if cache is None:
+            normalizadas, similitudes, metodos = self._resolver(
+                unicos, umbral_similitud, lote, candidatos_k, por_atributos
+            )
+        else:
+            claves = [str(desc).strip() for desc in unicos]
+            claves_validas = list(dict.fromkeys(c for c in claves if c))
+            memo = cache.obtener(claves_validas)
+
+            normalizadas = np.empty(len(unicos), dtype=object)
+            similitudes = np.zeros(len(unicos), dtype="float64")
+            metodos = np.empty(len(unicos), dtype=object)
+
+            pendientes = []
+            for i, clave in enumerate(claves):
+                if clave in memo:
+                    normalizadas[i], similitudes[i], metodos[i] = memo[clave]
+                else:
+                    pendientes.append(i)
+
+            if pendientes:
+                nuevas, sims, mets = self._resolver(
+                    [unicos[i] for i in pendientes], umbral_similitud, lote, candidatos_k, por_atributos
+                )
+                normalizadas[pendientes], similitudes[pendientes], metodos[pendientes] = nuevas, sims, mets
+                cache.guardar({
+                    claves[i]: (nuevas[j], sims[j], mets[j])
+                    for j, i in enumerate(pendientes) if claves[i]
+                })
+
+        # Posición extra al final para los nulos (código -1)
+        normalizadas = np.append(normalizadas, np.array([''], dtype=object))
+        similitudes = np.append(similitudes, 0.0)
+        metodos = np.append(metodos, np.array([METODO_SIN_DESCRIPCION], dtype=object))
+        codigos = np.where(codigos < 0, len(normalizadas) - 1, codigos)
+
+        return normalizadas[codigos], similitudes[codigos], metodos[codigos]
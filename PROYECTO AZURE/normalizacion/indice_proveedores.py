@@ -0,0 +1,330 @@
+"""
+Índices de normalización particionados por proveedor.
+
+Las variantes aprendidas de un proveedor (Coca-Cola, Quilmes, ...) forman su
+propia partición; las variantes sin proveedor forman el índice global. Cada
+descripción se busca primero en la partición de su proveedor y, si ahí no
+tiene match (exacto o fuzzy), en el índice global. Así una factura de
+Coca-Cola no se compara contra lo aprendido de otros proveedores ni termina
+normalizada con un producto de otro proveedor.
+
+Sin particiones (ninguna variante con proveedor) se comporta exactamente como
+el NormalizationIndex global, con la misma versión.
+"""
+
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from normalizacion.indice_normalizacion import (
+    METODO_EXACTA,
+    METODO_FUZZY,
+    METODO_SIN_DESCRIPCION,
+    NormalizationIndex,
+)
+
+# Nombre de la partición global en estadísticas y columnas de debug
+PARTICION_GLOBAL = 'global'
+
+# Separa proveedor y descripción en las claves de la cache
+_SEPARADOR_CLAVE = "\x1f"
+
+
+def _proveedor(valor) -> str:
+    return '' if valor is None or pd.isna(valor) else str(valor).strip()
+
+
+class IndicePorProveedor:
+    """
+    Índice global + un NormalizationIndex por proveedor.
+
+    Attributes:
+        global_: Índice de las variantes sin proveedor
+        particiones: Proveedor -> índice de sus variantes
+        metodo: Método de similitud
+        version: Hash del contenido de todas las particiones
+    """
+
+    def __init__(
+        self,
+        variantes: Iterable[str],
+        bases: Iterable[str],
+        proveedores: Optional[Iterable] = None,
+        metodo: str = 'token_sort_ratio'
+    ):
+        variantes = [str(v) for v in variantes]
+        bases = [str(b) for b in bases]
+        proveedores = [_proveedor(p) for p in proveedores] if proveedores is not None else [''] * len(variantes)
+
+        filas: Dict[str, Tuple[List[str], List[str]]] = {}
+        for variante, base, proveedor in zip(variantes, bases, proveedores):
+            destino = filas.setdefault(proveedor, ([], []))
+            destino[0].append(variante)
+            destino[1].append(base)
+
+        globales = filas.pop('', ([], []))
+        self.metodo = metodo
+        self.global_ = NormalizationIndex(globales[0], globales[1], metodo=metodo)
+        self.particiones: Dict[str, NormalizationIndex] = {
+            proveedor: NormalizationIndex(vs, bs, metodo=metodo) for proveedor, (vs, bs) in filas.items()
+        }
+        self.version = self._calcular_version()
+
+    @classmethod
+    def desde_dataframe(
+        cls,
+        tabla: pd.DataFrame,
+        columna_variante: str = 'Nombre Gestion',
+        columna_base: str = 'Base',
+        columna_proveedor: str = 'Proveedor',
+        metodo: str = 'token_sort_ratio'
+    ) -> "IndicePorProveedor":
+        """Construye los índices desde la tabla (la columna de proveedor es opcional)."""
+        proveedores = tabla[columna_proveedor].tolist() if columna_proveedor in tabla.columns else None
+        return cls(tabla[columna_variante].tolist(), tabla[columna_base].tolist(), proveedores, metodo=metodo)
+
+    def _calcular_version(self) -> str:
+        if not self.particiones:
+            return self.global_.version
+        h = hashlib.sha1(self.global_.version.encode("utf-8"))
+        for proveedor in sorted(self.particiones):
+            h.update(f"\x1e{proveedor}\x1f{self.particiones[proveedor].version}".encode("utf-8"))
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.global_) + sum(len(p) for p in self.particiones.values())
+
+    def hash_consistente(self) -> bool:
+        """Ver `NormalizationIndex.hash_consistente` (todas las particiones)."""
+        return self.global_.hash_consistente() and all(p.hash_consistente() for p in self.particiones.values())
+
+    def clave_metodo(self, candidatos_k: Optional[int] = None, por_atributos: bool = False) -> str:
+        return self.global_.clave_metodo(candidatos_k, por_atributos)
+
+    def particion(self, proveedor) -> Optional[NormalizationIndex]:
+        """Índice del proveedor, o None si no tiene variantes propias."""
+        return self.particiones.get(_proveedor(proveedor))
+
+    def clave_cache(self, descripcion: str, proveedor) -> str:
+        """Clave de cache: la descripción sola si se resuelve con el índice global."""
+        proveedor = _proveedor(proveedor)
+        return f"{proveedor}{_SEPARADOR_CLAVE}{descripcion}" if proveedor in self.particiones else descripcion
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+    def con_variantes(
+        self,
+        variantes: Iterable[str],
+        bases: Iterable[str],
+        proveedores: Optional[Iterable] = None
+    ) -> "IndicePorProveedor":
+        """
+        Devuelve índices nuevos con variantes agregadas (ver `NormalizationIndex.con_variantes`).
+
+        Solo se extienden las particiones que reciben variantes.
+        """
+        variantes = [str(v) for v in variantes]
+        bases = [str(b) for b in bases]
+        proveedores = [_proveedor(p) for p in proveedores] if proveedores is not None else [''] * len(variantes)
+
+        filas: Dict[str, Tuple[List[str], List[str]]] = {}
+        for variante, base, proveedor in zip(variantes, bases, proveedores):
+            destino = filas.setdefault(proveedor, ([], []))
+            destino[0].append(variante)
+            destino[1].append(base)
+
+        nuevo = object.__new__(IndicePorProveedor)
+        nuevo.metodo = self.metodo
+        nuevo.global_ = self.global_
+        nuevo.particiones = dict(self.particiones)
+        for proveedor, (vs, bs) in filas.items():
+            if proveedor == '':
+                nuevo.global_ = self.global_.con_variantes(vs, bs)
+            elif proveedor in nuevo.particiones:
+                nuevo.particiones[proveedor] = nuevo.particiones[proveedor].con_variantes(vs, bs)
+            else:
+                nuevo.particiones[proveedor] = NormalizationIndex(vs, bs, metodo=self.metodo)
+        nuevo.version = nuevo._calcular_version()
+        return nuevo
+
+    def afectadas_por(
+        self,
+        variantes_nuevas: Iterable[str],
+        proveedores_nuevos: Optional[Iterable],
+        claves: List[str],
+        similitudes: Iterable[float]
+    ) -> np.ndarray:
+        """
+        Resultados guardados (por clave de cache) que pueden cambiar con las variantes nuevas.
+
+        Las claves de un proveedor que recibe variantes se recalculan todas; para
+        las variantes globales se usa `NormalizationIndex.afectadas_por`.
+        """
+        variantes_nuevas = [str(v) for v in variantes_nuevas]
+        proveedores_nuevos = (
+            [_proveedor(p) for p in proveedores_nuevos] if proveedores_nuevos is not None
+            else [''] * len(variantes_nuevas)
+        )
+        con_variantes = {p for p in proveedores_nuevos if p}
+
+        partes = [clave.split(_SEPARADOR_CLAVE, 1) if _SEPARADOR_CLAVE in clave else ['', clave] for clave in claves]
+        afectadas = np.array([proveedor in con_variantes for proveedor, _ in partes], dtype=bool)
+
+        globales = [v for v, p in zip(variantes_nuevas, proveedores_nuevos) if not p]
+        if globales and claves:
+            afectadas |= self.global_.afectadas_por(globales, [d for _, d in partes], similitudes)
+        return afectadas
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+    def normalizar_serie(
+        self,
+        descripciones: pd.Series,
+        proveedores: Optional[pd.Series] = None,
+        umbral_similitud: float = 75,
+        cache=None,
+        candidatos_k: Optional[int] = None,
+        por_atributos: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Dict[str, float]]]:
+        """
+        Normaliza una serie buscando primero en la partición del proveedor de cada fila.
+
+        Args:
+            descripciones: Serie con las descripciones (puede tener repetidos y nulos)
+            proveedores: Serie alineada con el proveedor de cada fila (opcional)
+            umbral_similitud: Umbral mínimo de similitud (0-100)
+            cache: CacheNormalizacion opcional (misma versión y umbral)
+            candidatos_k: Preselección por trigramas (ver `NormalizationIndex.buscar_lote`)
+            por_atributos: Bloqueo por medida y pack (ver `NormalizationIndex.buscar_lote`)
+
+        Returns:
+            Tupla (normalizada, similitud, metodo, particion) alineada con la serie,
+            más estadísticas por partición: {particion: {"consultas", "resueltas",
+            "a_global", "segundos", "desde_cache"}}; con particiones "consultas"
+            cuenta las descripciones que no estaban en cache y "desde_cache" las
+            que sí, en la partición que las resolvió originalmente
+        """
+        if not self.particiones or proveedores is None:
+            inicio = time.perf_counter()
+            normalizadas, similitudes, metodos = self.global_.normalizar_serie(
+                descripciones, umbral_similitud, cache=cache, candidatos_k=candidatos_k,
+                por_atributos=por_atributos
+            )
+            particion = np.where(metodos == METODO_SIN_DESCRIPCION, None, PARTICION_GLOBAL).astype(object)
+            estadisticas = {PARTICION_GLOBAL: {
+                "consultas": int(pd.Series(descripciones).nunique()),
+                "resueltas": int(pd.Series(descripciones)[np.isin(metodos, [METODO_EXACTA, METODO_FUZZY])].nunique()),
+                "a_global": 0,
+                "segundos": time.perf_counter() - inicio,
+            }}
+            return normalizadas, similitudes, metodos, particion, estadisticas
+
+        limpias = [
+            None if pd.isna(d) or str(d).strip() == '' else str(d).strip()
+            for d in descripciones
+        ]
+        particiones = [
+            _proveedor(p) if _proveedor(p) in self.particiones else PARTICION_GLOBAL
+            for p in proveedores
+        ]
+
+        # Una búsqueda por (partición, descripción) distinta
+        claves = [
+            None if d is None else (d if p == PARTICION_GLOBAL else f"{p}{_SEPARADOR_CLAVE}{d}")
+            for d, p in zip(limpias, particiones)
+        ]
+        codigos, unicas = pd.factorize(pd.Series(claves, dtype=object), use_na_sentinel=True)
+        unicas = list(unicas)
+        primera = {}
+        for fila, codigo in enumerate(codigos):
+            if codigo >= 0 and codigo not in primera:
+                primera[codigo] = fila
+
+        normalizadas = np.empty(len(unicas), dtype=object)
+        similitudes = np.zeros(len(unicas), dtype="float64")
+        metodos = np.empty(len(unicas), dtype=object)
+        origen = np.empty(len(unicas), dtype=object)
+
+        memo = cache.obtener(unicas, con_particion=True) if cache is not None else {}
+        # Resultados de proveedor guardados sin partición: no se sabe si los
+        # resolvió el proveedor o la global, así que se recalculan
+        memo = {
+            clave: resultado for clave, resultado in memo.items()
+            if resultado[3] is not None or _SEPARADOR_CLAVE not in clave
+        }
+        pendientes_por_particion: Dict[str, List[int]] = {}
+        desde_cache: Dict[str, int] = {}
+        for codigo, clave in enumerate(unicas):
+            fila = primera[codigo]
+            if clave in memo:
+                normalizadas[codigo], similitudes[codigo], metodos[codigo], particion = memo[clave]
+                origen[codigo] = particion or PARTICION_GLOBAL
+                desde_cache[origen[codigo]] = desde_cache.get(origen[codigo], 0) + 1
+            else:
+                pendientes_por_particion.setdefault(particiones[fila], []).append(codigo)
+
+        estadisticas: Dict[str, Dict[str, float]] = {}
+        a_global = list(pendientes_por_particion.pop(PARTICION_GLOBAL, []))
+
+        for proveedor, codigos_particion in pendientes_por_particion.items():
+            inicio = time.perf_counter()
+            norm, sims, mets, _ = self.particiones[proveedor].buscar_lote(
+                [limpias[primera[c]] for c in codigos_particion], umbral_similitud,
+                candidatos_k=candidatos_k, por_atributos=por_atributos
+            )
+            resueltas = 0
+            for j, codigo in enumerate(codigos_particion):
+                if mets[j] in (METODO_EXACTA, METODO_FUZZY):
+                    normalizadas[codigo], similitudes[codigo], metodos[codigo] = norm[j], sims[j], mets[j]
+                    origen[codigo] = proveedor
+                    resueltas += 1
+                else:
+                    a_global.append(codigo)
+            estadisticas[proveedor] = {
+                "consultas": len(codigos_particion),
+                "resueltas": resueltas,
+                "a_global": len(codigos_particion) - resueltas,
+                "segundos": time.perf_counter() - inicio,
+                "desde_cache": desde_cache.pop(proveedor, 0),
+            }
+
+        if a_global:
+            inicio = time.perf_counter()
+            norm, sims, mets, _ = self.global_.buscar_lote(
+                [limpias[primera[c]] for c in a_global], umbral_similitud,
+                candidatos_k=candidatos_k, por_atributos=por_atributos
+            )
+            normalizadas[a_global], similitudes[a_global], metodos[a_global] = norm, sims, mets
+            origen[a_global] = PARTICION_GLOBAL
+            estadisticas[PARTICION_GLOBAL] = {
+                "consultas": len(a_global),
+                "resueltas": int(np.isin(mets, [METODO_EXACTA, METODO_FUZZY]).sum()),
+                "a_global": 0,
+                "segundos": time.perf_counter() - inicio,
+                "desde_cache": desde_cache.pop(PARTICION_GLOBAL, 0),
+            }
+        for particion, aciertos in desde_cache.items():
+            # Particiones resueltas enteras desde la cache
+            estadisticas[particion] = {
+                "consultas": 0, "resueltas": 0, "a_global": 0, "segundos": 0.0, "desde_cache": aciertos,
+            }
+
+        if cache is not None:
+            pendientes = [c for c in range(len(unicas)) if unicas[c] not in memo]
+            cache.guardar({
+                unicas[c]: (normalizadas[c], similitudes[c], metodos[c], origen[c]) for c in pendientes
+            })
+
+        # Posición extra al final para las descripciones vacías (código -1)
+        normalizadas = np.append(normalizadas, np.array([''], dtype=object))
+        similitudes = np.append(similitudes, 0.0)
+        metodos = np.append(metodos, np.array([METODO_SIN_DESCRIPCION], dtype=object))
+        origen = np.append(origen, np.array([None], dtype=object))
+        codigos = np.where(codigos < 0, len(normalizadas) - 1, codigos)
+
+        return normalizadas[codigos], similitudes[codigos], metodos[codigos], origen[codigos], estadisticas
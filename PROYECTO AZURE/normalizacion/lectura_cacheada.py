@@ -0,0 +1,162 @@
+"""
+Lectura de Excel/CSV con copia en caché (Parquet) para las lecturas siguientes.
+
+Leer un xlsx con `pd.read_excel` cuesta segundos (descomprimir el XML y
+convertir celda por celda) y las herramientas vuelven a leer los mismos
+archivos en cada corrida: la tabla de normalización, los libros de datos.
+`leer_tabla` convierte el archivo la primera vez y sirve las siguientes
+lecturas desde la copia, leyendo solo las columnas pedidas.
+
+La copia se identifica por archivo + hoja + opciones de lectura y es válida
+mientras no cambien el mtime y el tamaño del original; si cambian, se vuelve
+a convertir (y se pisa la copia anterior).
+
+Formato: Parquet si está instalado `pyarrow`; si no, o si el DataFrame no
+entra en Parquet (columnas con tipos mezclados, nombres no textuales), pickle.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Carpeta de la caché, relativa a la carpeta de cada archivo leído
+CARPETA_CACHE = Path(".cache") / "lectura"
+
+# Versión del formato de las copias: cambiarla invalida las existentes
+VERSION_FORMATO = 1
+
+_EXTENSIONES_CSV = {".csv", ".txt"}
+
+
+def _clave(ruta: Path, hoja: Union[str, int], opciones: Dict[str, Any]) -> str:
+    """Hash de archivo + hoja + opciones de lectura (nombre de la copia)."""
+    texto = json.dumps(
+        {"ruta": str(ruta), "hoja": hoja, "opciones": opciones, "version": VERSION_FORMATO},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _firma(ruta: Path) -> str:
+    estado = ruta.stat()
+    return f"{estado.st_mtime_ns}:{estado.st_size}"
+
+
+def _leer_original(ruta: Path, hoja: Union[str, int], opciones: Dict[str, Any]) -> pd.DataFrame:
+    if ruta.suffix.lower() in _EXTENSIONES_CSV:
+        return pd.read_csv(ruta, **opciones)
+    return pd.read_excel(ruta, sheet_name=hoja, **opciones)
+
+
+def _proyectar(df: pd.DataFrame, columnas: Optional[Iterable[str]]) -> pd.DataFrame:
+    if columnas is None:
+        return df
+    return df[[c for c in columnas if c in df.columns]]
+
+
+def _escribir_atomico(destino: Path, escribir) -> None:
+    fd, temporal = tempfile.mkstemp(suffix=destino.suffix, dir=str(destino.parent))
+    os.close(fd)
+    try:
+        escribir(temporal)
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _guardar_copia(df: pd.DataFrame, base: Path) -> str:
+    """Guarda la copia en Parquet (o pickle si no se puede) y devuelve el formato."""
+    try:
+        _escribir_atomico(base.with_suffix(".parquet"), lambda ruta: df.to_parquet(ruta))
+        return "parquet"
+    except (ImportError, TypeError, ValueError):
+        # Sin pyarrow, o tipos que Parquet no admite (ArrowTypeError / ArrowInvalid)
+        _escribir_atomico(base.with_suffix(".pkl"), lambda ruta: df.to_pickle(ruta))
+        return "pickle"
+
+
+def _restaurar_nulos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parquet devuelve None en las celdas vacías de columnas de texto, donde
+    `read_excel` da NaN: sin esto `str(valor)` daría 'None' en vez de 'nan'
+    según si la copia estaba o no.
+    """
+    for columna in df.select_dtypes(include="object").columns:
+        nulos = df[columna].isna()
+        if nulos.any():
+            df[columna] = df[columna].where(~nulos, np.nan)
+    return df
+
+
+def _leer_copia(base: Path, formato: str, columnas: Optional[Iterable[str]]) -> pd.DataFrame:
+    if formato == "parquet":
+        if columnas is None:
+            return _restaurar_nulos(pd.read_parquet(base.with_suffix(".parquet")))
+        # Parquet es columnar: solo se leen las columnas pedidas
+        import pyarrow.parquet as pq
+        disponibles = set(pq.read_schema(base.with_suffix(".parquet")).names)
+        return _restaurar_nulos(pd.read_parquet(
+            base.with_suffix(".parquet"), columns=[c for c in columnas if c in disponibles]
+        ))
+    return _proyectar(pd.read_pickle(base.with_suffix(".pkl")), columnas)
+
+
+def leer_tabla(
+    archivo: Union[str, Path],
+    hoja: Union[str, int] = 0,
+    columnas: Optional[Iterable[str]] = None,
+    carpeta_cache: Optional[Union[str, Path]] = None,
+    **opciones
+) -> pd.DataFrame:
+    """
+    Lee una hoja de Excel (o un CSV) usando la copia en caché si sigue vigente.
+
+    Args:
+        archivo: Path del archivo (.xlsx/.xls; .csv/.txt se leen con `pd.read_csv`)
+        hoja: Hoja del Excel (nombre o posición); se ignora en CSV
+        columnas: Columnas a devolver (None = todas); las que no existen se
+            omiten, así la validación queda a cargo de quien llama
+        carpeta_cache: Carpeta de las copias (None = `.cache/lectura` junto al archivo)
+        **opciones: Opciones de `pd.read_excel` / `pd.read_csv` (forman parte de la clave)
+
+    Returns:
+        DataFrame igual al de `pd.read_excel` / `pd.read_csv` (proyectado a `columnas`)
+    """
+    ruta = Path(archivo).resolve()
+    if ruta.suffix.lower() in _EXTENSIONES_CSV:
+        hoja = 0
+    carpeta = Path(carpeta_cache) if carpeta_cache is not None else ruta.parent / CARPETA_CACHE
+    base = carpeta / f"{ruta.stem}-{_clave(ruta, hoja, opciones)}"
+    archivo_meta = base.with_suffix(".json")
+    firma = _firma(ruta)
+
+    try:
+        meta = json.loads(archivo_meta.read_text(encoding="utf-8"))
+        if meta.get("firma") == firma:
+            return _leer_copia(base, meta["formato"], columnas)
+    except (OSError, ValueError, KeyError, ImportError):
+        # Sin copia, copia rota o formato ilegible acá: se vuelve a convertir
+        pass
+
+    df = _leer_original(ruta, hoja, opciones)
+    try:
+        carpeta.mkdir(parents=True, exist_ok=True)
+        formato = _guardar_copia(df, base)
+        _escribir_atomico(
+            archivo_meta,
+            lambda destino: Path(destino).write_text(
+                json.dumps({"archivo": str(ruta), "hoja": hoja, "firma": firma, "formato": formato}),
+                encoding="utf-8"
+            )
+        )
+    except OSError:
+        # Carpeta sin permisos de escritura: se usa la lectura directa
+        pass
+    return _proyectar(df, columnas)
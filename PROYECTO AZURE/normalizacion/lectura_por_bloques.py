@@ -0,0 +1,171 @@
+"""
+Lectura y escritura de Excel por bloques de filas, con memoria acotada.
+
+`pd.read_excel` arma el libro entero en memoria (celdas de openpyxl + el
+DataFrame) antes de devolver nada: con exportaciones de un año son varios GB.
+Acá la hoja se recorre con openpyxl en modo `read_only` y se entrega en
+DataFrames de `filas_por_bloque` filas; la salida se escribe con un libro
+`write_only`, que va volcando las filas a disco.
+
+Los pipelines por bloques (`normalizar_productos` y
+`normalizar_productos_con_auxiliar` con `filas_por_bloque`) solo guardan en
+memoria el estado por descripción única; las filas procesadas se guardan en
+archivos temporales entre la primera pasada (agregación) y la escritura.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+# Filas por bloque por defecto
+FILAS_POR_BLOQUE = 50_000
+
+
+def _encabezados(fila) -> List[str]:
+    """Nombres de columnas como `pd.read_excel` (celdas vacías -> 'Unnamed: i')."""
+    nombres = []
+    for i, valor in enumerate(fila):
+        nombre = f"Unnamed: {i}" if valor is None else str(valor)
+        # Repetidos: 'Col', 'Col.1', 'Col.2', ... como pandas
+        base, k = nombre, 1
+        while nombre in nombres:
+            nombre = f"{base}.{k}"
+            k += 1
+        nombres.append(nombre)
+    return nombres
+
+
+def leer_excel_por_bloques(
+    archivo: Union[str, Path],
+    hoja: Optional[str] = None,
+    filas_por_bloque: int = FILAS_POR_BLOQUE
+) -> Iterator[pd.DataFrame]:
+    """
+    Recorre una hoja de Excel en bloques de filas (openpyxl `read_only`).
+
+    Args:
+        archivo: Path del archivo Excel
+        hoja: Nombre de la hoja (None = la primera)
+        filas_por_bloque: Filas de cada DataFrame entregado
+
+    Yields:
+        DataFrames con las columnas de la primera fila de la hoja; las filas
+        completamente vacías se saltean
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja_excel = libro[hoja] if hoja is not None else libro.worksheets[0]
+        filas = hoja_excel.iter_rows(values_only=True)
+        primera = next(filas, None)
+        if primera is None:
+            return
+        columnas = _encabezados(primera)
+
+        bloque: List[tuple] = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            bloque.append(tuple(fila[:len(columnas)]) + (None,) * (len(columnas) - len(fila)))
+            if len(bloque) >= filas_por_bloque:
+                yield pd.DataFrame.from_records(bloque, columns=columnas, coerce_float=True)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame.from_records(bloque, columns=columnas, coerce_float=True)
+    finally:
+        libro.close()
+
+
+class EscritorExcelPorBloques:
+    """
+    Libro de Excel `write_only`: cada hoja recibe DataFrames que se vuelcan a disco.
+
+    Se puede alternar entre hojas; el encabezado de cada hoja se escribe con
+    el primer bloque que recibe.
+    """
+
+    def __init__(self, archivo: Union[str, Path]):
+        from openpyxl import Workbook
+
+        self.archivo = Path(archivo)
+        self._libro = Workbook(write_only=True)
+        self._hojas: Dict[str, object] = {}
+        self.filas: Dict[str, int] = {}
+
+    def agregar(self, hoja: str, df: pd.DataFrame) -> None:
+        """Agrega las filas de `df` al final de la hoja (la crea si no existe)."""
+        if hoja not in self._hojas:
+            self._hojas[hoja] = self._libro.create_sheet(hoja)
+            self._hojas[hoja].append([str(c) for c in df.columns])
+            self.filas[hoja] = 0
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            self._hojas[hoja].append(list(fila))
+        self.filas[hoja] += len(df)
+
+    def guardar(self) -> None:
+        """Escribe el archivo (archivo temporal + reemplazo atómico)."""
+        self.archivo.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(suffix=".xlsx", dir=str(self.archivo.parent))
+        os.close(fd)
+        try:
+            self._libro.save(temporal)
+            os.replace(temporal, self.archivo)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+
+class BloquesTemporales:
+    """
+    DataFrames guardados en disco (pickle) entre dos pasadas de un pipeline por bloques.
+
+    Usar como context manager: la carpeta temporal se borra al salir.
+    """
+
+    def __init__(self):
+        self._carpeta: Optional[tempfile.TemporaryDirectory] = None
+        self._archivos: List[Path] = []
+
+    def __enter__(self) -> "BloquesTemporales":
+        self._carpeta = tempfile.TemporaryDirectory(prefix="bloques_")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._carpeta.cleanup()
+
+    def __len__(self) -> int:
+        return len(self._archivos)
+
+    def guardar(self, df: pd.DataFrame) -> None:
+        archivo = Path(self._carpeta.name) / f"{len(self._archivos):06d}.pkl"
+        df.to_pickle(archivo)
+        self._archivos.append(archivo)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for archivo in self._archivos:
+            yield pd.read_pickle(archivo)
+
+
+def pico_memoria_mb() -> Optional[float]:
+    """
+    Pico de memoria residente (RSS) del proceso en MB, o None si no se puede medir.
+    """
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB; macOS: bytes
+        return pico / 1024 / 1024 if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memoria = psutil.Process().memory_info()
+        return getattr(memoria, "peak_wset", memoria.rss) / 1024 / 1024
+    except ImportError:
+        return None
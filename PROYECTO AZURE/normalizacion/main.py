@@ -6,15 +6,30 @@ Autor: Sistema de Normalización
 Fecha: 2025-01-26
 """
 
+import sys
 import pandas as pd
 import numpy as np
 import re
-from typing import Tuple, Dict, List, Optional
+from typing import Any, Callable, Tuple, Dict, List, Optional
 from pathlib import Path
-from rapidfuzz import fuzz
-from tqdm import tqdm
 import warnings
 
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from normalizacion.atributos import BLOQUEO_POR_NIVEL
+from normalizacion.checkpoint_clustering import registrar_eventos
+from normalizacion.clustering_grafo import familias_grafo
+from normalizacion.lectura_cacheada import leer_tabla
+from normalizacion.lectura_por_bloques import (
+    BloquesTemporales,
+    EscritorExcelPorBloques,
+    leer_excel_por_bloques,
+    pico_memoria_mb,
+)
+from normalizacion.modelo_familias import ModeloFamilias
+
 warnings.filterwarnings('ignore')
 
 
@@ -22,6 +37,18 @@ warnings.filterwarnings('ignore')
 # 1. MÓDULO DE PROCESAMIENTO Y AUDITORÍA (ETL)
 # ============================================================================
 
+# "Tipo - Num - Fecha - Prov - OC"; el número puede ser XXXX-XXXXXXXX y la
+# fecha YYYY-MM-DD o DD/MM/YYYY (con - o /). Proveedor y OC se separan por un
+# guion con espacios, así un guion dentro del nombre no corta el proveedor.
+PATRON_INFO = re.compile(
+    r'^\s*(?P<tipo>[^-]*?)\s*'
+    r'(?:-\s*(?P<numero>\d+(?:-\d+)?|[^-]*?)\s*'
+    r'(?:-\s*(?P<fecha>\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{4}|[^-]*?)\s*'
+    r'(?:-\s*(?P<proveedor>.*?)(?:\s+-\s+(?P<orden_compra>.*?))?)?)?)?\s*$'
+)
+_PATRON_FECHA = re.compile(r'\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{4}')
+
+
 def parse_columna_concatenada(valor: str) -> Dict[str, str]:
     """
     Extrae información de la columna A concatenada usando REGEX.
@@ -29,6 +56,9 @@ def parse_columna_concatenada(valor: str) -> Dict[str, str]:
     Formato esperado: "Tipo - Num - Fecha - Prov - OC"
     Ejemplo: "FC - 0001-12345678 - 2024-01-15 - PROVEEDOR SA - OC001"
 
+    Para una columna entera usar `parse_columna_concatenada_serie` (mismo
+    patrón, vectorizado y con columnas tipadas).
+
     Args:
         valor: String concatenado de la columna A
 
@@ -43,33 +73,60 @@ def parse_columna_concatenada(valor: str) -> Dict[str, str]:
         'orden_compra': None
     }
 
-    try:
-        # Dividir por guiones (considerando espacios)
-        partes = [p.strip() for p in str(valor).split('-')]
+    coincidencia = PATRON_INFO.match(str(valor))
+    if coincidencia is None:
+        print(f"Error parseando '{valor}': no coincide con el formato")
+        return resultado
 
-        if len(partes) >= 1:
-            resultado['tipo'] = partes[0]
+    for campo, texto in coincidencia.groupdict().items():
+        if texto:
+            resultado[campo] = texto
+    if resultado['fecha'] and not _PATRON_FECHA.fullmatch(resultado['fecha']):
+        resultado['fecha'] = None
 
-        if len(partes) >= 2:
-            # Extraer número (puede tener formato XXXX-XXXXXXXX)
-            resultado['numero'] = partes[1]
+    return resultado
 
-        if len(partes) >= 3:
-            # Extraer fecha (formato YYYY-MM-DD o DD/MM/YYYY)
-            fecha_match = re.search(r'(\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{4})', partes[2])
-            if fecha_match:
-                resultado['fecha'] = fecha_match.group(1)
 
-        if len(partes) >= 4:
-            resultado['proveedor'] = partes[3]
+def _fechas(textos: pd.Series) -> pd.Series:
+    """Fechas YYYY-MM-DD o DD-MM-YYYY (con - o /) a datetime; el resto NaT."""
+    normalizadas = textos.str.replace('/', '-', regex=False)
+    iso = pd.to_datetime(normalizadas, format='%Y-%m-%d', errors='coerce')
+    dia_primero = pd.to_datetime(normalizadas, format='%d-%m-%Y', errors='coerce')
+    return iso.fillna(dia_primero)
 
-        if len(partes) >= 5:
-            # OC puede estar en la última parte
-            resultado['orden_compra'] = '-'.join(partes[4:])
 
-    except Exception as e:
-        print(f"Error parseando '{valor}': {e}")
+def parse_columna_concatenada_serie(valores: pd.Series) -> pd.DataFrame:
+    """
+    Versión vectorizada de `parse_columna_concatenada` (`Series.str.extract`).
+
+    Cada valor distinto se parsea una sola vez (la misma factura se repite en
+    todos sus ítems) y el resultado se expande con los códigos de `factorize`.
+
+    Args:
+        valores: Columna A concatenada
 
+    Returns:
+        DataFrame con el mismo índice y columnas tipo (category), numero
+        (texto), fecha (datetime64), proveedor (category) y orden_compra
+        (texto); NaN / NaT en lo que no aparece
+    """
+    codigos, unicos = pd.factorize(valores)
+    # Un nulo al final para los valores nulos (código -1)
+    textos = pd.Series(list(unicos.astype(str)) + [None], dtype=object)
+    partes = textos.str.extract(PATRON_INFO)
+    partes = partes.where(partes.ne(''))
+
+    por_valor = pd.DataFrame({
+        'tipo': partes['tipo'].astype('category'),
+        'numero': partes['numero'].astype(object),
+        'fecha': _fechas(partes['fecha']),
+        'proveedor': partes['proveedor'].astype('category'),
+        'orden_compra': partes['orden_compra'].astype(object),
+    })
+    codigos = np.where(codigos < 0, len(unicos), codigos)
+
+    resultado = por_valor.iloc[codigos]
+    resultado.index = valores.index
     return resultado
 
 
@@ -125,6 +182,112 @@ def rescatar_valores_numericos(row: pd.Series) -> pd.Series:
     return row
 
 
+def rescatar_valores_numericos_lote(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rescate numérico de todas las filas a la vez con máscaras NumPy.
+
+    Mismo resultado que `df.apply(rescatar_valores_numericos, axis=1)`: cuenta
+    los faltantes (NaN o 0) de Cantidad, Precio_Unitario y Subtotal, calcula
+    el que falta cuando es uno solo y marca 'Salvable'. Un texto que entra en
+    la cuenta deja la fila insalvable (en la versión por fila era el error de
+    la operación, salvo entero x texto, que repetía el texto).
+
+    Args:
+        df: DataFrame con columnas 'Cantidad', 'Precio_Unitario', 'Subtotal'
+            (una columna ausente cuenta como faltante en todas las filas)
+
+    Returns:
+        Copia del DataFrame con valores rescatados y columna 'Salvable'
+    """
+    df = df.copy()
+    columnas = ['Cantidad', 'Precio_Unitario', 'Subtotal']
+
+    valores, faltante, no_numerico = [], [], []
+    for col in columnas:
+        if col in df.columns:
+            original = df[col]
+            if original.dtype == object:
+                # Textos (aunque parezcan números) no son números para la versión por fila
+                es_numero = original.map(lambda v: isinstance(v, (int, float, np.number)))
+                original = original.where(es_numero)
+                no_num = df[col].notna().to_numpy() & ~es_numero.to_numpy(dtype=bool)
+            else:
+                no_num = np.zeros(len(df), dtype=bool)
+            numerico = pd.to_numeric(original, errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            numerico = np.full(len(df), np.nan)
+            no_num = np.zeros(len(df), dtype=bool)
+        valores.append(numerico)
+        no_numerico.append(no_num)
+        faltante.append((np.isnan(numerico) & ~no_num) | (numerico == 0))
+    cantidad, precio, subtotal = valores
+    falta_cantidad, falta_precio, falta_subtotal = faltante
+
+    # Mismo orden de ramas que la versión por fila
+    salvable = (falta_cantidad.astype(np.int8) + falta_precio + falta_subtotal) < 2
+    calcular_cantidad = salvable & falta_cantidad
+    calcular_precio = salvable & ~falta_cantidad & falta_precio
+    calcular_subtotal = salvable & ~falta_cantidad & ~falta_precio & falta_subtotal
+
+    # Con un no numérico en la operación, la versión por fila fallaba
+    error = (
+        (calcular_cantidad & (no_numerico[2] | no_numerico[1]))
+        | (calcular_precio & (no_numerico[2] | no_numerico[0]))
+        | (calcular_subtotal & (no_numerico[0] | no_numerico[1]))
+    )
+    salvable &= ~error
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derivados = {
+            'Cantidad': (calcular_cantidad & ~error, subtotal / precio),
+            'Precio_Unitario': (calcular_precio & ~error, subtotal / cantidad),
+            'Subtotal': (calcular_subtotal & ~error, cantidad * precio),
+        }
+    for col, (mascara, calculado) in derivados.items():
+        if not mascara.any():
+            continue
+        if col not in df.columns:
+            df[col] = np.nan
+        elif df[col].dtype != object and not pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float64)
+        df.loc[mascara, col] = calculado[mascara]
+
+    df['Salvable'] = salvable
+    return df
+
+
+def _columna_info(df: pd.DataFrame) -> str:
+    return 'Info' if 'Info' in df.columns else df.columns[0]
+
+
+def _advertir_columnas_faltantes(df: pd.DataFrame) -> None:
+    columnas_requeridas = ['Cantidad', 'Precio_Unitario', 'Subtotal', 'Descripcion']
+    for col in columnas_requeridas:
+        if col not in df.columns:
+            print(f"⚠️  Advertencia: Columna '{col}' no encontrada")
+
+
+def auditar_facturas(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parseo de la columna concatenada + rescate numérico de un bloque de filas.
+
+    Args:
+        df: Filas tal como vienen del Excel
+
+    Returns:
+        Tupla (df_procesados, df_insalvables)
+    """
+    df_info = parse_columna_concatenada_serie(df[_columna_info(df)])
+    df = pd.concat([df_info, df], axis=1)
+
+    df = rescatar_valores_numericos_lote(df)
+
+    # Separar procesados vs insalvables
+    df_procesados = df[df['Salvable'] == True].copy()
+    df_insalvables = df[df['Salvable'] == False].copy()
+    return df_procesados, df_insalvables
+
+
 def procesar_facturas_con_auditoria(
     archivo_excel: str,
     hoja: str = 'Datos'
@@ -145,32 +308,18 @@ def procesar_facturas_con_auditoria(
 
     # Cargar Excel
     print(f"\n📂 Cargando archivo: {archivo_excel}")
-    df = pd.read_excel(archivo_excel, sheet_name=hoja)
+    df = leer_tabla(archivo_excel, hoja)
     print(f"✓ Registros cargados: {len(df):,}")
 
     # Parsear columna concatenada (asumiendo que está en columna A o 'Info')
-    if 'Info' in df.columns or df.columns[0]:
-        columna_info = 'Info' if 'Info' in df.columns else df.columns[0]
-        print(f"\n🔍 Parseando columna concatenada: '{columna_info}'")
-
-        info_parseada = df[columna_info].apply(parse_columna_concatenada)
-        df_info = pd.DataFrame(info_parseada.tolist())
-        df = pd.concat([df_info, df], axis=1)
+    print(f"\n🔍 Parseando columna concatenada: '{_columna_info(df)}'")
 
     # Asegurar que existan las columnas necesarias
-    columnas_requeridas = ['Cantidad', 'Precio_Unitario', 'Subtotal', 'Descripcion']
-    for col in columnas_requeridas:
-        if col not in df.columns:
-            print(f"⚠️  Advertencia: Columna '{col}' no encontrada")
+    _advertir_columnas_faltantes(df)
 
     # Aplicar rescate numérico
     print("\n💾 Aplicando lógica de rescate numérico...")
-    df['Salvable'] = True
-    df = df.apply(rescatar_valores_numericos, axis=1)
-
-    # Separar procesados vs insalvables
-    df_procesados = df[df['Salvable'] == True].copy()
-    df_insalvables = df[df['Salvable'] == False].copy()
+    df_procesados, df_insalvables = auditar_facturas(df)
 
     print(f"\n✅ Registros procesados: {len(df_procesados):,}")
     print(f"❌ Registros insalvables: {len(df_insalvables):,}")
@@ -182,35 +331,106 @@ def procesar_facturas_con_auditoria(
 # 2. MÓDULO DE ANÁLISIS DE FRECUENCIA (PARETO)
 # ============================================================================
 
-def analisis_pareto(
+def _codificar(valores: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Código de cada fila (int32, -1 = nulo) y valores únicos en el orden de groupby.
+
+    Con una columna categórica usa sus códigos sin volver a comparar textos.
+    """
+    codigos, unicas = pd.factorize(valores, sort=True, use_na_sentinel=True)
+    return codigos.astype(np.int32), unicas
+
+
+def _columna_por_codigo(valores: pd.Series, codigos: np.ndarray):
+    """
+    Expande un valor por código a una columna por fila (código -1 = nulo).
+
+    Los textos quedan como categórica (un diccionario de valores distintos y
+    códigos enteros por fila); el resto, con el mismo dtype que daría un merge.
+    """
+    if valores.dtype == object or isinstance(valores.dtype, pd.CategoricalDtype):
+        codigos_valor, categorias = pd.factorize(valores.to_numpy(dtype=object), use_na_sentinel=True)
+        codigos_valor = np.append(codigos_valor, -1).astype(np.int32)
+        return pd.Categorical.from_codes(codigos_valor[codigos], categories=categorias)
+    return pd.api.extensions.take(valores.to_numpy(), codigos, allow_fill=True)
+
+
+def _unir_por_descripcion(
+    df: pd.DataFrame,
+    columna_descripcion: str,
+    tabla: pd.DataFrame,
+    columna_tabla: str = 'Descripcion',
+    codificadas: Optional[Tuple[np.ndarray, pd.Index]] = None
+) -> pd.DataFrame:
+    """
+    Agrega a cada fila las columnas de `tabla` (una fila por descripción).
+
+    Da los mismos valores que `df.merge(tabla, left_on=columna_descripcion,
+    right_on=columna_tabla, how='left')` (sin columnas repetidas entre ambos),
+    pero sin unir textos fila por fila: las descripciones se codifican una vez
+    y cada columna se expande con esos códigos. La columna de descripción y
+    las de texto quedan categóricas y se decodifican recién al exportar.
+
+    Args:
+        codificadas: Resultado de `_codificar(df[columna_descripcion])`, si
+            ya se calculó
+
+    Returns:
+        DataFrame con índice 0..n-1, como el de merge
+    """
+    codigos, unicas = codificadas if codificadas is not None else _codificar(df[columna_descripcion])
+    posiciones = pd.Index(tabla[columna_tabla]).get_indexer(unicas)
+    # Posición en `tabla` de cada fila; -1 = descripción nula o sin fila en la tabla
+    posiciones = np.append(posiciones, -1).astype(np.int32)[codigos]
+
+    df_resultado = df.reset_index(drop=True)
+    if not isinstance(df_resultado[columna_descripcion].dtype, pd.CategoricalDtype):
+        df_resultado[columna_descripcion] = pd.Categorical.from_codes(codigos, categories=unicas)
+    for columna in tabla.columns:
+        if columna == columna_tabla == columna_descripcion:
+            continue
+        df_resultado[columna] = _columna_por_codigo(tabla[columna], posiciones)
+    return df_resultado
+
+
+def frecuencias_descripciones(
     df: pd.DataFrame,
     columna_descripcion: str = 'Descripcion',
     columna_cantidad: str = 'Cantidad'
 ) -> pd.DataFrame:
     """
-    Calcula frecuencia y volumen de cada descripción única.
-    Categoriza usando percentiles acumulados (Pareto).
+    Frecuencia (filas con cantidad) y volumen total de cada descripción.
 
-    Args:
-        df: DataFrame procesado
-        columna_descripcion: Nombre de la columna con descripciones
-        columna_cantidad: Nombre de la columna con cantidades
+    Los resultados de varios bloques se combinan sumando ambas columnas por
+    descripción (ver `_normalizar_productos_por_bloques`).
 
     Returns:
-        DataFrame con análisis de frecuencia agregado
+        DataFrame con columnas Descripcion, Frecuencia, Volumen_Total
     """
-    print(f"\n{'='*60}")
-    print("MÓDULO 2: ANÁLISIS DE FRECUENCIA (PARETO)")
-    print(f"{'='*60}")
+    codigos, unicas = _codificar(df[columna_descripcion])
+    validas = codigos >= 0
 
-    # Agrupar por descripción
-    print(f"\n📊 Calculando frecuencias y volúmenes...")
+    # Agrupado por código entero (mismo orden que el groupby por descripción)
+    agregado = df[columna_cantidad][validas].groupby(codigos[validas]).agg(['count', 'sum'])
+
+    return pd.DataFrame({
+        'Descripcion': unicas.take(agregado.index.to_numpy()),
+        'Frecuencia': agregado['count'].to_numpy(),
+        'Volumen_Total': agregado['sum'].to_numpy(),
+    })
 
-    df_freq = df.groupby(columna_descripcion).agg({
-        columna_cantidad: ['count', 'sum']
-    }).reset_index()
 
-    df_freq.columns = ['Descripcion', 'Frecuencia', 'Volumen_Total']
+def tabla_pareto(df_freq: pd.DataFrame) -> pd.DataFrame:
+    """
+    Volumen ponderado, percentil acumulado y categoría Pareto de cada descripción.
+
+    Args:
+        df_freq: Resultado de `frecuencias_descripciones`
+
+    Returns:
+        DataFrame ordenado por volumen ponderado descendente
+    """
+    df_freq = df_freq.copy()
 
     # Calcular volumen ponderado
     df_freq['Volumen_Ponderado'] = df_freq['Frecuencia'] * df_freq['Volumen_Total']
@@ -236,17 +456,52 @@ def analisis_pareto(
             return 'Ruido'
 
     df_freq['Categoria_Pareto'] = df_freq['Percentil_Acumulado'].apply(categorizar_pareto)
+    return df_freq
+
+
+def analisis_pareto(
+    df: pd.DataFrame,
+    columna_descripcion: str = 'Descripcion',
+    columna_cantidad: str = 'Cantidad'
+) -> pd.DataFrame:
+    """
+    Calcula frecuencia y volumen de cada descripción única.
+    Categoriza usando percentiles acumulados (Pareto).
+
+    Args:
+        df: DataFrame procesado
+        columna_descripcion: Nombre de la columna con descripciones
+        columna_cantidad: Nombre de la columna con cantidades
+
+    Returns:
+        DataFrame con análisis de frecuencia agregado (descripción y
+        Categoria_Pareto como categóricas)
+    """
+    print(f"\n{'='*60}")
+    print("MÓDULO 2: ANÁLISIS DE FRECUENCIA (PARETO)")
+    print(f"{'='*60}")
+
+    # Agrupar por descripción
+    print(f"\n📊 Calculando frecuencias y volúmenes...")
+
+    # Las descripciones se codifican una sola vez (diccionario de textos +
+    # código por fila); frecuencias y merge trabajan sobre los códigos
+    codificadas = _codificar(df[columna_descripcion])
+    df_codigos = pd.DataFrame({
+        columna_descripcion: pd.Categorical.from_codes(codificadas[0], categories=codificadas[1]),
+        columna_cantidad: df[columna_cantidad].to_numpy()
+    })
+
+    df_freq = tabla_pareto(frecuencias_descripciones(df_codigos, columna_descripcion, columna_cantidad))
 
     print(f"\n✓ Descripciones únicas: {len(df_freq):,}")
     print("\nDistribución por categoría:")
     print(df_freq['Categoria_Pareto'].value_counts())
 
-    # Merge con el dataframe original
-    df_resultado = df.merge(
-        df_freq[['Descripcion', 'Frecuencia', 'Categoria_Pareto']],
-        left_on=columna_descripcion,
-        right_on='Descripcion',
-        how='left'
+    # Frecuencia y categoría de cada fila, por código de descripción
+    df_resultado = _unir_por_descripcion(
+        df, columna_descripcion, df_freq[['Descripcion', 'Frecuencia', 'Categoria_Pareto']],
+        codificadas=codificadas
     )
 
     return df_resultado
@@ -256,39 +511,91 @@ def analisis_pareto(
 # 3. MÓDULO DE CLUSTERING JERÁRQUICO (NÚCLEO)
 # ============================================================================
 
+# Modos de `clustering_jerarquico` -> descripción para el log
+MODOS_CLUSTERING = {
+    'lideres': 'greedy por líderes (un cálculo de scores por nivel)',
+    'grafo': 'grafo de similitud + union-find (una pasada de scores)',
+}
+
+
 def clustering_jerarquico(
     df: pd.DataFrame,
     columna_descripcion: str = 'Descripcion',
     umbrales: List[int] = [85, 75, 65, 55],
-    usar_token_sort: bool = True
+    usar_token_sort: bool = True,
+    bloquear_por_atributos: bool = True,
+    archivo_modelo: Optional[str] = None,
+    reconstruir_modelo: bool = False,
+    carpeta_checkpoint: Optional[str] = None,
+    al_progreso: Optional[Callable[[Dict[str, Any]], None]] = None,
+    procesos: int = 1,
+    modo: str = 'lideres',
+    medoide: bool = False
 ) -> pd.DataFrame:
     """
     Aplica clustering jerárquico en cascada (4 niveles).
-    Usa rapidfuzz para cálculo eficiente de similitud.
+    Usa rapidfuzz.process.cdist por bloques (ver motor_clustering.py).
+
+    Con `archivo_modelo`, las familias se guardan en un modelo persistido (ver
+    modelo_familias.py): en las corridas siguientes solo se asignan las
+    descripciones nuevas a las familias existentes (o a familias nuevas).
 
     Args:
         df: DataFrame con análisis de frecuencia
         columna_descripcion: Columna con descripciones
         umbrales: Lista de umbrales de similitud por nivel [N1, N2, N3, N4]
         usar_token_sort: Si True, usa token_sort_ratio (tolera orden diferente)
+        bloquear_por_atributos: Si True, cada nivel solo compara descripciones
+            con los mismos atributos (N1: medida + pack, N2: medida, N3 y N4:
+            sin bloqueo; ver atributos.py)
+        archivo_modelo: Pickle del modelo de familias (se crea si no existe)
+        reconstruir_modelo: Si True, rehace el clustering completo aunque el
+            modelo exista
+        carpeta_checkpoint: Carpeta donde se guarda cada nivel terminado del
+            clustering completo; si el proceso se corta, la corrida siguiente
+            con los mismos datos y umbrales retoma desde el último nivel
+            guardado. Los eventos de progreso se agregan a `eventos.jsonl`
+            en la misma carpeta (ver checkpoint_clustering.py)
+        al_progreso: Callback opcional con los eventos de progreso por nivel
+            (inicio, avance con ETA, fin; ver `familias_jerarquicas`)
+        procesos: Procesos para calcular los scores del clustering completo
+            (1 = un proceso; -1 = todos los núcleos; ver clustering_procesos.py)
+        modo: 'lideres' (greedy por líderes, un cálculo de scores por nivel) o
+            'grafo' (una sola pasada de scores y componentes conexas por
+            nivel con union-find; ver clustering_grafo.py). El modo 'grafo'
+            no usa modelo, checkpoints ni procesos
+        medoide: En modo 'grafo', el representante de cada familia es el
+            medoide ponderado por Frecuencia en vez de la más frecuente
 
     Returns:
         DataFrame con columnas Familia_N1, Familia_N2, Familia_N3, Familia_N4
+        (categóricas: un diccionario de maestras y un código por fila)
     """
+    if modo not in MODOS_CLUSTERING:
+        raise ValueError(f"Modo de clustering desconocido: {modo}. Opciones: {list(MODOS_CLUSTERING)}")
+    if modo == 'grafo' and (archivo_modelo or carpeta_checkpoint or procesos != 1):
+        raise ValueError("El modo 'grafo' no admite archivo_modelo, carpeta_checkpoint ni procesos")
+
     print(f"\n{'='*60}")
     print("MÓDULO 3: CLUSTERING JERÁRQUICO")
     print(f"{'='*60}")
     print(f"\n🎯 Umbrales de similitud: {umbrales}")
     print(f"🔧 Método: {'token_sort_ratio' if usar_token_sort else 'ratio'}")
+    print(f"🧱 Bloqueo por atributos: {'sí' if bloquear_por_atributos else 'no'}")
+    print(f"🕸️ Modo: {MODOS_CLUSTERING[modo]}{' (medoide por frecuencia)' if modo == 'grafo' and medoide else ''}")
 
     # Obtener descripciones únicas ordenadas por frecuencia
     if 'Frecuencia' in df.columns:
-        df_unique = df.groupby(columna_descripcion).agg({
-            'Frecuencia': 'first'
-        }).reset_index().sort_values('Frecuencia', ascending=False)
+        codigos, unicas = _codificar(df[columna_descripcion])
+        validas = codigos >= 0
+        frecuencias = df['Frecuencia'][validas].groupby(codigos[validas]).first()
+        df_unique = pd.DataFrame({
+            columna_descripcion: unicas.take(frecuencias.index.to_numpy()),
+            'Frecuencia': frecuencias.to_numpy()
+        }).sort_values('Frecuencia', ascending=False, kind='stable')
     else:
         df_unique = pd.DataFrame({
-            columna_descripcion: df[columna_descripcion].unique()
+            columna_descripcion: df[columna_descripcion].dropna().unique()
         })
         df_unique['Frecuencia'] = 1
 
@@ -297,93 +604,84 @@ def clustering_jerarquico(
 
     print(f"\n📝 Descripciones únicas a agrupar: {n_descripciones:,}")
 
-    # Función de similitud
-    similitud_func = fuzz.token_sort_ratio if usar_token_sort else fuzz.ratio
-
-    # Diccionarios para almacenar familias por nivel
-    familias = {f'Nivel_{i+1}': {} for i in range(len(umbrales))}
-
-    # Nivel 1: Agrupación inicial
-    print(f"\n{'='*60}")
-    print(f"NIVEL 1 - Similitud > {umbrales[0]}%")
-    print(f"{'='*60}")
-
-    maestras_n1 = {}
-    asignadas_n1 = set()
-
-    for i, desc in enumerate(tqdm(descripciones, desc="Nivel 1")):
-        if desc in asignadas_n1:
-            continue
-
-        # Esta descripción es la maestra de su grupo
-        maestras_n1[desc] = desc
-        asignadas_n1.add(desc)
-
-        # Buscar similares
-        for j in range(i + 1, n_descripciones):
-            desc_candidata = descripciones[j]
-
-            if desc_candidata in asignadas_n1:
-                continue
-
-            similitud = similitud_func(desc, desc_candidata)
-
-            if similitud > umbrales[0]:
-                maestras_n1[desc_candidata] = desc
-                asignadas_n1.add(desc_candidata)
-
-    print(f"✓ Familias generadas: {len(set(maestras_n1.values())):,}")
-
-    # Niveles 2-4: Agrupación en cascada
-    nivel_anterior = maestras_n1
-
-    for nivel in range(1, len(umbrales)):
-        print(f"\n{'='*60}")
-        print(f"NIVEL {nivel + 1} - Similitud > {umbrales[nivel]}%")
-        print(f"{'='*60}")
-
-        # Obtener maestras únicas del nivel anterior
-        maestras_previas = list(set(nivel_anterior.values()))
-        n_maestras = len(maestras_previas)
-
-        print(f"Maestras del nivel anterior: {n_maestras:,}")
-
-        maestras_nivel = {}
-        asignadas_nivel = set()
-
-        for i, maestra in enumerate(tqdm(maestras_previas, desc=f"Nivel {nivel + 1}")):
-            if maestra in asignadas_nivel:
-                continue
-
-            # Esta maestra es la representante de su familia
-            maestras_nivel[maestra] = maestra
-            asignadas_nivel.add(maestra)
-
-            # Buscar maestras similares
-            for j in range(i + 1, n_maestras):
-                candidata = maestras_previas[j]
-
-                if candidata in asignadas_nivel:
-                    continue
-
-                similitud = similitud_func(maestra, candidata)
-
-                if similitud > umbrales[nivel]:
-                    maestras_nivel[candidata] = maestra
-                    asignadas_nivel.add(candidata)
-
-        print(f"✓ Familias generadas: {len(set(maestras_nivel.values())):,}")
-
-        # Propagar asignaciones a todas las descripciones originales
-        nivel_completo = {}
-        for desc_original, maestra_anterior in nivel_anterior.items():
-            nivel_completo[desc_original] = maestras_nivel.get(maestra_anterior, maestra_anterior)
-
-        familias[f'Nivel_{nivel + 1}'] = nivel_completo
-        nivel_anterior = nivel_completo
-
-    # Agregar Nivel 1 a familias
-    familias['Nivel_1'] = maestras_n1
+    metodo = 'token_sort_ratio' if usar_token_sort else 'ratio'
+    atributos_por_nivel = BLOQUEO_POR_NIVEL if bloquear_por_atributos else None
+    estadisticas: List[Dict[str, int]] = []
+
+    if modo == 'grafo':
+        # Una pasada de scores; cada nivel = componentes conexas sobre su umbral
+        def informar_nivel_grafo(nivel: int, n_familias: int) -> None:
+            print(f"✓ Nivel {nivel} (similitud > {umbrales[nivel - 1]}%): {n_familias:,} familias "
+                  f"({estadisticas[nivel - 1]['aristas']:,} aristas)")
+
+        posiciones = familias_grafo(
+            descripciones,
+            umbrales,
+            metodo=metodo,
+            atributos_por_nivel=atributos_por_nivel,
+            mostrar_progreso=True,
+            al_terminar_nivel=informar_nivel_grafo,
+            estadisticas=estadisticas,
+            pesos=df_unique['Frecuencia'].to_numpy(dtype=float),
+            medoide=medoide
+        )
+        print(f"🔗 Pasada única: {estadisticas[0]['comparaciones']:,} comparaciones en "
+              f"{estadisticas[0]['bloques']:,} bloques")
+        textos = np.array(descripciones, dtype=object)
+        familias = [textos[m].tolist() for m in posiciones]
+    else:
+        modelo = None
+        if archivo_modelo and not reconstruir_modelo and Path(archivo_modelo).exists():
+            modelo = ModeloFamilias.cargar(archivo_modelo)
+            if modelo is None or not modelo.compatible(umbrales, metodo, atributos_por_nivel):
+                print("⚠️  El modelo de familias no se puede usar (otro formato o parámetros): reconstruyendo")
+                modelo = None
+
+        if modelo is not None:
+            # Incremental: solo las descripciones que el modelo no tiene
+            print(f"\n📦 Modelo de familias: {len(modelo):,} descripciones conocidas")
+            agregadas = modelo.asignar(descripciones, estadisticas=estadisticas)
+            print(f"🆕 Descripciones nuevas: {agregadas:,}")
+            for nivel, datos in enumerate(estadisticas, start=1):
+                print(f"✓ Nivel {nivel} (similitud > {umbrales[nivel - 1]}%): "
+                      f"{datos['a_existentes']:,} a familias existentes, {datos['lideres_nuevos']:,} familias nuevas "
+                      f"({datos['comparaciones']:,} comparaciones)")
+        else:
+            # Un nivel por umbral: cdist por bloques + asignación greedy por líderes
+            def informar_nivel(nivel: int, n_familias: int) -> None:
+                datos = estadisticas[nivel - 1]
+                origen = " - checkpoint" if datos.get('reanudado') else ""
+                print(f"✓ Nivel {nivel} (similitud > {umbrales[nivel - 1]}%): {n_familias:,} familias "
+                      f"({datos['comparaciones']:,} comparaciones en {datos['bloques']:,} bloques{origen})")
+
+            if procesos != 1:
+                print(f"⚙️ Procesos del clustering: {'todos los núcleos' if procesos == -1 else procesos}")
+            destinos = [al_progreso] if al_progreso else []
+            if carpeta_checkpoint:
+                print(f"💾 Checkpoint por nivel: {carpeta_checkpoint}")
+                destinos.append(registrar_eventos(Path(carpeta_checkpoint) / 'eventos.jsonl'))
+
+            def emitir(evento: Dict[str, Any]) -> None:
+                for destino in destinos:
+                    destino(evento)
+
+            modelo = ModeloFamilias.construir(
+                descripciones,
+                umbrales,
+                metodo=metodo,
+                atributos_por_nivel=atributos_por_nivel,
+                mostrar_progreso=True,
+                al_terminar_nivel=informar_nivel,
+                estadisticas=estadisticas,
+                carpeta_checkpoint=carpeta_checkpoint,
+                al_progreso=emitir if destinos else None,
+                procesos=procesos
+            )
+
+        if archivo_modelo:
+            modelo.guardar(archivo_modelo)
+            print(f"💾 Modelo de familias guardado: {archivo_modelo}")
+        familias = modelo.familias(descripciones)
 
     # Crear DataFrame con todas las asignaciones
     print(f"\n{'='*60}")
@@ -394,18 +692,11 @@ def clustering_jerarquico(
         columna_descripcion: descripciones
     })
 
-    for nivel_num in range(1, len(umbrales) + 1):
-        nombre_col = f'Familia_N{nivel_num}'
-        df_familias[nombre_col] = df_familias[columna_descripcion].map(
-            familias[f'Nivel_{nivel_num}']
-        )
+    for nivel_num, maestras in enumerate(familias, start=1):
+        df_familias[f'Familia_N{nivel_num}'] = maestras
 
-    # Merge con el dataframe original
-    df_resultado = df.merge(
-        df_familias,
-        on=columna_descripcion,
-        how='left'
-    )
+    # Familias de cada fila por código de descripción (categóricas)
+    df_resultado = _unir_por_descripcion(df, columna_descripcion, df_familias, columna_descripcion)
 
     print(f"\n✅ Clustering completado exitosamente")
 
@@ -423,7 +714,15 @@ def normalizar_productos(
     columna_descripcion: str = 'Descripcion',
     columna_cantidad: str = 'Cantidad',
     umbrales_clustering: List[int] = [85, 75, 65, 55],
-    generar_insalvables: bool = True
+    generar_insalvables: bool = True,
+    bloquear_por_atributos: bool = True,
+    archivo_modelo: Optional[str] = None,
+    reconstruir_modelo: bool = False,
+    filas_por_bloque: Optional[int] = None,
+    carpeta_checkpoint: Optional[str] = None,
+    procesos: int = 1,
+    modo_clustering: str = 'lideres',
+    medoide: bool = False
 ) -> pd.DataFrame:
     """
     Función principal que ejecuta todo el pipeline de normalización.
@@ -436,9 +735,24 @@ def normalizar_productos(
         columna_cantidad: Nombre de la columna con cantidades
         umbrales_clustering: Umbrales de similitud por nivel
         generar_insalvables: Si True, genera hoja separada con insalvables
+        bloquear_por_atributos: Si True, el clustering solo compara descripciones
+            con la misma medida / pack
+        archivo_modelo: Modelo de familias persistido; si existe, solo se
+            agrupan las descripciones nuevas (ver modelo_familias.py)
+        reconstruir_modelo: Si True, rehace el clustering completo y
+            reemplaza el modelo
+        filas_por_bloque: Si se indica, lee y procesa el Excel por bloques de
+            esa cantidad de filas con memoria acotada (ver lectura_por_bloques.py)
+        carpeta_checkpoint: Carpeta de checkpoints por nivel del clustering,
+            para retomar una corrida cortada (ver `clustering_jerarquico`)
+        procesos: Procesos del clustering (1 = un proceso; -1 = todos los núcleos)
+        modo_clustering: 'lideres' o 'grafo' (ver `clustering_jerarquico`)
+        medoide: En modo 'grafo', representante = medoide ponderado por Frecuencia
 
     Returns:
-        DataFrame con toda la información procesada
+        DataFrame con toda la información procesada; por bloques, una fila por
+        descripción única (Frecuencia, Categoria_Pareto y familias), ya que
+        las filas solo se escriben en `archivo_salida`
     """
     print("\n" + "="*60)
     print("  SISTEMA DE NORMALIZACIÓN DE PRODUCTOS")
@@ -449,6 +763,14 @@ def normalizar_productos(
     if not Path(archivo_entrada).exists():
         raise FileNotFoundError(f"No se encuentra el archivo: {archivo_entrada}")
 
+    if filas_por_bloque:
+        return _normalizar_productos_por_bloques(
+            archivo_entrada, archivo_salida, hoja_entrada, columna_descripcion,
+            columna_cantidad, umbrales_clustering, generar_insalvables,
+            bloquear_por_atributos, archivo_modelo, reconstruir_modelo, filas_por_bloque,
+            carpeta_checkpoint, procesos, modo_clustering, medoide
+        )
+
     # 1. ETL y Auditoría
     df_procesados, df_insalvables = procesar_facturas_con_auditoria(
         archivo_entrada,
@@ -466,7 +788,14 @@ def normalizar_productos(
     df_final = clustering_jerarquico(
         df_con_frecuencia,
         columna_descripcion,
-        umbrales_clustering
+        umbrales_clustering,
+        bloquear_por_atributos=bloquear_por_atributos,
+        archivo_modelo=archivo_modelo,
+        reconstruir_modelo=reconstruir_modelo,
+        carpeta_checkpoint=carpeta_checkpoint,
+        procesos=procesos,
+        modo=modo_clustering,
+        medoide=medoide
     )
 
     # 4. Guardar resultados
@@ -484,30 +813,9 @@ def normalizar_productos(
                 df_insalvables.to_excel(writer, sheet_name='Insalvables', index=False)
 
             # Generar resumen
-            resumen = {
-                'Métrica': [
-                    'Total Registros',
-                    'Registros Procesados',
-                    'Registros Insalvables',
-                    'Descripciones Únicas',
-                    'Familias Nivel 1',
-                    'Familias Nivel 2',
-                    'Familias Nivel 3',
-                    'Familias Nivel 4'
-                ],
-                'Valor': [
-                    len(df_procesados) + len(df_insalvables),
-                    len(df_procesados),
-                    len(df_insalvables),
-                    df_final['Descripcion'].nunique(),
-                    df_final['Familia_N1'].nunique() if 'Familia_N1' in df_final.columns else 0,
-                    df_final['Familia_N2'].nunique() if 'Familia_N2' in df_final.columns else 0,
-                    df_final['Familia_N3'].nunique() if 'Familia_N3' in df_final.columns else 0,
-                    df_final['Familia_N4'].nunique() if 'Familia_N4' in df_final.columns else 0
-                ]
-            }
-
-            pd.DataFrame(resumen).to_excel(writer, sheet_name='Resumen', index=False)
+            _tabla_resumen(len(df_procesados), len(df_insalvables), df_final).to_excel(
+                writer, sheet_name='Resumen', index=False
+            )
 
         print(f"\n✅ Archivo guardado: {archivo_salida}")
         print(f"   - Hoja 'Procesados': {len(df_final):,} registros")
@@ -515,11 +823,159 @@ def normalizar_productos(
             print(f"   - Hoja 'Insalvables': {len(df_insalvables):,} registros")
         print(f"   - Hoja 'Resumen': Métricas del proceso")
 
+    _imprimir_fin()
+
+    return df_final
+
+
+def _tabla_resumen(n_procesados: int, n_insalvables: int, df_descripciones: pd.DataFrame) -> pd.DataFrame:
+    """Hoja 'Resumen' (df_descripciones: filas o descripciones únicas con sus familias)."""
+    resumen = {
+        'Métrica': [
+            'Total Registros',
+            'Registros Procesados',
+            'Registros Insalvables',
+            'Descripciones Únicas',
+            'Familias Nivel 1',
+            'Familias Nivel 2',
+            'Familias Nivel 3',
+            'Familias Nivel 4'
+        ],
+        'Valor': [
+            n_procesados + n_insalvables,
+            n_procesados,
+            n_insalvables,
+            df_descripciones['Descripcion'].nunique(),
+            df_descripciones['Familia_N1'].nunique() if 'Familia_N1' in df_descripciones.columns else 0,
+            df_descripciones['Familia_N2'].nunique() if 'Familia_N2' in df_descripciones.columns else 0,
+            df_descripciones['Familia_N3'].nunique() if 'Familia_N3' in df_descripciones.columns else 0,
+            df_descripciones['Familia_N4'].nunique() if 'Familia_N4' in df_descripciones.columns else 0
+        ]
+    }
+    return pd.DataFrame(resumen)
+
+
+def _imprimir_fin() -> None:
+    pico = pico_memoria_mb()
+    if pico is not None:
+        print(f"\n📈 Pico de memoria (RSS): {pico:,.0f} MB")
+
     print(f"\n{'='*60}")
     print("✅ PROCESO COMPLETADO EXITOSAMENTE")
     print(f"{'='*60}\n")
 
-    return df_final
+
+def _normalizar_productos_por_bloques(
+    archivo_entrada: str,
+    archivo_salida: Optional[str],
+    hoja_entrada: str,
+    columna_descripcion: str,
+    columna_cantidad: str,
+    umbrales_clustering: List[int],
+    generar_insalvables: bool,
+    bloquear_por_atributos: bool,
+    archivo_modelo: Optional[str],
+    reconstruir_modelo: bool,
+    filas_por_bloque: int,
+    carpeta_checkpoint: Optional[str] = None,
+    procesos: int = 1,
+    modo_clustering: str = 'lideres',
+    medoide: bool = False
+) -> pd.DataFrame:
+    """
+    Variante por bloques de `normalizar_productos`: mismas hojas de salida, con
+    memoria acotada.
+
+    Primera pasada: cada bloque del Excel pasa por ETL y rescate, se guarda en
+    disco y suma sus frecuencias por descripción. Con esas frecuencias se hace
+    el Pareto y el clustering de las descripciones únicas. Segunda pasada: los
+    bloques guardados se unen con las familias y se escriben en la salida.
+    """
+    print(f"\n{'='*60}")
+    print("MÓDULO 1: PROCESAMIENTO Y AUDITORÍA (POR BLOQUES)")
+    print(f"{'='*60}")
+    print(f"\n📂 Leyendo archivo: {archivo_entrada} (bloques de {filas_por_bloque:,} filas)")
+
+    with BloquesTemporales() as procesados, BloquesTemporales() as insalvables:
+        frecuencias = None
+        n_procesados = n_insalvables = 0
+        for numero, bloque in enumerate(leer_excel_por_bloques(archivo_entrada, hoja_entrada, filas_por_bloque), start=1):
+            if numero == 1:
+                print(f"🔍 Parseando columna concatenada: '{_columna_info(bloque)}'")
+                _advertir_columnas_faltantes(bloque)
+
+            df_procesados, df_insalvables = auditar_facturas(bloque)
+            procesados.guardar(df_procesados)
+            if len(df_insalvables):
+                insalvables.guardar(df_insalvables)
+            n_procesados += len(df_procesados)
+            n_insalvables += len(df_insalvables)
+
+            # Estado por descripción única: frecuencia y volumen acumulados
+            bloque_freq = frecuencias_descripciones(df_procesados, columna_descripcion, columna_cantidad)
+            if frecuencias is not None:
+                bloque_freq = pd.concat([frecuencias, bloque_freq]).groupby('Descripcion', as_index=False).sum()
+            frecuencias = bloque_freq
+
+            print(f"  Bloque {numero}: {len(bloque):,} filas "
+                  f"(acumulado: {n_procesados:,} procesados, {n_insalvables:,} insalvables, "
+                  f"{len(frecuencias):,} descripciones)")
+
+        print(f"\n✅ Registros procesados: {n_procesados:,}")
+        print(f"❌ Registros insalvables: {n_insalvables:,}")
+
+        if frecuencias is None:
+            frecuencias = pd.DataFrame(columns=['Descripcion', 'Frecuencia', 'Volumen_Total'])
+
+        # Pareto sobre las frecuencias acumuladas
+        print(f"\n{'='*60}")
+        print("MÓDULO 2: ANÁLISIS DE FRECUENCIA (PARETO)")
+        print(f"{'='*60}")
+        df_freq = tabla_pareto(frecuencias)
+        print(f"\n✓ Descripciones únicas: {len(df_freq):,}")
+        print("\nDistribución por categoría:")
+        print(df_freq['Categoria_Pareto'].value_counts())
+
+        # Clustering de las descripciones únicas
+        df_descripciones = clustering_jerarquico(
+            df_freq[['Descripcion', 'Frecuencia', 'Categoria_Pareto']],
+            'Descripcion',
+            umbrales_clustering,
+            bloquear_por_atributos=bloquear_por_atributos,
+            archivo_modelo=archivo_modelo,
+            reconstruir_modelo=reconstruir_modelo,
+            carpeta_checkpoint=carpeta_checkpoint,
+            procesos=procesos,
+            modo=modo_clustering,
+            medoide=medoide
+        )
+
+        # Segunda pasada: filas + familias directo al Excel de salida
+        if archivo_salida:
+            print(f"\n{'='*60}")
+            print("GUARDANDO RESULTADOS (POR BLOQUES)")
+            print(f"{'='*60}")
+
+            escritor = EscritorExcelPorBloques(archivo_salida)
+            for df_procesados in procesados:
+                escritor.agregar('Procesados', _unir_por_descripcion(
+                    df_procesados, columna_descripcion, df_descripciones
+                ))
+            if generar_insalvables:
+                for df_insalvables in insalvables:
+                    escritor.agregar('Insalvables', df_insalvables)
+            escritor.agregar('Resumen', _tabla_resumen(n_procesados, n_insalvables, df_descripciones))
+            escritor.guardar()
+
+            print(f"\n✅ Archivo guardado: {archivo_salida}")
+            print(f"   - Hoja 'Procesados': {escritor.filas.get('Procesados', 0):,} registros")
+            if generar_insalvables:
+                print(f"   - Hoja 'Insalvables': {escritor.filas.get('Insalvables', 0):,} registros")
+            print(f"   - Hoja 'Resumen': Métricas del proceso")
+
+    _imprimir_fin()
+
+    return df_descripciones
 
 
 # ============================================================================
@@ -535,6 +991,9 @@ if __name__ == "__main__":
     # Configuración
     ARCHIVO_ENTRADA = "facturas_input.xlsx"  # 👈 CAMBIAR ESTA RUTA
     ARCHIVO_SALIDA = "facturas_normalizadas.xlsx"
+    ARCHIVO_MODELO = "modelo_familias.pkl"  # Familias de corridas anteriores (None = sin modelo)
+    CARPETA_CHECKPOINT = "checkpoint_clustering"  # Niveles terminados, para retomar si se corta
+    PROCESOS = 1  # Procesos del clustering (-1 = todos los núcleos)
 
     # Ejecutar normalización
     try:
@@ -545,7 +1004,10 @@ if __name__ == "__main__":
             columna_descripcion='Descripcion',
             columna_cantidad='Cantidad',
             umbrales_clustering=[85, 75, 65, 55],
-            generar_insalvables=True
+            generar_insalvables=True,
+            archivo_modelo=ARCHIVO_MODELO,
+            carpeta_checkpoint=CARPETA_CHECKPOINT,
+            procesos=PROCESOS
         )
 
         # Mostrar muestra de resultados
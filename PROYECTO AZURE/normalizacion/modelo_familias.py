@@ -0,0 +1,313 @@
+"""
+Modelo persistido de familias del clustering jerárquico, para asignar
+descripciones nuevas sin volver a correr el clustering completo.
+
+El greedy por líderes de `familias_jerarquicas` nunca cambia la familia de
+una descripción por lo que venga después: una descripción nueva se une al
+primer líder (en orden) que supera el umbral, o pasa a ser líder. Por eso
+agregar las descripciones del último mes al final del orden da exactamente
+lo mismo que reconstruir con el histórico seguido de las nuevas, comparando
+solo las nuevas:
+
+  - por nivel, contra los líderes existentes de su bloque (cdist por
+    bloques; gana el primer líder que supera el umbral)
+  - las que no tienen líder existente, entre ellas con `agrupar_lideres`
+  - los líderes nuevos de un nivel son la entrada del nivel siguiente
+
+El orden de frecuencia queda fijo al construir el modelo: las nuevas se
+ordenan por frecuencia entre ellas. `reconstruir` (o `construir` con todo el
+histórico) vuelve a ordenar todo.
+"""
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from rapidfuzz import process
+
+from normalizacion.atributos import Atributos, extraer_atributos
+from normalizacion.indice_normalizacion import METODOS_SIMILITUD
+from normalizacion.motor_clustering import MEMORIA_BLOQUE_MB, agrupar_lideres, familias_jerarquicas
+
+# Cambiar si cambia la estructura del modelo o la extracción de atributos
+VERSION_FORMATO = 2
+
+
+class ModeloFamilias:
+    """
+    Familias de los 4 niveles de todas las descripciones vistas.
+
+    Attributes:
+        umbrales: Umbral de cada nivel
+        metodo: Clave de `METODOS_SIMILITUD`
+        atributos_por_nivel: Bloqueo de cada nivel (ver atributos.py) o None
+        descripciones: Descripciones en el orden del greedy
+        textos: Descripciones preprocesadas para el scorer
+        atributos: Atributos de cada descripción (None sin bloqueo)
+        maestras: Por nivel, posición de la maestra de cada descripción
+        posiciones: Descripción -> posición
+    """
+
+    def __init__(
+        self,
+        umbrales: Sequence[float],
+        metodo: str = 'token_sort_ratio',
+        atributos_por_nivel: Optional[Sequence[Sequence[str]]] = None
+    ):
+        self.umbrales = list(umbrales)
+        self.metodo = metodo
+        self.atributos_por_nivel = (
+            [tuple(n) for n in atributos_por_nivel] if atributos_por_nivel and any(atributos_por_nivel) else None
+        )
+        self.descripciones: List[str] = []
+        self.textos: List[str] = []
+        self.atributos: Optional[List[Atributos]] = [] if self.atributos_por_nivel else None
+        self.maestras: List[np.ndarray] = [np.empty(0, dtype=np.int64) for _ in self.umbrales]
+        self.posiciones: Dict[str, int] = {}
+
+    @classmethod
+    def construir(
+        cls,
+        descripciones: Sequence[str],
+        umbrales: Sequence[float],
+        metodo: str = 'token_sort_ratio',
+        atributos_por_nivel: Optional[Sequence[Sequence[str]]] = None,
+        workers: int = -1,
+        memoria_max_mb: float = MEMORIA_BLOQUE_MB,
+        mostrar_progreso: bool = False,
+        al_terminar_nivel: Optional[Callable[[int, int], None]] = None,
+        estadisticas: Optional[List[Dict[str, int]]] = None,
+        carpeta_checkpoint: Optional[Union[str, Path]] = None,
+        al_progreso: Optional[Callable[[Dict[str, Any]], None]] = None,
+        procesos: int = 1
+    ) -> "ModeloFamilias":
+        """
+        Clustering completo (`familias_jerarquicas`) guardado como modelo.
+
+        Args:
+            descripciones: Descripciones únicas en orden de prioridad (frecuencia)
+            umbrales, metodo, atributos_por_nivel, workers, memoria_max_mb,
+            mostrar_progreso, al_terminar_nivel, estadisticas,
+            carpeta_checkpoint, al_progreso, procesos: Igual que en `familias_jerarquicas`
+
+        Returns:
+            Modelo con las familias de todas las descripciones
+        """
+        modelo = cls(umbrales, metodo, atributos_por_nivel)
+        descripciones = [str(d) for d in descripciones]
+        modelo.maestras = familias_jerarquicas(
+            descripciones,
+            umbrales,
+            metodo=metodo,
+            workers=workers,
+            memoria_max_mb=memoria_max_mb,
+            mostrar_progreso=mostrar_progreso,
+            al_terminar_nivel=al_terminar_nivel,
+            atributos_por_nivel=modelo.atributos_por_nivel,
+            estadisticas=estadisticas,
+            carpeta_checkpoint=carpeta_checkpoint,
+            al_progreso=al_progreso,
+            procesos=procesos
+        )
+        modelo._agregar_descripciones(descripciones)
+        return modelo
+
+    def __len__(self) -> int:
+        return len(self.descripciones)
+
+    def compatible(
+        self,
+        umbrales: Sequence[float],
+        metodo: str,
+        atributos_por_nivel: Optional[Sequence[Sequence[str]]]
+    ) -> bool:
+        """True si el modelo se construyó con los mismos parámetros."""
+        otro = ModeloFamilias(umbrales, metodo, atributos_por_nivel)
+        return (
+            otro.umbrales == self.umbrales
+            and otro.metodo == self.metodo
+            and otro.atributos_por_nivel == self.atributos_por_nivel
+        )
+
+    def _agregar_descripciones(self, descripciones: List[str]) -> None:
+        preprocesar, _ = METODOS_SIMILITUD[self.metodo]
+        inicio = len(self.descripciones)
+        self.descripciones.extend(descripciones)
+        self.textos.extend(preprocesar(d) if preprocesar else d for d in descripciones)
+        if self.atributos is not None:
+            self.atributos.extend(extraer_atributos(d) for d in descripciones)
+        self.posiciones.update((d, inicio + i) for i, d in enumerate(descripciones))
+
+    def _clave(self, posicion: int, nombres: Tuple[str, ...]) -> Tuple:
+        if not nombres:
+            return ()
+        atributos = self.atributos[posicion]
+        return tuple(getattr(atributos, n) for n in nombres)
+
+    def _primer_lider(
+        self,
+        entrada: np.ndarray,
+        lideres: np.ndarray,
+        umbral: float,
+        scorer: Callable,
+        workers: int,
+        memoria_max_mb: float,
+        estadisticas: Dict[str, int]
+    ) -> np.ndarray:
+        """Primer líder (posición) que supera el umbral para cada entrada, o -1."""
+        resultado = np.full(len(entrada), -1, dtype=np.int64)
+        if not len(entrada) or not len(lideres):
+            return resultado
+
+        textos_lideres = [self.textos[p] for p in lideres]
+        filas_por_bloque = max(1, int(memoria_max_mb * 1024 * 1024 // (8 * len(lideres))))
+        for inicio in range(0, len(entrada), filas_por_bloque):
+            bloque = entrada[inicio:inicio + filas_por_bloque]
+            estadisticas['comparaciones'] += len(bloque) * len(lideres)
+            supera = process.cdist(
+                [self.textos[p] for p in bloque],
+                textos_lideres,
+                scorer=scorer,
+                processor=None,
+                score_cutoff=umbral,
+                dtype=np.float64,
+                workers=workers
+            ) > umbral
+            con_lider = supera.any(axis=1)
+            primeros = supera.argmax(axis=1)
+            resultado[inicio:inicio + len(bloque)] = np.where(con_lider, lideres[primeros], -1)
+        return resultado
+
+    def asignar(
+        self,
+        descripciones: Sequence[str],
+        workers: int = -1,
+        memoria_max_mb: float = MEMORIA_BLOQUE_MB,
+        estadisticas: Optional[List[Dict[str, int]]] = None
+    ) -> int:
+        """
+        Agrega descripciones nuevas a las familias existentes o a familias nuevas.
+
+        Args:
+            descripciones: Descripciones en orden de prioridad; las que el modelo
+                ya tiene se ignoran
+            workers: Hilos para cdist (-1 = todos los núcleos)
+            memoria_max_mb: Tamaño máximo de cada bloque de la matriz de scores
+            estadisticas: Lista opcional donde se agrega, por nivel, un dict con
+                'comparaciones', 'lideres_nuevos' y 'a_existentes' (entradas
+                unidas a un líder que ya estaba)
+
+        Returns:
+            Cantidad de descripciones agregadas
+        """
+        nuevas = list(dict.fromkeys(str(d) for d in descripciones if str(d) not in self.posiciones))
+        if not nuevas:
+            return 0
+
+        _, scorer = METODOS_SIMILITUD[self.metodo]
+        n_anteriores = len(self.descripciones)
+        self._agregar_descripciones(nuevas)
+        n_total = len(self.descripciones)
+
+        anterior = np.arange(n_total, dtype=np.int64)  # maestra del nivel previo ("nivel 0")
+        entrada = np.arange(n_anteriores, n_total, dtype=np.int64)
+        for nivel, umbral in enumerate(self.umbrales):
+            nombres = self.atributos_por_nivel[nivel] if self.atributos_por_nivel else ()
+            maestra_nivel = self.maestras[nivel]
+            datos = {'comparaciones': 0, 'lideres_nuevos': 0, 'a_existentes': 0}
+
+            # Líder de cada entrada nueva (posición -> líder), por bloque
+            lider = np.empty(n_total, dtype=np.int64)
+            lider[entrada] = entrada
+            lideres_existentes = np.flatnonzero(maestra_nivel == np.arange(len(maestra_nivel)))
+            grupos_lideres: Dict[Tuple, List[int]] = {}
+            for p in lideres_existentes:
+                grupos_lideres.setdefault(self._clave(p, nombres), []).append(p)
+            grupos_entrada: Dict[Tuple, List[int]] = {}
+            for p in entrada:
+                grupos_entrada.setdefault(self._clave(p, nombres), []).append(p)
+
+            for clave, posiciones in grupos_entrada.items():
+                posiciones = np.array(posiciones, dtype=np.int64)
+                existentes = self._primer_lider(
+                    posiciones,
+                    np.array(grupos_lideres.get(clave, []), dtype=np.int64),
+                    umbral,
+                    scorer,
+                    workers,
+                    memoria_max_mb,
+                    datos
+                )
+                con_lider = existentes >= 0
+                lider[posiciones[con_lider]] = existentes[con_lider]
+                datos['a_existentes'] += int(con_lider.sum())
+
+                # Las que no tienen líder existente: greedy entre ellas
+                libres = posiciones[~con_lider]
+                if len(libres):
+                    lider_libres = agrupar_lideres(
+                        [self.textos[p] for p in libres],
+                        umbral,
+                        scorer,
+                        workers=workers,
+                        memoria_max_mb=memoria_max_mb,
+                        estadisticas=datos
+                    )
+                    lider[libres] = libres[lider_libres]
+                    datos['lideres_nuevos'] += int((lider_libres == np.arange(len(libres))).sum())
+
+            # Maestra de las descripciones nuevas: la del nivel de su maestra previa
+            maestra = np.empty(n_total, dtype=np.int64)
+            maestra[:n_anteriores] = maestra_nivel
+            maestra[entrada] = lider[entrada]
+            nuevas_pos = np.arange(n_anteriores, n_total)
+            maestra[nuevas_pos] = maestra[anterior[nuevas_pos]]
+            self.maestras[nivel] = maestra
+
+            if estadisticas is not None:
+                estadisticas.append(datos)
+            anterior = maestra
+            entrada = entrada[lider[entrada] == entrada]
+
+        return len(nuevas)
+
+    def familias(self, descripciones: Sequence[str]) -> List[List[Optional[str]]]:
+        """
+        Maestra de cada descripción en cada nivel (None si el modelo no la tiene).
+
+        Returns:
+            Una lista por nivel, alineada con `descripciones`
+        """
+        posiciones = [self.posiciones.get(str(d), -1) for d in descripciones]
+        return [
+            [self.descripciones[m[p]] if p >= 0 else None for p in posiciones]
+            for m in self.maestras
+        ]
+
+    def guardar(self, ruta: Union[str, Path]) -> None:
+        """Guarda el modelo (archivo temporal + reemplazo atómico)."""
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=str(ruta.parent))
+        try:
+            with os.fdopen(fd, "wb") as archivo:
+                pickle.dump({"formato": VERSION_FORMATO, "modelo": self}, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    @classmethod
+    def cargar(cls, ruta: Union[str, Path]) -> Optional["ModeloFamilias"]:
+        """Modelo guardado en `ruta`, o None si no existe, es de otro formato o no se puede leer."""
+        try:
+            with open(ruta, "rb") as archivo:
+                artefacto = pickle.load(archivo)
+        except Exception:
+            return None
+        if not isinstance(artefacto, dict) or artefacto.get("formato") != VERSION_FORMATO:
+            return None
+        return artefacto["modelo"]
@@ -0,0 +1,327 @@
+"""
+Motor del clustering jerárquico por líderes con cdist por bloques.
+
+Mismo criterio que el doble bucle original de `clustering_jerarquico`: se
+recorren los textos en orden (por frecuencia) y cada texto todavía libre pasa
+a ser líder y se queda con todos los textos libres posteriores cuya similitud
+supera el umbral (estrictamente). Lo que cambia es cómo se calculan los scores:
+
+  - los textos se preprocesan una sola vez (token_sort_ratio = ratio de los
+    tokens ordenados, ver `METODOS_SIMILITUD`)
+  - los scores de un bloque de líderes contra todos los textos libres se
+    calculan juntos con `process.cdist` (multi-core, con score_cutoff)
+  - la asignación greedy dentro del bloque se hace con máscaras NumPy sobre
+    los pares que superan el umbral, en el mismo orden que el bucle original
+
+Los scores se piden en float64, así que la comparación con el umbral es la
+misma que con `similitud_func(a, b) > umbral` par por par.
+
+Los niveles siguientes agrupan a las maestras del nivel anterior en el orden
+en que aparecen por primera vez (el original usaba el orden de un `set`, que
+cambia entre corridas).
+
+Con `atributos_por_nivel` (ver atributos.py) cada nivel solo compara textos del
+mismo bloque (medida / pack / marca): el greedy se corre bloque por bloque,
+que da lo mismo que el greedy global restringido a pares del mismo bloque.
+
+Con `carpeta_checkpoint` cada nivel terminado se guarda en disco y una corrida
+con las mismas entradas retoma desde el primer nivel sin guardar (ver
+checkpoint_clustering.py). `al_progreso` recibe eventos (dicts) de inicio,
+avance con ETA y fin de cada nivel, además de las barras tqdm.
+
+Con `procesos` > 1 los scores de cada nivel se calculan en un pool de procesos
+con los textos en memoria compartida y el greedy queda en este proceso (ver
+clustering_procesos.py); las familias son las mismas.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from rapidfuzz import process
+
+from normalizacion.atributos import bloques, extraer_atributos
+from normalizacion.checkpoint_clustering import CheckpointNiveles
+from normalizacion.clustering_procesos import PoolSimilitud
+from normalizacion.indice_normalizacion import METODOS_SIMILITUD
+
+# Memoria máxima (MB) de cada bloque de la matriz de scores
+MEMORIA_BLOQUE_MB = 256
+
+# Segundos mínimos entre dos eventos 'progreso' del mismo nivel
+INTERVALO_PROGRESO_S = 1.0
+
+EventoProgreso = Dict[str, Any]
+
+
+def _emitir(al_progreso: Optional[Callable[[EventoProgreso], None]], evento: str, **datos) -> None:
+    if al_progreso is not None:
+        al_progreso({'evento': evento, 'instante': time.time(), **datos})
+
+
+class _ProgresoNivel:
+    """Eventos 'progreso' de un nivel, con ETA lineal según lo recorrido."""
+
+    def __init__(self, al_progreso: Optional[Callable[[EventoProgreso], None]], nivel: int, total: int):
+        self.al_progreso = al_progreso
+        self.nivel = nivel
+        self.total = total
+        self.procesados = 0
+        self.inicio = time.perf_counter()
+        self._ultimo = self.inicio
+
+    def avanzar(self, cantidad: int) -> None:
+        self.procesados += cantidad
+        ahora = time.perf_counter()
+        if self.al_progreso is None or (self.procesados < self.total and ahora - self._ultimo < INTERVALO_PROGRESO_S):
+            return
+        self._ultimo = ahora
+        segundos = ahora - self.inicio
+        _emitir(
+            self.al_progreso, 'progreso',
+            nivel=self.nivel,
+            procesados=self.procesados,
+            total=self.total,
+            segundos=round(segundos, 3),
+            eta_segundos=round(segundos / self.procesados * (self.total - self.procesados), 3)
+        )
+
+
+def agrupar_lideres(
+    textos: Sequence[str],
+    umbral: float,
+    scorer: Callable,
+    workers: int = -1,
+    memoria_max_mb: float = MEMORIA_BLOQUE_MB,
+    mostrar_progreso: bool = False,
+    descripcion_progreso: str = "Agrupando",
+    estadisticas: Optional[Dict[str, int]] = None,
+    al_avanzar: Optional[Callable[[int], None]] = None
+) -> np.ndarray:
+    """
+    Un nivel del clustering: líder de cada texto (greedy en el orden dado).
+
+    Args:
+        textos: Textos ya preprocesados, en orden de prioridad
+        umbral: Similitud que hay que superar (estrictamente) para unirse a un líder
+        scorer: Scorer de rapidfuzz (sin processor)
+        workers: Hilos para cdist (-1 = todos los núcleos)
+        memoria_max_mb: Tamaño máximo de cada bloque de la matriz de scores
+        mostrar_progreso: Si True, muestra una barra tqdm por texto recorrido
+        descripcion_progreso: Texto de la barra de progreso
+        estadisticas: Dict opcional donde se acumulan los pares puntuados ('comparaciones')
+        al_avanzar: Callback opcional con la cantidad de textos recorridos en
+            cada bloque (suman `len(textos)`)
+
+    Returns:
+        Array con la posición del líder de cada texto (el líder es su propio líder)
+    """
+    n = len(textos)
+    textos = list(textos)
+    lider = np.arange(n, dtype=np.int64)
+    asignado = np.zeros(n, dtype=bool)
+
+    barra = None
+    if mostrar_progreso:
+        from tqdm import tqdm
+        barra = tqdm(total=n, desc=descripcion_progreso)
+
+    inicio = 0
+    while inicio < n:
+        # Candidatos: textos libres después del primero del bloque
+        candidatos = np.flatnonzero(~asignado[inicio + 1:]) + inicio + 1
+        filas_por_bloque = max(1, int(memoria_max_mb * 1024 * 1024 // (8 * max(len(candidatos), 1))))
+        fin = min(n, inicio + filas_por_bloque)
+        filas = np.flatnonzero(~asignado[inicio:fin]) + inicio
+
+        if len(filas) and len(candidatos):
+            if estadisticas is not None:
+                estadisticas['comparaciones'] = estadisticas.get('comparaciones', 0) + len(filas) * len(candidatos)
+            matriz = process.cdist(
+                [textos[i] for i in filas],
+                [textos[j] for j in candidatos],
+                scorer=scorer,
+                processor=None,
+                score_cutoff=umbral,
+                dtype=np.float64,
+                workers=workers
+            )
+            fila_par, columna_par = np.nonzero(matriz > umbral)
+            del matriz
+            limites = np.searchsorted(fila_par, np.arange(len(filas) + 1))
+
+            for r, i in enumerate(filas):
+                if asignado[i]:
+                    continue
+                asignado[i] = True
+                similares = candidatos[columna_par[limites[r]:limites[r + 1]]]
+                similares = similares[(similares > i) & ~asignado[similares]]
+                asignado[similares] = True
+                lider[similares] = i
+        else:
+            asignado[filas] = True
+
+        if barra is not None:
+            barra.update(fin - inicio)
+        if al_avanzar is not None:
+            al_avanzar(fin - inicio)
+        inicio = fin
+
+    if barra is not None:
+        barra.close()
+    return lider
+
+
+def familias_jerarquicas(
+    descripciones: Sequence[str],
+    umbrales: Sequence[float],
+    metodo: str = 'token_sort_ratio',
+    workers: int = -1,
+    memoria_max_mb: float = MEMORIA_BLOQUE_MB,
+    mostrar_progreso: bool = False,
+    al_terminar_nivel: Optional[Callable[[int, int], None]] = None,
+    atributos_por_nivel: Optional[Sequence[Sequence[str]]] = None,
+    estadisticas: Optional[List[Dict[str, int]]] = None,
+    carpeta_checkpoint: Optional[Union[str, Path]] = None,
+    al_progreso: Optional[Callable[[EventoProgreso], None]] = None,
+    procesos: int = 1
+) -> List[np.ndarray]:
+    """
+    Clustering en cascada: un nivel por umbral, cada uno sobre las maestras del anterior.
+
+    Args:
+        descripciones: Descripciones únicas en orden de prioridad (frecuencia)
+        umbrales: Umbral de cada nivel [N1, N2, ...]
+        metodo: Clave de `METODOS_SIMILITUD` ('token_sort_ratio' o 'ratio')
+        workers: Hilos para cdist (-1 = todos los núcleos)
+        memoria_max_mb: Tamaño máximo de cada bloque de la matriz de scores
+        mostrar_progreso: Si True, muestra una barra tqdm por nivel
+        al_terminar_nivel: Callback opcional (nivel, cantidad de familias)
+        atributos_por_nivel: Atributos de bloqueo de cada nivel (ej.
+            `BLOQUEO_POR_NIVEL`); () o None = sin bloqueo en ese nivel
+        estadisticas: Lista opcional donde se agrega, por nivel, un dict con
+            'comparaciones' (pares puntuados) y 'bloques' ('reanudado' = 1 en
+            los niveles leídos del checkpoint)
+        carpeta_checkpoint: Carpeta donde se guarda cada nivel terminado; si
+            ya tiene niveles de estas mismas entradas, se retoma desde ahí
+        al_progreso: Callback opcional con eventos (dicts con 'evento' e
+            'instante'): 'nivel_inicio' (nivel, umbral, total, bloques),
+            'progreso' (nivel, procesados, total, segundos, eta_segundos),
+            'nivel_fin' (nivel, familias, comparaciones, segundos, checkpoint)
+            y 'nivel_reanudado' (nivel, familias)
+        procesos: Procesos para calcular los scores (1 = este proceso con los
+            hilos de `workers`; -1 = todos los núcleos); con más de uno cada
+            proceso usa un hilo y `memoria_max_mb` se reparte entre ellos
+
+    Returns:
+        Una lista por nivel con la posición (en `descripciones`) de la maestra
+        de cada descripción
+    """
+    preprocesar, scorer = METODOS_SIMILITUD[metodo]
+    textos = [preprocesar(str(d)) if preprocesar else str(d) for d in descripciones]
+    atributos = (
+        [extraer_atributos(d) for d in descripciones]
+        if atributos_por_nivel and any(atributos_por_nivel) else None
+    )
+
+    checkpoint = None
+    reanudados = []
+    if carpeta_checkpoint is not None:
+        checkpoint = CheckpointNiveles(carpeta_checkpoint, descripciones, umbrales, metodo, atributos_por_nivel)
+        reanudados = checkpoint.cargar()[:len(umbrales)]
+
+    pool = None
+    if procesos != 1 and len(reanudados) < len(umbrales):
+        pool = PoolSimilitud(textos, metodo, procesos, memoria_max_mb)
+
+    niveles: List[np.ndarray] = []
+    maestra = np.arange(len(textos), dtype=np.int64)
+    try:
+        for nivel, umbral in enumerate(umbrales, start=1):
+            if nivel <= len(reanudados):
+                # Nivel terminado en una corrida anterior
+                maestra, estadisticas_nivel = reanudados[nivel - 1]
+                if estadisticas is not None:
+                    estadisticas.append({**estadisticas_nivel, 'reanudado': 1})
+                niveles.append(maestra)
+                n_familias = len(np.unique(maestra))
+                _emitir(al_progreso, 'nivel_reanudado', nivel=nivel, familias=n_familias)
+                if al_terminar_nivel is not None:
+                    al_terminar_nivel(nivel, n_familias)
+                continue
+
+            inicio_nivel = time.perf_counter()
+
+            # Maestras del nivel anterior en orden de primera aparición
+            _, primera = np.unique(maestra, return_index=True)
+            maestras = maestra[np.sort(primera)]
+
+            nombres = atributos_por_nivel[nivel - 1] if atributos_por_nivel and nivel <= len(atributos_por_nivel) else ()
+            codigos = bloques([atributos[m] for m in maestras], nombres) if nombres else np.zeros(len(maestras), dtype=np.int64)
+            estadisticas_nivel = {'comparaciones': 0, 'bloques': int(codigos.max()) + 1 if len(codigos) else 0}
+            _emitir(al_progreso, 'nivel_inicio', nivel=nivel, umbral=float(umbral), total=len(maestras),
+                    bloques=estadisticas_nivel['bloques'])
+            progreso = _ProgresoNivel(al_progreso, nivel, len(maestras))
+
+            # Sin bloqueo ni pool la barra es la de agrupar_lideres; si no, una por nivel
+            barra = None
+            if mostrar_progreso and (nombres or pool is not None):
+                from tqdm import tqdm
+                barra = tqdm(total=len(maestras), desc=f"Nivel {nivel}")
+
+            # Greedy independiente por bloque (posiciones en orden dentro de cada bloque)
+            lider = np.arange(len(maestras), dtype=np.int64)
+            orden = np.argsort(codigos, kind="stable")
+            cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+            bloques_nivel = np.split(orden, cortes)
+            if pool is not None:
+                def al_avanzar(cantidad: int) -> None:
+                    progreso.avanzar(cantidad)
+                    if barra is not None:
+                        barra.update(cantidad)
+
+                lideres = pool.lideres([maestras[p] for p in bloques_nivel], umbral,
+                                       estadisticas=estadisticas_nivel, al_avanzar=al_avanzar)
+                for posiciones, lider_bloque in zip(bloques_nivel, lideres):
+                    lider[posiciones] = posiciones[lider_bloque]
+            else:
+                for posiciones in bloques_nivel:
+                    lider_bloque = agrupar_lideres(
+                        [textos[maestras[p]] for p in posiciones],
+                        umbral,
+                        scorer,
+                        workers=workers,
+                        memoria_max_mb=memoria_max_mb,
+                        mostrar_progreso=mostrar_progreso and not nombres,
+                        descripcion_progreso=f"Nivel {nivel}",
+                        estadisticas=estadisticas_nivel,
+                        al_avanzar=progreso.avanzar
+                    )
+                    lider[posiciones] = posiciones[lider_bloque]
+                    if barra is not None:
+                        barra.update(len(posiciones))
+            if barra is not None:
+                barra.close()
+
+            if estadisticas is not None:
+                estadisticas.append(estadisticas_nivel)
+            nueva = np.empty(len(textos), dtype=np.int64)
+            nueva[maestras] = maestras[lider]
+            maestra = nueva[maestra]
+            niveles.append(maestra)
+
+            archivo_checkpoint = checkpoint.guardar_nivel(nivel, maestra, estadisticas_nivel) if checkpoint else None
+            n_familias = len(np.unique(maestra))
+            _emitir(al_progreso, 'nivel_fin', nivel=nivel, familias=n_familias,
+                    comparaciones=estadisticas_nivel['comparaciones'],
+                    segundos=round(time.perf_counter() - inicio_nivel, 3),
+                    checkpoint=str(archivo_checkpoint) if archivo_checkpoint else None)
+            if al_terminar_nivel is not None:
+                al_terminar_nivel(nivel, n_familias)
+
+    finally:
+        if pool is not None:
+            pool.cerrar()
+
+    return niveles
@@ -6,6 +6,7 @@ Autor: Sistema de Normalización
 Fecha: 2025-01-26
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from typing import Tuple, Optional, Dict
@@ -14,6 +15,18 @@ from rapidfuzz import fuzz, process
 from tqdm import tqdm
 import warnings
 
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from normalizacion.indice_normalizacion import NormalizationIndex
+from normalizacion.lectura_cacheada import leer_tabla
+from normalizacion.lectura_por_bloques import (
+    EscritorExcelPorBloques,
+    leer_excel_por_bloques,
+    pico_memoria_mb,
+)
+
 warnings.filterwarnings('ignore')
 
 
@@ -42,7 +55,7 @@ def cargar_tabla_auxiliar(
     if not Path(archivo_auxiliar).exists():
         raise FileNotFoundError(f"No se encuentra el archivo auxiliar: {archivo_auxiliar}")
 
-    df_aux = pd.read_excel(archivo_auxiliar, sheet_name=hoja)
+    df_aux = leer_tabla(archivo_auxiliar, hoja)
 
     # Validar que existan las columnas requeridas
     if columna_variante not in df_aux.columns or columna_base not in df_aux.columns:
@@ -69,6 +82,71 @@ def cargar_tabla_auxiliar(
     return df_aux
 
 
+def _normalizar_en_lote(
+    df_datos: pd.DataFrame,
+    df_auxiliar: pd.DataFrame,
+    columna_descripcion: str,
+    columna_variante: str,
+    columna_base: str,
+    umbral_similitud: int,
+    metodo: str,
+    workers: int,
+    candidatos_k: Optional[int] = None,
+    por_atributos: bool = False
+) -> pd.DataFrame:
+    """
+    Variante en lote de `normalizar_con_fuzzy_matching`: mismo resultado, pero
+    las descripciones únicas se puntúan juntas con NormalizationIndex.buscar_lote.
+    """
+    indice = NormalizationIndex.desde_dataframe(df_auxiliar, columna_variante, columna_base, metodo=metodo)
+
+    codigos, descripciones_unicas = pd.factorize(df_datos[columna_descripcion], use_na_sentinel=True)
+    print(f"\nProcesando {len(descripciones_unicas):,} descripciones únicas contra {len(indice):,} variantes...")
+
+    normalizadas, similitudes, metodos, _ = indice.buscar_lote(
+        list(descripciones_unicas),
+        umbral_similitud,
+        workers=workers,
+        mostrar_progreso=True,
+        candidatos_k=candidatos_k,
+        por_atributos=por_atributos
+    )
+
+    # Los nulos (código -1) van a una posición extra al final
+    normalizadas = np.append(normalizadas, np.array([''], dtype=object))
+    similitudes = np.append(similitudes, 0.0)
+    metodos = np.append(metodos, np.array(['Sin descripción'], dtype=object))
+    codigos = np.where(codigos < 0, len(normalizadas) - 1, codigos)
+
+    df_resultado = df_datos.copy()
+    df_resultado['Descripcion_Normalizada'] = normalizadas[codigos]
+    df_resultado['Similitud_Match'] = similitudes[codigos]
+    df_resultado['Metodo_Match'] = metodos[codigos]
+
+    _imprimir_estadisticas_metodos(df_resultado)
+
+    return df_resultado
+
+
+def _imprimir_estadisticas_metodos(df_resultado: pd.DataFrame) -> None:
+    """Imprime la distribución de Metodo_Match."""
+    _imprimir_conteo_metodos(df_resultado.groupby('Metodo_Match').size())
+
+
+def _imprimir_conteo_metodos(stats: pd.Series) -> None:
+    """Imprime la distribución de Metodo_Match a partir de los conteos por método."""
+    print(f"\n{'='*60}")
+    print("ESTADÍSTICAS DE NORMALIZACIÓN")
+    print(f"{'='*60}")
+
+    total = stats.sum()
+    for metodo, cantidad in stats.items():
+        porcentaje = (cantidad / total) * 100
+        print(f"{metodo:15s}: {cantidad:6,} ({porcentaje:5.1f}%)")
+
+    print(f"\n✓ Productos normalizados exitosamente")
+
+
 def normalizar_con_fuzzy_matching(
     df_datos: pd.DataFrame,
     df_auxiliar: pd.DataFrame,
@@ -76,7 +154,11 @@ def normalizar_con_fuzzy_matching(
     columna_variante: str = 'Nombre Gestion',
     columna_base: str = 'Base',
     umbral_similitud: int = 80,
-    metodo: str = 'token_sort_ratio'
+    metodo: str = 'token_sort_ratio',
+    modo_lote: bool = True,
+    workers: int = -1,
+    candidatos_k: Optional[int] = None,
+    por_atributos: bool = False
 ) -> pd.DataFrame:
     """
     Normaliza las descripciones usando fuzzy matching contra la tabla auxiliar.
@@ -89,6 +171,12 @@ def normalizar_con_fuzzy_matching(
         columna_base: Columna con nombres base en df_auxiliar
         umbral_similitud: Umbral mínimo de similitud (0-100)
         metodo: Método de similitud ('token_sort_ratio', 'ratio', 'partial_ratio')
+        modo_lote: Si True, puntúa todas las descripciones juntas con cdist (multi-core)
+        workers: Hilos para cdist en modo lote (-1 = todos los núcleos)
+        candidatos_k: En modo lote, compara solo contra las K variantes
+            preseleccionadas por trigramas (aproximado); None = toda la tabla
+        por_atributos: En modo lote, compara cada descripción solo con las
+            variantes de medida y pack compatibles (ver atributos.py)
 
     Returns:
         DataFrame con columna adicional 'Descripcion_Normalizada'
@@ -98,6 +186,13 @@ def normalizar_con_fuzzy_matching(
     print(f"{'='*60}")
     print(f"Método de similitud: {metodo}")
     print(f"Umbral mínimo: {umbral_similitud}%")
+    print(f"Modo: {'lote (cdist)' if modo_lote else 'individual (extractOne)'}")
+
+    if modo_lote:
+        return _normalizar_en_lote(
+            df_datos, df_auxiliar, columna_descripcion, columna_variante,
+            columna_base, umbral_similitud, metodo, workers, candidatos_k, por_atributos
+        )
 
     # Crear diccionario de mapeo variante -> base
     mapa_normalizacion = dict(zip(
@@ -186,16 +281,7 @@ def normalizar_con_fuzzy_matching(
     )
 
     # Estadísticas
-    print(f"\n{'='*60}")
-    print("ESTADÍSTICAS DE NORMALIZACIÓN")
-    print(f"{'='*60}")
-
-    stats = df_resultado.groupby('Metodo_Match').size()
-    for metodo, cantidad in stats.items():
-        porcentaje = (cantidad / len(df_resultado)) * 100
-        print(f"{metodo:15s}: {cantidad:6,} ({porcentaje:5.1f}%)")
-
-    print(f"\n✓ Productos normalizados exitosamente")
+    _imprimir_estadisticas_metodos(df_resultado)
 
     return df_resultado
 
@@ -262,7 +348,9 @@ def normalizar_productos_con_auxiliar(
     columna_base: str = 'Base',
     umbral_similitud: int = 80,
     metodo_similitud: str = 'token_sort_ratio',
-    generar_reporte: bool = True
+    generar_reporte: bool = True,
+    por_atributos: bool = False,
+    filas_por_bloque: Optional[int] = None
 ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
     """
     Función principal para normalizar productos usando tabla auxiliar.
@@ -279,17 +367,30 @@ def normalizar_productos_con_auxiliar(
         umbral_similitud: Umbral mínimo de similitud (0-100)
         metodo_similitud: Método de similitud a usar
         generar_reporte: Si True, genera reporte de calidad
+        por_atributos: Si True, solo matchea variantes de medida y pack compatibles
+        filas_por_bloque: Si se indica, lee, normaliza y escribe los datos por
+            bloques de esa cantidad de filas con memoria acotada (ver
+            lectura_por_bloques.py)
 
     Returns:
-        Tupla (df_normalizado, df_reporte)
+        Tupla (df_normalizado, df_reporte); por bloques, df_normalizado tiene
+        una fila por descripción única (con Frecuencia y Cantidad), ya que las
+        filas solo se escriben en `archivo_salida`
     """
     print("\n" + "="*60)
     print("  NORMALIZACIÓN DE PRODUCTOS CON TABLA AUXILIAR")
     print("="*60)
 
+    if filas_por_bloque:
+        return _normalizar_productos_con_auxiliar_por_bloques(
+            archivo_datos, archivo_auxiliar, archivo_salida, hoja_datos, hoja_auxiliar,
+            columna_descripcion, columna_variante, columna_base, umbral_similitud,
+            metodo_similitud, generar_reporte, por_atributos, filas_por_bloque
+        )
+
     # 1. Cargar datos
     print(f"\n📂 Cargando datos: {archivo_datos}")
-    df_datos = pd.read_excel(archivo_datos, sheet_name=hoja_datos)
+    df_datos = leer_tabla(archivo_datos, hoja_datos)
     print(f"✓ Registros cargados: {len(df_datos):,}")
 
     # 2. Cargar tabla auxiliar
@@ -308,7 +409,8 @@ def normalizar_productos_con_auxiliar(
         columna_variante,
         columna_base,
         umbral_similitud,
-        metodo_similitud
+        metodo_similitud,
+        por_atributos=por_atributos
     )
 
     # 4. Generar reporte de calidad
@@ -356,11 +458,155 @@ def normalizar_productos_con_auxiliar(
 
         print(f"\n✅ Archivo guardado: {archivo_salida}")
 
+    _imprimir_fin()
+
+    return df_normalizado, df_reporte
+
+
+def _imprimir_fin() -> None:
+    pico = pico_memoria_mb()
+    if pico is not None:
+        print(f"\n📈 Pico de memoria (RSS): {pico:,.0f} MB")
+
     print(f"\n{'='*60}")
     print("✅ NORMALIZACIÓN COMPLETADA")
     print(f"{'='*60}\n")
 
-    return df_normalizado, df_reporte
+
+def _normalizar_productos_con_auxiliar_por_bloques(
+    archivo_datos: str,
+    archivo_auxiliar: str,
+    archivo_salida: Optional[str],
+    hoja_datos: str,
+    hoja_auxiliar: str,
+    columna_descripcion: str,
+    columna_variante: str,
+    columna_base: str,
+    umbral_similitud: int,
+    metodo_similitud: str,
+    generar_reporte: bool,
+    por_atributos: bool,
+    filas_por_bloque: int
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Variante por bloques de `normalizar_productos_con_auxiliar`: mismas hojas de
+    salida, con memoria acotada.
+
+    El índice de la tabla se construye una vez; cada bloque de filas solo
+    busca las descripciones que todavía no se vieron y se escribe directo en
+    la salida. En memoria queda el resultado y el volumen de cada descripción
+    única, que alcanzan para el reporte de calidad y el resumen.
+    """
+    df_auxiliar = cargar_tabla_auxiliar(archivo_auxiliar, hoja_auxiliar, columna_variante, columna_base)
+    indice = NormalizationIndex.desde_dataframe(
+        df_auxiliar, columna_variante, columna_base, metodo=metodo_similitud
+    )
+    del df_auxiliar
+
+    print(f"\n{'='*60}")
+    print("NORMALIZANDO DESCRIPCIONES POR BLOQUES")
+    print(f"{'='*60}")
+    print(f"Método de similitud: {metodo_similitud}")
+    print(f"Umbral mínimo: {umbral_similitud}%")
+    print(f"📂 Leyendo datos: {archivo_datos} (bloques de {filas_por_bloque:,} filas)")
+
+    # Estado por descripción única
+    resultados: Dict[str, Tuple[str, float, str]] = {}
+    frecuencia: Dict[str, int] = {}
+    cantidad: Dict[str, float] = {}
+
+    metodos_filas = pd.Series(dtype=np.int64)
+    total_filas = 0
+    suma_similitud = 0.0
+    hay_nulos = False
+    escritor = EscritorExcelPorBloques(archivo_salida) if archivo_salida else None
+
+    for numero, bloque in enumerate(leer_excel_por_bloques(archivo_datos, hoja_datos, filas_por_bloque), start=1):
+        descripciones = bloque[columna_descripcion]
+        codigos, unicas = pd.factorize(descripciones, use_na_sentinel=True)
+        nuevas = [d for d in unicas if d not in resultados]
+        if nuevas:
+            normalizadas, similitudes, metodos, _ = indice.buscar_lote(
+                nuevas,
+                umbral_similitud,
+                por_atributos=por_atributos
+            )
+            resultados.update(zip(nuevas, zip(normalizadas, similitudes, metodos)))
+
+        # Los nulos (código -1) van a una posición extra al final
+        por_unica = [resultados[d] for d in unicas] + [('', 0.0, 'Sin descripción')]
+        codigos = np.where(codigos < 0, len(unicas), codigos)
+        hay_nulos = hay_nulos or bool((codigos == len(unicas)).any())
+
+        df_resultado = bloque.copy()
+        df_resultado['Descripcion_Normalizada'] = np.array([r[0] for r in por_unica], dtype=object)[codigos]
+        df_resultado['Similitud_Match'] = np.array([r[1] for r in por_unica], dtype=np.float64)[codigos]
+        df_resultado['Metodo_Match'] = np.array([r[2] for r in por_unica], dtype=object)[codigos]
+
+        # Acumulados para el reporte y el resumen
+        for descripcion, filas in descripciones.value_counts().items():
+            frecuencia[descripcion] = frecuencia.get(descripcion, 0) + int(filas)
+        if 'Cantidad' in bloque.columns:
+            for descripcion, suma in bloque.groupby(columna_descripcion)['Cantidad'].sum().items():
+                cantidad[descripcion] = cantidad.get(descripcion, 0) + suma
+        metodos_filas = metodos_filas.add(df_resultado['Metodo_Match'].value_counts(), fill_value=0)
+        total_filas += len(bloque)
+        suma_similitud += float(df_resultado['Similitud_Match'].sum())
+
+        if escritor is not None:
+            escritor.agregar('Datos_Normalizados', df_resultado)
+        print(f"  Bloque {numero}: {len(bloque):,} filas ({len(nuevas):,} descripciones nuevas, "
+              f"{len(resultados):,} en total)")
+
+    _imprimir_conteo_metodos(metodos_filas.astype(np.int64))
+
+    # Una fila por descripción única
+    df_descripciones = pd.DataFrame(
+        [(d, *resultados[d], frecuencia.get(d, 0), cantidad.get(d, 0)) for d in resultados],
+        columns=['Descripcion', 'Descripcion_Normalizada', 'Similitud_Match', 'Metodo_Match', 'Frecuencia', 'Cantidad']
+    )
+
+    df_reporte = None
+    if generar_reporte:
+        df_reporte = generar_reporte_calidad(df_descripciones)
+
+    if escritor is not None:
+        print(f"\n{'='*60}")
+        print("GUARDANDO RESULTADOS")
+        print(f"{'='*60}")
+
+        if df_reporte is not None:
+            escritor.agregar('Reporte_Calidad', df_reporte)
+
+        normalizadas_unicas = set(df_descripciones['Descripcion_Normalizada']) | ({''} if hay_nulos else set())
+        resumen = {
+            'Métrica': [
+                'Total Registros',
+                'Descripciones Únicas Originales',
+                'Descripciones Únicas Normalizadas',
+                'Matches Exactos',
+                'Matches Fuzzy',
+                'Sin Match',
+                'Similitud Promedio (%)'
+            ],
+            'Valor': [
+                total_filas,
+                len(df_descripciones),
+                len(normalizadas_unicas),
+                int(metodos_filas.get('Exacta', 0)),
+                int(metodos_filas.get('Fuzzy', 0)),
+                int(metodos_filas.get('Sin match', 0)),
+                suma_similitud / total_filas if total_filas else np.nan
+            ]
+        }
+        escritor.agregar('Resumen', pd.DataFrame(resumen))
+        escritor.guardar()
+
+        print(f"\n✅ Archivo guardado: {archivo_salida}")
+
+    _imprimir_fin()
+
+    return df_descripciones, df_reporte
 
 
 # ============================================================================
@@ -0,0 +1,103 @@
+"""
+Tabla de normalización compilada: tabla + índice de búsqueda ya construido.
+
+Leer el Excel (openpyxl) y preprocesar todas las variantes es lo más lento
+del arranque. El artefacto guarda ambos resultados en un pickle junto con la
+firma del contenido del que salieron; al arrancar se carga si la firma
+coincide y si no se descarta y se vuelve a compilar.
+
+La firma la define quien compila (por ejemplo `AlmacenVariantes.firma()`, que
+cambia cuando cambia el Excel en disco o se aprenden variantes), así que no
+hace falta ningún vencimiento por tiempo.
+"""
+
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from normalizacion.indice_normalizacion import NormalizationIndex
+from normalizacion.indice_proveedores import IndicePorProveedor
+
+Indice = Union[NormalizationIndex, IndicePorProveedor]
+
+# Cambiar si cambia la estructura del artefacto o del índice
+VERSION_FORMATO = 2
+
+
+def guardar_tabla_compilada(
+    ruta: Union[str, Path],
+    firma: str,
+    tabla: pd.DataFrame,
+    indice: Indice
+) -> float:
+    """
+    Guarda tabla + índice (archivo temporal + reemplazo atómico).
+
+    Args:
+        ruta: Archivo del artefacto
+        firma: Firma del contenido compilado
+        tabla: DataFrame con 'Nombre Gestion', 'Base' y 'Proveedor'
+        indice: Índice construido con esa tabla
+
+    Returns:
+        Segundos que tardó en escribirse
+    """
+    inicio = time.perf_counter()
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    artefacto = {
+        "formato": VERSION_FORMATO,
+        "firma": firma,
+        "metodo": indice.metodo,
+        "tabla": tabla,
+        "indice": indice,
+    }
+    fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=str(ruta.parent))
+    try:
+        with os.fdopen(fd, "wb") as archivo:
+            pickle.dump(artefacto, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return time.perf_counter() - inicio
+
+
+def cargar_tabla_compilada(
+    ruta: Union[str, Path],
+    firma: str,
+    metodo: str = 'token_sort_ratio'
+) -> Optional[Tuple[pd.DataFrame, Indice, Dict[str, float]]]:
+    """
+    Carga el artefacto si corresponde a `firma` y `metodo`.
+
+    Returns:
+        (tabla, índice, {"segundos": tiempo de carga}) o None si no existe, es de
+        otra firma/formato o no se puede leer
+    """
+    inicio = time.perf_counter()
+    try:
+        with open(ruta, "rb") as archivo:
+            artefacto = pickle.load(archivo)
+    except Exception:
+        return None
+
+    if (
+        not isinstance(artefacto, dict)
+        or artefacto.get("formato") != VERSION_FORMATO
+        or artefacto.get("firma") != firma
+        or artefacto.get("metodo") != metodo
+    ):
+        return None
+
+    indice = artefacto["indice"]
+    if not indice.hash_consistente():
+        return None
+
+    return artefacto["tabla"], indice, {"segundos": time.perf_counter() - inicio}
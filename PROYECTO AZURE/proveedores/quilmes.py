@@ -12,7 +12,8 @@ PATTERNS = [
 PROMPT = """
 Rol: Actúa como un Auditor de Datos experto. Tu tarea es extraer, procesar y validar matemáticamente facturas de "CERVECERIA Y MALTERIA QUILMES".
 
-Objetivo: Generar una tabla de costos estructurada donde la suma de los totales calculados coincida exactamente (diferencia ≈ 0%) con el total a pagar de la factura. Todas las columnas pedidas aquí son necesarias, y las compras siempre son de una sola página.
+Objetivo: Generar una tabla de costos estructurada donde la suma de los totales calculados coincida exactamente (diferencia ≈ 0%) con el total a pagar de la factura. Todas las columnas pedidas aquí son necesarias.
+Puede que recibas solo una parte de la factura (una página de una factura de varias hojas): extrae los ítems visibles y, si los Datos de Control del pie no aparecen, devuelve invoice_total y los totales de control en null (no los inventes); "invoice_number" siempre debe ser el número del encabezado.
 
 ═══════════════════════════════════════════════════════════════════════════════
 FASE 1: EXTRACCIÓN Y REGLAS DE NEGOCIO
@@ -12,21 +12,20 @@ import importlib
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any, Callable
-from decimal import Decimal, InvalidOperation
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
-
 # Agregar el directorio raíz al path
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 # === Gemini (tu conector) ===
-from src.connect_gemini import model
+from src.connect_gemini import get_model
+
+# === Análisis de documentos compartido (una llamada a Azure por archivo) ===
+from src.document_analysis import _has_digits, _to_float, analyze_document, get_invoice_items
 
 # === Configuración centralizada ===
 import config.config as cfg
@@ -79,7 +78,7 @@ creds = service_account.Credentials.from_service_account_file(
 )
 drive = build('drive', 'v3', credentials=creds)
 
-az_client = DocumentAnalysisClient(ENDPOINT, AzureKeyCredential(KEY))
+# El cliente de Azure vive en src.document_analysis (cache por contenido)
 
 # =========================
 # UTILS (delegadas a logger)
@@ -90,50 +89,6 @@ _print_items = log_items_summary
 # =========================
 # HELPERS NUMÉRICOS / TEXTO
 # =========================
-def _has_digits(s: str) -> bool:
-    return any(ch.isdigit() for ch in s)
-
-def _to_float(x):
-    """
-    Convierte a float si es posible. Acepta:
-      - int/float/Decimal
-      - numpy numeric
-      - str con símbolos ($, espacios, miles . y decimal ,)
-    Devuelve float o None. Si no hay dígitos en el string, se considera vacío (None).
-    """
-    if x is None:
-        return None
-    if isinstance(x, float):
-        return x
-    if isinstance(x, int):
-        return float(x)
-    if isinstance(x, Decimal):
-        try:
-            return float(x)
-        except (ValueError, InvalidOperation):
-            return None
-    try:
-        import numpy as np  # type: ignore
-        if isinstance(x, (np.integer, np.floating)):
-            return float(x)
-    except Exception:
-        pass
-    if isinstance(x, str):
-        s = x.strip()
-        if s == "":
-            return None
-        if not _has_digits(s):
-            return None
-        s = s.replace("$", "").replace("\u00A0", " ").strip()
-        s = re.sub(r"(?<=\d)\.(?=\d{3}\b)", "", s)
-        s = s.replace(",", ".")
-        s = s.replace(" ", "")
-        try:
-            return float(s)
-        except Exception:
-            return None
-    return None
-
 def _is_nan(v) -> bool:
     try:
         return isinstance(v, float) and math.isnan(v)
@@ -168,29 +123,6 @@ def _normalize_desc(desc) -> str:
     s = re.sub(r"\s+", " ", s).strip()
     return s
 
-def _unwrap_azure_num(x):
-    """
-    Devuelve un float a partir de valores de Azure:
-    - CurrencyValue (tiene .amount) -> float(amount)
-    - int/float/Decimal -> float
-    - str -> _to_float(str)
-    - otros -> _to_float(x)
-    """
-    if x is None:
-        return None
-    amt = getattr(x, "amount", None)
-    if amt is not None:
-        try:
-            return float(amt)
-        except Exception:
-            pass
-    if isinstance(x, (int, float, Decimal)):
-        try:
-            return float(x)
-        except Exception:
-            return None
-    return _to_float(x)
-
 # =========================
 # PROVEEDORES: prompt + transformaciones + condicionales
 # =========================
@@ -276,43 +208,10 @@ def resolve_supplier_plugin(filename: str) -> Tuple[str, Optional[str], Optional
 def analyze_invoice_bytes(content: bytes) -> List[Dict]:
     """
     Ejecuta Azure Form Recognizer (prebuilt-invoice) y devuelve lista de ítems normalizada.
+    Usa el análisis compartido de src.document_analysis (cacheado por hash del contenido).
     Lanza excepción ante cualquier error — el caller (main) maneja fallback a Gemini.
     """
-    poller = az_client.begin_analyze_document(
-        model_id="prebuilt-invoice",
-        document=content
-    )
-    result = poller.result()
-
-    items_out: List[Dict] = []
-    for doc in result.documents:
-        items_field = doc.fields.get("Items")
-        if not items_field or not items_field.value:
-            continue
-
-        for it in items_field.value:
-            flds = it.value
-
-            def v(name: str):
-                f = flds.get(name)
-                return getattr(f, "value", None) if f else None
-
-            qty        = _unwrap_azure_num(v("Quantity"))
-            unit_price = _unwrap_azure_num(v("UnitPrice"))
-            amount     = _unwrap_azure_num(v("Amount"))
-
-            subtotal = amount if amount is not None else (
-                round(qty * unit_price, 2) if (qty is not None and unit_price is not None) else None
-            )
-
-            items_out.append({
-                "Codigo": v("ProductCode"),
-                "Descripcion": v("Description"),
-                "Cantidad": qty,
-                "PrecioUnitario": unit_price,
-                "Subtotal": subtotal,
-            })
-    return items_out
+    return get_invoice_items(analyze_document(content), round_digits=2)
 
 # =========================
 # SANITIZADO POST-AZURE
@@ -428,7 +327,7 @@ def _call_gemini(prompt: str, image_part: Dict, temperature: Optional[float] = N
     if temperature is None:
         temperature = GEMINI_TEMPERATURE
 
-    resp = model.generate_content(
+    resp = get_model().generate_content(
         [prompt, image_part],
         generation_config={
             "temperature": temperature,
@@ -513,6 +412,8 @@ def download_file_bytes(file_id: str) -> bytes:
 # MAIN
 # =========================
 def main():
+    logging_module.setup_logging()
+
     # Validar configuración antes de empezar
     try:
         validate_setup()
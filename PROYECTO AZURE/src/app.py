@@ -16,31 +16,25 @@ import json
 import re
 import importlib
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from datetime import datetime
-from PIL import Image
 
 import streamlit as st
-import pandas as pd
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
 
 # Importar módulos del proyecto
 # Agregar el directorio raíz al path
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
+# Arranque liviano: pandas, PIL, los SDK de Azure/Gemini, el normalizador (rapidfuzz)
+# y los plugins de proveedores se importan dentro de las funciones que los usan,
+# recién cuando se procesa un archivo. La configuración (cfg.*) también se resuelve
+# al leerla, no al importar.
 import config.config as cfg
 import config.logger as logging_module
-from src.connect_gemini import model
-from src.test import _unwrap_azure_num
-from src.normalizador import normalizar_dataframe, mostrar_estadisticas_normalizacion, agregar_variantes_a_tabla
+from src.connect_gemini import get_model
 
 # Extraer configuraciones
-AZURE_ENDPOINT = cfg.AZURE_ENDPOINT
-AZURE_KEY = cfg.AZURE_KEY
-GEMINI_API_KEY = cfg.GEMINI_API_KEY
-GEMINI_MODEL = cfg.GEMINI_MODEL
 ALLOWED_MIME_TYPES = cfg.ALLOWED_MIME_TYPES
 get_logger = logging_module.get_logger
 
@@ -258,115 +252,139 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def extract_items_azure(file_bytes: bytes) -> List[Dict]:
+def extract_items_azure(file_bytes: bytes, doc_hash: Optional[str] = None) -> List[Dict]:
     """
     Extrae items usando Azure Document Intelligence (modelo prebuilt-invoice).
 
+    El análisis se comparte con los extractores por proveedor: si el mismo
+    archivo ya se analizó (en esta u otra pestaña) no se vuelve a llamar a Azure.
+
     Args:
         file_bytes: Contenido del archivo en bytes
+        doc_hash: Clave de cache del análisis (sub-documentos de `src.page_splitting`)
 
     Returns:
         Lista de ítems extraídos
     """
-    client = DocumentAnalysisClient(
-        endpoint=AZURE_ENDPOINT,
-        credential=AzureKeyCredential(AZURE_KEY)
-    )
+    from src.document_analysis import analyze_document, get_invoice_items
 
-    poller = client.begin_analyze_document(
-        model_id="prebuilt-invoice",
-        document=file_bytes
-    )
-    result = poller.result()
+    return get_invoice_items(analyze_document(file_bytes, doc_hash))
 
-    items = []
-    for doc in result.documents:
-        items_field = doc.fields.get("Items")
-        if not items_field or not items_field.value:
-            continue
 
-        for it in items_field.value:
-            flds = it.value or {}
-            def v(name: str):
-                fld = flds.get(name)
-                return getattr(fld, "value", None) if fld else None
-
-            qty = _unwrap_azure_num(v("Quantity"))
-            unit_price = _unwrap_azure_num(v("UnitPrice"))
-            amount = _unwrap_azure_num(v("Amount"))
-            subtotal = amount if amount is not None else (
-                qty * unit_price if (qty is not None and unit_price is not None) else None
-            )
+@st.cache_resource
+def _supplier_patterns() -> List[Tuple[str, List]]:
+    """(módulo, PATTERNS compilados) de cada plugin en proveedores/, en el orden de pkgutil."""
+    import pkgutil
 
-            items.append({
-                "Codigo": v("ProductCode"),
-                "Descripcion": v("Description"),
-                "Cantidad": qty,
-                "PrecioUnitario": unit_price,
-                "Subtotal": subtotal,
-            })
+    patterns = []
+    for _, mod_name, is_pkg in pkgutil.iter_modules([str(root_dir / "proveedores")]):
+        if is_pkg or mod_name in ("archivos", "__init__"):
+            continue
+        try:
+            mod = importlib.import_module(f"proveedores.{mod_name}")
+        except Exception as e:
+            logger.warning(f"No se pudo importar el plugin {mod_name}: {e}")
+            continue
+        compiled = []
+        for pat in getattr(mod, "PATTERNS", None) or []:
+            try:
+                compiled.append(re.compile(pat, re.I) if isinstance(pat, str) else pat)
+            except re.error:
+                continue
+        if compiled:
+            patterns.append((mod_name, compiled))
+    return patterns
+
+
+def resolve_supplier_key(filename: str) -> str:
+    """
+    Proveedor de un archivo: el plugin de proveedores/ cuyos PATTERNS coinciden con el nombre.
 
-    return items
+    Es la misma detección por nombre de archivo que usan los extractores por
+    proveedor; la clave se usa para buscar primero en las variantes de
+    normalización de ese proveedor.
 
+    Args:
+        filename: Nombre del archivo
 
-def extract_items_cocacola(file_bytes: bytes, filename: str) -> Dict:
+    Returns:
+        Nombre del módulo del plugin (ej. 'CocaCola'), o '' si ninguno coincide
     """
-    Extrae items de facturas de Coca-Cola FEMSA usando el plugin específico + Gemini.
+    for mod_name, compiled in _supplier_patterns():
+        if any(pat.search(filename) for pat in compiled):
+            return mod_name
+    return ""
+
+
+def _extract_items_supplier(
+    module_name: str,
+    supplier_label: str,
+    file_bytes: bytes,
+    filename: str,
+    doc_hash: Optional[str] = None
+) -> Dict:
+    """
+    Extrae items de facturas de un proveedor usando su plugin (PROMPT) + Gemini.
+
+    Las imágenes se envían directo a Gemini; los PDF se resuelven localmente
+    (`src.pdf_local`: capa de texto o páginas rasterizadas) y solo si eso falla
+    se usa el texto del análisis compartido de Azure (`src.document_analysis`).
 
     Args:
+        module_name: Módulo del plugin (ej: "proveedores.CocaCola")
+        supplier_label: Nombre del proveedor para logs y errores
         file_bytes: Contenido del archivo
         filename: Nombre del archivo
+        doc_hash: Clave de cache de renders y análisis (sub-documentos de `src.page_splitting`)
 
     Returns:
         Dict con {"items": lista de ítems, "invoice_total": total de factura, "invoice_number": número de factura}
     """
+    response_text = ""
     try:
-        # Cargar plugin de Coca-Cola
-        coca_module = importlib.import_module("proveedores.CocaCola")
-        prompt = getattr(coca_module, "PROMPT", "")
+        # Cargar plugin del proveedor
+        supplier_module = importlib.import_module(module_name)
+        prompt = getattr(supplier_module, "PROMPT", "")
 
         if not prompt:
-            raise ValueError("No se encontró el prompt de Coca-Cola")
+            raise ValueError(f"No se encontró el prompt de {supplier_label}")
 
-        logger.info(f"Procesando factura Coca-Cola: {filename}")
+        logger.info(f"Procesando factura {supplier_label}: {filename}")
 
         # Intentar cargar como imagen
         try:
+            from PIL import Image
+
             image = Image.open(io.BytesIO(file_bytes))
             logger.info("Archivo cargado como imagen")
 
             # Llamar a Gemini con imagen
-            response = model.generate_content([prompt, image])
+            response = get_model().generate_content([prompt, image])
             response_text = response.text.strip()
 
         except Exception as img_error:
             logger.warning(f"No se pudo cargar como imagen: {img_error}")
-            # Si es PDF, usar Azure para OCR
-            client = DocumentAnalysisClient(
-                endpoint=AZURE_ENDPOINT,
-                credential=AzureKeyCredential(AZURE_KEY)
-            )
-            poller = client.begin_analyze_document(
-                model_id="prebuilt-layout",
-                document=file_bytes
-            )
-            result = poller.result()
+            # Si es PDF, resolver localmente: capa de texto o páginas rasterizadas
+            from src.pdf_local import prepare_pdf_for_gemini
+
+            pdf_input = prepare_pdf_for_gemini(file_bytes, doc_hash)
 
-            # Extraer texto completo del documento
-            full_text = result.content if hasattr(result, 'content') else ""
+            if pdf_input is not None and pdf_input["mode"] == "images":
+                # Llamar a Gemini con las páginas como imágenes
+                response = get_model().generate_content([prompt, *pdf_input["images"]])
+            else:
+                if pdf_input is not None:
+                    full_text = pdf_input["text"]
+                else:
+                    # Último recurso: texto del análisis de Azure (cacheado por contenido)
+                    from src.document_analysis import analyze_document, get_document_text
 
-            # Si no hay content, extraer de las líneas de cada página
-            if not full_text:
-                full_text = "\n".join([
-                    line.content
-                    for page in result.pages
-                    for line in page.lines
-                ])
+                    full_text = get_document_text(analyze_document(file_bytes, doc_hash))
 
-            prompt_with_text = f"{prompt}\n\nTEXTO EXTRAÍDO:\n{full_text}"
+                prompt_with_text = f"{prompt}\n\nTEXTO EXTRAÍDO:\n{full_text}"
 
-            # Llamar a Gemini solo con texto
-            response = model.generate_content(prompt_with_text)
+                # Llamar a Gemini solo con texto
+                response = get_model().generate_content(prompt_with_text)
             response_text = response.text.strip()
 
         # Limpiar respuesta (quitar ```json si existe)
@@ -411,114 +429,87 @@ def extract_items_cocacola(file_bytes: bytes, filename: str) -> Dict:
         logger.error(f"Respuesta recibida: {response_text[:500]}")
         raise ValueError(f"Error al parsear respuesta de IA: {str(je)}")
     except Exception as e:
-        logger.error(f"Error en extracción Coca-Cola: {e}", exc_info=True)
+        logger.error(f"Error en extracción {supplier_label}: {e}", exc_info=True)
         raise e
 
 
-def extract_items_quilmes(file_bytes: bytes, filename: str) -> Dict:
+def extract_items_cocacola(file_bytes: bytes, filename: str, doc_hash: Optional[str] = None) -> Dict:
     """
-    Extrae items de facturas de Quilmes usando el plugin específico + Gemini.
+    Extrae items de facturas de Coca-Cola FEMSA usando el plugin específico + Gemini.
 
     Args:
         file_bytes: Contenido del archivo
         filename: Nombre del archivo
+        doc_hash: Clave de cache (sub-documentos de `src.page_splitting`)
 
     Returns:
         Dict con {"items": lista de ítems, "invoice_total": total de factura, "invoice_number": número de factura}
     """
-    try:
-        # Cargar plugin de Quilmes
-        quilmes_module = importlib.import_module("proveedores.quilmes")
-        prompt = getattr(quilmes_module, "PROMPT", "")
-
-        if not prompt:
-            raise ValueError("No se encontró el prompt de Quilmes")
+    return _extract_items_supplier("proveedores.CocaCola", "Coca-Cola", file_bytes, filename, doc_hash)
 
-        logger.info(f"Procesando factura Quilmes: {filename}")
 
-        # Intentar cargar como imagen
-        try:
-            image = Image.open(io.BytesIO(file_bytes))
-            logger.info("Archivo cargado como imagen")
-
-            # Llamar a Gemini con imagen
-            response = model.generate_content([prompt, image])
-            response_text = response.text.strip()
+def extract_items_quilmes(file_bytes: bytes, filename: str, doc_hash: Optional[str] = None) -> Dict:
+    """
+    Extrae items de facturas de Quilmes usando el plugin específico + Gemini.
 
-        except Exception as img_error:
-            logger.warning(f"No se pudo cargar como imagen: {img_error}")
-            # Si es PDF, usar Azure para OCR
-            client = DocumentAnalysisClient(
-                endpoint=AZURE_ENDPOINT,
-                credential=AzureKeyCredential(AZURE_KEY)
-            )
-            poller = client.begin_analyze_document(
-                model_id="prebuilt-layout",
-                document=file_bytes
-            )
-            result = poller.result()
+    Args:
+        file_bytes: Contenido del archivo
+        filename: Nombre del archivo
+        doc_hash: Clave de cache (sub-documentos de `src.page_splitting`)
 
-            # Extraer texto completo del documento
-            full_text = result.content if hasattr(result, 'content') else ""
+    Returns:
+        Dict con {"items": lista de ítems, "invoice_total": total de factura, "invoice_number": número de factura}
+    """
+    return _extract_items_supplier("proveedores.quilmes", "Quilmes", file_bytes, filename, doc_hash)
 
-            # Si no hay content, extraer de las líneas de cada página
-            if not full_text:
-                full_text = "\n".join([
-                    line.content
-                    for page in result.pages
-                    for line in page.lines
-                ])
 
-            prompt_with_text = f"{prompt}\n\nTEXTO EXTRAÍDO:\n{full_text}"
+def extract_invoices_split(
+    extract_fn: Callable[[bytes, str, Optional[str]], Dict],
+    file_bytes: bytes,
+    filename: str
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Aplica un extractor por proveedor a cada factura del archivo.
 
-            # Llamar a Gemini solo con texto
-            response = model.generate_content(prompt_with_text)
-            response_text = response.text.strip()
+    Los PDF con varias facturas (o escaneados de varias páginas) se dividen en
+    sub-documentos que se procesan en paralelo (`src.page_splitting`); el resto
+    se procesa como una sola unidad.
 
-        # Limpiar respuesta (quitar ```json si existe)
-        response_text = response_text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+    Args:
+        extract_fn: Extractor (ej: extract_items_cocacola)
+        file_bytes: Contenido del archivo
+        filename: Nombre del archivo
 
-        # Parsear JSON
-        result = json.loads(response_text)
+    Returns:
+        Tupla (lista de resultados por factura, errores de las partes que fallaron)
+    """
+    from src.page_splitting import (
+        describe_part_errors, merge_invoice_results, plan_subdocuments, process_subdocuments
+    )
 
-        # Manejar ambos formatos: nuevo (con invoice_total) y antiguo (solo lista)
-        if isinstance(result, dict) and "items" in result:
-            items = result["items"]
-            invoice_total = result.get("invoice_total", None)
-            invoice_number = result.get("invoice_number", None)
-        elif isinstance(result, list):
-            items = result
-            invoice_total = None
-            invoice_number = None
-        else:
-            raise ValueError("La respuesta no tiene el formato esperado")
+    groups = plan_subdocuments(file_bytes)
+    if groups is None:
+        return [extract_fn(file_bytes, filename)], []
 
-        if not isinstance(items, list):
-            raise ValueError("Los items no son una lista")
+    outcomes = process_subdocuments(file_bytes, groups, extract_fn, filename)
+    part_errors = describe_part_errors(outcomes)
 
-        logger.info(f"Extracción exitosa: {len(items)} productos detectados")
+    done = [(group, result) for group, result in outcomes if not isinstance(result, Exception)]
+    if groups[0]["by_page"]:
+        # Páginas sueltas: se unen por el número de factura que devuelve Gemini
+        invoices = merge_invoice_results(
+            [result for _, result in done],
+            [group["key"] for group, _ in done]
+        )
+    else:
+        invoices = []
+        for group, result in done:
+            if result.get("invoice_number") is None and group["key"][1]:
+                result["invoice_number"] = group["key"][1]
+            invoices.append(result)
 
-        # Retornar items, total y número de factura
-        return {
-            "items": items,
-            "invoice_total": invoice_total,
-            "invoice_number": invoice_number
-        }
-
-    except json.JSONDecodeError as je:
-        logger.error(f"Error parseando JSON: {je}")
-        logger.error(f"Respuesta recibida: {response_text[:500]}")
-        raise ValueError(f"Error al parsear respuesta de IA: {str(je)}")
-    except Exception as e:
-        logger.error(f"Error en extracción Quilmes: {e}", exc_info=True)
-        raise e
+    logger.info(f"{filename}: {len(invoices)} factura(s) en {len(groups)} sub-documentos")
+    return invoices, part_errors
 
 
 def extract_items_julio(file_bytes: bytes, filename: str) -> Dict:
@@ -551,7 +542,7 @@ def extract_items_julio(file_bytes: bytes, filename: str) -> Dict:
         raise e
 
 
-def process_single_file_general(file_bytes: bytes, filename: str) -> tuple[List[Dict], str]:
+def process_single_file_general(file_bytes: bytes, filename: str) -> tuple[List[Dict], str, List[str]]:
     """
     Procesa un archivo con el extractor general (Azure).
 
@@ -560,11 +551,27 @@ def process_single_file_general(file_bytes: bytes, filename: str) -> tuple[List[
         filename: Nombre del archivo
 
     Returns:
-        Tupla de (items, método_usado)
+        Tupla de (items, método_usado, errores de las partes que fallaron)
     """
     try:
-        items = extract_items_azure(file_bytes)
-        return items, "Azure Document Intelligence"
+        from src.page_splitting import describe_part_errors, plan_subdocuments, process_subdocuments
+
+        groups = plan_subdocuments(file_bytes)
+        if groups is None or groups[0]["by_page"]:
+            # Una sola factura (o escaneo sin encabezados legibles): Azure ve el documento completo
+            items = extract_items_azure(file_bytes)
+            return items, "Azure Document Intelligence", []
+
+        # Varias facturas en el PDF: una llamada a Azure por factura, en paralelo
+        outcomes = process_subdocuments(
+            file_bytes, groups, lambda part, _label, key: extract_items_azure(part, doc_hash=key), filename
+        )
+        part_errors = describe_part_errors(outcomes)
+        items = []
+        for _, result in outcomes:
+            if not isinstance(result, Exception):
+                items.extend(result)
+        return items, f"Azure Document Intelligence ({len(groups)} facturas)", part_errors
     except Exception as e:
         logger.error(f"Error procesando {filename}: {e}")
         raise e
@@ -581,6 +588,8 @@ def create_excel_download(items: List[Dict], filename_prefix: str = "facturas")
     Returns:
         Bytes del archivo Excel
     """
+    import pandas as pd
+
     df = pd.DataFrame(items)
 
     # Crear Excel en memoria
@@ -592,7 +601,7 @@ def create_excel_download(items: List[Dict], filename_prefix: str = "facturas")
         worksheet = writer.sheets['Items']
         for idx, col in enumerate(df.columns, 1):
             max_length = max(
-                df[col].astype(str).apply(len).max(),
+                df[col].astype(str).str.len().max(),
                 len(col)
             )
             worksheet.column_dimensions[chr(64 + idx)].width = min(max_length + 2, 50)
@@ -663,53 +672,83 @@ def render_general_tab():
         st.markdown("---")
 
         if st.button("🚀 Procesar Facturas", type="primary", key="process_general"):
+            import pandas as pd
+            from src.normalizador import NormalizacionPorArchivo, mostrar_estadisticas_normalizacion, agregar_variantes_a_tabla
+
             all_items = []
+            normalized_frames = []
 
             # Barra de progreso
             progress_bar = st.progress(0)
             status_text = st.empty()
+            normalization_text = st.empty()
 
-            # Contenedor para resultados
-            results_container = st.container()
+            # Índice y cache compartidos: cada archivo se normaliza apenas termina
+            normalizacion = NormalizacionPorArchivo(columna_descripcion='Descripcion', umbral_similitud=75)
 
-            valid_files = [f for f in uploaded_files if f]
+            try:
+                # Contenedor para resultados
+                results_container = st.container()
 
-            for idx, uploaded_file in enumerate(valid_files):
-                progress = (idx + 1) / len(valid_files)
-                progress_bar.progress(progress)
-                status_text.text(f"Procesando: {uploaded_file.name} ({idx + 1}/{len(valid_files)})")
+                valid_files = [f for f in uploaded_files if f]
 
-                try:
-                    # Leer bytes del archivo
-                    file_bytes = uploaded_file.read()
+                for idx, uploaded_file in enumerate(valid_files):
+                    progress = (idx + 1) / len(valid_files)
+                    progress_bar.progress(progress)
+                    status_text.text(f"Procesando: {uploaded_file.name} ({idx + 1}/{len(valid_files)})")
 
-                    # Procesar archivo
-                    with st.spinner(f"Analizando {uploaded_file.name}..."):
-                        items, method = process_single_file_general(file_bytes, uploaded_file.name)
+                    try:
+                        # Leer bytes del archivo
+                        file_bytes = uploaded_file.read()
 
-                    # Agregar nombre de archivo a cada ítem
-                    for item in items:
-                        item['Archivo'] = uploaded_file.name
+                        # Procesar archivo
+                        with st.spinner(f"Analizando {uploaded_file.name}..."):
+                            items, method, part_errors = process_single_file_general(file_bytes, uploaded_file.name)
 
-                    all_items.extend(items)
+                        for part_error in part_errors:
+                            with results_container:
+                                st.warning(f"⚠️ {uploaded_file.name}: {part_error}")
 
-                    # Mostrar resultado individual
-                    with results_container:
-                        with st.expander(f"✅ {uploaded_file.name} - {len(items)} ítems extraídos"):
-                            if items:
-                                df_preview = pd.DataFrame(items)
-                                st.dataframe(df_preview, use_container_width=True)
-                            else:
-                                st.warning("No se encontraron ítems en este archivo")
+                        # Agregar nombre de archivo y proveedor (partición de normalización) a cada ítem
+                        supplier_key = resolve_supplier_key(uploaded_file.name)
+                        for item in items:
+                            item['Archivo'] = uploaded_file.name
+                            item['Proveedor'] = supplier_key
+
+                        # Normalizar los ítems del archivo antes de pasar al siguiente
+                        if items:
+                            df_preview = normalizacion.normalizar(pd.DataFrame(items), agregar_columnas_debug=True)
+                            normalized_frames.append(df_preview)
+                            if normalizacion.metodos:
+                                normalization_text.caption(
+                                    f"🔄 Normalizados {sum(normalizacion.metodos.values())} ítems: "
+                                    f"{normalizacion.metodos.get('Exacta', 0)} exactos, "
+                                    f"{normalizacion.metodos.get('Fuzzy', 0)} fuzzy, "
+                                    f"{normalizacion.metodos.get('Sin match', 0)} sin match"
+                                )
 
-                except Exception as e:
-                    with results_container:
-                        st.error(f"❌ Error en {uploaded_file.name}: {str(e)}")
-                    logger.error(f"Error procesando {uploaded_file.name}: {e}", exc_info=True)
+                        all_items.extend(items)
+
+                        # Mostrar resultado individual
+                        with results_container:
+                            with st.expander(f"✅ {uploaded_file.name} - {len(items)} ítems extraídos"):
+                                if items:
+                                    st.dataframe(df_preview, use_container_width=True)
+                                else:
+                                    st.warning("No se encontraron ítems en este archivo")
+
+                    except Exception as e:
+                        with results_container:
+                            st.error(f"❌ Error en {uploaded_file.name}: {str(e)}")
+                        logger.error(f"Error procesando {uploaded_file.name}: {e}", exc_info=True)
+            finally:
+                # Libera la cache aunque falle un st.* del loop
+                normalizacion.cerrar()
 
             # Limpiar barra de progreso
             progress_bar.empty()
             status_text.empty()
+            normalization_text.empty()
 
             # Mostrar resultados finales
             st.markdown("---")
@@ -718,17 +757,16 @@ def render_general_tab():
             if all_items:
                 st.success(f"✅ Procesamiento completado: {len(all_items)} ítems extraídos de {len(valid_files)} archivos")
 
-                # DataFrame completo
-                df_final = pd.DataFrame(all_items)
-
-                # Normalizar nombres de productos
-                df_final = normalizar_dataframe(df_final, columna_descripcion='Descripcion', umbral_similitud=75, agregar_columnas_debug=True)
+                # DataFrame completo: los ítems ya vienen normalizados archivo por archivo
+                df_final = pd.concat(normalized_frames, ignore_index=True)
+                df_final.attrs = normalizacion.attrs()
 
                 # Mostrar estadísticas de normalización
                 if 'Metodo_Match' in df_final.columns:
                     mostrar_estadisticas_normalizacion(df_final)
 
-                    # Aprendizaje automático: agregar variantes con fuzzy match exitoso
+                    # Aprendizaje automático: variantes con fuzzy match exitoso de todos
+                    # los archivos, en una sola escritura al almacén
                     variantes_agregadas = agregar_variantes_a_tabla(
                         df_final,
                         columna_descripcion='Descripcion',
@@ -906,6 +944,9 @@ def render_cocacola_tab():
             st.markdown('</div>', unsafe_allow_html=True)
 
         if process_button:
+            import pandas as pd
+            from src.formato import formatear_columnas, construir_tabla_validacion
+
             all_items = []
             all_validations = []
 
@@ -922,31 +963,36 @@ def render_cocacola_tab():
                     # Leer bytes
                     file_bytes = uploaded_file.read()
 
-                    # Procesar
+                    # Procesar (un resultado por factura: los PDF con varias facturas o
+                    # páginas se dividen y procesan en paralelo)
                     with st.spinner(f"🔍 Analizando {uploaded_file.name}..."):
-                        result = extract_items_cocacola(file_bytes, uploaded_file.name)
+                        invoices, part_errors = extract_invoices_split(extract_items_cocacola, file_bytes, uploaded_file.name)
 
-                    # Extraer items, total y número de factura
-                    items = result.get("items", [])
-                    invoice_total = result.get("invoice_total", None)
-                    invoice_number = result.get("invoice_number", uploaded_file.name)  # Fallback al nombre de archivo
+                    for part_error in part_errors:
+                        st.warning(f"⚠️ {uploaded_file.name}: {part_error}")
 
-                    if items:
-                        # Agregar número de factura a cada item
-                        for item in items:
-                            item['Nro_Factura'] = invoice_number
+                    for result in invoices:
+                        # Extraer items, total y número de factura
+                        items = result.get("items", [])
+                        invoice_total = result.get("invoice_total", None)
+                        invoice_number = result.get("invoice_number", uploaded_file.name)  # Fallback al nombre de archivo
 
-                        all_items.extend(items)
+                        if items:
+                            # Agregar número de factura a cada item
+                            for item in items:
+                                item['Nro_Factura'] = invoice_number
 
-                        # Guardar validación
-                        if 'total_final' in items[0]:
-                            calculated_total = sum(item.get('total_final', 0) for item in items)
-                            all_validations.append({
-                                'Factura': invoice_number,  # Usar número de factura real
-                                'Total_Papel': invoice_total,
-                                'Total_Calculado': calculated_total,
-                                'Diferencia': calculated_total - invoice_total if invoice_total else None
-                            })
+                            all_items.extend(items)
+
+                            # Guardar validación
+                            if 'total_final' in items[0]:
+                                calculated_total = sum(item.get('total_final', 0) for item in items)
+                                all_validations.append({
+                                    'Factura': invoice_number,  # Usar número de factura real
+                                    'Total_Papel': invoice_total,
+                                    'Total_Calculado': calculated_total,
+                                    'Diferencia': calculated_total - invoice_total if invoice_total else None
+                                })
 
                 except Exception as e:
                     st.error(f"❌ Error en {uploaded_file.name}: {str(e)}")
@@ -991,42 +1037,8 @@ def render_cocacola_tab():
                     st.markdown("---")
                     st.subheader("✅ Validación de Totales por Factura")
 
-                    df_val = pd.DataFrame(all_validations)
-
-                    # Añadir columnas de diferencia y estado
-                    df_val['Diferencia_Abs'] = df_val.apply(
-                        lambda row: abs(row['Diferencia']) if pd.notna(row['Diferencia']) else None,
-                        axis=1
-                    )
-
-                    def get_status(diff):
-                        if pd.isna(diff):
-                            return "Sin validación"
-                        elif abs(diff) <= 50:
-                            return "✅ Exacto"
-                        elif abs(diff) <= 100:
-                            return "✅ OK"
-                        elif abs(diff) <= 500:
-                            return "⚠️ Revisar"
-                        else:
-                            return "❌ Error"
-
-                    df_val['Estado'] = df_val['Diferencia'].apply(get_status)
-
-                    # Formatear para display
-                    df_val_display = df_val.copy()
-                    df_val_display['Total_Papel'] = df_val_display['Total_Papel'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-                    df_val_display['Total_Calculado'] = df_val_display['Total_Calculado'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-                    df_val_display['Diferencia'] = df_val_display['Diferencia'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-
-                    # Seleccionar columnas para mostrar
-                    df_val_display = df_val_display[['Factura', 'Total_Papel', 'Total_Calculado', 'Diferencia', 'Estado']]
+                    # Diferencia absoluta y estado (np.select) + versión formateada para display
+                    df_val, df_val_display = construir_tabla_validacion(all_validations)
 
                     st.dataframe(df_val_display, use_container_width=True)
 
@@ -1068,22 +1080,14 @@ def render_cocacola_tab():
                                'Desc.', 'Neto', 'Imp.Int.', 'IVA 21%', 'Total', 'Neto+II',
                                'IIBB CABA', 'IIBB 3337', 'Total Final', 'Costo/Bulto']
 
-                for col in numeric_cols:
-                    if col in df_display.columns:
-                        df_display[col] = df_display[col].apply(
-                            lambda x: f"{int(x):,.0f}".replace(",", ".") if pd.notna(x) and x != 0 else "-"
-                        )
+                df_display = formatear_columnas(df_display, numeric_cols, decimales=0, truncar=True, ocultar_ceros=True)
 
                 # Formatear Costo Unitario con 2 decimales
-                if 'Costo Unitario' in df_display.columns:
-                    df_display['Costo Unitario'] = df_display['Costo Unitario'].apply(
-                        lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notna(x) else "-"
-                    )
+                df_display = formatear_columnas(df_display, ['Costo Unitario'], decimales=2)
 
-                if '%Desc' in df_display.columns:
-                    df_display['%Desc'] = df_display['%Desc'].apply(
-                        lambda x: f"{float(x)*100:.2f}%" if pd.notna(x) else "-"
-                    )
+                df_display = formatear_columnas(
+                    df_display, ['%Desc'], escala=100, sufijo="%", sep_miles="", sep_decimal="."
+                )
 
                 # Mostrar tabla con scroll
                 st.dataframe(
@@ -1265,6 +1269,9 @@ def render_quilmes_tab():
             st.markdown('</div>', unsafe_allow_html=True)
 
         if process_button:
+            import pandas as pd
+            from src.formato import formatear_columnas, construir_tabla_validacion
+
             all_items = []
             all_validations = []
 
@@ -1281,36 +1288,41 @@ def render_quilmes_tab():
                     # Leer bytes
                     file_bytes = uploaded_file.read()
 
-                    # Procesar
+                    # Procesar (un resultado por factura: los PDF con varias facturas o
+                    # páginas se dividen y procesan en paralelo)
                     with st.spinner(f"🔍 Analizando {uploaded_file.name}..."):
-                        result = extract_items_quilmes(file_bytes, uploaded_file.name)
-
-                    # Extraer items, total y número de factura
-                    items = result.get("items", [])
-                    invoice_total = result.get("invoice_total", None)
-                    invoice_number = result.get("invoice_number", uploaded_file.name)  # Fallback al nombre de archivo
-
-                    if items:
-                        # Agregar número de factura a cada item si no está presente
-                        for item in items:
-                            if 'Nro_Factura' not in item and 'Num_de_FC' not in item:
-                                item['Nro_Factura'] = invoice_number
-
-                        all_items.extend(items)
-
-                        # Guardar validación si hay total de factura
-                        if invoice_total:
-                            # Intentar calcular el total desde los items
-                            calculated_total = sum(item.get('Final', 0) or 0 for item in items if item.get('Final') is not None)
-
-                            # Solo agregar validación si se pudo calcular un total
-                            if calculated_total > 0:
-                                all_validations.append({
-                                    'Factura': invoice_number,
-                                    'Total_Papel': invoice_total,
-                                    'Total_Calculado': calculated_total,
-                                    'Diferencia': calculated_total - invoice_total
-                                })
+                        invoices, part_errors = extract_invoices_split(extract_items_quilmes, file_bytes, uploaded_file.name)
+
+                    for part_error in part_errors:
+                        st.warning(f"⚠️ {uploaded_file.name}: {part_error}")
+
+                    for result in invoices:
+                        # Extraer items, total y número de factura
+                        items = result.get("items", [])
+                        invoice_total = result.get("invoice_total", None)
+                        invoice_number = result.get("invoice_number", uploaded_file.name)  # Fallback al nombre de archivo
+
+                        if items:
+                            # Agregar número de factura a cada item si no está presente
+                            for item in items:
+                                if 'Nro_Factura' not in item and 'Num_de_FC' not in item:
+                                    item['Nro_Factura'] = invoice_number
+
+                            all_items.extend(items)
+
+                            # Guardar validación si hay total de factura
+                            if invoice_total:
+                                # Intentar calcular el total desde los items
+                                calculated_total = sum(item.get('Final', 0) or 0 for item in items if item.get('Final') is not None)
+
+                                # Solo agregar validación si se pudo calcular un total
+                                if calculated_total > 0:
+                                    all_validations.append({
+                                        'Factura': invoice_number,
+                                        'Total_Papel': invoice_total,
+                                        'Total_Calculado': calculated_total,
+                                        'Diferencia': calculated_total - invoice_total
+                                    })
 
                 except Exception as e:
                     st.error(f"❌ Error en {uploaded_file.name}: {str(e)}")
@@ -1331,42 +1343,8 @@ def render_quilmes_tab():
                     st.markdown("---")
                     st.subheader("✅ Validación de Totales por Factura")
 
-                    df_val = pd.DataFrame(all_validations)
-
-                    # Añadir columnas de diferencia y estado
-                    df_val['Diferencia_Abs'] = df_val.apply(
-                        lambda row: abs(row['Diferencia']) if pd.notna(row['Diferencia']) else None,
-                        axis=1
-                    )
-
-                    def get_status(diff):
-                        if pd.isna(diff):
-                            return "Sin validación"
-                        elif abs(diff) <= 50:
-                            return "✅ Exacto"
-                        elif abs(diff) <= 100:
-                            return "✅ OK"
-                        elif abs(diff) <= 500:
-                            return "⚠️ Revisar"
-                        else:
-                            return "❌ Error"
-
-                    df_val['Estado'] = df_val['Diferencia'].apply(get_status)
-
-                    # Formatear para display
-                    df_val_display = df_val.copy()
-                    df_val_display['Total_Papel'] = df_val_display['Total_Papel'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-                    df_val_display['Total_Calculado'] = df_val_display['Total_Calculado'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-                    df_val_display['Diferencia'] = df_val_display['Diferencia'].apply(
-                        lambda x: f"${int(x):,}" if pd.notna(x) else "N/A"
-                    )
-
-                    # Seleccionar columnas para mostrar
-                    df_val_display = df_val_display[['Factura', 'Total_Papel', 'Total_Calculado', 'Diferencia', 'Estado']]
+                    # Diferencia absoluta y estado (np.select) + versión formateada para display
+                    df_val, df_val_display = construir_tabla_validacion(all_validations)
 
                     st.dataframe(df_val_display, use_container_width=True)
 
@@ -1413,22 +1391,13 @@ def render_quilmes_tab():
                                'Total Bruto', 'Desc. $', 'Neto', 'Imp. Int.', 'Neto+II',
                                'IVA', 'IIBB', 'Perc. IVA', 'Total Final', 'Pack Final', 'Costo Unit.']
 
-                for col in numeric_cols:
-                    if col in df_display.columns:
-                        df_display[col] = df_display[col].apply(
-                            lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notna(x) and x != 0 else "-"
-                        )
+                df_display = formatear_columnas(df_display, numeric_cols, decimales=2, ocultar_ceros=True)
 
                 # Formatear porcentajes
-                if '%Desc' in df_display.columns:
-                    df_display['%Desc'] = df_display['%Desc'].apply(
-                        lambda x: f"{float(x)*100:.2f}%" if pd.notna(x) and x != 0 else "-"
-                    )
-
-                if '%II' in df_display.columns:
-                    df_display['%II'] = df_display['%II'].apply(
-                        lambda x: f"{float(x)*100:.2f}%" if pd.notna(x) and x != 0 else "-"
-                    )
+                df_display = formatear_columnas(
+                    df_display, ['%Desc', '%II'], escala=100, sufijo="%",
+                    sep_miles="", sep_decimal=".", ocultar_ceros=True
+                )
 
                 # Mostrar tabla con scroll
                 st.dataframe(
@@ -1594,6 +1563,9 @@ def render_julio_tab():
             st.markdown('</div>', unsafe_allow_html=True)
 
         if process_button:
+            import pandas as pd
+            from src.formato import formatear_columnas, formatear_importe_ar
+
             all_facturas = []
 
             # Barra de progreso
@@ -1662,11 +1634,7 @@ def render_julio_tab():
                 numeric_cols = ['Importe Neto Gravado', 'IVA 27%', 'IVA 21%', 'IVA 10.5%',
                                'IVA 5%', 'IVA 2.5%', 'IVA 0%', 'Importe Otros Tributos', 'Importe Total']
 
-                for col in numeric_cols:
-                    if col in df_display.columns:
-                        df_display[col] = df_display[col].apply(
-                            lambda x: f"${float(x):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notna(x) and x != "ERROR" else x
-                        )
+                df_display = formatear_columnas(df_display, numeric_cols, prefijo="$", conservar_no_numericos=True)
 
                 # Mostrar tabla con scroll
                 st.dataframe(
@@ -1691,7 +1659,7 @@ def render_julio_tab():
                         and row.get('Importe_Total') != ''
                         and not str(row.get('Importe_Total')).startswith('ERROR')
                     )
-                    st.metric("Suma Total", f"${total_importe:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+                    st.metric("Suma Total", formatear_importe_ar(total_importe))
 
                 with col3:
                     errores = len([f for f in all_facturas if 'ERROR' in str(f.get('Razon_Social', ''))])
@@ -1765,6 +1733,7 @@ def render_julio_tab():
 
 def main():
     """Función principal de la aplicación."""
+    logging_module.setup_logging()
 
     # Header principal
     st.markdown("# 🏢 Sistema de Gestión de Facturas")
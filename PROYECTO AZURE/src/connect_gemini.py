@@ -1,30 +1,47 @@
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Agregar el directorio raíz al path
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
-from google.generativeai import configure, GenerativeModel
-
 # Import directo desde el módulo config
 import config.config as cfg
 import config.logger as logging_module
 
-GEMINI_API_KEY = cfg.GEMINI_API_KEY
-GEMINI_MODEL = cfg.GEMINI_MODEL
 get_logger = logging_module.get_logger
 
 # Configurar logger
 logger = get_logger(__name__)
 
-# Configurar API Key de Gemini desde variables de entorno
-configure(api_key=GEMINI_API_KEY)
 
-# Modelo a utilizar (configurable desde .env)
-model = GenerativeModel(GEMINI_MODEL)
+@lru_cache(maxsize=None)
+def get_model():
+    """
+    Devuelve el modelo de Gemini, configurándolo en el primer uso.
+
+    El SDK (google.generativeai) y la API key se cargan recién acá, no al
+    importar el módulo, para no penalizar el arranque de la app.
+    """
+    from google.generativeai import configure, GenerativeModel
+
+    # Configurar API Key de Gemini desde variables de entorno
+    configure(api_key=cfg.GEMINI_API_KEY)
+
+    # Modelo a utilizar (configurable desde .env)
+    gemini_model = GenerativeModel(cfg.GEMINI_MODEL)
+
+    logger.info(f"Gemini configurado con modelo: {cfg.GEMINI_MODEL}")
+    return gemini_model
+
+
+def __getattr__(name: str):
+    """Compatibilidad: `from src.connect_gemini import model` configura el modelo al pedirlo."""
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-logger.info(f"Gemini configurado con modelo: {GEMINI_MODEL}")
 
 # Función para estructurar con OCRIA
 def estructurar_con_prompt_especifico(prompt: str) -> str:
@@ -38,7 +55,7 @@ def estructurar_con_prompt_especifico(prompt: str) -> str:
         Texto generado o string vacío en caso de error
     """
     try:
-        response = model.generate_content(prompt)
+        response = get_model().generate_content(prompt)
         return response.text.strip()
     except Exception as e:
         logger.error(f"Error en estructurar_con_prompt_especifico: {e}", exc_info=True)
@@ -57,7 +74,7 @@ def estructurar_con_prompt_imgia(prompt, image):
         Texto generado o None en caso de error
     """
     try:
-        response = model.generate_content([prompt, image])
+        response = get_model().generate_content([prompt, image])
         return response.text.strip()
     except Exception as e:
         logger.error(f"Error al generar contenido con Gemini (imagen): {e}", exc_info=True)
@@ -80,8 +97,6 @@ def limpiar_csv_de_respuesta(texto):
     return texto
 
 
-import pandas as pd
-from io import StringIO
 import csv
 
 def cargar_csv_imgia_en_linea(texto_csv_raw):
@@ -89,6 +104,8 @@ def cargar_csv_imgia_en_linea(texto_csv_raw):
     Convierte una cadena CSV sin saltos de línea (plana) en un DataFrame
     Espera que cada fila tenga exactamente 5 columnas.
     """
+    import pandas as pd
+
     # Eliminar delimitadores de bloque
     texto_csv_raw = texto_csv_raw.strip().replace("```csv", "").replace("```", "").strip()
 
@@ -0,0 +1,315 @@
+# document_analysis.py
+# -*- coding: utf-8 -*-
+"""
+Etapa única de análisis de documentos con Azure Document Intelligence.
+
+Cada archivo se analiza UNA sola vez con `prebuilt-invoice`, que además de los
+campos de factura devuelve el contenido de layout (texto, líneas por página y
+tablas). El resultado se convierte a estructuras planas (dicts / listas) y se
+cachea por hash del contenido, así el extractor general, los extractores por
+proveedor y el runner de Drive derivan lo que necesitan del mismo análisis
+aunque el archivo se procese en otra pestaña.
+"""
+
+import hashlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+import config.config as cfg
+import config.logger as logging_module
+
+logger = logging_module.get_logger(__name__)
+
+# Modelo usado para el análisis (incluye layout + campos de factura)
+ANALYSIS_MODEL_ID = "prebuilt-invoice"
+
+# Cantidad máxima de documentos analizados que se mantienen en memoria
+MAX_CACHED_DOCUMENTS = 64
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_client():
+    """Crea (una vez) el cliente de Azure Document Intelligence."""
+    from azure.ai.formrecognizer import DocumentAnalysisClient
+    from azure.core.credentials import AzureKeyCredential
+
+    return DocumentAnalysisClient(
+        endpoint=cfg.AZURE_ENDPOINT,
+        credential=AzureKeyCredential(cfg.AZURE_KEY)
+    )
+
+
+def document_hash(file_bytes: bytes) -> str:
+    """Hash SHA-256 del contenido, usado como clave de cache."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def part_hash(doc_hash: str, pages: List[int]) -> str:
+    """
+    Clave de cache de un sub-documento: hash del PDF original + páginas.
+
+    Los sub-PDF que arma `split_pdf` cambian de bytes en cada llamada (PyMuPDF
+    genera IDs nuevos), así que no se pueden identificar por su propio hash.
+    """
+    return f"{doc_hash}:{'-'.join(str(p) for p in pages)}"
+
+
+def _has_digits(s: str) -> bool:
+    return any(ch.isdigit() for ch in s)
+
+
+def _to_float(x: Any) -> Optional[float]:
+    """
+    Convierte a float si es posible. Acepta:
+      - int/float/Decimal
+      - numpy numeric
+      - str con símbolos ($, espacios, miles . y decimal ,)
+    Devuelve float o None. Si no hay dígitos en el string, se considera vacío (None).
+
+    >>> _to_float("1.234,56")
+    1234.56
+    >>> _to_float("$\u00a01.234,56")
+    1234.56
+    >>> _to_float("12,5")
+    12.5
+    >>> _to_float("-") is None
+    True
+    """
+    if x is None:
+        return None
+    if isinstance(x, float):
+        return x
+    if isinstance(x, int):
+        return float(x)
+    if isinstance(x, Decimal):
+        try:
+            return float(x)
+        except (ValueError, InvalidOperation):
+            return None
+    try:
+        import numpy as np  # type: ignore
+        if isinstance(x, (np.integer, np.floating)):
+            return float(x)
+    except Exception:
+        pass
+    if isinstance(x, str):
+        s = x.strip()
+        if s == "":
+            return None
+        if not _has_digits(s):
+            return None
+        s = s.replace("$", "").replace("\u00A0", " ").strip()
+        s = re.sub(r"(?<=\d)\.(?=\d{3}\b)", "", s)
+        s = s.replace(",", ".")
+        s = s.replace(" ", "")
+        try:
+            return float(s)
+        except Exception:
+            return None
+    return None
+
+
+def _unwrap_azure_num(x: Any) -> Optional[float]:
+    """
+    Convierte valores numéricos de Azure a float:
+      - CurrencyValue (tiene .amount) -> float(amount)
+      - int/float/Decimal -> float
+      - str y otros -> `_to_float` (formato AR: "$ 1.234,56" -> 1234.56)
+
+    >>> _unwrap_azure_num("1.234,56")
+    1234.56
+    """
+    if x is None:
+        return None
+    amt = getattr(x, "amount", None)
+    if amt is not None:
+        try:
+            return float(amt)
+        except Exception:
+            pass
+    if isinstance(x, (int, float, Decimal)):
+        try:
+            return float(x)
+        except Exception:
+            return None
+    return _to_float(x)
+
+
+def _plain_value(x: Any) -> Any:
+    """Convierte el valor de un campo de Azure a un tipo simple (cacheable)."""
+    if x is None or isinstance(x, (str, int, float, bool)):
+        return x
+    if getattr(x, "amount", None) is not None:
+        return _unwrap_azure_num(x)
+    if isinstance(x, (date, datetime)):
+        return x.isoformat()
+    if isinstance(x, Decimal):
+        return float(x)
+    content = getattr(x, "content", None)
+    if content is not None:
+        return content
+    return str(x)
+
+
+def _extract_items(result) -> List[Dict]:
+    """Ítems del modelo de facturas; Subtotal queda en None si Azure no trae Amount."""
+    items: List[Dict] = []
+    for doc in result.documents or []:
+        items_field = doc.fields.get("Items")
+        if not items_field or not items_field.value:
+            continue
+
+        for it in items_field.value:
+            flds = it.value or {}
+
+            def v(name: str):
+                fld = flds.get(name)
+                return getattr(fld, "value", None) if fld else None
+
+            items.append({
+                "Codigo": v("ProductCode"),
+                "Descripcion": v("Description"),
+                "Cantidad": _unwrap_azure_num(v("Quantity")),
+                "PrecioUnitario": _unwrap_azure_num(v("UnitPrice")),
+                "Subtotal": _unwrap_azure_num(v("Amount")),
+            })
+    return items
+
+
+def _extract_fields(result) -> Dict[str, Any]:
+    """Campos de cabecera de la primera factura detectada (sin Items)."""
+    for doc in result.documents or []:
+        return {
+            name: _plain_value(getattr(field, "value", None))
+            for name, field in (doc.fields or {}).items()
+            if name != "Items"
+        }
+    return {}
+
+
+def _extract_tables(result) -> List[Dict]:
+    """Tablas como matrices de texto (fila x columna)."""
+    tables = []
+    for table in getattr(result, "tables", None) or []:
+        cells = [["" for _ in range(table.column_count)] for _ in range(table.row_count)]
+        for cell in table.cells:
+            cells[cell.row_index][cell.column_index] = cell.content
+        pages = sorted({region.page_number for region in (table.bounding_regions or [])})
+        tables.append({"pages": pages, "cells": cells})
+    return tables
+
+
+def _to_analysis(result, doc_hash: str) -> Dict[str, Any]:
+    """Convierte el AnalyzeResult del SDK a un dict plano."""
+    pages = [
+        {
+            "page_number": page.page_number,
+            "lines": [line.content for line in (page.lines or [])],
+        }
+        for page in (result.pages or [])
+    ]
+    return {
+        "hash": doc_hash,
+        "model_id": ANALYSIS_MODEL_ID,
+        "content": getattr(result, "content", "") or "",
+        "pages": pages,
+        "tables": _extract_tables(result),
+        "fields": _extract_fields(result),
+        "items": _extract_items(result),
+    }
+
+
+def analyze_document(file_bytes: bytes, doc_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analiza un documento con Azure (una sola llamada por contenido) y cachea el resultado.
+
+    Args:
+        file_bytes: Contenido del archivo (imagen o PDF)
+        doc_hash: Clave de cache si ya se calculó (ej: `part_hash` de un sub-documento)
+
+    Returns:
+        Dict con hash, content, pages (líneas por página), tables, fields e items
+    """
+    if doc_hash is None:
+        doc_hash = document_hash(file_bytes)
+
+    with _cache_lock:
+        cached = _cache.get(doc_hash)
+        if cached is not None:
+            _cache.move_to_end(doc_hash)
+            logger.debug(f"Análisis Azure reutilizado desde cache ({doc_hash[:12]})")
+            return cached
+
+    poller = _get_client().begin_analyze_document(
+        model_id=ANALYSIS_MODEL_ID,
+        document=file_bytes
+    )
+    analysis = _to_analysis(poller.result(), doc_hash)
+    logger.info(
+        f"Análisis Azure ({ANALYSIS_MODEL_ID}): {len(analysis['pages'])} páginas, "
+        f"{len(analysis['tables'])} tablas, {len(analysis['items'])} ítems"
+    )
+
+    with _cache_lock:
+        _cache[doc_hash] = analysis
+        _cache.move_to_end(doc_hash)
+        while len(_cache) > MAX_CACHED_DOCUMENTS:
+            _cache.popitem(last=False)
+
+    return analysis
+
+
+def get_document_text(analysis: Dict[str, Any]) -> str:
+    """
+    Texto completo del documento (para prompts de Gemini o parsers locales).
+    Si Azure no devolvió `content`, se arma con las líneas de cada página.
+    """
+    if analysis.get("content"):
+        return analysis["content"]
+    return "\n".join(
+        line
+        for page in analysis.get("pages", [])
+        for line in page["lines"]
+    )
+
+
+def get_invoice_items(analysis: Dict[str, Any], round_digits: Optional[int] = None) -> List[Dict]:
+    """
+    Ítems de factura del análisis, completando Subtotal = Cantidad * PrecioUnitario si falta.
+
+    Args:
+        analysis: Resultado de `analyze_document`
+        round_digits: Si se indica, redondea el Subtotal calculado
+
+    Returns:
+        Lista nueva de ítems (el análisis cacheado no se modifica)
+    """
+    items = []
+    for it in analysis.get("items", []):
+        item = dict(it)
+        qty, unit_price = item["Cantidad"], item["PrecioUnitario"]
+        if item["Subtotal"] is None and qty is not None and unit_price is not None:
+            subtotal = qty * unit_price
+            item["Subtotal"] = round(subtotal, round_digits) if round_digits is not None else subtotal
+        items.append(item)
+    return items
+
+
+def clear_cache() -> None:
+    """Vacía la cache de análisis en memoria."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,270 @@
+# formato.py
+# -*- coding: utf-8 -*-
+"""
+Capa de formateo para las tablas de resultados de la app.
+
+Construye los strings de display (formato AR: miles con "." y decimales con ",")
+con operaciones vectorizadas de NumPy en lugar de un `.apply` por celda.
+El DataFrame numérico nunca se modifica: el display se arma sobre una copia,
+así la exportación a Excel y la vista comparten la misma fuente de datos.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Estados de validación de totales (|diferencia| contra el total en papel)
+ESTADOS_VALIDACION = [
+    (50, "✅ Exacto"),
+    (100, "✅ OK"),
+    (500, "⚠️ Revisar"),
+]
+ESTADO_SIN_VALIDACION = "Sin validación"
+ESTADO_ERROR = "❌ Error"
+
+_CERO = ord("0")
+
+# Hasta 2**53 el valor escalado (x * 10**decimales) se representa sin perder
+# unidades y entra en int64; más allá se formatea con el f-string
+_MAX_ESCALADO = 2.0 ** 53
+
+
+def _a_numerico(valores) -> np.ndarray:
+    """Convierte una serie/array a float64; lo no convertible queda como NaN."""
+    return pd.to_numeric(pd.Series(valores).reset_index(drop=True), errors="coerce").to_numpy(dtype="float64")
+
+
+def formatear_numeros_ar(
+    valores,
+    decimales: int = 2,
+    prefijo: str = "",
+    sufijo: str = "",
+    sep_miles: str = ".",
+    sep_decimal: str = ",",
+    escala: float = 1.0,
+    truncar: bool = False,
+    ocultar_ceros: bool = False,
+    vacio: str = "-"
+) -> np.ndarray:
+    """
+    Formatea un vector de números como strings, sin iterar en Python.
+
+    Equivale a `f"{x:,.{decimales}f}"` con los separadores intercambiados,
+    pero arma los caracteres en una matriz de bytes (una fila por valor) y la
+    compacta con operaciones por columna. Los valores a mitad de camino entre
+    dos redondeos (ej. 0.005, 2.675) y los que no entran en int64 se formatean
+    con el f-string, que redondea según el valor binario exacto.
+
+    Args:
+        valores: Serie, lista o array con los valores (se convierten a numérico)
+        decimales: Cantidad de decimales a mostrar
+        prefijo: Texto antes del número (ej: "$"); el signo va después del prefijo
+        sufijo: Texto después del número (ej: "%")
+        sep_miles: Separador de miles ("" para no agrupar)
+        sep_decimal: Separador decimal
+        escala: Factor a aplicar antes de formatear (ej: 100 para porcentajes)
+        truncar: Si True, trunca hacia cero como `int(x)` en vez de redondear
+        ocultar_ceros: Si True, los ceros se muestran como `vacio`
+        vacio: Texto para valores nulos / no numéricos (y ceros si se ocultan)
+
+    Returns:
+        Array de objetos (str) con la misma longitud que `valores`
+    """
+    x = _a_numerico(valores) * escala
+    n = len(x)
+    salida = np.full(n, vacio, dtype=object)
+
+    validos = np.isfinite(x)
+    if ocultar_ceros:
+        validos &= x != 0
+    if not validos.any():
+        return salida
+
+    v = x[validos]
+    if truncar:
+        v = np.trunc(v)
+        negativos = v < 0
+    else:
+        negativos = np.signbit(v)
+
+    escala_dec = 10 ** decimales
+    escalados = np.abs(v) * escala_dec
+    # El producto puede correrse hasta media unidad de precisión: si queda tan
+    # cerca de .5, el lado del redondeo solo lo decide el valor exacto
+    fuera_de_rango = escalados >= _MAX_ESCALADO
+    empates = np.abs(escalados - np.floor(escalados) - 0.5) <= 2 * np.spacing(escalados)
+    respaldo = fuera_de_rango | empates
+
+    posiciones = np.flatnonzero(validos)
+    if respaldo.any():
+        salida[posiciones[respaldo]] = [
+            _formatear_con_fstring(valor, negativo, decimales, prefijo, sufijo, sep_miles, sep_decimal)
+            for valor, negativo in zip(v[respaldo].tolist(), negativos[respaldo].tolist())
+        ]
+        if respaldo.all():
+            return salida
+        posiciones = posiciones[~respaldo]
+        escalados = escalados[~respaldo]
+        negativos = negativos[~respaldo]
+
+    unidades = np.round(escalados).astype(np.int64)
+    enteros, fracciones = np.divmod(unidades, escala_dec)
+
+    n_filas = len(unidades)
+    pre = prefijo.encode("utf-8")
+    suf = sufijo.encode("utf-8")
+    sep = sep_miles.encode("ascii")
+
+    # Dígitos enteros por fila (mínimo 1 para el cero) y ancho de cada bloque
+    max_dig = len(str(int(enteros.max())))
+    n_dig = np.ones(n_filas, dtype=np.int64)
+    for k in range(1, max_dig):
+        n_dig += enteros >= 10 ** k
+    n_sep = (max_dig - 1) // 3 if sep else 0
+    ancho_entero = 1 + max_dig + n_sep  # +1: columna para el signo
+    ancho_dec = 1 + decimales if decimales > 0 else 0
+    ancho = len(pre) + ancho_entero + ancho_dec + len(suf)
+
+    # Matriz de bytes: [prefijo][signo + parte entera alineada a derecha][,decimales][sufijo]
+    matriz = np.empty((n_filas, ancho), dtype=np.uint8)
+    if pre:
+        matriz[:, :len(pre)] = np.frombuffer(pre, dtype=np.uint8)
+
+    col = len(pre) + ancho_entero - 1
+    resto = enteros
+    for k in range(max_dig):
+        if sep and k > 0 and k % 3 == 0:
+            matriz[:, col] = sep[0]
+            col -= 1
+        resto, digito = np.divmod(resto, 10)
+        matriz[:, col] = digito + _CERO
+        col -= 1
+
+    anchos = n_dig + ((n_dig - 1) // 3 if sep else 0) + negativos
+    inicio = ancho_entero - anchos  # primera columna útil dentro de la parte entera
+    if negativos.any():
+        filas = np.flatnonzero(negativos)
+        matriz[filas, len(pre) + inicio[filas]] = ord("-")
+
+    col = len(pre) + ancho_entero
+    if decimales > 0:
+        matriz[:, col] = sep_decimal.encode("ascii")[0]
+        resto = fracciones
+        for k in range(decimales, 0, -1):
+            resto, digito = np.divmod(resto, 10)
+            matriz[:, col + k] = digito + _CERO
+        col += ancho_dec
+    if suf:
+        matriz[:, col:] = np.frombuffer(suf, dtype=np.uint8)
+
+    # Compactar: correr cada fila a la izquierda según su ancho (hay pocos valores
+    # distintos de corrimiento) y rellenar con \0, que NumPy descarta al
+    # interpretar la fila como bytes de ancho fijo.
+    compacta = np.zeros_like(matriz)
+    compacta[:, :len(pre)] = matriz[:, :len(pre)]
+    for corrimiento in np.unique(inicio):
+        filas = inicio == corrimiento
+        compacta[filas, len(pre):ancho - corrimiento] = matriz[filas, len(pre) + corrimiento:]
+
+    textos = compacta.view(f"S{ancho}").ravel()
+    if prefijo.isascii() and sufijo.isascii():
+        salida[posiciones] = textos.astype(f"U{ancho}").astype(object)
+    else:
+        salida[posiciones] = [t.decode("utf-8") for t in textos.tolist()]
+    return salida
+
+
+def _formatear_con_fstring(
+    valor: float,
+    negativo: bool,
+    decimales: int,
+    prefijo: str,
+    sufijo: str,
+    sep_miles: str,
+    sep_decimal: str
+) -> str:
+    """Un valor con `f"{x:,.{decimales}f}"` y los separadores de `formatear_numeros_ar`."""
+    numero = f"{abs(valor):,.{decimales}f}"
+    numero = numero.replace(",", "\0").replace(".", sep_decimal).replace("\0", sep_miles)
+    return f"{prefijo}{'-' if negativo else ''}{numero}{sufijo}"
+
+
+def formatear_columnas(
+    df: pd.DataFrame,
+    columnas: Iterable[str],
+    conservar_no_numericos: bool = False,
+    **opciones
+) -> pd.DataFrame:
+    """
+    Devuelve una copia de `df` con las columnas indicadas formateadas para display.
+
+    Args:
+        df: DataFrame numérico (no se modifica)
+        columnas: Columnas a formatear (las inexistentes se ignoran)
+        conservar_no_numericos: Si True, los valores no numéricos se dejan como estaban
+        **opciones: Parámetros de `formatear_numeros_ar`
+
+    Returns:
+        DataFrame de display con strings en las columnas formateadas
+    """
+    df_display = df.copy()
+    for col in columnas:
+        if col not in df_display.columns:
+            continue
+        textos = formatear_numeros_ar(df_display[col], **opciones)
+        if conservar_no_numericos:
+            no_numericos = np.isnan(_a_numerico(df_display[col]))
+            textos[no_numericos] = df_display[col].to_numpy(dtype=object)[no_numericos]
+        df_display[col] = textos
+    return df_display
+
+
+def clasificar_estado_validacion(diferencias) -> np.ndarray:
+    """
+    Clasifica diferencias de totales con `np.select` (reemplaza a `get_status`).
+
+    Args:
+        diferencias: Serie o array con Total_Calculado - Total_Papel
+
+    Returns:
+        Array con el estado de cada diferencia
+    """
+    diff = _a_numerico(diferencias)
+    abs_diff = np.abs(diff)
+    condiciones = [np.isnan(diff)] + [abs_diff <= limite for limite, _ in ESTADOS_VALIDACION]
+    estados = [ESTADO_SIN_VALIDACION] + [estado for _, estado in ESTADOS_VALIDACION]
+    return np.select(condiciones, estados, default=ESTADO_ERROR)
+
+
+def construir_tabla_validacion(validaciones: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Arma la tabla de validación de totales por factura y su versión de display.
+
+    Args:
+        validaciones: Lista de dicts con Factura, Total_Papel, Total_Calculado, Diferencia
+
+    Returns:
+        Tupla (df_val numérico con Diferencia_Abs y Estado, df_val_display formateado)
+    """
+    df_val = pd.DataFrame(validaciones)
+    df_val['Diferencia_Abs'] = pd.to_numeric(df_val['Diferencia'], errors='coerce').abs()
+    df_val['Estado'] = clasificar_estado_validacion(df_val['Diferencia'])
+
+    df_val_display = formatear_columnas(
+        df_val,
+        ['Total_Papel', 'Total_Calculado', 'Diferencia'],
+        decimales=0,
+        prefijo="$",
+        truncar=True,
+        vacio="N/A"
+    )
+    df_val_display = df_val_display[['Factura', 'Total_Papel', 'Total_Calculado', 'Diferencia', 'Estado']]
+
+    return df_val, df_val_display
+
+
+def formatear_importe_ar(valor: Optional[float], prefijo: str = "$") -> str:
+    """Formatea un único importe (métricas, totales) con el mismo criterio que las tablas."""
+    return formatear_numeros_ar([valor], decimales=2, prefijo=prefijo)[0]
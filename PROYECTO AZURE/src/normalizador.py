@@ -5,11 +5,24 @@ Usa tabla auxiliar con fuzzy matching para normalizar nombres de productos.
 
 import pandas as pd
 import os
-from typing import Optional, Tuple
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
 from pathlib import Path
-from rapidfuzz import fuzz, process
 import streamlit as st
 
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+import config.config as cfg
+from normalizacion.indice_normalizacion import NormalizationIndex, calcular_version_tabla
+from normalizacion.cache_normalizacion import CacheNormalizacion
+from normalizacion.almacen_variantes import AlmacenVariantes
+from normalizacion.indice_proveedores import PARTICION_GLOBAL, IndicePorProveedor
+from normalizacion.tabla_compilada import cargar_tabla_compilada, guardar_tabla_compilada
+
 
 # Paths a la tabla auxiliar (múltiples fallbacks)
 BASE_DIR = Path(__file__).parent
@@ -19,58 +32,209 @@ TABLA_AUXILIAR_PATHS = [
     r"C:\Users\gesti\OneDrive\Escritorio\Auxiliar de facturas.xlsx",  # Fallback original
 ]
 
+# Cache persistente de descripciones ya normalizadas (entre corridas)
+CACHE_NORMALIZACION_PATH = BASE_DIR / ".cache" / "normalizacion.sqlite"
 
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def cargar_tabla_normalizacion(archivo_path: Optional[str] = None) -> Optional[pd.DataFrame]:
+# Tabla de normalización vigente: variantes del Excel + aprendidas (append-only).
+# El Excel queda como formato de importación/exportación.
+VARIANTES_DB_PATH = BASE_DIR / "variantes_normalizacion.sqlite"
+
+# Tabla + índice ya construidos, válidos mientras no cambie la firma del almacén
+TABLA_COMPILADA_PATH = BASE_DIR / ".cache" / "tabla_normalizacion.pkl"
+
+
+def _encontrar_tabla_excel(archivo_path: Optional[str] = None) -> Optional[str]:
+    """Primer Excel de normalización existente (el indicado o los fallbacks)."""
+    paths_a_probar = [archivo_path] if archivo_path else TABLA_AUXILIAR_PATHS
+    for path in paths_a_probar:
+        if path and Path(path).exists():
+            return path
+    return None
+
+
+def abrir_almacen_variantes(archivo_path: Optional[str] = None) -> AlmacenVariantes:
     """
-    Carga la tabla de normalización desde Excel.
-    Usa cache de Streamlit para no recargar en cada request.
-    Intenta múltiples ubicaciones en orden de prioridad.
+    Abre el almacén de variantes y reimporta el Excel si cambió desde la última vez.
 
     Args:
         archivo_path: Path opcional al archivo Excel. Si no se especifica, usa fallbacks.
 
     Returns:
-        DataFrame con columnas 'Nombre Gestion' y 'Base', o None si hay error
+        AlmacenVariantes abierto (cerrarlo con `cerrar()` o usarlo con `with`)
     """
+    almacen = AlmacenVariantes(VARIANTES_DB_PATH)
+    try:
+        ruta_excel = _encontrar_tabla_excel(archivo_path)
+        if ruta_excel:
+            almacen.sincronizar_excel(ruta_excel)
+    except Exception:
+        almacen.cerrar()
+        raise
+    return almacen
+
+
+def _abrir_almacen_con_avisos(archivo_path: Optional[str] = None) -> Optional[AlmacenVariantes]:
+    """Como `abrir_almacen_variantes`, pero informa los problemas en Streamlit y devuelve None."""
     try:
-        # Si se proporciona un path específico, usarlo
+        almacen = abrir_almacen_variantes(archivo_path)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None
+    except Exception as e:
+        st.error(f"❌ Error al cargar tabla de normalización: {e}")
+        return None
+
+    if len(almacen) == 0:
+        almacen.cerrar()
         paths_a_probar = [archivo_path] if archivo_path else TABLA_AUXILIAR_PATHS
+        st.warning(f"⚠️ No se encuentra la tabla de normalización. Probé en: {', '.join(str(p) for p in paths_a_probar if p)}")
+        return None
+    return almacen
 
-        archivo_encontrado = None
-        for path in paths_a_probar:
-            if path and Path(path).exists():
-                archivo_encontrado = path
-                break
 
-        if not archivo_encontrado:
-            st.warning(f"⚠️ No se encuentra la tabla de normalización. Probé en: {', '.join(str(p) for p in paths_a_probar if p)}")
-            return None
+def cargar_tabla_normalizacion(archivo_path: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Carga la tabla de normalización vigente (Excel importado + variantes aprendidas).
 
-        df_aux = pd.read_excel(archivo_encontrado)
+    La tabla se recarga cuando cambia el Excel en disco (mtime/tamaño) o se
+    aprenden variantes, no por tiempo; en un arranque nuevo se lee del
+    artefacto compilado si sigue vigente.
 
-        # Validar columnas
-        if 'Nombre Gestion' not in df_aux.columns or 'Base' not in df_aux.columns:
-            st.error(f"❌ La tabla debe tener columnas 'Nombre Gestion' y 'Base'")
-            return None
+    Args:
+        archivo_path: Path opcional al archivo Excel. Si no se especifica, usa fallbacks.
 
-        # Limpiar datos
-        df_aux['Nombre Gestion'] = df_aux['Nombre Gestion'].astype(str).str.strip()
-        df_aux['Base'] = df_aux['Base'].astype(str).str.strip()
+    Returns:
+        DataFrame con columnas 'Nombre Gestion' y 'Base', o None si hay error
+    """
+    almacen = _abrir_almacen_con_avisos(archivo_path)
+    if almacen is None:
+        return None
+    with almacen:
+        tabla, _ = _tabla_e_indice_del_almacen(almacen)
+    return tabla.copy()
 
-        # Eliminar filas vacías
-        df_aux = df_aux[
-            (df_aux['Nombre Gestion'].notna()) &
-            (df_aux['Nombre Gestion'] != '') &
-            (df_aux['Base'].notna()) &
-            (df_aux['Base'] != '')
-        ].copy()
 
-        return df_aux
+@st.cache_resource(max_entries=4)
+def _construir_indice(version: str, _tabla_aux: pd.DataFrame) -> NormalizationIndex:
+    """Construye el índice una vez por versión de la tabla (Streamlit no hashea `_tabla_aux`)."""
+    return NormalizationIndex(_tabla_aux['Nombre Gestion'].tolist(), _tabla_aux['Base'].tolist())
 
-    except Exception as e:
-        st.error(f"❌ Error al cargar tabla de normalización: {e}")
+
+@st.cache_resource
+def _estado_indice() -> Dict[str, Any]:
+    """Índice compartido entre sesiones y la posición del almacén que refleja."""
+    return {
+        "lock": threading.Lock(),
+        "firma": None,
+        "tabla": None,
+        "indice": None,
+        "ultimo_id": None,
+        "carga": None,
+    }
+
+
+def _migrar_cache(anterior: IndicePorProveedor, nuevo: IndicePorProveedor, nuevas: pd.DataFrame) -> None:
+    """Conserva en la cache los resultados que las variantes nuevas no pueden cambiar."""
+    try:
+        with CacheNormalizacion(CACHE_NORMALIZACION_PATH, anterior.version, 0, anterior.metodo) as cache:
+            cache.migrar_version(
+                nuevo.version,
+                anterior.metodo,
+                lambda claves, similitudes: anterior.afectadas_por(
+                    nuevas['Nombre Gestion'], nuevas['Proveedor'], claves, similitudes
+                )
+            )
+    except Exception:
+        # Sin cache utilizable: se recalcula en la próxima corrida
+        pass
+
+
+def _tabla_e_indice_del_almacen(almacen: AlmacenVariantes) -> Tuple[pd.DataFrame, IndicePorProveedor]:
+    """
+    Devuelve tabla e índice para el contenido actual del almacén.
+
+    Si solo se agregaron variantes aprendidas se extiende el índice anterior
+    (y se migra la cache); si no hay nada en memoria se usa el artefacto
+    compilado cuando su firma coincide; en otro caso se compila de nuevo.
+    El origen y el tiempo de carga quedan en `_estado_indice()["carga"]`.
+    """
+    estado = _estado_indice()
+    with estado["lock"]:
+        ultimo_id = almacen.ultimo_id()
+        firma = almacen.firma(ultimo_id)
+        if firma == estado["firma"]:
+            return estado["tabla"], estado["indice"]
+
+        inicio = time.perf_counter()
+        anterior = estado["indice"]
+        misma_generacion = (
+            estado["firma"] is not None
+            and estado["firma"].rpartition(':')[0] == firma.rpartition(':')[0]
+        )
+
+        if anterior is not None and misma_generacion and ultimo_id > estado["ultimo_id"]:
+            nuevas = almacen.variantes_desde(estado["ultimo_id"], hasta_id=ultimo_id)
+            tabla = pd.concat([estado["tabla"], nuevas], ignore_index=True)
+            indice = anterior.con_variantes(nuevas['Nombre Gestion'], nuevas['Base'], nuevas['Proveedor'])
+            _migrar_cache(anterior, indice, nuevas)
+            origen = 'incremental'
+        else:
+            compilada = cargar_tabla_compilada(TABLA_COMPILADA_PATH, firma)
+            if compilada is not None:
+                tabla, indice, _ = compilada
+                origen = 'artefacto'
+            else:
+                tabla = almacen.cargar_tabla(hasta_id=ultimo_id)
+                indice = IndicePorProveedor.desde_dataframe(tabla)
+                origen = 'compilada'
+
+        segundos = time.perf_counter() - inicio
+        if origen != 'artefacto':
+            try:
+                guardar_tabla_compilada(TABLA_COMPILADA_PATH, firma, tabla, indice)
+            except Exception:
+                # Sin disco escribible: el próximo arranque vuelve a compilar
+                pass
+
+        estado.update(
+            firma=firma,
+            tabla=tabla,
+            indice=indice,
+            ultimo_id=ultimo_id,
+            carga={
+                "origen": origen,
+                "segundos": segundos,
+                "variantes": len(indice),
+                "particiones": len(indice.particiones),
+            },
+        )
+        return tabla, indice
+
+
+def obtener_indice_normalizacion(
+    tabla_aux: Optional[pd.DataFrame] = None
+) -> Optional[Union[NormalizationIndex, IndicePorProveedor]]:
+    """
+    Devuelve el índice de normalización.
+
+    Args:
+        tabla_aux: DataFrame con tabla de normalización; si es None se usa el
+            almacén de variantes (Excel + aprendidas)
+
+    Returns:
+        NormalizationIndex de `tabla_aux`, o IndicePorProveedor del almacén
+        (cacheados mientras la tabla no cambie); None si no hay tabla
+    """
+    if tabla_aux is not None:
+        version = calcular_version_tabla(tabla_aux['Nombre Gestion'], tabla_aux['Base'])
+        return _construir_indice(version, tabla_aux)
+
+    almacen = _abrir_almacen_con_avisos()
+    if almacen is None:
         return None
+    with almacen:
+        _, indice = _tabla_e_indice_del_almacen(almacen)
+    return indice
 
 
 def normalizar_descripcion(
@@ -89,40 +253,137 @@ def normalizar_descripcion(
     Returns:
         Tupla (descripcion_normalizada, similitud, metodo)
     """
-    if pd.isna(descripcion) or str(descripcion).strip() == '':
-        return '', 0, 'Sin descripción'
+    return obtener_indice_normalizacion(tabla_aux).buscar(descripcion, umbral_similitud)
+
+
+class NormalizacionPorArchivo:
+    """
+    Normaliza ítems a medida que llegan (un archivo a la vez).
+
+    Toma el índice una sola vez y deja la cache abierta durante toda la
+    corrida: lo que resuelve un archivo ya está en la cache para los
+    siguientes. Acumula los métodos de match y las estadísticas por partición
+    de todos los archivos para mostrarlas al final sin volver a normalizar.
+
+    Attributes:
+        indice: Índice de normalización (None si no hay tabla)
+        metodos: Filas por método de match acumuladas
+        por_particion: Estadísticas por partición acumuladas (ver
+            `IndicePorProveedor.normalizar_serie`)
+    """
+
+    def __init__(
+        self,
+        columna_descripcion: str = 'Descripcion',
+        umbral_similitud: int = 75,
+        usar_cache: bool = True,
+        columna_proveedor: str = 'Proveedor'
+    ):
+        self.columna_descripcion = columna_descripcion
+        self.umbral_similitud = umbral_similitud
+        self.columna_proveedor = columna_proveedor
+        self.candidatos_k = cfg.NORMALIZACION_CANDIDATOS_K or None
+        self.por_atributos = cfg.NORMALIZACION_BLOQUEO_ATRIBUTOS
+        self.metodos: Dict[str, int] = {}
+        self.por_particion: Dict[str, Dict[str, float]] = {}
+
+        # Índice de la tabla de normalización (almacén de variantes)
+        self.indice = obtener_indice_normalizacion()
+
+        self.cache = None
+        if usar_cache and self.activa:
+            try:
+                self.cache = CacheNormalizacion(
+                    CACHE_NORMALIZACION_PATH,
+                    self.indice.version,
+                    umbral_similitud,
+                    self.indice.clave_metodo(self.candidatos_k, self.por_atributos)
+                )
+            except Exception:
+                # Sin disco escribible: se normaliza igual, sin cache
+                self.cache = None
+
+    @property
+    def activa(self) -> bool:
+        """True si hay una tabla con variantes para normalizar."""
+        return self.indice is not None and len(self.indice) > 0
+
+    def normalizar(self, df: pd.DataFrame, agregar_columnas_debug: bool = False) -> pd.DataFrame:
+        """
+        Normaliza los ítems de un archivo y suma sus estadísticas a las de la corrida.
+
+        Args:
+            df: DataFrame con los ítems del archivo
+            agregar_columnas_debug: Si True, agrega columnas Similitud_Match,
+                Metodo_Match y Particion_Match
+
+        Returns:
+            DataFrame con columna 'Producto_Normalizado' agregada
+        """
+        if not self.activa:
+            # Si no hay tabla, devolver el DataFrame original sin normalizar
+            df['Producto_Normalizado'] = df.get(self.columna_descripcion, '')
+            return df
+
+        # Verificar que existe la columna de descripción
+        if self.columna_descripcion not in df.columns:
+            st.warning(f"⚠️ Columna '{self.columna_descripcion}' no encontrada. No se normalizará.")
+            df['Producto_Normalizado'] = ''
+            return df
+
+        # Normalizar cada descripción distinta una sola vez y mapear a las filas
+        proveedores = df[self.columna_proveedor] if self.columna_proveedor in df.columns else None
+        normalizadas, similitudes, metodos, particiones, por_particion = self.indice.normalizar_serie(
+            df[self.columna_descripcion], proveedores, self.umbral_similitud,
+            cache=self.cache, candidatos_k=self.candidatos_k, por_atributos=self.por_atributos
+        )
+
+        for metodo, filas in pd.Series(metodos).value_counts().items():
+            self.metodos[metodo] = self.metodos.get(metodo, 0) + int(filas)
+        for particion, datos in por_particion.items():
+            acumulado = self.por_particion.setdefault(particion, {})
+            for clave, valor in datos.items():
+                acumulado[clave] = acumulado.get(clave, 0) + valor
+
+        df['Producto_Normalizado'] = normalizadas
 
-    desc_limpia = str(descripcion).strip()
+        if agregar_columnas_debug:
+            df['Similitud_Match'] = similitudes
+            df['Metodo_Match'] = metodos
+            df['Particion_Match'] = particiones
 
-    # Crear diccionario de mapeo
-    mapa = dict(zip(tabla_aux['Nombre Gestion'], tabla_aux['Base']))
-    variantes = list(mapa.keys())
+        df.attrs.update(self.attrs())
+        return df
 
-    # 1. Buscar coincidencia exacta (case-insensitive)
-    for variante in variantes:
-        if desc_limpia.upper() == variante.upper():
-            return mapa[variante], 100.0, 'Exacta'
+    def attrs(self) -> Dict[str, Any]:
+        """Estadísticas acumuladas con las claves de `df.attrs` que lee `mostrar_estadisticas_normalizacion`."""
+        if not self.activa:
+            return {}
+        return {
+            'cache_normalizacion': self.cache.estadisticas() if self.cache is not None else None,
+            'particiones_normalizacion': {particion: dict(datos) for particion, datos in self.por_particion.items()},
+            'carga_tabla_normalizacion': _estado_indice()["carga"],
+        }
 
-    # 2. Fuzzy matching con token_sort_ratio
-    resultado = process.extractOne(
-        desc_limpia,
-        variantes,
-        scorer=fuzz.token_sort_ratio
-    )
+    def cerrar(self) -> None:
+        """Cierra la cache (las estadísticas acumuladas siguen disponibles)."""
+        if self.cache is not None:
+            self.cache.cerrar()
 
-    if resultado and resultado[1] >= umbral_similitud:
-        mejor_match, similitud, _ = resultado
-        return mapa[mejor_match], float(similitud), 'Fuzzy'
+    def __enter__(self) -> "NormalizacionPorArchivo":
+        return self
 
-    # 3. Sin match suficiente - mantener original
-    return desc_limpia, float(resultado[1]) if resultado else 0.0, 'Sin match'
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
 
 
 def normalizar_dataframe(
     df: pd.DataFrame,
     columna_descripcion: str = 'Descripcion',
     umbral_similitud: int = 75,
-    agregar_columnas_debug: bool = False
+    agregar_columnas_debug: bool = False,
+    usar_cache: bool = True,
+    columna_proveedor: str = 'Proveedor'
 ) -> pd.DataFrame:
     """
     Normaliza un DataFrame completo agregando columna de productos normalizados.
@@ -131,38 +392,20 @@ def normalizar_dataframe(
         df: DataFrame con los datos a normalizar
         columna_descripcion: Nombre de la columna con descripciones
         umbral_similitud: Umbral mínimo de similitud (0-100)
-        agregar_columnas_debug: Si True, agrega columnas Similitud_Match y Metodo_Match
+        agregar_columnas_debug: Si True, agrega columnas Similitud_Match,
+            Metodo_Match y Particion_Match
+        usar_cache: Si True, reutiliza resultados de corridas anteriores (SQLite);
+            el uso de la cache queda en df.attrs['cache_normalizacion']
+        columna_proveedor: Columna con el proveedor de cada fila (opcional); si
+            existe, cada descripción se busca primero en las variantes de su
+            proveedor y después en las globales. Los tiempos y aciertos por
+            partición quedan en df.attrs['particiones_normalizacion']
 
     Returns:
         DataFrame con columna 'Producto_Normalizado' agregada
     """
-    # Cargar tabla de normalización
-    tabla_aux = cargar_tabla_normalizacion()
-
-    if tabla_aux is None or len(tabla_aux) == 0:
-        # Si no hay tabla, devolver el DataFrame original sin normalizar
-        df['Producto_Normalizado'] = df.get(columna_descripcion, '')
-        return df
-
-    # Verificar que existe la columna de descripción
-    if columna_descripcion not in df.columns:
-        st.warning(f"⚠️ Columna '{columna_descripcion}' no encontrada. No se normalizará.")
-        df['Producto_Normalizado'] = ''
-        return df
-
-    # Normalizar cada descripción
-    resultados = df[columna_descripcion].apply(
-        lambda x: normalizar_descripcion(x, tabla_aux, umbral_similitud)
-    )
-
-    # Desempaquetar resultados
-    df['Producto_Normalizado'] = resultados.apply(lambda x: x[0])
-
-    if agregar_columnas_debug:
-        df['Similitud_Match'] = resultados.apply(lambda x: x[1])
-        df['Metodo_Match'] = resultados.apply(lambda x: x[2])
-
-    return df
+    with NormalizacionPorArchivo(columna_descripcion, umbral_similitud, usar_cache, columna_proveedor) as sesion:
+        return sesion.normalizar(df, agregar_columnas_debug)
 
 
 def mostrar_estadisticas_normalizacion(df: pd.DataFrame):
@@ -210,6 +453,45 @@ def mostrar_estadisticas_normalizacion(df: pd.DataFrame):
         similitud_promedio = df['Similitud_Match'].mean()
         st.info(f"**Similitud Promedio:** {similitud_promedio:.1f}%")
 
+    uso_cache = df.attrs.get('cache_normalizacion')
+    if uso_cache and uso_cache['consultas'] > 0:
+        st.caption(
+            f"💾 Cache de normalización: {uso_cache['aciertos']} de {uso_cache['consultas']} "
+            f"descripciones distintas reutilizadas ({uso_cache['tasa_aciertos'] * 100:.1f}% de aciertos)"
+        )
+
+    carga = df.attrs.get('carga_tabla_normalizacion')
+    if carga:
+        origenes = {
+            'artefacto': "leída del artefacto compilado",
+            'compilada': "compilada desde el almacén",
+            'incremental': "actualizada con variantes aprendidas",
+        }
+        st.caption(
+            f"⏱️ Tabla de normalización ({carga['variantes']:,} variantes) "
+            f"{origenes.get(carga['origen'], carga['origen'])} en {carga['segundos']:.2f}s"
+        )
+
+    por_particion = df.attrs.get('particiones_normalizacion')
+    if por_particion and set(por_particion) != {PARTICION_GLOBAL}:
+        with st.expander("🏷️ Normalización por proveedor"):
+            resumen = pd.DataFrame([
+                {
+                    'Partición': particion,
+                    'Consultas': datos['consultas'],
+                    'Resueltas': datos['resueltas'],
+                    'A global': datos['a_global'],
+                    'Desde cache': datos.get('desde_cache', 0),
+                    'Segundos': round(datos['segundos'], 3),
+                }
+                for particion, datos in por_particion.items()
+            ])
+            st.dataframe(resumen, use_container_width=True, hide_index=True)
+            st.caption(
+                "Descripciones distintas calculadas en esta corrida; las de la cache se cuentan "
+                "aparte, en la partición que las resolvió"
+            )
+
 
 def agregar_variantes_a_tabla(
     df: pd.DataFrame,
@@ -220,11 +502,16 @@ def agregar_variantes_a_tabla(
     """
     Agrega automáticamente variantes con fuzzy match exitoso a la tabla auxiliar.
 
+    Las variantes se agregan al almacén (append-only, una transacción por lote);
+    el índice en memoria se extiende con ellas sin reconstruirse. Si el
+    DataFrame tiene columna 'Proveedor', cada variante se aprende en la
+    partición de su proveedor.
+
     Args:
         df: DataFrame con normalización aplicada (debe tener Metodo_Match, Similitud_Match)
         columna_descripcion: Columna con descripciones originales
         umbral_min: Similitud mínima para agregar (default 80%)
-        auto_guardar: Si True, guarda automáticamente la tabla actualizada
+        auto_guardar: Si True, guarda automáticamente las variantes nuevas
 
     Returns:
         Cantidad de variantes agregadas
@@ -233,43 +520,41 @@ def agregar_variantes_a_tabla(
         st.warning("⚠️ No hay datos de normalización para aprender")
         return 0
 
-    # Cargar tabla actual
-    tabla_aux = cargar_tabla_normalizacion()
-    if tabla_aux is None:
-        st.error("❌ No se puede cargar tabla auxiliar para actualizar")
-        return 0
-
-    # Encontrar variantes con fuzzy match exitoso que no estén en la tabla
-    fuzzy_matches = df[
+    # Variantes con fuzzy match exitoso
+    columnas = [columna_descripcion, 'Producto_Normalizado']
+    if 'Proveedor' in df.columns:
+        columnas.append('Proveedor')
+    fuzzy_matches = df.loc[
         (df['Metodo_Match'] == 'Fuzzy') &
-        (df['Similitud_Match'] >= umbral_min)
+        (df['Similitud_Match'] >= umbral_min),
+        columnas
     ]
 
     if len(fuzzy_matches) == 0:
         return 0
 
-    # Obtener descripciones únicas para agregar
-    nuevas_variantes = []
+    candidatas = pd.DataFrame({
+        'Nombre Gestion': fuzzy_matches[columna_descripcion].to_numpy(),
+        'Base': fuzzy_matches['Producto_Normalizado'].to_numpy(),
+    })
+    if 'Proveedor' in fuzzy_matches.columns:
+        candidatas['Proveedor'] = fuzzy_matches['Proveedor'].fillna('').to_numpy()
 
-    for _, row in fuzzy_matches.iterrows():
-        descripcion_original = row[columna_descripcion]
-        nombre_base = row['Producto_Normalizado']
-
-        # Verificar si ya existe en la tabla
-        ya_existe = (
-            (tabla_aux['Nombre Gestion'].str.upper() == str(descripcion_original).upper()) |
-            (tabla_aux['Base'].str.upper() == str(nombre_base).upper())
-        ).any()
+    almacen = _abrir_almacen_con_avisos()
+    if almacen is None:
+        st.error("❌ No se puede cargar tabla auxiliar para actualizar")
+        return 0
 
-        if not ya_existe:
-            nuevas_variantes.append({
-                'Nombre Gestion': descripcion_original,
-                'Base': nombre_base
-            })
+    with almacen:
+        try:
+            # Descarta las que ya están en la tabla (por variante) y las repetidas del lote
+            df_nuevas = almacen.agregar(candidatas) if auto_guardar else almacen.filtrar_nuevas(candidatas)
+        except Exception as e:
+            st.error(f"❌ Error al guardar tabla: {e}")
+            return 0
 
-    # Eliminar duplicados
-    if nuevas_variantes:
-        df_nuevas = pd.DataFrame(nuevas_variantes).drop_duplicates()
+        if len(df_nuevas) == 0:
+            return 0
 
         # Mostrar en Streamlit
         st.markdown("### 🤖 Aprendizaje Automático")
@@ -278,26 +563,36 @@ def agregar_variantes_a_tabla(
         with st.expander("👀 Ver variantes que se agregarán"):
             st.dataframe(df_nuevas, use_container_width=True)
 
-        # Agregar a tabla
-        tabla_actualizada = pd.concat([tabla_aux, df_nuevas], ignore_index=True)
-
-        # Guardar automáticamente
         if auto_guardar:
-            try:
-                # Buscar la ruta de la tabla
-                for path in TABLA_AUXILIAR_PATHS:
-                    if path and Path(path).exists():
-                        tabla_actualizada.to_excel(path, index=False)
-                        st.success(f"✅ Tabla auxiliar actualizada: {len(df_nuevas)} variantes agregadas")
-                        st.info(f"📁 Guardada en: {path}")
-
-                        # Limpiar cache para recargar
-                        cargar_tabla_normalizacion.clear()
-                        return len(df_nuevas)
-            except Exception as e:
-                st.error(f"❌ Error al guardar tabla: {e}")
-                return 0
-
-        return len(df_nuevas)
-
-    return 0
+            st.success(f"✅ Tabla auxiliar actualizada: {len(df_nuevas)} variantes agregadas")
+            st.info(f"📁 Guardada en: {almacen.ruta}")
+
+            # Extender el índice (y la cache) con las variantes nuevas
+            _tabla_e_indice_del_almacen(almacen)
+
+    return len(df_nuevas)
+
+
+def exportar_tabla_normalizacion(archivo_path: Optional[str] = None) -> Optional[str]:
+    """
+    Exporta la tabla vigente (Excel + variantes aprendidas) a Excel.
+
+    Args:
+        archivo_path: Destino; por defecto el Excel de normalización encontrado
+            (o el primero de los fallbacks)
+
+    Returns:
+        Path del Excel exportado, o None si hay error
+    """
+    destino = archivo_path or _encontrar_tabla_excel() or TABLA_AUXILIAR_PATHS[0]
+    almacen = _abrir_almacen_con_avisos()
+    if almacen is None:
+        return None
+    with almacen:
+        try:
+            filas = almacen.exportar_excel(destino)
+        except Exception as e:
+            st.error(f"❌ Error al exportar tabla: {e}")
+            return None
+    st.success(f"✅ Tabla de normalización exportada: {filas} variantes en {destino}")
+    return destino
@@ -0,0 +1,284 @@
+# page_splitting.py
+# -*- coding: utf-8 -*-
+"""
+Separación de PDFs en sub-documentos por factura y procesamiento en paralelo.
+
+Un PDF puede traer una factura de varias páginas o un lote escaneado con varias
+facturas. Esta etapa:
+  1. Detecta los límites de cada factura con el encabezado de cada página
+     (CUIT + número de comprobante). Las páginas sin encabezado propio son
+     continuación de la anterior y las copias (DUPLICADO/TRIPLICADO) de una
+     factura ya vista se descartan.
+  2. Si el PDF no tiene capa de texto usable, no se pueden leer encabezados
+     localmente: cada página se procesa por separado.
+  3. Procesa los sub-documentos en paralelo y vuelve a unir ítems y totales por
+     número de factura.
+"""
+
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+import config.config as cfg
+import config.logger as logging_module
+from src.document_analysis import document_hash, part_hash
+from src.pdf_local import extract_text_pages, is_pdf, text_layer_is_usable
+
+logger = logging_module.get_logger(__name__)
+
+# Líneas del principio de cada página donde se busca el encabezado
+HEADER_LINES = 40
+
+_RE_COMPROBANTE = [
+    # Formato AFIP: "Punto de Venta: 00003  Comp. Nro: 00001234"
+    re.compile(r"Punto\s+de\s+Venta\s*:?\s*(\d{1,5})\s+Comp(?:robante)?\.?\s*N(?:ro|°|º)?\.?\s*:?\s*(\d{1,8})", re.IGNORECASE),
+    # Formato compacto: "0001-00001234", "N° 9407-06280841"
+    re.compile(r"(?<![\d-])(\d{4,5})\s*-\s*(\d{8})(?![\d-])"),
+]
+_RE_CUIT = re.compile(r"(?<!\d)(2[0347]|3[034])-?(\d{8})-?(\d)(?!\d)")
+_RE_COPIA = re.compile(r"\b(DUPLICADO|TRIPLICADO|CUADRUPLICADO)\b", re.IGNORECASE)
+
+InvoiceKey = Tuple[Optional[str], Optional[str]]
+
+
+def parse_page_header(text: str) -> Dict[str, Any]:
+    """
+    Extrae del encabezado de una página el CUIT, el comprobante y si es una copia.
+
+    Returns:
+        Dict con cuit, comprobante (ej: "00003-00001234") y es_copia
+    """
+    header = "\n".join(text.splitlines()[:HEADER_LINES])
+
+    comprobante = None
+    for patron in _RE_COMPROBANTE:
+        m = patron.search(header)
+        if m:
+            comprobante = f"{int(m.group(1)):05d}-{int(m.group(2)):08d}"
+            break
+
+    m = _RE_CUIT.search(header)
+    cuit = f"{m.group(1)}-{m.group(2)}-{m.group(3)}" if m else None
+
+    return {
+        "cuit": cuit,
+        "comprobante": comprobante,
+        "es_copia": bool(_RE_COPIA.search(header)),
+    }
+
+
+def detect_invoice_boundaries(pages_text: List[str]) -> List[Dict[str, Any]]:
+    """
+    Agrupa las páginas en facturas según los encabezados.
+
+    Args:
+        pages_text: Texto de cada página
+
+    Returns:
+        Lista de grupos {"pages": [índices 0-based], "key": (cuit, comprobante)}
+    """
+    groups: List[Dict[str, Any]] = []
+    seen_keys = set()
+    skipping_copy = False
+
+    for index, text in enumerate(pages_text):
+        header = parse_page_header(text)
+        has_header = header["comprobante"] is not None or header["cuit"] is not None
+        key: InvoiceKey = (header["cuit"], header["comprobante"])
+
+        if not has_header:
+            # Continuación de la página anterior (o de una copia descartada)
+            if skipping_copy:
+                continue
+            if groups:
+                groups[-1]["pages"].append(index)
+            else:
+                groups.append({"pages": [index], "key": (None, None)})
+            continue
+
+        if header["es_copia"] and header["comprobante"] and key in seen_keys:
+            skipping_copy = True
+            logger.debug(f"Página {index + 1}: copia de {header['comprobante']}, se omite")
+            continue
+        skipping_copy = False
+
+        current = groups[-1] if groups else None
+        if current is not None and _same_invoice(current["key"], key):
+            current["pages"].append(index)
+            current["key"] = (current["key"][0] or key[0], current["key"][1] or key[1])
+        else:
+            groups.append({"pages": [index], "key": key})
+        seen_keys.add(groups[-1]["key"])
+
+    return groups
+
+
+def _same_invoice(current: InvoiceKey, new: InvoiceKey) -> bool:
+    """Dos encabezados son de la misma factura si no se contradicen en CUIT ni comprobante."""
+    cuit_a, comp_a = current
+    cuit_b, comp_b = new
+    if comp_a and comp_b:
+        return comp_a == comp_b and (not cuit_a or not cuit_b or cuit_a == cuit_b)
+    if cuit_a and cuit_b and cuit_a != cuit_b:
+        return False
+    # Sin comprobante en alguno de los dos: la página nueva solo abre factura si trae uno
+    return comp_b is None
+
+
+def plan_subdocuments(file_bytes: bytes) -> Optional[List[Dict[str, Any]]]:
+    """
+    Decide cómo dividir un PDF.
+
+    Returns:
+        None si el archivo no es PDF, no se puede leer o es una sola unidad;
+        si no, la lista de grupos de páginas (con "by_page": True cuando se
+        dividió página por página por falta de capa de texto)
+    """
+    if not is_pdf(file_bytes):
+        return None
+    try:
+        pages_text = extract_text_pages(file_bytes)
+    except Exception as e:
+        logger.warning(f"No se pudo leer el PDF para dividirlo: {e}")
+        return None
+
+    if len(pages_text) <= 1:
+        return None
+
+    if text_layer_is_usable(pages_text):
+        groups = detect_invoice_boundaries(pages_text)
+        if len(groups) <= 1 and len(groups[0]["pages"]) == len(pages_text):
+            return None
+        for group in groups:
+            group["by_page"] = False
+        return groups
+
+    return [{"pages": [i], "key": (None, None), "by_page": True} for i in range(len(pages_text))]
+
+
+def split_pdf(file_bytes: bytes, pages: List[int]) -> bytes:
+    """Arma un PDF nuevo con las páginas indicadas (0-based)."""
+    import fitz  # PyMuPDF
+
+    src = fitz.open(stream=file_bytes, filetype="pdf")
+    out = fitz.open()
+    try:
+        for page_index in pages:
+            out.insert_pdf(src, from_page=page_index, to_page=page_index)
+        return out.tobytes()
+    finally:
+        out.close()
+        src.close()
+
+
+def process_subdocuments(
+    file_bytes: bytes,
+    groups: List[Dict[str, Any]],
+    process_fn: Callable[[bytes, str, str], Any],
+    filename: str,
+    max_workers: Optional[int] = None
+) -> List[Tuple[Dict[str, Any], Any]]:
+    """
+    Procesa cada grupo de páginas en paralelo.
+
+    Args:
+        file_bytes: PDF original
+        groups: Grupos de `plan_subdocuments`
+        process_fn: Extractor a aplicar a cada sub-PDF (bytes, nombre, clave de
+            cache). La clave (`part_hash`) depende del PDF original y de las
+            páginas, así un reproceso del mismo archivo reutiliza los análisis.
+        filename: Nombre del archivo original (para logs / nombres de partes)
+        max_workers: Hilos; None = cfg.PDF_MAX_WORKERS
+
+    Returns:
+        Lista (en el orden de las páginas) de tuplas (grupo, resultado o excepción)
+    """
+    if max_workers is None:
+        max_workers = cfg.PDF_MAX_WORKERS
+    original_hash = document_hash(file_bytes)
+
+    def run(group: Dict[str, Any]):
+        pages = group["pages"]
+        label = f"{filename} [pág. {pages[0] + 1}-{pages[-1] + 1}]" if len(pages) > 1 else f"{filename} [pág. {pages[0] + 1}]"
+        try:
+            return process_fn(split_pdf(file_bytes, pages), label, part_hash(original_hash, pages))
+        except Exception as e:
+            logger.error(f"Error procesando {label}: {e}")
+            return e
+
+    logger.info(f"{filename}: {len(groups)} sub-documentos, procesando con {max_workers} hilos")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as executor:
+        results = list(executor.map(run, groups))
+    return list(zip(groups, results))
+
+
+def describe_part_errors(outcomes: List[Tuple[Dict[str, Any], Any]]) -> List[str]:
+    """
+    Mensajes de las partes que fallaron en `process_subdocuments`.
+
+    Raises:
+        La excepción de la primera parte si fallaron todas
+    """
+    errors = [result for _, result in outcomes if isinstance(result, Exception)]
+    if errors and len(errors) == len(outcomes):
+        raise errors[0]
+    return [
+        f"{len(group['pages'])} página(s) desde la {group['pages'][0] + 1} no se pudieron procesar: {result}"
+        for group, result in outcomes if isinstance(result, Exception)
+    ]
+
+
+def _same_header(a: InvoiceKey, b: InvoiceKey) -> bool:
+    """Las claves de encabezado confirman que dos partes son la misma factura."""
+    return a[1] is not None and a[1] == b[1] and (not a[0] or not b[0] or a[0] == b[0])
+
+
+def merge_invoice_results(
+    results: List[Dict],
+    keys: Optional[List[InvoiceKey]] = None
+) -> List[Dict]:
+    """
+    Une resultados parciales ({"items", "invoice_total", "invoice_number"}) por factura.
+
+    Los resultados consecutivos con el mismo número de factura se concatenan; el
+    total es el último informado, que en facturas de varias páginas está en la
+    última hoja. Un resultado sin número solo se une al anterior si las claves
+    de encabezado (`keys`, una por resultado) dicen que son la misma factura;
+    si no, queda como factura aparte y se registra una advertencia.
+    """
+    if keys is None:
+        keys = [(None, None)] * len(results)
+
+    merged: List[Dict] = []
+    last_key: InvoiceKey = (None, None)
+    for index, (result, key) in enumerate(zip(results, keys)):
+        number = result.get("invoice_number")
+        last = merged[-1] if merged else None
+        if last is not None and (
+            _same_header(last_key, key)
+            or (number is not None and last["invoice_number"] == number)
+        ):
+            last["items"].extend(result.get("items", []))
+            if last["invoice_number"] is None:
+                last["invoice_number"] = number
+            if result.get("invoice_total") is not None:
+                last["invoice_total"] = result["invoice_total"]
+        else:
+            if number is None:
+                logger.warning(
+                    f"Parte {index + 1} sin número de factura ni encabezado que la una "
+                    f"a la anterior: queda como factura aparte"
+                )
+            merged.append({
+                "items": list(result.get("items", [])),
+                "invoice_total": result.get("invoice_total"),
+                "invoice_number": number,
+            })
+        last_key = key
+    return merged
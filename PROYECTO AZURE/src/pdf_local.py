@@ -0,0 +1,161 @@
+# pdf_local.py
+# -*- coding: utf-8 -*-
+"""
+Preparación local de PDFs para los extractores de Gemini (sin pasar por Azure).
+
+Orden de preferencia para un PDF:
+  1. Capa de texto (PDF generado digitalmente): se envía el texto a Gemini.
+  2. Rasterizado con PyMuPDF a `cfg.PDF_RASTER_DPI` (PDF escaneado): se envían
+     las páginas como PNG. Los renders se cachean por (hash, página, DPI).
+  3. Si nada de lo anterior produce una entrada usable, el caller recurre al
+     análisis de Azure (`src.document_analysis`).
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+import config.config as cfg
+import config.logger as logging_module
+from src.document_analysis import document_hash
+
+logger = logging_module.get_logger(__name__)
+
+# Cantidad máxima de páginas renderizadas (PNG) que se mantienen en memoria
+MAX_CACHED_PAGES = 128
+
+_render_cache: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+_render_lock = threading.Lock()
+
+
+def is_pdf(file_bytes: bytes) -> bool:
+    """True si el contenido tiene la firma de un PDF."""
+    return file_bytes[:1024].lstrip().startswith(b"%PDF")
+
+
+def _open_pdf(file_bytes: bytes):
+    import fitz  # PyMuPDF
+
+    return fitz.open(stream=file_bytes, filetype="pdf")
+
+
+def extract_text_pages(file_bytes: bytes) -> List[str]:
+    """Texto de la capa de texto de cada página (vacío en PDFs escaneados)."""
+    doc = _open_pdf(file_bytes)
+    try:
+        return [page.get_text("text") for page in doc]
+    finally:
+        doc.close()
+
+
+def text_layer_is_usable(pages_text: List[str], min_chars: Optional[int] = None) -> bool:
+    """
+    Indica si la capa de texto alcanza para mandarla a Gemini.
+
+    Cada página debe tener al menos `min_chars` caracteres alfanuméricos; con
+    una sola página escaneada se prefiere rasterizar todo el documento.
+    """
+    if min_chars is None:
+        min_chars = cfg.PDF_MIN_TEXT_CHARS
+    if not pages_text:
+        return False
+    return all(sum(c.isalnum() for c in text) >= min_chars for text in pages_text)
+
+
+def render_pages_png(
+    file_bytes: bytes,
+    pages: Optional[List[int]] = None,
+    dpi: Optional[int] = None,
+    doc_hash: Optional[str] = None
+) -> List[bytes]:
+    """
+    Rasteriza páginas del PDF a PNG, reutilizando renders previos.
+
+    Args:
+        file_bytes: Contenido del PDF
+        pages: Índices (0-based) a renderizar; None = todas
+        dpi: Resolución; None = cfg.PDF_RASTER_DPI
+        doc_hash: Hash del contenido si ya se calculó
+
+    Returns:
+        Lista de PNG (bytes) en el orden de `pages`
+    """
+    if dpi is None:
+        dpi = cfg.PDF_RASTER_DPI
+    if doc_hash is None:
+        doc_hash = document_hash(file_bytes)
+
+    doc = None
+    try:
+        if pages is None:
+            doc = _open_pdf(file_bytes)
+            pages = list(range(len(doc)))
+
+        rendered: List[bytes] = []
+        for page_index in pages:
+            key = (doc_hash, page_index, dpi)
+            with _render_lock:
+                png = _render_cache.get(key)
+                if png is not None:
+                    _render_cache.move_to_end(key)
+            if png is None:
+                if doc is None:
+                    doc = _open_pdf(file_bytes)
+                png = doc[page_index].get_pixmap(dpi=dpi).tobytes("png")
+                with _render_lock:
+                    _render_cache[key] = png
+                    while len(_render_cache) > MAX_CACHED_PAGES:
+                        _render_cache.popitem(last=False)
+            rendered.append(png)
+        return rendered
+    finally:
+        if doc is not None:
+            doc.close()
+
+
+def prepare_pdf_for_gemini(file_bytes: bytes, doc_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Arma la entrada para Gemini a partir del PDF, sin llamadas de red.
+
+    Args:
+        file_bytes: Contenido del PDF
+        doc_hash: Clave de cache de los renders si ya se calculó
+
+    Returns:
+        {"mode": "text", "text": str} si hay capa de texto usable,
+        {"mode": "images", "images": [parts]} con las páginas rasterizadas, o
+        None si no es un PDF o PyMuPDF no pudo procesarlo (usar Azure)
+    """
+    if not is_pdf(file_bytes):
+        return None
+
+    try:
+        pages_text = extract_text_pages(file_bytes)
+        if text_layer_is_usable(pages_text):
+            logger.info(f"PDF con capa de texto ({len(pages_text)} páginas): se envía el texto a Gemini")
+            return {"mode": "text", "text": "\n".join(pages_text)}
+
+        if not pages_text:
+            return None
+
+        images = render_pages_png(file_bytes, list(range(len(pages_text))), doc_hash=doc_hash)
+        logger.info(f"PDF rasterizado localmente ({len(images)} páginas a {cfg.PDF_RASTER_DPI} DPI)")
+        return {
+            "mode": "images",
+            "images": [{"mime_type": "image/png", "data": png} for png in images],
+        }
+    except Exception as e:
+        logger.warning(f"No se pudo preparar el PDF localmente: {e}")
+        return None
+
+
+def clear_cache() -> None:
+    """Vacía la cache de renders en memoria."""
+    with _render_lock:
+        _render_cache.clear()
@@ -12,11 +12,8 @@ Uso:
 
 import os
 import sys
-from typing import Any, Dict, List, Optional
-from decimal import Decimal
+from typing import Dict, List
 from pathlib import Path
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
 
 # Agregar el directorio raíz al path
 root_dir = Path(__file__).parent.parent
@@ -25,6 +22,7 @@ sys.path.insert(0, str(root_dir))
 # Importar configuración centralizada
 import config.config as cfg
 import config.logger as logging_module
+from src.document_analysis import _unwrap_azure_num, analyze_document, get_invoice_items  # noqa: F401 (app_backup.py)
 
 AZURE_ENDPOINT = cfg.AZURE_ENDPOINT
 AZURE_KEY = cfg.AZURE_KEY
@@ -47,68 +45,16 @@ FILE_PATH = (
 )
 # =================================
 
-def _unwrap_azure_num(x: Any) -> Optional[float]:
-    """
-    Convierte valores numéricos de Azure a float:
-      - CurrencyValue (tiene .amount) -> float(amount)
-      - int/float/Decimal -> float
-      - str -> intenta float (sin normalizar)
-    """
-    if x is None:
-        return None
-    amt = getattr(x, "amount", None)
-    if amt is not None:
-        try:
-            return float(amt)
-        except Exception:
-            return None
-    if isinstance(x, (int, float, Decimal)):
-        try:
-            return float(x)
-        except Exception:
-            return None
-    if isinstance(x, str):
-        try:
-            return float(x)
-        except Exception:
-            return None
-    return None
-
 def extract_items_from_file(path: str) -> List[Dict]:
-    client = DocumentAnalysisClient(endpoint=ENDPOINT, credential=AzureKeyCredential(KEY))
     with open(path, "rb") as f:
         content = f.read()
 
-    poller = client.begin_analyze_document(model_id="prebuilt-invoice", document=content)
-    result = poller.result()
-
-    items: List[Dict] = []
-    for doc in result.documents:
-        items_field = doc.fields.get("Items")
-        if not items_field or not items_field.value:
-            continue
-
-        for it in items_field.value:
-            flds = it.value or {}
-            def v(name: str):
-                fld = flds.get(name)
-                return getattr(fld, "value", None) if fld else None
-
-            qty        = _unwrap_azure_num(v("Quantity"))
-            unit_price = _unwrap_azure_num(v("UnitPrice"))
-            amount     = _unwrap_azure_num(v("Amount"))
-            subtotal   = amount if amount is not None else (qty * unit_price if (qty is not None and unit_price is not None) else None)
-
-            items.append({
-                "Codigo":        v("ProductCode"),
-                "Descripcion":   v("Description"),
-                "Cantidad":      qty,
-                "PrecioUnitario":unit_price,
-                "Subtotal":      subtotal,
-            })
-    return items
+    # Mismo análisis (y cache) que usan la app y el runner de Drive
+    return get_invoice_items(analyze_document(content))
 
 def main():
+    logging_module.setup_logging()
+
     if not FILE_PATH:
         logger.error("No se especificó archivo de entrada.")
         print("\nUso: python test.py <ruta_al_archivo>")